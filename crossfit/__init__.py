@@ -1,7 +1,8 @@
 from crossfit import refs
 from crossfit.commands import Command
 from crossfit.tools import Tool, Jacoco, DotnetCoverage, create_tool
-from crossfit.executors import Executor, LocalExecutor, create_executor
+from crossfit.executors import Executor, CancellationToken, LocalExecutor, JacocoDaemonExecutor, AsyncExecutor, CachingExecutor, create_executor
+from crossfit.pipelines import MergePlanner, CoverageWatcher, SnapshotSweep, SnapshotTarget, CoverageSlicer, CoverageIndex, ShardedReporter
 
 __all__ = [
     'refs',
@@ -11,7 +12,18 @@ __all__ = [
     'DotnetCoverage',
     'create_tool',
     'Executor',
+    'CancellationToken',
     'LocalExecutor',
-    'create_executor'
+    'JacocoDaemonExecutor',
+    'AsyncExecutor',
+    'CachingExecutor',
+    'create_executor',
+    'MergePlanner',
+    'CoverageWatcher',
+    'SnapshotSweep',
+    'SnapshotTarget',
+    'CoverageSlicer',
+    'CoverageIndex',
+    'ShardedReporter'
 ]
 
@@ -0,0 +1,106 @@
+import java.io.BufferedInputStream;
+import java.io.BufferedOutputStream;
+import java.io.ByteArrayOutputStream;
+import java.io.DataInputStream;
+import java.io.DataOutputStream;
+import java.io.EOFException;
+import java.io.FileDescriptor;
+import java.io.FileInputStream;
+import java.io.FileOutputStream;
+import java.io.OutputStreamWriter;
+import java.io.PrintStream;
+import java.io.PrintWriter;
+import java.lang.reflect.Constructor;
+import java.lang.reflect.InvocationTargetException;
+import java.lang.reflect.Method;
+import java.nio.charset.StandardCharsets;
+
+/**
+ * Long-lived host for jacococli.jar commands.
+ *
+ * Launched by crossfit's JacocoDaemonExecutor in single-file source mode:
+ *   java -cp jacococli.jar JacocoDaemon.java
+ *
+ * Protocol (big-endian, over stdin/stdout):
+ *   request:  int argc, then argc times (int length, UTF-8 bytes); argc < 0 shuts the daemon down
+ *   response: int exit code, int length + UTF-8 stdout bytes, int length + UTF-8 stderr bytes
+ */
+public class JacocoDaemon {
+
+    private static final String MAIN_CLASS = "org.jacoco.cli.internal.Main";
+
+    public static void main(final String[] args) throws Exception {
+        final DataInputStream in = new DataInputStream(new BufferedInputStream(new FileInputStream(FileDescriptor.in)));
+        final DataOutputStream protocol = new DataOutputStream(
+                new BufferedOutputStream(new FileOutputStream(FileDescriptor.out)));
+        // stdout is reserved for the protocol - stray prints must never reach it
+        System.setOut(new PrintStream(new FileOutputStream(FileDescriptor.err), true));
+
+        final Constructor<?> constructor = Class.forName(MAIN_CLASS).getDeclaredConstructor(String[].class);
+        constructor.setAccessible(true);
+        final Method execute = constructor.getDeclaringClass()
+                .getMethod("execute", PrintWriter.class, PrintWriter.class);
+
+        while (true) {
+            final String[] commandArgs;
+            try {
+                commandArgs = readRequest(in);
+            } catch (final EOFException e) {
+                return;
+            }
+            if (commandArgs == null) {
+                return;
+            }
+
+            final ByteArrayOutputStream outBuffer = new ByteArrayOutputStream();
+            final ByteArrayOutputStream errBuffer = new ByteArrayOutputStream();
+            final PrintWriter out = new PrintWriter(new OutputStreamWriter(outBuffer, StandardCharsets.UTF_8), true);
+            final PrintWriter err = new PrintWriter(new OutputStreamWriter(errBuffer, StandardCharsets.UTF_8), true);
+            final PrintStream stdout = System.out;
+            final PrintStream stderr = System.err;
+            System.setOut(new PrintStream(outBuffer, true, "UTF-8"));
+            System.setErr(new PrintStream(errBuffer, true, "UTF-8"));
+
+            int code;
+            try {
+                final Object main = constructor.newInstance((Object) commandArgs);
+                code = (Integer) execute.invoke(main, out, err);
+            } catch (final InvocationTargetException e) {
+                e.getCause().printStackTrace(err);
+                code = 1;
+            } catch (final Throwable e) {
+                e.printStackTrace(err);
+                code = 1;
+            } finally {
+                out.flush();
+                err.flush();
+                System.setOut(stdout);
+                System.setErr(stderr);
+            }
+
+            protocol.writeInt(code);
+            writeBytes(protocol, outBuffer.toByteArray());
+            writeBytes(protocol, errBuffer.toByteArray());
+            protocol.flush();
+        }
+    }
+
+    private static String[] readRequest(final DataInputStream in) throws Exception {
+        final int argc = in.readInt();
+        if (argc < 0) {
+            return null;
+        }
+        final String[] commandArgs = new String[argc];
+        for (int i = 0; i < argc; i++) {
+            final byte[] value = new byte[in.readInt()];
+            in.readFully(value);
+            commandArgs[i] = new String(value, StandardCharsets.UTF_8);
+        }
+        return commandArgs;
+    }
+
+    private static void writeBytes(final DataOutputStream protocol, final byte[] value) throws Exception {
+        protocol.writeInt(value.length);
+        protocol.write(value);
+    }
+}
@@ -1,4 +1,5 @@
 from .command import Command
 from .command_builder import CommandBuilder
+from .path_resolver import PathResolver
 
-__all__ = ['Command', 'CommandBuilder']
+__all__ = ['Command', 'CommandBuilder', 'PathResolver']
@@ -0,0 +1,65 @@
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from crossfit.commands.command import Command
+from crossfit.models.command_models import ArgFileStyle
+
+DEFAULT_ARGFILE_THRESHOLD = 32 * 1024
+
+
+def argv_size(argv: list[str]) -> int:
+    """
+    :param argv: An argument vector
+    :returns: The number of bytes the arguments take on the command line, including their terminators
+    """
+    return sum(len(arg.encode("utf-8")) + 1 for arg in argv)
+
+
+@contextmanager
+def spilled_argv(command: Command, threshold: Optional[int] = DEFAULT_ARGFILE_THRESHOLD) -> Iterator[list[str]]:
+    """
+    Provides the command's argument vector, moving the arguments into a response file when the vector exceeds
+    the threshold and the command declares a response file style. The response file is removed on exit.
+    :param command: The command to execute
+    :param threshold: Argument vector size in bytes from which arguments are spilled, or None to never spill
+    :returns: The argument vector to execute
+    :raises ValueError: If an argument cannot be represented in the command's response file style
+    """
+    argv = command.argv
+    style = command.argfile_style
+    if style is None or threshold is None or argv_size(argv) <= threshold:
+        yield argv
+        return
+
+    kept = 1 if style == ArgFileStyle.Java else len(command.execution_args)
+    content = _format_argfile(argv[kept:], style)
+    descriptor, path = tempfile.mkstemp(prefix="crossfit-", suffix=".args")
+    try:
+        with os.fdopen(descriptor, "w", encoding="utf-8", newline="\n") as argfile:
+            argfile.write(content)
+        yield [*argv[:kept], f"@{path}"]
+    finally:
+        os.remove(path)
+
+
+def _format_argfile(args: list[str], style: ArgFileStyle) -> str:
+    """
+    :param args: The arguments to write, one per line
+    :param style: The response file syntax of the executed tool
+    :returns: The response file content
+    :raises ValueError: If an argument cannot be represented in the given style
+    """
+    if style == ArgFileStyle.Java:
+        # The java launcher unescapes backslashes within quotes, so every argument is quoted and escaped
+        lines = ['"' + arg.replace("\\", "\\\\").replace('"', '\\"') + '"' for arg in args]
+    elif style == ArgFileStyle.DotnetResponseFile:
+        if any('"' in arg or "\n" in arg for arg in args):
+            raise ValueError("Arguments containing quotes or new lines cannot be passed in a .NET response file")
+        lines = [f'"{arg}"' if any(char.isspace() for char in arg) or arg.startswith("#") else arg for arg in args]
+    else:
+        if any("\n" in arg for arg in args):
+            raise ValueError("Arguments containing new lines cannot be passed in an argparse arguments file")
+        lines = args
+    return "\n".join(lines) + "\n"
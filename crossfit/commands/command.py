@@ -1,20 +1,27 @@
 import copy
-import glob
+import shlex
 from pathlib import Path
 from typing import Optional, Self
 from typeguard import typechecked
+from crossfit.commands.path_resolver import default_path_resolver
+from crossfit.models.command_models import ArgFileStyle
 
 COMMAND_DELIMITER = " "
 
 
 class Command:
     next_command: Optional[Self]
-    execution_call: Optional[str]
+    _execution_call: Optional[str]
+    _execution_args: Optional[list[str]]
     command_to_execute: Optional[str]
     command_body: list[str]
     options: list[tuple[str, Optional[str]]]
     arguments: list[str]
     values_delimiter: Optional[str]
+    timeout: Optional[float]
+    argfile_style: Optional[ArgFileStyle]
+    inputs: list[Path]
+    outputs: list[Path]
 
     @typechecked()
     def __init__(self):
@@ -22,12 +29,67 @@ class Command:
         Initializes the command structure
         """
         self.next_command = None
-        self.execution_call = None
+        self._execution_call = None
+        self._execution_args = None
         self.command_to_execute = None
         self.command_body = []
         self.options = []
         self.arguments = []
         self.values_delimiter = None
+        self.timeout = None
+        self.argfile_style = None
+        self.inputs = []
+        self.outputs = []
+
+    @property
+    def execution_call(self) -> Optional[str]:
+        """
+        :returns: The executable or interpreter call as a single string
+        """
+        return self._execution_call
+
+    @execution_call.setter
+    def execution_call(self, value: Optional[str]):
+        """
+        Sets the execution call from a single string - calls containing spaces (e.g. 'java -jar tool.jar')
+        are split into arguments shell-like
+        :param value: The execution call
+        """
+        self._execution_call = value
+        self._execution_args = None
+
+    @property
+    def execution_args(self) -> list[str]:
+        """
+        :returns: The execution call as separate arguments
+        """
+        if self._execution_args is not None:
+            return list(self._execution_args)
+        if not self._execution_call:
+            return []
+        if any(char.isspace() or char in "'\"" for char in self._execution_call):
+            return shlex.split(self._execution_call)
+        return [self._execution_call]
+
+    @execution_args.setter
+    def execution_args(self, value: list[str]):
+        """
+        Sets the execution call from separate arguments, which are used as they are without any splitting
+        :param value: The execution call arguments (e.g. ['java', '-jar', 'tool.jar'])
+        """
+        self._execution_args = list(value)
+        self._execution_call = shlex.join(value) if value else None
+
+    @property
+    def argv(self) -> list[str]:
+        """
+        :returns: The canonical argument vector of the command, passed as is to the executed process
+        """
+        argv = self.execution_args
+        if self.command_to_execute:
+            argv.append(self.command_to_execute)
+        argv.extend(self.command_body)
+        return argv
 
     @property
     def command(self) -> list[str]:
@@ -48,9 +110,9 @@ class Command:
 
     def __str__(self) -> str:
         """
-        :returns: The command itself as a single string
+        :returns: The command itself as a single shell-quoted string, for logging
         """
-        return COMMAND_DELIMITER.join(self.command)
+        return shlex.join(self.argv)
 
     def validate(self):
         """
@@ -67,8 +129,7 @@ class Command:
         :param path: The path to validate
         :raises FileNotFoundError: If the path does not exist
         """
-        paths = glob.glob(str(path), recursive=True)
-        if not paths:
+        if not default_path_resolver.resolve(path):
             raise FileNotFoundError(f"Could not recognize given path - '{path}' - does not exist")
 
     def __copy__(self) -> Self:
@@ -77,10 +138,15 @@ class Command:
         """
         command_copy = Command()
         command_copy.next_command = copy.copy(self.next_command)
-        command_copy.execution_call = self.execution_call
+        command_copy._execution_call = self._execution_call
+        command_copy._execution_args = self._execution_args
         command_copy.command_to_execute = self.command_to_execute
         command_copy.command_body = self.command_body
         command_copy.options = self.options
         command_copy.arguments = self.arguments
         command_copy.values_delimiter = self.values_delimiter
+        command_copy.timeout = self.timeout
+        command_copy.argfile_style = self.argfile_style
+        command_copy.inputs = self.inputs
+        command_copy.outputs = self.outputs
         return command_copy
@@ -1,22 +1,25 @@
 import copy
-import glob
 import os.path
 
 from pathlib import Path
 from typing import Optional, Self
 from typeguard import typechecked
 from crossfit.commands.command import Command
+from crossfit.commands.path_resolver import PathResolver, default_path_resolver
+from crossfit.models.command_models import ArgFileStyle
 
 
 class CommandBuilder:
     """Builder class for constructing Command objects with a fluent interface."""
     _command: Command
+    _path_resolver: PathResolver
 
     def __init__(self):
         """
         Initializes a new CommandBuilder instance with an empty Command.
         """
         self._command: Command = Command()
+        self._path_resolver = default_path_resolver
 
     @typechecked()
     def with_next_command(self, command: Command):
@@ -47,10 +50,23 @@ class CommandBuilder:
         """
         Sets the execution call for the command.
         :param execution_call: The executable or interpreter to run
-        :param path: Optional path to prepend to the execution call
+        :param path: Optional path to prepend to the execution call, making it a single executable path
         :returns: Self for method chaining
         """
-        self._command.execution_call = execution_call if path is None else str(os.path.relpath(path / execution_call))
+        if path is None:
+            self._command.execution_call = execution_call
+        else:
+            self._command.execution_args = [os.path.relpath(path / execution_call)]
+        return self
+
+    @typechecked()
+    def set_execution_args(self, *args: str) -> Self:
+        """
+        Sets the execution call from separate arguments, which are passed to the process as they are.
+        :param args: The execution call arguments (e.g. 'java', '-jar', 'tools/jacococli.jar')
+        :returns: Self for method chaining
+        """
+        self._command.execution_args = list(args)
         return self
 
     @typechecked()
@@ -87,6 +103,30 @@ class CommandBuilder:
                 self._update_all_options()
         return self
 
+    @typechecked()
+    def set_timeout(self, timeout: Optional[float]) -> Self:
+        """
+        Sets the maximum time the command may run before its process group is killed.
+        :param timeout: Timeout in seconds, or None for no timeout
+        :returns: Self for method chaining
+        :raises ValueError: If the timeout is not positive
+        """
+        if timeout is not None and timeout <= 0:
+            raise ValueError(f"Command timeout must be positive. Valued as: '{timeout}'")
+        self._command.timeout = timeout
+        return self
+
+    @typechecked()
+    def set_argfile_style(self, style: Optional[ArgFileStyle]) -> Self:
+        """
+        Sets the response file syntax the executed tool understands, allowing executors to move long argument
+        lists into a response file.
+        :param style: The tool's response file style, or None if it does not support response files
+        :returns: Self for method chaining
+        """
+        self._command.argfile_style = style
+        return self
+
     @typechecked()
     def add_option(self, option: str, value: Optional[str] = None, delimiter: Optional[str] = None) -> Self:
         """
@@ -122,6 +162,17 @@ class CommandBuilder:
         self._command.command_body = self._command.arguments + self._command.command_body
         return self
 
+    @typechecked()
+    def with_path_resolver(self, path_resolver: Optional[PathResolver]) -> Self:
+        """
+        Sets the resolver of path arguments, the resolver shared by all builders by default.
+        :param path_resolver: The path resolver, e.g. a separate one for trees its directory cache should not hold -
+                              None to resolve without caching directory listings at all
+        :returns: Self for method chaining
+        """
+        self._path_resolver = path_resolver if path_resolver is not None else PathResolver(cache=False)
+        return self
+
     @typechecked()
     def add_path_arguments(self, *paths: Path) -> Self:
         """
@@ -130,12 +181,34 @@ class CommandBuilder:
         :returns: Self for method chaining
         :raises FileNotFoundError: If a path does not exist and is not a valid glob pattern
         """
-        [self._command.validate_path(path) for path in paths]
-        resolved_glob_paths = []
+        resolved_paths = []
         for path in paths:
-            resolved_glob_paths.extend(
-                os.path.relpath(resolved_path) for resolved_path in glob.glob(str(path), recursive=True))
-        self.add_arguments(*[os.path.relpath(path) for path in resolved_glob_paths])
+            resolved = self._path_resolver.resolve(path)
+            if not resolved:
+                raise FileNotFoundError(f"Could not recognize given path - '{path}' - does not exist")
+            resolved_paths.extend(resolved)
+        self.add_arguments(*resolved_paths)
+        self.add_inputs(*map(Path, resolved_paths))
+        return self
+
+    @typechecked()
+    def add_inputs(self, *paths: Path) -> Self:
+        """
+        Declares files or directories the command reads, without adding them to the command body.
+        :param paths: Variable number of Path objects, which may contain glob patterns
+        :returns: Self for method chaining
+        """
+        self._command.inputs = [*self._command.inputs, *paths]
+        return self
+
+    @typechecked()
+    def add_outputs(self, *paths: Path) -> Self:
+        """
+        Declares files or directories the command writes, without adding them to the command body.
+        :param paths: Variable number of Path objects
+        :returns: Self for method chaining
+        """
+        self._command.outputs = [*self._command.outputs, *paths]
         return self
 
     def build_command(self) -> Command:
@@ -0,0 +1,177 @@
+import fnmatch
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterator, Union
+
+_MAGIC = re.compile(r"[*?[]")
+_SEPARATORS = re.compile(r"[\\/]+" if os.altsep else r"/+")
+# Modification times are as coarse as 2 seconds on some file systems
+_MTIME_GRANULARITY_NS = 2_000_000_000
+
+
+class PathResolver:
+    """
+    Resolves paths and recursive glob patterns like glob.glob(recursive=True) in a single pass, caching directory
+    listings - a listing is scanned once and reused until its directory's modification time changes.
+    Like git's racy index entries, a listing scanned within the modification time granularity of the directory's
+    last change is not cached, as an entry added in the same tick would leave the modification time unchanged.
+    Instances are thread safe and meant to be shared, so repeated commands over the same tree skip the scans.
+    """
+
+    def __init__(self, max_directories: int = 65536, cache: bool = True):
+        """
+        :param max_directories: Maximal number of cached directory listings, the least recently used are evicted
+        :param cache: If False, directories are scanned on every resolution and no listing is cached
+        """
+        self._max_directories = max_directories if cache else 0
+        self._listings: OrderedDict[str, tuple[int, list[tuple[str, bool]]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def resolve(self, path: Union[str, Path]) -> list[str]:
+        """
+        :param path: A path, which may contain glob patterns ('**' matches any number of directories)
+        :returns: The existing matching paths relative to the current directory, as os.path.relpath returns them -
+                  directory entries in name order, hidden entries only matched by patterns starting with a dot
+        """
+        text = os.fspath(path)
+        if not _MAGIC.search(text):
+            return [os.path.relpath(text)] if os.path.lexists(text) else []
+
+        drive, rest = os.path.splitdrive(text)
+        parts = _SEPARATORS.split(rest)
+        directory_only = len(parts) > 1 and parts[-1] == ""
+        if directory_only:
+            parts.pop()
+        literal = next(index for index, part in enumerate(parts) if _MAGIC.search(part))
+        base = drive + os.sep.join(parts[:literal]) if literal else drive
+        if literal == 1 and parts[0] == "":
+            base = drive + os.sep
+        base = base or os.curdir
+        if not os.path.isdir(base):
+            return []
+
+        # Relative paths are computed once for the base and joined with the matched names
+        relative_base = os.path.relpath(base)
+        absolute_base = os.path.abspath(base)
+        resolved = []
+        for names in self._match(absolute_base, parts, literal, directory_only):
+            if not names:
+                # Like glob, a pattern starting with '**' does not match the current directory itself
+                if literal:
+                    resolved.append(relative_base)
+            elif relative_base == os.curdir:
+                resolved.append(os.path.join(*names))
+            else:
+                resolved.append(os.path.join(relative_base, *names))
+        return resolved
+
+    def clear(self):
+        """
+        Drops all cached directory listings.
+        """
+        with self._lock:
+            self._listings.clear()
+
+    def _match(self, directory: str, parts: list[str], index: int, directory_only: bool) -> Iterator[list[str]]:
+        """
+        :param directory: Absolute path of the directory the remaining parts are matched in
+        :param parts: The pattern's parts
+        :param index: Index of the first remaining part
+        :param directory_only: If True, only directories match the last part
+        :returns: Iterator over the names leading from the directory to each match
+        """
+        part, last = parts[index], index == len(parts) - 1
+        if part == "**":
+            candidates = [([], True)] + list(self._descendants(directory, last and not directory_only))
+            for names, is_dir in candidates:
+                if last:
+                    yield names
+                elif is_dir:
+                    subdirectory = os.path.join(directory, *names) if names else directory
+                    yield from (names + rest for rest in self._match(subdirectory, parts, index + 1, directory_only))
+        elif _MAGIC.search(part):
+            hidden = part.startswith(".")
+            listing = self._listing(directory)
+            matched = set(fnmatch.filter([name for name, _ in listing if hidden or not name.startswith(".")], part))
+            for name, is_dir in listing:
+                if name not in matched:
+                    continue
+                if last:
+                    if is_dir or not directory_only:
+                        yield [name]
+                elif is_dir:
+                    yield from ([name] + rest for rest in
+                                self._match(os.path.join(directory, name), parts, index + 1, directory_only))
+        else:
+            path = os.path.join(directory, part)
+            if last:
+                if os.path.isdir(path) if directory_only else os.path.lexists(path):
+                    yield [part]
+            elif os.path.isdir(path):
+                yield from ([part] + rest for rest in self._match(path, parts, index + 1, directory_only))
+
+    def _descendants(self, directory: str, files: bool) -> Iterator[tuple[list[str], bool]]:
+        """
+        :param directory: Absolute path of the directory
+        :param files: If True, yields files as well as directories
+        :returns: Iterator over the names leading to each descendant that is not hidden, depth first, and whether
+                  it is a directory
+        """
+        for name, is_dir in self._listing(directory):
+            if name.startswith("."):
+                continue
+            if is_dir:
+                yield [name], True
+                yield from (([name] + names, child_is_dir) for names, child_is_dir in
+                            self._descendants(os.path.join(directory, name), files))
+            elif files:
+                yield [name], False
+
+    def _listing(self, directory: str) -> list[tuple[str, bool]]:
+        """
+        :param directory: Absolute path of the directory
+        :returns: The names of the directory's entries in name order and whether each is a directory - from the
+                  cache while the directory's modification time is unchanged, rescanned while it is racy
+        """
+        try:
+            modified = os.stat(directory).st_mtime_ns
+        except OSError:
+            return []
+        with self._lock:
+            cached = self._listings.get(directory)
+            if cached is not None and cached[0] == modified:
+                self._listings.move_to_end(directory)
+                return cached[1]
+
+        scanned = time.time_ns()
+        try:
+            with os.scandir(directory) as entries:
+                listing = sorted((entry.name, _is_dir(entry)) for entry in entries)
+        except OSError:
+            return []
+        if not self._max_directories or scanned - modified < _MTIME_GRANULARITY_NS:
+            return listing
+        with self._lock:
+            self._listings[directory] = (modified, listing)
+            self._listings.move_to_end(directory)
+            while len(self._listings) > self._max_directories:
+                self._listings.popitem(last=False)
+        return listing
+
+
+def _is_dir(entry: os.DirEntry) -> bool:
+    """
+    :returns: True if the entry is a directory or a link to one
+    """
+    try:
+        return entry.is_dir()
+    except OSError:
+        return False
+
+
+# Shared by all command builders, so that commands built over the same tree reuse its directory listings
+default_path_resolver = PathResolver()
@@ -1,5 +1,8 @@
-from .executor import Executor
+from .executor import Executor, BatchExecution, CancellationToken
 from .local_executor import LocalExecutor
+from .jacoco_daemon_executor import JacocoDaemonExecutor
+from .async_executor import AsyncExecutor
+from .caching_executor import CachingExecutor
 from .executor_factory import create_executor
 
-__all__ = ['Executor', 'LocalExecutor', 'create_executor']
+__all__ = ['Executor', 'BatchExecution', 'CancellationToken', 'LocalExecutor', 'JacocoDaemonExecutor', 'AsyncExecutor', 'CachingExecutor', 'create_executor']
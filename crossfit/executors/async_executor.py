@@ -0,0 +1,182 @@
+import asyncio
+import os
+import shlex
+import subprocess
+from concurrent.futures import CancelledError
+from logging import Logger
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+from crossfit.commands.command import Command
+from crossfit.executors.executor import CancellationToken
+from crossfit.executors.local_executor import LocalExecutor, CANCEL_POLL_INTERVAL, kill_process_group
+from crossfit.models.command_models import CommandResult, ResultChain, SpooledOutput
+
+
+class AsyncExecutor(LocalExecutor):
+    """Executor that runs commands locally via asyncio subprocesses, allowing many commands to run concurrently."""
+
+    def __init__(self, logger: Logger, catch: bool = True, workdir: Path = None, max_concurrency: int = 16,
+                 **execution_kwargs):
+        """
+        :param logger: Logger instance for logging execution details (required)
+        :param catch: If True, catches exceptions and returns error in CommandResult.
+                      If False, re-raises exceptions.
+        :param workdir: Working directory of the executed processes
+        :param max_concurrency: Default maximum number of command chains running at once in execute_many
+        :param execution_kwargs: Additional arguments passed to subprocess.run, of which cwd, env and timeout
+                                 are also honoured by the asynchronous execution, killing the process group
+                                 on timeout
+        :raises ValueError: If max_concurrency is lower than 1
+        """
+        if max_concurrency < 1:
+            raise ValueError(f"max_concurrency must be at least 1, got {max_concurrency}")
+        super().__init__(logger, catch, workdir, **execution_kwargs)
+        self._max_concurrency = max_concurrency
+
+    async def execute_async(self,
+                            command: Command,
+                            timeout: Optional[float] = None,
+                            cancel_token: Optional[CancellationToken] = None) -> CommandResult:
+        """
+        Executes the given command and any chained commands via next_command without blocking the event loop.
+        :param command: The Command object to execute
+        :param timeout: Maximum time in seconds for the whole chain, on top of each command's own timeout
+        :param cancel_token: Token cancelling the chain from another thread
+        :returns: Aggregated CommandResult from all executed commands
+        """
+        with self._limited(timeout, cancel_token):
+            chain = ResultChain(await self._execute_single_async(command))
+
+            current = command.next_command
+            while current is not None:
+                if chain.code != 0:
+                    self._logger.warning(f"Stopping command chain due to failure. Code: {chain.code}")
+                    break
+                chain.add_result(await self._execute_single_async(current))
+                current = current.next_command
+
+        return chain.to_result()
+
+    async def execute_many_async(self,
+                                 commands: Iterable[Command],
+                                 max_concurrency: int = None,
+                                 timeout: Optional[float] = None,
+                                 cancel_token: Optional[CancellationToken] = None) -> list[CommandResult]:
+        """
+        Executes the given commands concurrently, each with its own command chain.
+        :param commands: The Command objects to execute
+        :param max_concurrency: Maximum number of command chains running at once, defaults to the executor's
+        :param timeout: Maximum time in seconds for each command chain, counted from its start
+        :param cancel_token: Token cancelling all command chains from another thread
+        :returns: The aggregated CommandResult of every command chain, in the order of the given commands
+        """
+        semaphore = asyncio.Semaphore(max_concurrency or self._max_concurrency)
+
+        async def execute_bounded(command: Command) -> CommandResult:
+            async with semaphore:
+                return await self.execute_async(command, timeout, cancel_token)
+
+        return list(await asyncio.gather(*(execute_bounded(command) for command in commands)))
+
+    def execute_many(self,
+                     commands: Iterable[Command],
+                     max_concurrency: int = None,
+                     timeout: Optional[float] = None,
+                     cancel_token: Optional[CancellationToken] = None) -> list[CommandResult]:
+        """
+        Executes the given commands concurrently from synchronous code, blocking until all of them finished.
+        :param commands: The Command objects to execute
+        :param max_concurrency: Maximum number of command chains running at once, defaults to the executor's
+        :param timeout: Maximum time in seconds for each command chain, counted from its start
+        :param cancel_token: Token cancelling all command chains from another thread
+        :returns: The aggregated CommandResult of every command chain, in the order of the given commands
+        """
+        return asyncio.run(self.execute_many_async(commands, max_concurrency, timeout, cancel_token))
+
+    async def _execute_single_async(self, command: Command) -> CommandResult:
+        """
+        Executes a single command without handling chained commands.
+        :param command: The Command object to execute
+        :returns: CommandResult with execution details
+        """
+        command_str = str(command)
+        try:
+            command.validate()
+            timeout = self._with_default_timeout(self._timeout_for(command))
+            with self._spilled(command) as args:
+                return self._to_result(command_str, await self._run_async(args, timeout, self._cancel_token()))
+        except Exception as e:
+            return self._handle_error(command_str, e)
+
+    async def _run_async(self,
+                         args: list[str],
+                         timeout: Optional[float] = None,
+                         cancel_token: Optional[CancellationToken] = None) -> subprocess.CompletedProcess:
+        """
+        Runs the given argument vector as a local asyncio subprocess in a new session.
+        :param args: The command's arguments, starting with the executable
+        :param timeout: Maximum time in seconds the process may run before its process group is killed
+        :param cancel_token: Token killing the process group once cancelled
+        :returns: The completed process, with decoded output - or SpooledOutput handles when streaming
+        :raises subprocess.TimeoutExpired: If the process was killed due to the timeout
+        :raises CancelledError: If the process was killed due to cancellation
+        """
+        process = await asyncio.create_subprocess_exec(
+            *args,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=self._exec_kwargs.get("cwd"),
+            env=self._exec_kwargs.get("env"),
+            start_new_session=os.name == "posix",
+        )
+        if self._stream_output:
+            stdout, stderr = SpooledOutput(self._spool_size), SpooledOutput(self._spool_size)
+            work = asyncio.ensure_future(asyncio.gather(
+                self._pump_async(process.stdout, stdout, self._logger.info),
+                self._pump_async(process.stderr, stderr, self._logger.warning),
+                process.wait(),
+            ))
+        else:
+            work = asyncio.ensure_future(process.communicate())
+
+        watchers = {work}
+        if cancel_token is not None:
+            watchers.add(asyncio.ensure_future(self._wait_cancelled(cancel_token)))
+        done, pending = await asyncio.wait(watchers, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        for watcher in pending - {work}:
+            watcher.cancel()
+
+        if work not in done:
+            kill_process_group(process)
+            await work
+            if cancel_token is not None and cancel_token.cancelled:
+                raise CancelledError(f"Command '{shlex.join(args)}' was cancelled.")
+            raise subprocess.TimeoutExpired(args, timeout)
+
+        if not self._stream_output:
+            out, err = work.result()
+            stdout, stderr = out.decode(errors="replace"), err.decode(errors="replace")
+        return subprocess.CompletedProcess(args, process.returncode, stdout, stderr)
+
+    @staticmethod
+    async def _wait_cancelled(cancel_token: CancellationToken):
+        """
+        Completes once the token is cancelled.
+        :param cancel_token: The token to wait for
+        """
+        while not cancel_token.cancelled:
+            await asyncio.sleep(CANCEL_POLL_INTERVAL)
+
+    @staticmethod
+    async def _pump_async(stream: asyncio.StreamReader, output: SpooledOutput, log: Callable[[str], None]):
+        """
+        Copies a process stream into its output handle line by line, forwarding every line to the logger.
+        :param stream: The process' stdout or stderr
+        :param output: The output handle to write to
+        :param log: The logging method the lines are forwarded to
+        """
+        async for line in stream:
+            text = line.decode(errors="replace")
+            output.write(text)
+            log(text.rstrip("\n"))
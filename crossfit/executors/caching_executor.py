@@ -0,0 +1,294 @@
+import glob
+import hashlib
+import os
+import shutil
+import threading
+import uuid
+from collections import OrderedDict
+from logging import Logger
+from pathlib import Path
+from typing import Optional
+
+from crossfit.commands.command import Command
+from crossfit.executors.executor import Executor
+from crossfit.models.command_models import CommandResult
+from crossfit.models.executor_models import CacheStatistics
+
+DEFAULT_CACHE_SIZE = 1024 ** 3
+_CACHE_VERSION = b"crossfit-cache-1"
+_RESULT_FILE = "result.json"
+_OUTPUTS_DIR = "outputs"
+_HASH_CHUNK_SIZE = 1024 * 1024
+_MAX_FILE_HASHES = 65536
+
+
+class CachingExecutor(Executor):
+    """
+    Executor wrapping another executor with a content-addressed result cache. Commands declaring their inputs and
+    outputs are keyed by their arguments and the content of their inputs - on a hit, the outputs are restored from
+    the cache directory instead of running the command again.
+    """
+
+    def __init__(self, logger: Logger, executor: Executor, cache_dir: Path, max_size: int = DEFAULT_CACHE_SIZE,
+                 catch: bool = True):
+        """
+        :param logger: Logger instance for logging execution details (required)
+        :param executor: The executor running commands missing from the cache
+        :param cache_dir: Directory holding the cached results and outputs, shared between runs
+        :param max_size: Maximum size in bytes of the cached outputs - least recently used entries are evicted
+                         beyond it
+        :param catch: If True, catches exceptions and returns error in CommandResult.
+                      If False, re-raises exceptions.
+        :raises ValueError: If max_size is not positive
+        """
+        if max_size <= 0:
+            raise ValueError(f"Cache size must be positive. Valued as: '{max_size}'")
+        super().__init__(logger, catch)
+        self._executor = executor
+        self._cache_dir = Path(cache_dir)
+        self._max_size = max_size
+        self._lock = threading.Lock()
+        self._statistics = CacheStatistics()
+        self._entries: OrderedDict[str, int] = OrderedDict()
+        self._file_hashes: OrderedDict[str, tuple[tuple, bytes]] = OrderedDict()
+        self._load_entries()
+
+    @property
+    def workdir(self) -> Optional[str]:
+        """
+        :returns: The working directory of the wrapped executor, which relative inputs and outputs are resolved in
+        """
+        return self._executor.workdir
+
+    @property
+    def statistics(self) -> CacheStatistics:
+        """
+        :returns: A snapshot of the cache's hit/miss statistics and size
+        """
+        with self._lock:
+            return self._statistics.model_copy(update={"entries": len(self._entries),
+                                                       "size": sum(self._entries.values())})
+
+    def clear(self):
+        """
+        Removes every cached entry.
+        """
+        with self._lock:
+            keys = list(self._entries)
+            self._entries.clear()
+        for key in keys:
+            shutil.rmtree(self._cache_dir / key, ignore_errors=True)
+
+    def _execute_single(self, command: Command) -> CommandResult:
+        """
+        Restores the command's outputs from the cache, or executes it and caches its outputs on success.
+        :param command: The Command object to execute
+        :returns: CommandResult with execution details
+        """
+        try:
+            key = self._key(command)
+        except OSError as e:
+            self._logger.warning(f"Could not hash inputs of command '{command}', executing without cache: {e}")
+            key = None
+        if key is None:
+            return self._executor.execute_single(command)
+
+        result = self._restore(key, command)
+        if result is not None:
+            return result
+
+        result = self._executor.execute_single(command)
+        if result.code == 0:
+            self._store(key, command, result)
+        return result
+
+    def _key(self, command: Command) -> Optional[str]:
+        """
+        :param command: The command about to be executed
+        :returns: The cache key of the command, or None if it does not declare its inputs and outputs
+                  or an input does not exist
+        """
+        if not command.inputs or not command.outputs:
+            return None
+        digest = hashlib.sha256(_CACHE_VERSION)
+        for arg in command.argv:
+            digest.update(arg.encode("utf-8") + b"\0")
+        # The executed tool is part of the key, so upgrading a jar or executable invalidates its results
+        for arg in map(self._resolve, command.execution_args):
+            if os.path.isfile(arg):
+                digest.update(self._file_hash(arg))
+        for pattern in command.inputs:
+            # Relative inputs are the files the command reads from its executor's working directory
+            paths = sorted(glob.glob(str(pattern), root_dir=self.workdir, recursive=True))
+            if not paths:
+                return None
+            for path in paths:
+                digest.update(self._path_hash(self._resolve(path)))
+        return digest.hexdigest()
+
+    def _resolve(self, path) -> str:
+        """
+        :param path: A path, relative paths being relative to the wrapped executor's working directory
+        :returns: The path as seen from the current directory
+        """
+        return os.path.join(self.workdir, path) if self.workdir is not None else os.fspath(path)
+
+    def _path_hash(self, path: str) -> bytes:
+        """
+        :param path: An input file or directory
+        :returns: Hash of the file's content, or of the relative paths and content of every file in the directory
+        """
+        if not os.path.isdir(path):
+            return self._file_hash(path)
+        digest = hashlib.sha256()
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                file_path = os.path.join(root, name)
+                digest.update(os.path.relpath(file_path, path).encode("utf-8") + b"\0")
+                digest.update(self._file_hash(file_path))
+        return digest.digest()
+
+    def _file_hash(self, path: str) -> bytes:
+        """
+        :param path: A file path
+        :returns: Hash of the file's content - memoized until the file's size or modification time change, for
+                  the most recently hashed files
+        """
+        stat = os.stat(path)
+        memo_path, signature = os.path.abspath(path), (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+        with self._lock:
+            cached = self._file_hashes.get(memo_path)
+            if cached is not None and cached[0] == signature:
+                self._file_hashes.move_to_end(memo_path)
+                return cached[1]
+        digest = hashlib.sha256()
+        with open(path, "rb") as file:
+            while chunk := file.read(_HASH_CHUNK_SIZE):
+                digest.update(chunk)
+        with self._lock:
+            # A rewritten file replaces its previous hash, and the least recently hashed files are forgotten
+            self._file_hashes[memo_path] = (signature, digest.digest())
+            self._file_hashes.move_to_end(memo_path)
+            while len(self._file_hashes) > _MAX_FILE_HASHES:
+                self._file_hashes.popitem(last=False)
+        return digest.digest()
+
+    def _restore(self, key: str, command: Command) -> Optional[CommandResult]:
+        """
+        :param key: The command's cache key
+        :param command: The command about to be executed
+        :returns: The cached result with the command's outputs restored, or None on a cache miss
+        """
+        with self._lock:
+            if key not in self._entries:
+                self._statistics.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._statistics.hits += 1
+
+        entry = self._cache_dir / key
+        try:
+            result = CommandResult.model_validate_json((entry / _RESULT_FILE).read_text(encoding="utf-8"))
+            # Directories replace their targets, so they are restored before the files they may contain
+            outputs = sorted(enumerate(command.outputs),
+                             key=lambda output: not (entry / _OUTPUTS_DIR / str(output[0])).is_dir())
+            for index, output in outputs:
+                _copy(entry / _OUTPUTS_DIR / str(index), self._resolve(output))
+            os.utime(entry)
+        except (OSError, ValueError) as e:
+            self._logger.warning(f"Could not restore cached result of command '{command}': {e}")
+            self._discard(key)
+            with self._lock:
+                self._statistics.hits -= 1
+                self._statistics.misses += 1
+            return None
+
+        self._logger.info(f"Restored outputs of command '{command}' from cache entry {key}")
+        result.command = str(command)
+        return result
+
+    def _store(self, key: str, command: Command, result: CommandResult):
+        """
+        Caches the outputs of a successfully executed command, evicting least recently used entries beyond the
+        cache size.
+        :param key: The command's cache key
+        :param command: The executed command
+        :param result: The command's result
+        """
+        staging = self._cache_dir / f".staging-{uuid.uuid4().hex}"
+        try:
+            for index, output in enumerate(command.outputs):
+                if not os.path.exists(self._resolve(output)):
+                    self._logger.warning(f"Not caching command '{command}', its output '{output}' does not exist")
+                    return
+                _copy(self._resolve(output), staging / _OUTPUTS_DIR / str(index))
+            (staging / _RESULT_FILE).write_text(result.model_dump_json(), encoding="utf-8")
+            size = _size(staging)
+            if size > self._max_size:
+                self._logger.warning(f"Not caching command '{command}', its outputs exceed the cache size")
+                return
+            try:
+                os.replace(staging, self._cache_dir / key)
+            except OSError:
+                return  # Cached concurrently by another executor
+        except OSError as e:
+            self._logger.warning(f"Could not cache result of command '{command}': {e}")
+            return
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+        with self._lock:
+            self._entries[key] = size
+            self._statistics.stores += 1
+            evicted = []
+            while sum(self._entries.values()) > self._max_size:
+                evicted.append(self._entries.popitem(last=False)[0])
+            self._statistics.evictions += len(evicted)
+        for evicted_key in evicted:
+            shutil.rmtree(self._cache_dir / evicted_key, ignore_errors=True)
+
+    def _discard(self, key: str):
+        """
+        Removes a corrupt cache entry.
+        :param key: The entry's cache key
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+        shutil.rmtree(self._cache_dir / key, ignore_errors=True)
+
+    def _load_entries(self):
+        """
+        Indexes the entries already in the cache directory, from least to most recently used.
+        """
+        self._cache_dir.mkdir(parents=True, exist_ok=True)
+        entries = []
+        for entry in self._cache_dir.iterdir():
+            if entry.name.startswith(".staging-"):
+                shutil.rmtree(entry, ignore_errors=True)
+            elif (entry / _RESULT_FILE).is_file():
+                entries.append((entry.stat().st_mtime, entry.name, _size(entry)))
+        for _, key, size in sorted(entries):
+            self._entries[key] = size
+
+
+def _copy(source, destination):
+    """
+    Copies a file or directory, replacing an existing directory so no stale files are left in it.
+    :param source: The file or directory to copy
+    :param destination: The path to copy to
+    """
+    if os.path.isdir(source):
+        shutil.rmtree(destination, ignore_errors=True)
+        shutil.copytree(source, destination)
+    else:
+        os.makedirs(os.path.dirname(os.path.abspath(destination)), exist_ok=True)
+        shutil.copy2(source, destination)
+
+
+def _size(path: Path) -> int:
+    """
+    :param path: A directory
+    :returns: The total size in bytes of the files in the directory
+    """
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, files in os.walk(path) for name in files)
@@ -1,8 +1,59 @@
+import os
+import subprocess
+import threading
+import time
 from abc import ABC, abstractmethod
+from concurrent.futures import CancelledError
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
 from logging import Logger
+from typing import Iterable, Iterator, Optional
 
 from crossfit.commands.command import Command
-from crossfit.models.command_models import CommandResult
+from crossfit.models.command_models import CommandResult, ResultChain
+from crossfit.models.executor_models import BatchPolicy, BatchSummary
+
+TIMED_OUT_CODE = 125
+CANCELLED_CODE = 130
+
+
+class CancellationToken:
+    """Thread-safe flag cancelling the commands it was passed to - running processes are killed, pending ones skipped."""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        """
+        :returns: True if cancellation was requested
+        """
+        return self._event.is_set()
+
+    def cancel(self):
+        """
+        Requests cancellation, can be called from any thread.
+        """
+        self._event.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Blocks until cancellation is requested or the timeout passed.
+        :param timeout: Maximum time to wait in seconds, or None to wait forever
+        :returns: True if cancellation was requested
+        """
+        return self._event.wait(timeout)
+
+
+@dataclass(frozen=True, slots=True)
+class _ExecutionLimits:
+    """Deadline and cancellation token of the command chain currently executed in this context."""
+    deadline: Optional[float] = None
+    cancel_token: Optional[CancellationToken] = None
+
+
+_limits: ContextVar[_ExecutionLimits] = ContextVar("crossfit_execution_limits", default=_ExecutionLimits())
 
 
 class Executor(ABC):
@@ -17,24 +68,152 @@ class Executor(ABC):
         self._logger = logger
         self._catch = catch
 
-    def execute(self, command: Command) -> CommandResult:
+    @property
+    def workdir(self) -> Optional[str]:
+        """
+        :returns: The working directory relative command paths are resolved against, None for the current one
+        """
+        return None
+
+    def execute(self,
+                command: Command,
+                timeout: Optional[float] = None,
+                cancel_token: Optional[CancellationToken] = None) -> CommandResult:
         """
         Executes the given command and any chained commands via next_command.
         :param command: The Command object to execute
-        :returns: Aggregated CommandResult from all executed commands
+        :param timeout: Maximum time in seconds for the whole chain, on top of each command's own timeout
+        :param cancel_token: Token cancelling the chain from another thread
+        :returns: Aggregated CommandResult from all executed commands - a timed out command has the code
+                  TIMED_OUT_CODE and a cancelled one CANCELLED_CODE
         """
-        result = self._execute_single(command)
+        with self._limited(timeout, cancel_token):
+            chain = ResultChain(self._execute_limited(command))
 
-        current = command.next_command
-        while current is not None:
-            if result.code != 0:
-                self._logger.warning(f"Stopping command chain due to failure. Code: {result.code}")
-                break
-            next_result = self._execute_single(current)
-            result = result.add_result(next_result)
-            current = current.next_command
+            current = command.next_command
+            while current is not None:
+                if chain.code != 0:
+                    self._logger.warning(f"Stopping command chain due to failure. Code: {chain.code}")
+                    break
+                chain.add_result(self._execute_limited(current))
+                current = current.next_command
 
-        return result
+        return chain.to_result()
+
+    def execute_single(self, command: Command) -> CommandResult:
+        """
+        Executes a single command without its chained commands, within the timeout and cancellation of the chain
+        executed in the current context - for executors wrapping another executor.
+        :param command: The Command object to execute
+        :returns: CommandResult with execution details
+        """
+        return self._execute_limited(command)
+
+    def execute_batch(self,
+                      commands: Iterable[Command],
+                      max_workers: Optional[int] = None,
+                      policy: BatchPolicy = BatchPolicy.CollectAll,
+                      timeout: Optional[float] = None,
+                      cancel_token: Optional[CancellationToken] = None) -> "BatchExecution":
+        """
+        Executes independent commands, each with its own command chain, yielding results as they complete.
+        :param commands: The Command objects to execute
+        :param max_workers: Maximum number of command chains running at once - executors that run commands
+                            one by one ignore it
+        :param policy: Whether to keep executing after a failed command chain (CollectAll)
+                       or to skip the commands not started yet (FailFast)
+        :param timeout: Maximum time in seconds for each command chain
+        :param cancel_token: Token cancelling all command chains of the batch from another thread
+        :returns: BatchExecution iterating over (index, CommandResult) pairs in completion order
+        """
+        commands = list(commands)
+        return BatchExecution(self._logger, len(commands),
+                              self._execute_batch(commands, max_workers, policy, timeout, cancel_token))
+
+    def _execute_batch(self,
+                       commands: list[Command],
+                       max_workers: Optional[int],
+                       policy: BatchPolicy,
+                       timeout: Optional[float],
+                       cancel_token: Optional[CancellationToken]) -> Iterator[tuple[int, CommandResult]]:
+        """
+        Executes the commands one by one.
+        :param commands: The Command objects to execute
+        :param max_workers: Ignored, commands are executed sequentially
+        :param policy: The batch failure policy
+        :param timeout: Maximum time in seconds for each command chain
+        :param cancel_token: Token cancelling the batch
+        :returns: Iterator over (index, CommandResult) pairs in completion order
+        """
+        for index, command in enumerate(commands):
+            result = self.execute(command, timeout, cancel_token)
+            yield index, result
+            if result.code != 0 and policy == BatchPolicy.FailFast:
+                return
+
+    @contextmanager
+    def _limited(self, timeout: Optional[float], cancel_token: Optional[CancellationToken]):
+        """
+        Applies a chain deadline and cancellation token to the commands executed in the current context.
+        :param timeout: Maximum time in seconds for the chain
+        :param cancel_token: Token cancelling the chain
+        """
+        if timeout is not None and timeout <= 0:
+            raise ValueError(f"Execution timeout must be positive. Valued as: '{timeout}'")
+        outer = _limits.get()
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        if outer.deadline is not None:
+            deadline = outer.deadline if deadline is None else min(deadline, outer.deadline)
+        reset_token = _limits.set(_ExecutionLimits(deadline, cancel_token or outer.cancel_token))
+        try:
+            yield
+        finally:
+            _limits.reset(reset_token)
+
+    def _execute_limited(self, command: Command) -> CommandResult:
+        """
+        Executes a single command unless its chain was already cancelled or ran out of time.
+        :param command: The Command object to execute
+        :returns: CommandResult with execution details
+        :raises CancelledError: If the chain was cancelled and exceptions are not caught
+        :raises subprocess.TimeoutExpired: If the chain ran out of time and exceptions are not caught
+        """
+        limits = _limits.get()
+        if limits.cancel_token is not None and limits.cancel_token.cancelled:
+            error = CancelledError(f"Command '{command}' was cancelled before it started.")
+            code = CANCELLED_CODE
+        elif limits.deadline is not None and limits.deadline <= time.monotonic():
+            error = subprocess.TimeoutExpired(str(command), 0)
+            code = TIMED_OUT_CODE
+        else:
+            return self._execute_single(command)
+
+        self._logger.error(f"Skipping command '{command}': {error}")
+        if not self._catch:
+            raise error
+        return CommandResult(code=code, command=str(command), output="", error=str(error))
+
+    @staticmethod
+    def _timeout_for(command: Command, default: Optional[float] = None) -> Optional[float]:
+        """
+        :param command: The command about to be executed
+        :param default: Timeout applied when the command has none
+        :returns: The time in seconds the command may run - the lowest of its own timeout and the time left
+                  for its chain - or None if it is not limited
+        """
+        timeout = command.timeout if command.timeout is not None else default
+        deadline = _limits.get().deadline
+        if deadline is not None:
+            remaining = max(deadline - time.monotonic(), 0.0)
+            timeout = remaining if timeout is None else min(timeout, remaining)
+        return timeout
+
+    @staticmethod
+    def _cancel_token() -> Optional[CancellationToken]:
+        """
+        :returns: The cancellation token of the chain executed in the current context, if any
+        """
+        return _limits.get().cancel_token
 
     @abstractmethod
     def _execute_single(self, command: Command) -> CommandResult:
@@ -44,3 +223,69 @@ class Executor(ABC):
         :returns: CommandResult with execution details
         """
         raise NotImplementedError
+
+
+class BatchExecution:
+    """Results of a batch of commands in completion order, summarized once all of them were consumed."""
+
+    def __init__(self, logger: Logger, total: int, results: Iterator[tuple[int, CommandResult]]):
+        """
+        :param logger: Logger instance for logging the batch summary
+        :param total: The number of commands in the batch
+        :param results: Iterator over (index, CommandResult) pairs in completion order
+        """
+        self._logger = logger
+        self._total = total
+        self._results = results
+        self._completed: dict[int, CommandResult] = {}
+        self._started: Optional[tuple[float, float]] = None
+        self.summary: Optional[BatchSummary] = None
+
+    def __iter__(self) -> Iterator[tuple[int, CommandResult]]:
+        """
+        Runs the batch - commands are only executed while iterating. Iterating again continues with the commands
+        not consumed yet; the batch is timed from the first result pulled and summarized once, when exhausted.
+        :returns: Iterator over (index, CommandResult) pairs in completion order
+        """
+        if self._started is None:
+            self._started = time.monotonic(), _cpu_time()
+        for index, result in self._results:
+            self._completed[index] = result
+            yield index, result
+
+        if self.summary is not None:
+            return
+        failed = sum(1 for result in self._completed.values() if result.code != 0)
+        start_wall, start_cpu = self._started
+        self.summary = BatchSummary(
+            total=self._total,
+            succeeded=len(self._completed) - failed,
+            failed=failed,
+            skipped=self._total - len(self._completed),
+            wall_time=time.monotonic() - start_wall,
+            cpu_time=_cpu_time() - start_cpu,
+        )
+        self._logger.info(
+            f"Batch of {self._total} commands finished in {self.summary.wall_time:.2f}s wall-clock "
+            f"({self.summary.cpu_time:.2f}s CPU). Succeeded: {self.summary.succeeded}, "
+            f"failed: {self.summary.failed}, skipped: {self.summary.skipped}."
+        )
+
+    def results(self) -> list[Optional[CommandResult]]:
+        """
+        Runs the remaining batch to completion.
+        :returns: The CommandResult of every command in the order of the given commands,
+                  None for commands skipped due to the FailFast policy
+        """
+        if self.summary is None:
+            for _ in self:
+                pass
+        return [self._completed.get(index) for index in range(self._total)]
+
+
+def _cpu_time() -> float:
+    """
+    :returns: User and system CPU time of this process and its finished child processes
+    """
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
@@ -1,5 +1,7 @@
 from crossfit.models.executor_models import ExecutorType
 from crossfit.executors.local_executor import LocalExecutor
+from crossfit.executors.jacoco_daemon_executor import JacocoDaemonExecutor
+from crossfit.executors.async_executor import AsyncExecutor
 
 def create_executor(executor_type: ExecutorType, logger = None, catch: bool = True, **kwargs):
     """
@@ -12,5 +14,9 @@ def create_executor(executor_type: ExecutorType, logger = None, catch: bool = Tr
     """
     if executor_type == ExecutorType.Local:
         return LocalExecutor(logger, catch, **kwargs)
+    elif executor_type == ExecutorType.JacocoDaemon:
+        return JacocoDaemonExecutor(logger, catch, **kwargs)
+    elif executor_type == ExecutorType.Async:
+        return AsyncExecutor(logger, catch, **kwargs)
     else:
         raise ValueError(f"Unknown executor type: {executor_type}")
@@ -0,0 +1,233 @@
+import os.path
+import struct
+import subprocess
+import threading
+from contextlib import nullcontext
+from logging import Logger
+from pathlib import Path
+from typing import ContextManager, Optional
+
+import crossfit.refs
+from crossfit.commands.command import Command
+from crossfit.executors.executor import CancellationToken
+from crossfit.executors.local_executor import LocalExecutor, ProcessWatchdog
+from crossfit.models.tool_models import ToolType
+
+DAEMON_SOURCE = crossfit.refs.executors_dir / r"JacocoDaemon.java"
+_INT = struct.Struct(">i")
+
+
+class JacocoDaemon:
+    """A long-lived JVM hosting jacococli.jar, fed with commands over its stdin/stdout pipes."""
+
+    def __init__(self, jar_path: Path, java: str = "java", cwd: Optional[str] = None, env: Optional[dict] = None):
+        """
+        :param jar_path: Path to the jacococli.jar to host
+        :param java: The java launcher to start the daemon with (JDK 11+, for single-file source launch)
+        :param cwd: Working directory of the daemon, relative command paths are resolved against it
+        :param env: Environment of the daemon process
+        """
+        self._jar_path = jar_path
+        self._java = java
+        self._cwd = cwd
+        self._env = env
+        self._process: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
+
+    @property
+    def launch_args(self) -> list[str]:
+        """
+        :returns: The argument vector starting the daemon's JVM
+        """
+        return [self._java, "-cp", str(self._jar_path), str(DAEMON_SOURCE)]
+
+    @property
+    def alive(self) -> bool:
+        """
+        :returns: True if the daemon's JVM is running
+        """
+        return self._process is not None and self._process.poll() is None
+
+    def run(self,
+            args: list[str],
+            timeout: Optional[float] = None,
+            cancel_token: Optional[CancellationToken] = None) -> tuple[int, str, str]:
+        """
+        Runs a jacococli command inside the daemon, (re)starting the JVM when needed.
+        A command that times out or is cancelled kills the JVM, which is restarted by the next command.
+        :param args: The jacococli arguments (everything after 'java -jar jacococli.jar')
+        :param timeout: Maximum time in seconds to wait for the command
+        :param cancel_token: Token killing the JVM once cancelled
+        :returns: Tuple of exit code, stdout and stderr of the command
+        :raises ConnectionError: If the daemon exits before answering
+        :raises subprocess.TimeoutExpired: If the command did not finish in time
+        :raises CancelledError: If the command was cancelled
+        """
+        request = bytearray(_INT.pack(len(args)))
+        for arg in args:
+            encoded = arg.encode("utf-8")
+            request += _INT.pack(len(encoded)) + encoded
+
+        with self._lock:
+            if not self.alive:
+                self._start()
+            process = self._process
+            with ProcessWatchdog(process.kill, ["jacococli", *args], timeout, cancel_token) as watchdog:
+                try:
+                    process.stdin.write(request)
+                    process.stdin.flush()
+                    code = self._read_int()
+                    output = self._read_bytes().decode("utf-8")
+                    error = self._read_bytes().decode("utf-8")
+                except (OSError, EOFError) as e:
+                    failure = e
+                else:
+                    failure = None
+            if failure is not None:
+                self._kill()
+                watchdog.raise_if_triggered()
+                raise ConnectionError(
+                    f"JaCoCo daemon for '{self._jar_path}' exited unexpectedly. {failure}") from failure
+        return code, output, error
+
+    def close(self):
+        """
+        Asks the daemon to shut down, killing it if it does not exit in time.
+        """
+        with self._lock:
+            if self.alive:
+                try:
+                    self._process.stdin.write(_INT.pack(-1))
+                    self._process.stdin.close()
+                    self._process.wait(timeout=5)
+                except (OSError, subprocess.TimeoutExpired):
+                    self._kill()
+            self._process = None
+
+    def _start(self):
+        """
+        Starts the daemon's JVM.
+        """
+        self._process = subprocess.Popen(
+            self.launch_args, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            cwd=self._cwd, env=self._env)
+
+    def _kill(self):
+        """
+        Kills the daemon's JVM without waiting for pending commands.
+        """
+        if self._process is not None:
+            self._process.kill()
+            self._process.wait()
+            self._process = None
+
+    def _read_int(self) -> int:
+        """
+        :returns: The next big-endian int sent by the daemon
+        :raises EOFError: If the daemon's stdout was closed
+        """
+        data = self._process.stdout.read(_INT.size)
+        if len(data) < _INT.size:
+            raise EOFError("Daemon closed its output stream.")
+        return _INT.unpack(data)[0]
+
+    def _read_bytes(self) -> bytes:
+        """
+        :returns: The next length-prefixed byte string sent by the daemon
+        :raises EOFError: If the daemon's stdout was closed
+        """
+        length = self._read_int()
+        data = self._process.stdout.read(length)
+        if len(data) < length:
+            raise EOFError("Daemon closed its output stream.")
+        return data
+
+
+class JacocoDaemonExecutor(LocalExecutor):
+    """
+    Executor that runs jacococli.jar commands inside long-lived JVMs, sparing the JVM startup per command.
+    Any other command is executed as a local process, just like LocalExecutor.
+    """
+
+    def __init__(self, logger: Logger, catch: bool = True, workdir: Path = None, java: str = "java",
+                 **execution_kwargs):
+        """
+        :param logger: Logger instance for logging execution details (required)
+        :param catch: If True, catches exceptions and returns error in CommandResult.
+                      If False, re-raises exceptions.
+        :param workdir: Working directory for executed commands and the hosted JVMs
+        :param java: The java launcher used to start the daemons (JDK 11+)
+        :param execution_kwargs: Additional arguments passed to subprocess.run
+        """
+        super().__init__(logger, catch, workdir, **execution_kwargs)
+        self._java = java
+        self._daemons: dict[str, JacocoDaemon] = {}
+        self._daemons_lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """
+        Shuts down all daemons started by this executor.
+        """
+        with self._daemons_lock:
+            daemons = list(self._daemons.values())
+            self._daemons.clear()
+        for daemon in daemons:
+            daemon.close()
+
+    def _run(self,
+             args: list[str],
+             timeout: Optional[float] = None,
+             cancel_token: Optional[CancellationToken] = None) -> subprocess.CompletedProcess:
+        """
+        Runs jacococli.jar invocations inside a daemon, and any other command as a local process.
+        :param args: The command's arguments, starting with the executable
+        :param timeout: Maximum time in seconds the command may run
+        :param cancel_token: Token cancelling the command
+        :returns: The completed process
+        """
+        if not self._is_jacoco_call(args):
+            return super()._run(args, timeout, cancel_token)
+
+        daemon = self._get_daemon(args[2])
+        code, output, error = daemon.run(args[3:], self._with_default_timeout(timeout), cancel_token)
+        if code != 0 and self._exec_kwargs.get("check"):
+            raise subprocess.CalledProcessError(code, args, output=output, stderr=error)
+        return subprocess.CompletedProcess(args, code, stdout=output, stderr=error)
+
+    def _spilled(self, command: Command) -> ContextManager[list[str]]:
+        """
+        :param command: The command to execute
+        :returns: Context providing the argument vector to execute - daemons receive their arguments over a pipe,
+                  so jacococli.jar invocations are never moved into a response file
+        """
+        if self._is_jacoco_call(command.argv):
+            return nullcontext(command.argv)
+        return super()._spilled(command)
+
+    def _get_daemon(self, jar_path: str) -> JacocoDaemon:
+        """
+        :param jar_path: Path to the hosted jacococli.jar
+        :returns: The daemon hosting the given jar, created on first use
+        """
+        key = os.path.abspath(os.path.join(self._exec_kwargs.get("cwd") or os.getcwd(), jar_path))
+        with self._daemons_lock:
+            if key not in self._daemons:
+                self._logger.info(f"Starting JaCoCo daemon for '{key}'")
+                self._daemons[key] = JacocoDaemon(
+                    Path(key), self._java, self._exec_kwargs.get("cwd"), self._exec_kwargs.get("env"))
+            return self._daemons[key]
+
+    @staticmethod
+    def _is_jacoco_call(args: list[str]) -> bool:
+        """
+        :param args: The command's arguments, starting with the executable
+        :returns: True if the arguments invoke jacococli.jar through 'java -jar'
+        """
+        return (len(args) > 2 and os.path.basename(args[0]) in ("java", "java.exe") and args[1] == "-jar"
+                and os.path.basename(args[2]) == ToolType.Jacoco.value)
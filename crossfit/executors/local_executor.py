@@ -1,21 +1,45 @@
+import os
+import signal
 import subprocess
+import threading
+import time
+from concurrent.futures import CancelledError, ThreadPoolExecutor, as_completed
 from logging import Logger
 import shlex
 from pathlib import Path
+from typing import Callable, ContextManager, IO, Iterator, Optional, Union
 
+from crossfit.commands.argfile import spilled_argv, DEFAULT_ARGFILE_THRESHOLD
 from crossfit.commands.command import Command
-from crossfit.executors.executor import Executor
-from crossfit.models.command_models import CommandResult
+from crossfit.executors.executor import Executor, CancellationToken, TIMED_OUT_CODE, CANCELLED_CODE
+from crossfit.models.command_models import CommandResult, SpooledOutput, DEFAULT_SPOOL_SIZE
+from crossfit.models.executor_models import BatchPolicy
+
+CANCEL_POLL_INTERVAL = 0.05
 
 
 class LocalExecutor(Executor):
     """Executor that runs commands locally via subprocess."""
 
-    def __init__(self, logger: Logger, catch: bool = True, workdir: Path = None, **execution_kwargs):
+    def __init__(self,
+                 logger: Logger,
+                 catch: bool = True,
+                 workdir: Path = None,
+                 stream_output: bool = False,
+                 spool_size: int = DEFAULT_SPOOL_SIZE,
+                 argfile_threshold: Optional[int] = DEFAULT_ARGFILE_THRESHOLD,
+                 **execution_kwargs):
         """
         :param logger: Logger instance for logging execution details (required)
         :param catch: If True, catches exceptions and returns error in CommandResult.
                       If False, re-raises exceptions.
+        :param workdir: Working directory of the executed processes
+        :param stream_output: If True, output is read line by line as it arrives, forwarded to the logger and
+                              returned as SpooledOutput handles instead of strings
+        :param spool_size: Number of characters of each streamed output kept in memory before spooling to disk
+        :param argfile_threshold: Argument vector size in bytes from which the arguments of commands supporting
+                                  response files are passed through a temporary response file, or None to
+                                  always pass them on the command line
         :param execution_kwargs: Additional arguments passed to subprocess.run
         """
         self._workdir = workdir
@@ -24,6 +48,10 @@ class LocalExecutor(Executor):
 
         super().__init__(logger, catch)
 
+        self._stream_output = stream_output
+        self._spool_size = spool_size
+        self._argfile_threshold = argfile_threshold
+
         self._exec_kwargs = {
             "capture_output": True,
             "check": True,
@@ -31,6 +59,141 @@ class LocalExecutor(Executor):
             **execution_kwargs,
         }
 
+    @property
+    def workdir(self) -> Optional[str]:
+        """
+        :returns: The working directory of the executed processes, None for the current one
+        """
+        cwd = self._exec_kwargs.get("cwd")
+        return os.fspath(cwd) if cwd is not None else None
+
+    def _run(self,
+             args: list[str],
+             timeout: Optional[float] = None,
+             cancel_token: Optional[CancellationToken] = None) -> subprocess.CompletedProcess:
+        """
+        Runs the given argument vector as a local process.
+        :param args: The command's arguments, starting with the executable
+        :param timeout: Maximum time in seconds the process may run before its process group is killed
+        :param cancel_token: Token killing the process group once cancelled
+        :returns: The completed process
+        :raises subprocess.TimeoutExpired: If the process was killed due to the timeout
+        :raises CancelledError: If the process was killed due to cancellation
+        """
+        if self._stream_output:
+            return self._run_streaming(args, timeout, cancel_token)
+        if timeout is None and cancel_token is None:
+            return subprocess.run(args, **self._exec_kwargs)
+        timeout = self._with_default_timeout(timeout)
+
+        process = subprocess.Popen(args, **self._popen_kwargs())
+        with ProcessWatchdog(lambda: kill_process_group(process), args, timeout, cancel_token) as watchdog:
+            stdout, stderr = process.communicate()
+        watchdog.raise_if_triggered(stdout, stderr)
+        if self._exec_kwargs.get("check") and process.returncode != 0:
+            raise subprocess.CalledProcessError(process.returncode, args, output=stdout, stderr=stderr)
+        return subprocess.CompletedProcess(args, process.returncode, stdout, stderr)
+
+    def _run_streaming(self,
+                       args: list[str],
+                       timeout: Optional[float] = None,
+                       cancel_token: Optional[CancellationToken] = None) -> subprocess.CompletedProcess:
+        """
+        Runs the given argument vector as a local process, reading its output line by line as it arrives.
+        :param args: The command's arguments, starting with the executable
+        :param timeout: Maximum time in seconds the process may run before its process group is killed
+        :param cancel_token: Token killing the process group once cancelled
+        :returns: The completed process, holding SpooledOutput handles as stdout and stderr
+        :raises subprocess.TimeoutExpired: If the process was killed due to the timeout
+        :raises CancelledError: If the process was killed due to cancellation
+        """
+        timeout = self._with_default_timeout(timeout)
+        process = subprocess.Popen(args, **{**self._popen_kwargs(), "stdout": subprocess.PIPE,
+                                            "stderr": subprocess.PIPE, "text": True, "errors": "replace"})
+        stdout, stderr = SpooledOutput(self._spool_size), SpooledOutput(self._spool_size)
+        readers = [
+            threading.Thread(target=self._pump, args=(process.stdout, stdout, self._logger.info), daemon=True),
+            threading.Thread(target=self._pump, args=(process.stderr, stderr, self._logger.warning), daemon=True),
+        ]
+        for reader in readers:
+            reader.start()
+        with ProcessWatchdog(lambda: kill_process_group(process), args, timeout, cancel_token) as watchdog:
+            process.wait()
+            for reader in readers:
+                reader.join()
+        watchdog.raise_if_triggered(stdout, stderr)
+        return subprocess.CompletedProcess(args, process.returncode, stdout, stderr)
+
+    def _with_default_timeout(self, timeout: Optional[float]) -> Optional[float]:
+        """
+        :param timeout: The command's timeout
+        :returns: The lower of the command's timeout and the timeout given in the execution arguments
+        """
+        default = self._exec_kwargs.get("timeout")
+        if default is None:
+            return timeout
+        return default if timeout is None else min(timeout, default)
+
+    def _popen_kwargs(self) -> dict:
+        """
+        :returns: The execution arguments translated to subprocess.Popen arguments, starting the process
+                  in a new session so that its whole process group can be killed
+        """
+        kwargs = {key: value for key, value in self._exec_kwargs.items()
+                  if key not in ("capture_output", "check", "timeout", "input")}
+        if self._exec_kwargs.get("capture_output"):
+            kwargs["stdout"] = kwargs["stderr"] = subprocess.PIPE
+        if os.name == "posix":
+            kwargs["start_new_session"] = True
+        return kwargs
+
+    @staticmethod
+    def _pump(stream: IO[str], output: SpooledOutput, log: Callable[[str], None]):
+        """
+        Copies a process stream into its output handle line by line, forwarding every line to the logger.
+        :param stream: The process' stdout or stderr
+        :param output: The output handle to write to
+        :param log: The logging method the lines are forwarded to
+        """
+        with stream:
+            for line in stream:
+                output.write(line)
+                log(line.rstrip("\n"))
+
+    def _execute_batch(self,
+                       commands: list[Command],
+                       max_workers: Optional[int],
+                       policy: BatchPolicy,
+                       timeout: Optional[float],
+                       cancel_token: Optional[CancellationToken]) -> Iterator[tuple[int, CommandResult]]:
+        """
+        Executes the command chains concurrently on a thread pool.
+        :param commands: The Command objects to execute
+        :param max_workers: Maximum number of command chains running at once, defaults to the thread pool's default
+        :param policy: The batch failure policy - on FailFast, commands not started yet are cancelled
+                       while the results of the already running ones are still yielded
+        :param timeout: Maximum time in seconds for each command chain
+        :param cancel_token: Token cancelling the batch
+        :returns: Iterator over (index, CommandResult) pairs in completion order
+        """
+        pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="crossfit-batch")
+        try:
+            futures = {pool.submit(self.execute, command, timeout, cancel_token): index
+                       for index, command in enumerate(commands)}
+            cancelled = False
+            for future in as_completed(futures):
+                if future.cancelled():
+                    continue
+                result = future.result()
+                yield futures[future], result
+                if result.code != 0 and policy == BatchPolicy.FailFast and not cancelled:
+                    self._logger.warning(f"Cancelling pending batch commands due to failure. Code: {result.code}")
+                    cancelled = True
+                    for pending in futures:
+                        pending.cancel()
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
     def _execute_single(self, command: Command) -> CommandResult:
         """
         Executes a single command without handling chained commands.
@@ -40,63 +203,188 @@ class LocalExecutor(Executor):
         command_str = str(command)
         try:
             command.validate()
-            res = subprocess.run(shlex.split(command_str), **self._exec_kwargs)
+            with self._spilled(command) as args:
+                return self._to_result(command_str, self._run(args, self._timeout_for(command), self._cancel_token()))
+        except Exception as e:
+            return self._handle_error(command_str, e)
 
-            if res.returncode != 0 or (res.stderr and len(res.stderr)):
-                raise subprocess.CalledProcessError(
-                    res.returncode, command_str, output=res.stdout, stderr=res.stderr
-                )
+    def _spilled(self, command: Command) -> ContextManager[list[str]]:
+        """
+        :param command: The command to execute
+        :returns: Context providing the argument vector to execute, with long argument lists moved into a
+                  response file that is removed on exit
+        """
+        return spilled_argv(command, self._argfile_threshold)
 
-            self._logger.info(f"Command '{command_str}' finished with exit code {res.returncode}. {res.stdout}")
-            return CommandResult(
-                code=res.returncode,
-                command=command_str,
-                output=res.stdout,
-                error=res.stderr,
+    def _to_result(self, command_str: str, res: subprocess.CompletedProcess) -> CommandResult:
+        """
+        Converts a completed process to a CommandResult, treating a non-zero code or any stderr output as failure.
+        :param command_str: The executed command
+        :param res: The completed process
+        :returns: CommandResult with execution details
+        :raises subprocess.CalledProcessError: If the process failed
+        """
+        if res.returncode != 0 or (res.stderr and len(res.stderr)):
+            raise subprocess.CalledProcessError(
+                res.returncode, command_str, output=res.stdout, stderr=res.stderr
             )
 
-        except subprocess.CalledProcessError as cpe:
+        self._logger.info(f"Command '{command_str}' finished with exit code {res.returncode}. {_loggable(res.stdout)}")
+        return CommandResult(
+            code=res.returncode,
+            command=command_str,
+            output=res.stdout,
+            error=res.stderr,
+        )
+
+    def _handle_error(self, command_str: str, error: Exception) -> CommandResult:
+        """
+        Logs an execution error and converts it to a failed CommandResult.
+        :param command_str: The executed command
+        :param error: The raised error
+        :returns: CommandResult with the error details
+        :raises Exception: The given error, if errors are not caught
+        """
+        if isinstance(error, subprocess.CalledProcessError):
             self._logger.error(
-                f"Execution of command '{command_str}' failed with error: {cpe.stderr}. Return code {cpe.returncode}."
+                f"Execution of command '{command_str}' failed with error: {_loggable(error.stderr)}. "
+                f"Return code {error.returncode}."
             )
-            if not self._catch:
-                raise
-            return CommandResult(
-                code=cpe.returncode,
+            result = CommandResult(
+                code=error.returncode,
                 command=command_str,
-                output=cpe.stdout or "",
-                error=cpe.stderr or "",
+                output=error.stdout or "",
+                error=error.stderr or "",
             )
-
-        except FileNotFoundError as not_found_e:
-            self._logger.error(f"Command '{command_str}' not found. {not_found_e.strerror}")
-            if not self._catch:
-                raise
-            return CommandResult(
+        elif isinstance(error, subprocess.TimeoutExpired):
+            self._logger.error(f"Command '{command_str}' timed out after {error.timeout:g} seconds and was killed.")
+            result = CommandResult(
+                code=TIMED_OUT_CODE,
+                command=command_str,
+                output=error.output or "",
+                error=str(error),
+            )
+        elif isinstance(error, CancelledError):
+            self._logger.error(f"Command '{command_str}' was cancelled. {error}")
+            result = CommandResult(
+                code=CANCELLED_CODE,
+                command=command_str,
+                output="",
+                error=str(error) or "Command was cancelled",
+            )
+        elif isinstance(error, FileNotFoundError):
+            self._logger.error(f"Command '{command_str}' not found. {error.strerror}")
+            result = CommandResult(
                 code=124,
                 command=command_str,
                 output="",
-                error=not_found_e.strerror,
+                error=error.strerror,
             )
-
-        except AttributeError as attr_e:
-            self._logger.error(f"Command validation failed: {attr_e}")
-            if not self._catch:
-                raise
-            return CommandResult(
+        elif isinstance(error, AttributeError):
+            self._logger.error(f"Command validation failed: {error}")
+            result = CommandResult(
                 code=1,
                 command=command_str,
                 output="",
-                error=str(attr_e),
+                error=str(error),
             )
-
-        except Exception as e:
-            self._logger.error(f"An error occurred while executing command '{command_str}': {e}")
-            if not self._catch:
-                raise
-            return CommandResult(
+        else:
+            self._logger.error(f"An error occurred while executing command '{command_str}': {error}")
+            result = CommandResult(
                 code=1,
                 command=command_str,
                 output="",
-                error=str(e),
+                error=str(error),
             )
+
+        if not self._catch:
+            raise error
+        return result
+
+
+def _loggable(output: Optional[Union[str, SpooledOutput]]) -> str:
+    """
+    :param output: A process output
+    :returns: The output if it was captured as a string - streamed outputs were already logged line by line
+    """
+    return output if isinstance(output, str) else ""
+
+
+def kill_process_group(process):
+    """
+    Kills a process together with all processes it started in its session.
+    :param process: A subprocess.Popen or asyncio process started in a new session
+    """
+    if os.name == "posix":
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+            return
+        except (ProcessLookupError, PermissionError):
+            pass
+    try:
+        process.kill()
+    except ProcessLookupError:
+        pass
+
+
+class ProcessWatchdog:
+    """Runs a kill function once a timeout passed or a cancellation token was cancelled, unless stopped before."""
+
+    def __init__(self,
+                 kill: Callable[[], None],
+                 args: list[str],
+                 timeout: Optional[float],
+                 cancel_token: Optional[CancellationToken]):
+        """
+        :param kill: Function killing the watched process
+        :param args: The watched command's arguments, reported in the raised errors
+        :param timeout: Maximum time in seconds before killing, or None
+        :param cancel_token: Token killing once cancelled, or None
+        """
+        self._kill = kill
+        self._args = args
+        self._timeout = timeout
+        self._cancel_token = cancel_token
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.error: Optional[Exception] = None
+
+    def __enter__(self) -> "ProcessWatchdog":
+        if self._timeout is not None or self._cancel_token is not None:
+            self._thread = threading.Thread(target=self._watch, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def raise_if_triggered(self, stdout=None, stderr=None):
+        """
+        :param stdout: Output read from the process before it was killed
+        :param stderr: Error output read from the process before it was killed
+        :raises subprocess.TimeoutExpired: If the process was killed due to the timeout
+        :raises CancelledError: If the process was killed due to cancellation
+        """
+        if isinstance(self.error, subprocess.TimeoutExpired):
+            raise subprocess.TimeoutExpired(self._args, self._timeout, output=stdout, stderr=stderr)
+        if self.error is not None:
+            raise self.error
+
+    def _watch(self):
+        deadline = time.monotonic() + self._timeout if self._timeout is not None else None
+        while True:
+            wait = None if deadline is None else max(deadline - time.monotonic(), 0.0)
+            if self._cancel_token is not None:
+                wait = CANCEL_POLL_INTERVAL if wait is None else min(wait, CANCEL_POLL_INTERVAL)
+            if self._stopped.wait(wait):
+                return
+            if self._cancel_token is not None and self._cancel_token.cancelled:
+                self.error = CancelledError(f"Command '{shlex.join(self._args)}' was cancelled.")
+            elif deadline is not None and time.monotonic() >= deadline:
+                self.error = subprocess.TimeoutExpired(self._args, self._timeout)
+            else:
+                continue
+            self._kill()
+            return
@@ -1,5 +1,6 @@
-from .command_models import CommandResult
-from .tool_models import ToolType, ReportFormat
-from .executor_models import ExecutorType
+from .command_models import CommandResult, ResultChain, ArgFileStyle
+from .tool_models import ToolType, ReportFormat, DeltaSummary
+from .executor_models import ExecutorType, BatchPolicy, BatchSummary, CacheStatistics
+from .pipeline_models import SweepSummary, CoverageTotals
 
-__all__ = ['CommandResult', 'ToolType', 'ReportFormat', 'ExecutorType']
+__all__ = ['CommandResult', 'ResultChain', 'ArgFileStyle', 'ToolType', 'ReportFormat', 'DeltaSummary', 'ExecutorType', 'BatchPolicy', 'BatchSummary', 'CacheStatistics', 'SweepSummary', 'CoverageTotals']
@@ -1,6 +1,11 @@
+import io
+import tempfile
 from enum import Enum
-from typing import Optional
-from pydantic import BaseModel
+from typing import Iterator, Optional, Union
+from pydantic import BaseModel, ConfigDict, field_serializer
+
+DEFAULT_SPOOL_SIZE = 1024 * 1024
+_CHUNK_SIZE = 64 * 1024
 
 
 class CommandType(Enum):
@@ -10,21 +15,219 @@ class CommandType(Enum):
     ResetCoverage = "reset"
 
 
+class ArgFileStyle(Enum):
+    Java = "java"
+    DotnetResponseFile = "rsp"
+    Argparse = "argparse"
+
+
+class SpooledOutput:
+    """
+    Lazy handle to a command's output - kept in memory up to max_size characters and spooled to a temporary file
+    beyond it. The text is only materialized when read, and the temporary file is removed with the handle.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_SPOOL_SIZE):
+        """
+        :param max_size: Number of characters kept in memory before spooling to a temporary file
+        """
+        self._max_size = max_size
+        self._size = 0
+        self._file = tempfile.SpooledTemporaryFile(max_size=max_size, mode="w+", encoding="utf-8", newline="")
+
+    @classmethod
+    def join(cls, values: list[Union[str, "SpooledOutput"]], separator: str = "\n") -> "SpooledOutput":
+        """
+        Joins outputs into a new handle, copying spooled outputs chunk by chunk.
+        :param values: The outputs to join
+        :param separator: The text written between the outputs
+        :returns: A handle to the joined outputs
+        """
+        max_size = max((value.max_size for value in values if isinstance(value, SpooledOutput)),
+                       default=DEFAULT_SPOOL_SIZE)
+        joined = cls(max_size)
+        for index, value in enumerate(values):
+            if index:
+                joined.write(separator)
+            for chunk in (value.chunks() if isinstance(value, SpooledOutput) else (value,)):
+                joined.write(chunk)
+        return joined
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size
+
+    @property
+    def spooled(self) -> bool:
+        """
+        :returns: True if the output exceeded max_size and was moved to a temporary file
+        """
+        return self._size > self._max_size
+
+    def write(self, text: str):
+        """
+        Appends text to the output.
+        :param text: The text to append
+        """
+        self._file.write(text)
+        self._size += len(text)
+
+    def chunks(self) -> Iterator[str]:
+        """
+        :returns: Iterator over the output in chunks, without materializing all of it
+        """
+        self._file.seek(0)
+        try:
+            while chunk := self._file.read(_CHUNK_SIZE):
+                yield chunk
+        finally:
+            self._file.seek(0, io.SEEK_END)
+
+    def read(self) -> str:
+        """
+        :returns: The whole output
+        """
+        return "".join(self.chunks())
+
+    def close(self):
+        """
+        Releases the output, removing its temporary file.
+        """
+        self._file.close()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __str__(self) -> str:
+        return self.read()
+
+    def __contains__(self, text: str) -> bool:
+        return text in self.read()
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, SpooledOutput):
+            return self is other
+        return isinstance(other, str) and len(other) == self._size and self.read() == other
+
+    __hash__ = object.__hash__
+
+    def __repr__(self) -> str:
+        return f"SpooledOutput(size={self._size}, spooled={self.spooled})"
+
+
 class CommandResult(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     code: int
     command: str
-    output: Optional[str] = ""
+    output: Optional[Union[str, SpooledOutput]] = ""
     target: Optional[str] = ""
-    error: Optional[str] = ""
+    error: Optional[Union[str, SpooledOutput]] = ""
 
 
     def __add__(self, other):
-        self.code &= other.code
+        # The first failure decides the code of the aggregated result
+        self.code = self.code or other.code
         self.command += " && " + other.command
-        self.output = "\n".join(filter(lambda val: val is not None, (self.output, other.output)))
+        self.output = _join_outputs(self.output, other.output)
         self.target = other.target or self.target
-        self.error = "\n".join(filter(lambda val: val is not None, (self.error, other.error)))
+        self.error = _join_outputs(self.error, other.error)
         return self
 
     def add_result(self, other):
         return self + other
+
+    @field_serializer("output", "error")
+    def _serialize_output(self, value: Optional[Union[str, SpooledOutput]]) -> Optional[str]:
+        return value if value is None or isinstance(value, str) else value.read()
+
+
+class ResultChain:
+    """
+    Aggregation of the results of chained commands, adding a result in O(1) - the results are kept as they are and
+    their commands, outputs and errors only joined when read.
+    """
+    __slots__ = ("_results", "_code")
+
+    def __init__(self, *results: CommandResult):
+        """
+        :param results: The results of the first commands of the chain
+        """
+        self._results = []
+        self._code = 0
+        for result in results:
+            self.add_result(result)
+
+    def add_result(self, result: CommandResult) -> "ResultChain":
+        """
+        :param result: The result of the next command of the chain
+        :returns: Self for method chaining
+        """
+        self._results.append(result)
+        # The first failure decides the code of the chain
+        self._code = self._code or result.code
+        return self
+
+    @property
+    def results(self) -> list[CommandResult]:
+        """
+        :returns: The result of every command of the chain, in execution order
+        """
+        return list(self._results)
+
+    @property
+    def code(self) -> int:
+        """
+        :returns: The code of the first failed command, 0 if all succeeded
+        """
+        return self._code
+
+    @property
+    def command(self) -> str:
+        return " && ".join(result.command for result in self._results)
+
+    @property
+    def output(self) -> Union[str, SpooledOutput]:
+        return _join_outputs(*(result.output for result in self._results))
+
+    @property
+    def error(self) -> Union[str, SpooledOutput]:
+        return _join_outputs(*(result.error for result in self._results))
+
+    @property
+    def target(self) -> Optional[str]:
+        """
+        :returns: The target of the last command of the chain having one
+        """
+        return next((result.target for result in reversed(self._results) if result.target), "")
+
+    def to_result(self) -> CommandResult:
+        """
+        Materializes the chain as a single CommandResult, joining the commands, outputs and errors once.
+        :returns: The aggregated result - the only result itself for a chain of a single command
+        """
+        if len(self._results) == 1:
+            return self._results[0]
+        # The step results are already validated, so the aggregation skips the model validation
+        return CommandResult.model_construct(code=self.code, command=self.command, output=self.output,
+                                             target=self.target, error=self.error)
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def __iter__(self) -> Iterator[CommandResult]:
+        return iter(self._results)
+
+    def __repr__(self) -> str:
+        return f"ResultChain(results={len(self._results)}, code={self.code})"
+
+
+def _join_outputs(*values: Optional[Union[str, SpooledOutput]]) -> Union[str, SpooledOutput]:
+    """
+    :param values: Outputs of chained commands
+    :returns: The outputs joined by new lines - as a spooled handle if any of them is spooled
+    """
+    values = [value for value in values if value is not None]
+    if any(isinstance(value, SpooledOutput) for value in values):
+        return SpooledOutput.join(values)
+    return "\n".join(values)
@@ -1,6 +1,32 @@
 from enum import Enum
+from pydantic import BaseModel
 
 
 class ExecutorType(Enum):
     Local = "Local"
+    JacocoDaemon = "JacocoDaemon"
+    Async = "Async"
     Remote = "Remote"
+
+
+class BatchPolicy(Enum):
+    CollectAll = "collect-all"
+    FailFast = "fail-fast"
+
+
+class BatchSummary(BaseModel):
+    total: int
+    succeeded: int = 0
+    failed: int = 0
+    skipped: int = 0
+    wall_time: float = 0.0
+    cpu_time: float = 0.0
+
+
+class CacheStatistics(BaseModel):
+    hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0
+    entries: int = 0
+    size: int = 0
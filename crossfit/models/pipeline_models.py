@@ -0,0 +1,33 @@
+from typing import Optional
+from pydantic import BaseModel
+
+from crossfit.models.command_models import CommandResult
+
+
+class SweepSummary(BaseModel):
+    total: int
+    succeeded: int = 0
+    failed: int = 0
+    skipped: int = 0
+    bytes_collected: int = 0
+    wall_time: float = 0.0
+    failures: dict[str, str] = {}
+    results: list[Optional[CommandResult]] = []
+
+
+class CoverageTotals(BaseModel):
+    build: str
+    lines_valid: int = 0
+    lines_covered: int = 0
+    branches_valid: int = 0
+    branches_covered: int = 0
+    probes_valid: int = 0
+    probes_covered: int = 0
+
+    @property
+    def line_rate(self) -> float:
+        return self.lines_covered / self.lines_valid if self.lines_valid else 0.0
+
+    @property
+    def branch_rate(self) -> float:
+        return self.branches_covered / self.branches_valid if self.branches_valid else 0.0
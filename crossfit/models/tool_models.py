@@ -1,4 +1,5 @@
 from enum import Enum
+from pydantic import BaseModel
 
 
 class ToolType(Enum):
@@ -12,3 +13,11 @@ class ReportFormat(Enum):
     Html = "Html"
     Xml = "Xml"
     Cobertura = "Cobertura"
+
+
+class DeltaSummary(BaseModel):
+    covered_before: int = 0
+    covered_after: int = 0
+    newly_covered: int = 0
+    no_longer_covered: int = 0
+    classes: list[str] = []
@@ -0,0 +1,9 @@
+from .merge_planner import MergePlanner
+from .coverage_watcher import CoverageWatcher
+from .snapshot_sweep import SnapshotSweep, SnapshotTarget
+from .coverage_slicer import CoverageSlicer
+from .coverage_index import CoverageIndex
+from .sharded_reporter import ShardedReporter
+
+__all__ = ['MergePlanner', 'CoverageWatcher', 'SnapshotSweep', 'SnapshotTarget', 'CoverageSlicer', 'CoverageIndex',
+           'ShardedReporter']
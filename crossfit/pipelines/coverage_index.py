@@ -0,0 +1,306 @@
+import sqlite3
+import time
+import xml.etree.ElementTree as ElementTree
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from crossfit.models.pipeline_models import CoverageTotals
+from crossfit.tools.cobertura import CoberturaAggregate
+from crossfit.tools.jacoco_exec import ExecFileLoader
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS builds (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    timestamp REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS classes (
+    id INTEGER PRIMARY KEY,
+    build_id INTEGER NOT NULL REFERENCES builds(id) ON DELETE CASCADE,
+    package TEXT NOT NULL,
+    name TEXT NOT NULL,
+    filename TEXT,
+    lines_valid INTEGER NOT NULL,
+    lines_covered INTEGER NOT NULL,
+    branches_valid INTEGER NOT NULL,
+    branches_covered INTEGER NOT NULL,
+    probes_valid INTEGER NOT NULL,
+    probes_covered INTEGER NOT NULL,
+    probes BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS lines (
+    class_id INTEGER NOT NULL REFERENCES classes(id) ON DELETE CASCADE,
+    number INTEGER NOT NULL,
+    hits INTEGER NOT NULL,
+    branches_valid INTEGER NOT NULL,
+    branches_covered INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS classes_build_package ON classes (build_id, package, name);
+CREATE INDEX IF NOT EXISTS classes_build_filename ON classes (build_id, filename);
+CREATE INDEX IF NOT EXISTS lines_class ON lines (class_id, number);
+"""
+
+_TOTALS = ("SUM(lines_valid), SUM(lines_covered), SUM(branches_valid), SUM(branches_covered), "
+           "SUM(probes_valid), SUM(probes_covered)")
+
+# (package, class name, file name, [(line number, hits, branches valid, branches covered)], probes valid,
+# probes packed into an int - bit i is probe i)
+_ClassRecord = tuple[str, str, Optional[str], list[tuple[int, int, int, int]], int, int]
+
+
+class CoverageIndex:
+    """
+    Local SQLite index of coverage reports, one build at a time, answering coverage and trend queries per package
+    and source file without re-reading the reports.
+    Ingests JaCoCo .exec files (class and probe totals only) and XML reports, and Cobertura XML files.
+    """
+
+    def __init__(self, path: Path):
+        """
+        :param path: The index database file, created if it does not exist - ':memory:' for an in-memory index
+        """
+        self.path = path
+        self._connection = sqlite3.connect(str(path))
+        self._connection.execute("PRAGMA foreign_keys = ON")
+        if str(path) != ":memory:":
+            self._connection.execute("PRAGMA journal_mode = WAL")
+            self._connection.execute("PRAGMA synchronous = NORMAL")
+        self._connection.executescript(_SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """
+        Closes the index database.
+        """
+        self._connection.close()
+
+    def ingest(self, coverage_file: Path, build: str, timestamp: Optional[float] = None) -> int:
+        """
+        Loads a coverage file into the index, in a single transaction. Files ingested under the same build are
+        merged into it: a class already indexed in the build has its line hits summed and its probes OR-ed, so
+        partial files of one build are not counted twice.
+        :param coverage_file: A JaCoCo .exec file or XML report, or a Cobertura XML file
+        :param build: Name of the build the coverage belongs to
+        :param timestamp: Time of the build for ordering trends, defaults to now when the build is new
+        :returns: The number of classes ingested
+        :raises ValueError: If the file could not be parsed
+        """
+        records = _read_records(Path(coverage_file))
+        with self._connection:
+            build_id = self._build_id(build, timestamp)
+            count = 0
+            for package, name, filename, lines, probes_valid, probes in records:
+                row = self._connection.execute(
+                    "SELECT id, filename, probes FROM classes "
+                    "WHERE build_id = ? AND package = ? AND name = ? AND probes_valid = ?",
+                    (build_id, package, name, probes_valid)).fetchone()
+                if row is not None:
+                    class_id, filename = row[0], row[1] if row[1] is not None else filename
+                    probes |= int.from_bytes(row[2], "little")
+                    lines = _merge_lines(self._connection.execute(
+                        "SELECT number, hits, branches_valid, branches_covered FROM lines WHERE class_id = ?",
+                        (class_id,)).fetchall(), lines)
+                    self._connection.execute("DELETE FROM classes WHERE id = ?", (class_id,))
+                class_id = self._connection.execute(
+                    "INSERT INTO classes (build_id, package, name, filename, lines_valid, lines_covered, "
+                    "branches_valid, branches_covered, probes_valid, probes_covered, probes) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (build_id, package, name, filename, len(lines), sum(1 for line in lines if line[1]),
+                     sum(line[2] for line in lines), sum(line[3] for line in lines), probes_valid,
+                     probes.bit_count(), probes.to_bytes((probes_valid + 7) // 8, "little"))
+                ).lastrowid
+                self._connection.executemany(
+                    "INSERT INTO lines (class_id, number, hits, branches_valid, branches_covered) "
+                    "VALUES (?, ?, ?, ?, ?)", ((class_id, *line) for line in lines))
+                count += 1
+        return count
+
+    def remove_build(self, build: str) -> bool:
+        """
+        :param build: Name of the build to remove with all its coverage
+        :returns: True if the build was indexed
+        """
+        with self._connection:
+            return self._connection.execute("DELETE FROM builds WHERE name = ?", (build,)).rowcount > 0
+
+    def builds(self) -> list[str]:
+        """
+        :returns: The indexed builds, oldest first
+        """
+        return [name for name, in self._connection.execute("SELECT name FROM builds ORDER BY timestamp, id")]
+
+    def coverage(self, build: str, package: Optional[str] = None, filename: Optional[str] = None) -> CoverageTotals:
+        """
+        :param build: Name of the build
+        :param package: Restricts the totals to a package, None for all packages
+        :param filename: Restricts the totals to a source file, None for all files
+        :returns: The coverage totals of the build - zero for unknown builds, packages and files
+        """
+        condition, parameters = _filter(package, filename)
+        row = self._connection.execute(
+            f"SELECT {_TOTALS} FROM classes JOIN builds ON builds.id = classes.build_id "
+            f"WHERE builds.name = ?{condition}", (build, *parameters)).fetchone()
+        return _totals(build, row)
+
+    def packages(self, build: str) -> dict[str, CoverageTotals]:
+        """
+        :param build: Name of the build
+        :returns: The coverage totals of every package of the build, by package name
+        """
+        return {row[0]: _totals(build, row[1:]) for row in self._connection.execute(
+            f"SELECT package, {_TOTALS} FROM classes JOIN builds ON builds.id = classes.build_id "
+            f"WHERE builds.name = ? GROUP BY package ORDER BY package", (build,))}
+
+    def trend(self,
+              package: Optional[str] = None,
+              filename: Optional[str] = None,
+              last: Optional[int] = 30) -> list[CoverageTotals]:
+        """
+        :param package: Restricts the totals to a package, None for all packages
+        :param filename: Restricts the totals to a source file, None for all files
+        :param last: Number of most recent builds to return, None for all builds
+        :returns: The coverage totals of each build, oldest first
+        """
+        condition, parameters = _filter(package, filename)
+        rows = self._connection.execute(
+            f"SELECT * FROM (SELECT builds.name, builds.timestamp, builds.id, {_TOTALS} FROM builds "
+            f"LEFT JOIN classes ON builds.id = classes.build_id{condition} GROUP BY builds.id "
+            f"ORDER BY builds.timestamp DESC, builds.id DESC LIMIT ?) ORDER BY timestamp, id",
+            (*parameters, -1 if last is None else last)).fetchall()
+        return [_totals(row[0], row[3:]) for row in rows]
+
+    def lines(self, build: str, filename: str) -> dict[int, int]:
+        """
+        :param build: Name of the build
+        :param filename: The source file
+        :returns: The summed hits of every line of the file
+        """
+        return dict(self._connection.execute(
+            "SELECT lines.number, SUM(lines.hits) FROM lines JOIN classes ON classes.id = lines.class_id "
+            "JOIN builds ON builds.id = classes.build_id WHERE builds.name = ? AND classes.filename = ? "
+            "GROUP BY lines.number ORDER BY lines.number", (build, filename)))
+
+    def _build_id(self, build: str, timestamp: Optional[float]) -> int:
+        """
+        :param build: Name of the build
+        :param timestamp: Time of the build, updated on existing builds when given
+        :returns: The id of the build, created if it is not indexed yet
+        """
+        row = self._connection.execute("SELECT id FROM builds WHERE name = ?", (build,)).fetchone()
+        if row is None:
+            return self._connection.execute("INSERT INTO builds (name, timestamp) VALUES (?, ?)",
+                                            (build, time.time() if timestamp is None else timestamp)).lastrowid
+        if timestamp is not None:
+            self._connection.execute("UPDATE builds SET timestamp = ? WHERE id = ?", (timestamp, row[0]))
+        return row[0]
+
+
+def _filter(package: Optional[str], filename: Optional[str]) -> tuple[str, tuple[str, ...]]:
+    """
+    :returns: The SQL condition restricting classes to the package and file, and its parameters
+    """
+    condition, parameters = "", ()
+    if package is not None:
+        condition, parameters = condition + " AND classes.package = ?", parameters + (package,)
+    if filename is not None:
+        condition, parameters = condition + " AND classes.filename = ?", parameters + (filename,)
+    return condition, parameters
+
+
+def _totals(build: str, row: Iterable[Optional[int]]) -> CoverageTotals:
+    """
+    :returns: The coverage totals of a row of summed class totals - NULL sums of no classes count as zero
+    """
+    values = [value or 0 for value in row]
+    return CoverageTotals(build=build, lines_valid=values[0], lines_covered=values[1], branches_valid=values[2],
+                          branches_covered=values[3], probes_valid=values[4], probes_covered=values[5])
+
+
+def _merge_lines(indexed: list[tuple[int, int, int, int]],
+                 added: list[tuple[int, int, int, int]]) -> list[tuple[int, int, int, int]]:
+    """
+    :param indexed: The lines of a class already indexed in the build
+    :param added: The lines of the same class in a newly ingested file
+    :returns: The lines of both, with hits summed and the most branches of each line kept
+    """
+    merged = {line[0]: line for line in indexed}
+    for number, hits, branches_valid, branches_covered in added:
+        if number in merged:
+            _, indexed_hits, indexed_valid, indexed_covered = merged[number]
+            merged[number] = (number, indexed_hits + hits, max(indexed_valid, branches_valid),
+                              max(indexed_covered, branches_covered))
+        else:
+            merged[number] = (number, hits, branches_valid, branches_covered)
+    return [merged[number] for number in sorted(merged)]
+
+
+def _read_records(path: Path) -> Iterator[_ClassRecord]:
+    """
+    :param path: A JaCoCo .exec file or XML report, or a Cobertura XML file
+    :returns: Iterator over the class records of the file
+    :raises ValueError: If the file could not be parsed
+    """
+    if path.suffix == ".exec":
+        loader = ExecFileLoader()
+        loader.load(path)
+        return ((data.name.rpartition("/")[0], data.name, None, [], data.probe_count, data.probes)
+                for data in loader.store)
+    try:
+        _, root = next(ElementTree.iterparse(path, events=("start",)))
+    except (ElementTree.ParseError, StopIteration) as e:
+        raise ValueError(f"Could not parse coverage file '{path}': {e}") from e
+    if root.tag == "report":
+        return _read_jacoco_report(path)
+    if root.tag == "coverage":
+        return _read_cobertura(path)
+    raise ValueError(f"'{path}' is neither a JaCoCo nor a Cobertura report - root is <{root.tag}>")
+
+
+def _read_cobertura(path: Path) -> Iterator[_ClassRecord]:
+    """
+    :param path: A Cobertura XML file
+    :returns: Iterator over the classes of the file, with lines repeated across its documents summed
+    """
+    aggregate = CoberturaAggregate()
+    aggregate.add_file(path)
+    for package in aggregate.packages.values():
+        for coverage_class in package.classes.values():
+            lines = [(number, line.hits, line.total_conditions, line.covered_conditions)
+                     for number, line in sorted(coverage_class.lines.items())]
+            yield package.name, coverage_class.name, coverage_class.filename, lines, 0, 0
+
+
+def _read_jacoco_report(path: Path) -> Iterator[_ClassRecord]:
+    """
+    Streams a JaCoCo XML report. JaCoCo reports lines per source file, so each source file becomes one class
+    record named after its path; hits are the line's covered instructions.
+    :param path: A JaCoCo XML report
+    :returns: Iterator over the source files of the report
+    """
+    package = ""
+    lines: list[tuple[int, int, int, int]] = []
+    try:
+        for event, element in ElementTree.iterparse(path, events=("start", "end")):
+            tag = element.tag
+            if event == "start":
+                if tag == "package":
+                    package = element.get("name", "")
+                elif tag == "sourcefile":
+                    lines = []
+            elif tag == "line":
+                missed_branches, covered_branches = int(element.get("mb", 0)), int(element.get("cb", 0))
+                lines.append((int(element.get("nr")), int(element.get("ci", 0)),
+                              missed_branches + covered_branches, covered_branches))
+            elif tag == "sourcefile":
+                filename = f"{package}/{element.get('name', '')}" if package else element.get("name", "")
+                yield package, filename, filename, lines, 0, 0
+                element.clear()
+            elif tag in ("class", "package"):
+                element.clear()
+    except ElementTree.ParseError as e:
+        raise ValueError(f"Could not parse JaCoCo report '{path}': {e}") from e
@@ -0,0 +1,134 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from logging import Logger
+from pathlib import Path
+from typing import Iterator, Optional
+
+from crossfit.executors.executor import Executor
+from crossfit.models.command_models import CommandResult
+from crossfit.tools.jacoco_agent import AgentClient
+from crossfit.tools.slice_store import SliceStore, exec_units
+from crossfit.tools.tool import Tool
+
+
+class CoverageSlicer:
+    """
+    Records the coverage of each test as a separate slice, snapshotting and resetting the agent atomically after
+    every test, so the coverage of one test never leaks into the next one's slice.
+    Slices are stored deduplicated and compressed in a SliceStore, which answers which tests hit a class or file.
+    """
+
+    def __init__(self,
+                 tool: Tool,
+                 executor: Executor,
+                 logger: Logger,
+                 store: SliceStore,
+                 session: str,
+                 work_dir: Path,
+                 extras: tuple[tuple[str, Optional[str]], ...] = (),
+                 client: Optional[AgentClient] = None):
+        """
+        :param tool: The tool building the snapshot and reset commands (e.g. Jacoco or DotnetCoverage)
+        :param executor: The executor running the commands
+        :param logger: Logger instance for logging failed slices (required)
+        :param store: The store the slices are recorded in
+        :param session: The coverage session of the agent under test
+        :param work_dir: Directory the snapshots are written to before they are stored
+        :param extras: Extra options of the snapshot and reset commands (e.g. '--address', '--port')
+        :param client: Client of a JaCoCo agent to dump and reset in-process instead of running the tool's commands,
+                       keeping the per-test overhead to a socket round trip
+        """
+        self._tool = tool
+        self._executor = executor
+        self._logger = logger
+        self._store = store
+        self._session = session
+        self._work_dir = Path(work_dir)
+        self._extras = extras
+        self._client = client
+        self.recorded = 0
+        self.failed = 0
+        self.overhead = 0.0
+
+    @property
+    def store(self) -> SliceStore:
+        """Returns the store the slices are recorded in."""
+        return self._store
+
+    def reset(self) -> CommandResult:
+        """
+        Resets the agent's coverage, discarding everything collected before the first test.
+        :returns: The reset's CommandResult
+        """
+        if self._client is not None:
+            return self._run_client("agent reset", lambda: self._client.dump(dump=False, reset=True))
+        return self._executor.execute(self._tool.reset_coverage(self._session, *self._extras))
+
+    def record(self, label: str) -> CommandResult:
+        """
+        Snapshots and resets the agent's coverage in a single command, storing the snapshot as the test's slice.
+        :param label: The test's label
+        :returns: The snapshot's CommandResult - a failed snapshot records no slice
+        """
+        started = time.perf_counter()
+        if self._client is not None:
+            result = self._run_client(
+                f"agent dump {label}",
+                lambda: self._store.add(label, exec_units(self._client.dump(dump=True, reset=True))))
+        else:
+            result = self._record_snapshot(label)
+        self.overhead += time.perf_counter() - started
+        if result.code == 0:
+            self.recorded += 1
+        else:
+            self.failed += 1
+            self._logger.error(f"Could not record the coverage slice of '{label}'. Code: {result.code}")
+        return result
+
+    @contextmanager
+    def slice(self, label: str) -> Iterator[None]:
+        """
+        Records the coverage of the wrapped test - whether it passed or not - as its slice.
+        :param label: The test's label
+        """
+        try:
+            yield
+        finally:
+            self.record(label)
+
+    def _record_snapshot(self, label: str) -> CommandResult:
+        """
+        Runs the tool's snapshot command with --reset and stores the snapshot written.
+        :param label: The test's label
+        :returns: The snapshot's CommandResult, failed if the snapshot could not be parsed
+        """
+        self._work_dir.mkdir(parents=True, exist_ok=True)
+        target_file = Path(f".slice-{os.getpid()}-{threading.get_ident()}")
+        command = self._tool.snapshot_coverage(self._session, self._work_dir, target_file,
+                                               *self._extras, ("--reset", None))
+        result = self._executor.execute(command)
+        for snapshot in command.outputs:
+            try:
+                if result.code == 0:
+                    self._store.add_file(label, snapshot)
+            except (OSError, ValueError) as e:
+                result.code = 1
+                result.error = f"{result.error}\n{e}".strip()
+            finally:
+                Path(snapshot).unlink(missing_ok=True)
+        return result
+
+    @staticmethod
+    def _run_client(command: str, call) -> CommandResult:
+        """
+        :param command: Description of the call in its CommandResult, e.g. 'agent reset'
+        :param call: The in-process agent call
+        :returns: A CommandResult of the call, failed with the error it raised
+        """
+        try:
+            call()
+        except (OSError, ValueError, EOFError) as e:
+            return CommandResult(code=1, command=command, error=str(e))
+        return CommandResult(code=0, command=command)
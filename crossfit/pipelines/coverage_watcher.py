@@ -0,0 +1,398 @@
+import ctypes
+import ctypes.util
+import fnmatch
+import os
+import queue
+import select
+import struct
+import tempfile
+import threading
+import time
+from logging import Logger
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+from crossfit.commands.command import Command
+from crossfit.executors.executor import Executor
+from crossfit.models.command_models import CommandResult
+from crossfit.tools.tool import Tool
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+_INOTIFY_EVENT = struct.Struct("iIII")
+_READ_SIZE = 64 * 1024
+_STOP_POLL_INTERVAL = 0.1
+
+
+class CoverageWatcher:
+    """
+    Watches a drop directory and continuously folds arriving coverage files into a rolling aggregate.
+    Arrivals are debounced until a file stopped changing, batched, and appended to the aggregate - optionally
+    regenerating a report from the aggregate on an interval. Files that could not be folded are retried one at a
+    time, and moved to a quarantine directory once out of retries. Uses inotify on Linux, polling elsewhere.
+    """
+
+    def __init__(self,
+                 tool: Tool,
+                 executor: Executor,
+                 logger: Logger,
+                 watch_dir: Path,
+                 aggregate_file: Path,
+                 patterns: Iterable[str] = ("*.exec", "*.xml"),
+                 debounce: float = 1.0,
+                 max_batch: int = 64,
+                 queue_size: int = 1024,
+                 consume: bool = True,
+                 include_existing: bool = True,
+                 report_command: Optional[Callable[[Path], Command]] = None,
+                 report_interval: Optional[float] = None,
+                 poll_interval: float = 1.0,
+                 use_inotify: bool = True,
+                 max_retries: int = 2,
+                 quarantine_dir: Optional[Path] = None):
+        """
+        :param tool: The tool building the append or merge commands (e.g. Jacoco or DotnetCoverage)
+        :param executor: The executor running the commands
+        :param logger: Logger instance for logging the watch progress (required)
+        :param watch_dir: The drop directory the coverage files land in
+        :param aggregate_file: The rolling aggregate coverage file
+        :param patterns: File name patterns of the coverage files to merge
+        :param debounce: Time in seconds a file must stay unchanged before it is merged
+        :param max_batch: Maximal number of files folded into the aggregate by a single command
+        :param queue_size: Maximal number of arrivals queued, and of files waiting to be debounced - the watch
+                           blocks beyond it
+        :param consume: If True, merged files are removed from the drop directory
+        :param include_existing: If True, files already in the drop directory are merged on start
+        :param report_command: Builds the report command from the aggregate file, e.g.
+                               lambda aggregate: jacoco.save_report([aggregate], report_dir, ...)
+        :param report_interval: Minimal time in seconds between report regenerations, None to only
+                                regenerate the report on stop
+        :param poll_interval: Time in seconds between directory scans when polling
+        :param use_inotify: If False, always polls the directory
+        :param max_retries: Number of times a file is folded again after a failed fold
+        :param quarantine_dir: Directory the files still failing after their retries are moved to, defaults to
+                               '.failed' in the drop directory
+        :raises ValueError: If the timing or size parameters are out of range
+        """
+        if debounce < 0 or poll_interval <= 0:
+            raise ValueError(f"Watch intervals must be positive. Valued as: '{debounce}', '{poll_interval}'")
+        if max_batch < 1 or queue_size < 1:
+            raise ValueError(f"Watch batch and queue sizes must be at least 1. Valued as: '{max_batch}', "
+                             f"'{queue_size}'")
+        if max_retries < 0:
+            raise ValueError(f"Watch retries must not be negative. Valued as: '{max_retries}'")
+        if report_interval is not None and report_interval <= 0:
+            raise ValueError(f"Report interval must be positive. Valued as: '{report_interval}'")
+        self._tool = tool
+        self._executor = executor
+        self._logger = logger
+        self._watch_dir = Path(watch_dir)
+        self._aggregate_file = Path(aggregate_file)
+        self._patterns = tuple(patterns)
+        self._debounce = debounce
+        self._max_batch = max_batch
+        self._queue_size = queue_size
+        self._max_retries = max_retries
+        self._quarantine_dir = Path(quarantine_dir) if quarantine_dir is not None else self._watch_dir / ".failed"
+        self._consume = consume
+        self._include_existing = include_existing
+        self._report_command = report_command
+        self._report_interval = report_interval
+        self._poll_interval = poll_interval
+        self._use_inotify = use_inotify
+
+        self._arrivals: queue.Queue[Path] = queue.Queue(maxsize=queue_size)
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+        self._dirty = False
+        self._last_report = 0.0
+        self.merged_files = 0
+        self.failed_files = 0
+        self.reports = 0
+        self.last_result: Optional[CommandResult] = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def start(self):
+        """
+        Starts watching the drop directory in background threads.
+        :raises RuntimeError: If the watcher is already running
+        """
+        if self._threads:
+            raise RuntimeError("Coverage watcher is already running.")
+        self._watch_dir.mkdir(parents=True, exist_ok=True)
+        self._stop.clear()
+        watch = self._watch_inotify if self._use_inotify and _inotify_available() else self._watch_polling
+        self._logger.info(f"Watching '{self._watch_dir}' for coverage files ({watch.__name__.split('_')[-1]})")
+        self._threads = [threading.Thread(target=watch, name="crossfit-watch", daemon=True),
+                         threading.Thread(target=self._work, name="crossfit-watch-merge", daemon=True)]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        """
+        Stops watching, merging the files that arrived so far and regenerating the report if needed.
+        """
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def _matches(self, path: Path) -> bool:
+        """
+        :param path: A file in the drop directory
+        :returns: True if the file is a coverage file to merge
+        """
+        name = path.name
+        return (not name.startswith(".") and path != self._aggregate_file
+                and any(fnmatch.fnmatch(name, pattern) for pattern in self._patterns))
+
+    def _offer(self, path: Path):
+        """
+        Queues an arrival, blocking while the queue is full.
+        :param path: The arrived file
+        """
+        if not self._matches(path):
+            return
+        while not self._stop.is_set():
+            try:
+                self._arrivals.put(path, timeout=_STOP_POLL_INTERVAL)
+                return
+            except queue.Full:
+                continue
+
+    def _scan(self) -> dict[Path, tuple[int, int]]:
+        """
+        :returns: The size and modification time of every coverage file in the drop directory
+        """
+        signatures = {}
+        with os.scandir(self._watch_dir) as entries:
+            for entry in entries:
+                path = Path(entry.path)
+                if entry.is_file() and self._matches(path):
+                    stat = entry.stat()
+                    signatures[path] = (stat.st_size, stat.st_mtime_ns)
+        return signatures
+
+    def _watch_polling(self):
+        """
+        Scans the drop directory periodically, queueing files that appeared or changed since the last scan.
+        """
+        seen = {} if self._include_existing else self._scan()
+        while not self._stop.is_set():
+            try:
+                current = self._scan()
+            except OSError as e:
+                self._logger.warning(f"Could not scan '{self._watch_dir}': {e}")
+                current = seen
+            for path, signature in current.items():
+                if seen.get(path) != signature:
+                    self._offer(path)
+            seen = current
+            self._stop.wait(self._poll_interval)
+
+    def _watch_inotify(self):
+        """
+        Queues files written or moved into the drop directory, as reported by inotify.
+        Rescans the directory when the kernel's event queue overflowed.
+        """
+        libc = _libc()
+        descriptor = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if descriptor < 0:
+            self._logger.warning("Could not initialize inotify, falling back to polling.")
+            return self._watch_polling()
+        try:
+            if libc.inotify_add_watch(descriptor, os.fsencode(self._watch_dir), IN_CLOSE_WRITE | IN_MOVED_TO) < 0:
+                self._logger.warning(f"Could not watch '{self._watch_dir}' with inotify, falling back to polling.")
+                return self._watch_polling()
+            if self._include_existing:
+                for path in self._scan():
+                    self._offer(path)
+            while not self._stop.is_set():
+                readable, _, _ = select.select([descriptor], [], [], _STOP_POLL_INTERVAL)
+                if not readable:
+                    continue
+                for mask, name in _read_inotify_events(os.read(descriptor, _READ_SIZE)):
+                    if mask & IN_Q_OVERFLOW:
+                        self._logger.warning("inotify event queue overflowed, rescanning the drop directory.")
+                        for path in self._scan():
+                            self._offer(path)
+                    elif name and not mask & IN_ISDIR:
+                        self._offer(self._watch_dir / name)
+        finally:
+            os.close(descriptor)
+
+    def _work(self):
+        """
+        Debounces queued arrivals, folds ready files into the aggregate in batches and regenerates the report.
+        Arrivals are taken without waiting for the queue to go quiet, so files are folded under steady arrivals too.
+        Files of a failed fold are debounced again and retried one at a time, so a broken file does not fail the
+        others. On stop, folds every pending file regardless of the debounce.
+        """
+        pending: dict[Path, float] = {}
+        attempts: dict[Path, int] = {}
+        while True:
+            stopping = self._stop.is_set()
+            self._take_arrivals(pending, stopping)
+
+            now = time.monotonic()
+            ready = []
+            for path in [path for path, arrived in pending.items() if stopping or now - arrived >= self._debounce]:
+                del pending[path]
+                if path.exists():
+                    ready.append(path)
+                else:
+                    attempts.pop(path, None)
+            fresh = [path for path in ready if path not in attempts]
+            batches = ([fresh[index:index + self._max_batch] for index in range(0, len(fresh), self._max_batch)]
+                       + [[path] for path in ready if path in attempts])
+            for batch in batches:
+                if self._fold(batch):
+                    for path in batch:
+                        attempts.pop(path, None)
+                    continue
+                for path in batch:
+                    attempts[path] = attempts.get(path, 0) + 1
+                    if attempts[path] > self._max_retries:
+                        del attempts[path]
+                        self._quarantine(path)
+                    else:
+                        pending[path] = time.monotonic()
+
+            if self._dirty and self._report_command is not None and (stopping or (
+                    self._report_interval is not None and now - self._last_report >= self._report_interval)):
+                self._regenerate_report()
+            if stopping and not pending and self._arrivals.empty():
+                return
+
+    def _take_arrivals(self, pending: dict[Path, float], stopping: bool):
+        """
+        Moves up to max_batch queued arrivals to the pending files, waiting briefly for the first one unless
+        stopping. Takes nothing while queue_size files are pending, so the watch blocks instead of pending growing.
+        :param pending: The arrival time of every file waiting to be debounced, updated in place
+        :param stopping: If True, does not wait for arrivals
+        """
+        for taken in range(self._max_batch):
+            if len(pending) >= self._queue_size:
+                if not taken and not stopping:
+                    self._stop.wait(_STOP_POLL_INTERVAL)
+                return
+            try:
+                if taken or stopping:
+                    path = self._arrivals.get_nowait()
+                else:
+                    path = self._arrivals.get(timeout=_STOP_POLL_INTERVAL)
+            except queue.Empty:
+                return
+            pending[path] = time.monotonic()
+
+    def _fold(self, batch: list[Path]) -> bool:
+        """
+        Folds a batch of coverage files into the aggregate, removing them when consumed.
+        :param batch: The coverage files to fold
+        :returns: False if the fold failed
+        """
+        if not batch:
+            return True
+        self._logger.info(f"Folding {len(batch)} coverage files into '{self._aggregate_file}'")
+        if self._tool.supports_append:
+            result = self._executor.execute(self._tool.append_coverage(batch, self._aggregate_file))
+        else:
+            result = self._merge_into_aggregate(batch)
+        self.last_result = result
+        if result.code != 0:
+            self._logger.error(f"Could not fold coverage files into the aggregate. Code: {result.code}")
+            return False
+
+        self.merged_files += len(batch)
+        self._dirty = True
+        if self._consume:
+            for path in batch:
+                path.unlink(missing_ok=True)
+        return True
+
+    def _quarantine(self, path: Path):
+        """
+        Gives up on a file which could not be folded, moving it out of the drop directory.
+        :param path: The coverage file
+        """
+        self.failed_files += 1
+        target = self._quarantine_dir / path.name
+        try:
+            self._quarantine_dir.mkdir(parents=True, exist_ok=True)
+            os.replace(path, target)
+        except OSError as e:
+            self._logger.error(f"Could not fold '{path}' in {self._max_retries + 1} attempts, "
+                               f"nor move it to '{target}': {e}")
+            return
+        self._logger.error(f"Could not fold '{path}' in {self._max_retries + 1} attempts, moved it to '{target}'")
+
+    def _merge_into_aggregate(self, batch: list[Path]) -> CommandResult:
+        """
+        Merges the aggregate and the batch into a new file replacing the aggregate, for tools that cannot append.
+        :param batch: The coverage files to merge
+        :returns: The merge's CommandResult
+        """
+        inputs = ([self._aggregate_file] if self._aggregate_file.exists() else []) + batch
+        descriptor, temp_path = tempfile.mkstemp(prefix=f".{self._aggregate_file.name}.",
+                                                 suffix=self._aggregate_file.suffix, dir=self._aggregate_file.parent)
+        os.close(descriptor)
+        os.remove(temp_path)
+        try:
+            result = self._executor.execute(
+                self._tool.merge_coverage(inputs, Path(temp_path).parent, Path(Path(temp_path).name)))
+            if result.code == 0:
+                os.replace(temp_path, self._aggregate_file)
+            return result
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def _regenerate_report(self):
+        """
+        Regenerates the report from the aggregate.
+        """
+        self._last_report = time.monotonic()
+        self._dirty = False
+        result = self._executor.execute(self._report_command(self._aggregate_file))
+        self.reports += 1
+        if result.code != 0:
+            self._logger.error(f"Could not regenerate the coverage report. Code: {result.code}")
+
+
+def _libc():
+    """
+    :returns: The C library, loaded with errno support
+    """
+    return ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+
+
+def _inotify_available() -> bool:
+    """
+    :returns: True if the C library provides inotify
+    """
+    try:
+        return hasattr(_libc(), "inotify_init1")
+    except OSError:
+        return False
+
+
+def _read_inotify_events(data: bytes) -> Iterable[tuple[int, str]]:
+    """
+    :param data: Raw inotify_event structures read from the inotify descriptor
+    :returns: Iterator over the (mask, file name) of each event
+    """
+    offset = 0
+    while offset + _INOTIFY_EVENT.size <= len(data):
+        _, mask, _, length = _INOTIFY_EVENT.unpack_from(data, offset)
+        offset += _INOTIFY_EVENT.size
+        name = data[offset:offset + length].rstrip(b"\0")
+        offset += length
+        yield mask, os.fsdecode(name)
@@ -0,0 +1,111 @@
+import glob
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from logging import Logger
+from pathlib import Path
+from typing import Optional
+
+from crossfit.executors.executor import Executor
+from crossfit.models.command_models import CommandResult, ResultChain
+from crossfit.tools.tool import Tool
+
+
+class MergePlanner:
+    """
+    Merges large sets of coverage files as a tree reduction - inputs are split into batches of at most
+    fan_in files, the batches are merged concurrently into intermediates, and the intermediates are reduced
+    the same way until a single merge into the target remains.
+    """
+
+    def __init__(self,
+                 tool: Tool,
+                 executor: Executor,
+                 logger: Logger,
+                 fan_in: int = 64,
+                 parallelism: int = 4,
+                 intermediates_dir: Optional[Path] = None):
+        """
+        :param tool: The tool building the merge commands (e.g. Jacoco or DotnetCoverage)
+        :param executor: The executor running the merge commands
+        :param logger: Logger instance for logging the merge progress (required)
+        :param fan_in: Maximal number of files merged by a single command (at least 2)
+        :param parallelism: Maximal number of merge commands running at once
+        :param intermediates_dir: Directory to create the intermediates directory in, defaults to the temp dir
+        :raises ValueError: If fan_in or parallelism are out of range
+        """
+        if fan_in < 2:
+            raise ValueError(f"Merge fan-in must be at least 2. Valued as: '{fan_in}'")
+        if parallelism < 1:
+            raise ValueError(f"Merge parallelism must be at least 1. Valued as: '{parallelism}'")
+        self._tool = tool
+        self._executor = executor
+        self._logger = logger
+        self._fan_in = fan_in
+        self._parallelism = parallelism
+        self._intermediates_dir = intermediates_dir
+
+    def merge(self,
+              coverage_files: list[Path],
+              target_dir: Path,
+              target_file: Optional[Path],
+              *extras: tuple[str, Optional[str]]) -> CommandResult:
+        """
+        Merges the coverage files into the target, reducing them in parallel batches when there are more
+        files than the fan-in. Intermediates are always removed.
+        :param coverage_files: File paths (can handle wildcards) to the coverage files to merge.
+        :param target_dir: Targeted directory to save the merged coverage file to.
+        :param target_file: Specified merged file name - when not given, uses the tool's default.
+        :param extras: Extra options to pass to every merge command.
+        :returns: Aggregated CommandResult of all executed merge commands
+        """
+        files = self._resolve(coverage_files)
+        if len(files) <= self._fan_in:
+            return self._executor.execute(self._tool.merge_coverage(files, target_dir, target_file, *extras))
+
+        suffix = files[0].suffix
+        work_dir = Path(tempfile.mkdtemp(prefix="crossfit-merge-", dir=self._intermediates_dir))
+        chain = ResultChain()
+        try:
+            level = 0
+            while len(files) > self._fan_in:
+                batches = [files[i:i + self._fan_in] for i in range(0, len(files), self._fan_in)]
+                level_dir = work_dir / f"level-{level}"
+                targets = [Path(f"merged-{index}{suffix}") for index in range(len(batches))]
+                self._logger.info(f"Merging {len(files)} coverage files in {len(batches)} batches (level {level})")
+
+                commands = [self._tool.merge_coverage(batch, level_dir, target, *extras)
+                            for batch, target in zip(batches, targets)]
+                with ThreadPoolExecutor(max_workers=self._parallelism) as pool:
+                    level_results = list(pool.map(self._executor.execute, commands))
+
+                for level_result in level_results:
+                    chain.add_result(level_result)
+                failed = [level_result for level_result in level_results if level_result.code != 0]
+                if failed:
+                    self._logger.error(f"Stopping merge due to {len(failed)} failed batches at level {level}.")
+                    break
+
+                if level:
+                    shutil.rmtree(work_dir / f"level-{level - 1}", ignore_errors=True)
+                files = [level_dir / target for target in targets]
+                level += 1
+            else:
+                chain.add_result(
+                    self._executor.execute(self._tool.merge_coverage(files, target_dir, target_file, *extras)))
+            # The step results are only joined once, into the returned result
+            return chain.to_result()
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    @staticmethod
+    def _resolve(coverage_files: list[Path]) -> list[Path]:
+        """
+        :param coverage_files: File paths, which may contain glob patterns
+        :returns: The matching files, in the given order
+        """
+        resolved = []
+        for coverage_file in coverage_files:
+            matches = sorted(glob.glob(str(coverage_file), recursive=True))
+            resolved.extend(Path(match) for match in matches or [coverage_file])
+        return resolved
@@ -0,0 +1,418 @@
+import io
+import os
+import shutil
+import tempfile
+import xml.etree.ElementTree as ElementTree
+import zipfile
+from contextlib import nullcontext
+from logging import Logger
+from pathlib import Path
+from typing import IO, Optional
+from xml.sax.saxutils import quoteattr
+
+from crossfit.commands.command import Command
+from crossfit.executors.executor import Executor
+from crossfit.models.command_models import CommandResult, ResultChain
+from crossfit.models.executor_models import BatchPolicy
+from crossfit.models.tool_models import ReportFormat
+from crossfit.tools import jacoco_report
+from crossfit.tools.atomic_file import atomic_write
+from crossfit.tools.cobertura import merge_cobertura_files
+from crossfit.tools.dotnet_coverage import DotnetCoverage
+from crossfit.tools.jacoco import Jacoco
+from crossfit.tools.tool import Tool
+
+_ARCHIVE_SUFFIXES = (".jar", ".war", ".ear", ".zip")
+_COBERTURA_REPORT = "Cobertura.xml"
+
+
+class ShardedReporter:
+    """
+    Creates a coverage report as shards reported in parallel - the classes are partitioned by package into
+    contiguous, equally sized shards, each shard is reported by its own report command, and the shards' reports are
+    stitched into a single report with the content of an unsharded one.
+    JaCoCo shards by the packages of the class files, over all class roots and archives, and stitches XML, CSV and
+    HTML reports, dotnet-coverage shards by the assemblies of the coverage files and stitches Cobertura reports.
+    """
+
+    def __init__(self,
+                 tool: Tool,
+                 executor: Executor,
+                 logger: Logger,
+                 shards: Optional[int] = None,
+                 work_dir: Optional[Path] = None):
+        """
+        :param tool: The tool building the report commands (Jacoco or DotnetCoverage)
+        :param executor: The executor running the report commands
+        :param logger: Logger instance for logging the report progress (required)
+        :param shards: Maximal number of shards, all reported at once - defaults to the number of CPUs
+        :param work_dir: Directory to create the shards directory in, defaults to the temp dir
+        :raises ValueError: If shards is out of range
+        """
+        shards = shards if shards is not None else os.cpu_count() or 1
+        if shards < 1:
+            raise ValueError(f"Report shards must be at least 1. Valued as: '{shards}'")
+        self._tool = tool
+        self._executor = executor
+        self._logger = logger
+        self._shards = shards
+        self._work_dir = work_dir
+
+    def save_report(self,
+                    coverage_files: list[Path],
+                    target_dir: Path,
+                    sourcecode_dir: Optional[Path] = None,
+                    report_format: Optional[ReportFormat] = None,
+                    report_formats: Optional[list[ReportFormat]] = None,
+                    build_dir: Optional[Path] = None,
+                    *extras: tuple[str, Optional[str]]) -> CommandResult:
+        """
+        Creates a coverage report like the tool's save_report, reporting shards in parallel when the classes can be
+        partitioned - otherwise runs the tool's report command as is. Shard reports are always removed.
+        :param coverage_files: File paths to the coverage files to create the report from.
+        :param target_dir: Targeted directory to save the report to.
+        :param sourcecode_dir: Directory containing the covered source code files.
+        :param report_format: Primary format of the report.
+        :param report_formats: Additional formats of reports to create.
+        :param build_dir: Directory containing the compiled class files (JaCoCo only).
+        :param extras: Extra options to pass to every report command.
+        :returns: Aggregated CommandResult of all executed report commands
+        """
+        formats = {rf for rf in (report_formats or []) + [report_format] if rf is not None}
+        unsharded = self._report_command(coverage_files, target_dir, sourcecode_dir, report_format, report_formats,
+                                         build_dir, *extras)
+        shard_extras: list[tuple[tuple[str, Optional[str]], ...]] = []
+        if isinstance(self._tool, Jacoco):
+            report_extras = tuple(extra for extra in extras if extra[0] != "--classfiles")
+            shard_extras = [report_extras + tuple(("--classfiles", str(path)) for path in paths)
+                            for paths in self._partition_class_files(build_dir, extras)]
+            # Shards always report XML, which holds the counters the HTML index is stitched from
+            shard_formats = sorted(formats | {ReportFormat.Xml}, key=lambda rf: rf.value)
+        elif isinstance(self._tool, DotnetCoverage) and formats == {ReportFormat.Cobertura}:
+            shard_extras = [extras + (("-assemblyfilters", ";".join(f"+{assembly}" for assembly in assemblies)),)
+                            for assemblies in self._partition_assemblies(coverage_files, extras)]
+            shard_formats = [ReportFormat.Cobertura]
+        if len(shard_extras) < 2:
+            self._logger.info("Report cannot be sharded, creating it with a single report command")
+            return self._executor.execute(unsharded)
+
+        work_dir = Path(tempfile.mkdtemp(prefix="crossfit-report-", dir=self._work_dir))
+        try:
+            commands = [self._report_command(coverage_files, work_dir / f"shard-{index}", sourcecode_dir,
+                                             shard_formats[0], shard_formats[1:], None, *shard_extra)
+                        for index, shard_extra in enumerate(shard_extras)]
+            self._logger.info(f"Reporting {len(commands)} shards in parallel")
+            shard_results = self._executor.execute_batch(commands, len(commands), BatchPolicy.CollectAll).results()
+
+            chain = ResultChain(*shard_results)
+            failed = [shard_result for shard_result in shard_results if shard_result.code != 0]
+            if failed:
+                self._logger.error(f"Stopping report due to {len(failed)} failed shards.")
+                return chain.to_result()
+
+            try:
+                if isinstance(self._tool, Jacoco):
+                    self._stitch_jacoco(commands, [work_dir / f"shard-{index}" for index in range(len(commands))],
+                                        unsharded, Path(target_dir), formats, extras)
+                else:
+                    merge_cobertura_files([command.outputs[0] / _COBERTURA_REPORT for command in commands],
+                                          unsharded.outputs[0] / _COBERTURA_REPORT)
+            except (OSError, ValueError, ElementTree.ParseError) as e:
+                self._logger.error(f"Encountered error while stitching report shards. Error - {e}")
+                chain.add_result(CommandResult(code=1, command="stitch", output="", error=str(e)))
+            return chain.to_result()
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    def _report_command(self,
+                        coverage_files: list[Path],
+                        target_dir: Path,
+                        sourcecode_dir: Optional[Path],
+                        report_format: Optional[ReportFormat],
+                        report_formats: Optional[list[ReportFormat]],
+                        build_dir: Optional[Path],
+                        *extras: tuple[str, Optional[str]]) -> Command:
+        """
+        :returns: The tool's report command - the build directory is only passed to JaCoCo
+        """
+        if isinstance(self._tool, Jacoco):
+            return self._tool.save_report(coverage_files, target_dir, sourcecode_dir, report_format, report_formats,
+                                          build_dir, *extras)
+        return self._tool.save_report(coverage_files, target_dir, sourcecode_dir, report_format, report_formats,
+                                      *extras)
+
+    def _partition_class_files(self, build_dir: Optional[Path],
+                               extras: tuple[tuple[str, Optional[str]], ...]) -> list[list[Path]]:
+        """
+        Partitions the class files into contiguous shards of about equal size, every package in exactly one shard.
+        Packages are units of the partition across all class file locations, a package's directories in several
+        roots joined, and the packages of an archive joined, as an archive is passed to a single shard.
+        A directory whose packages all fall in one shard is passed to it as a whole.
+        :param build_dir: Directory containing the compiled class files
+        :param extras: Extra options, holding more class file locations as --classfiles options
+        :returns: The class file locations of each shard, empty if the class files cannot be partitioned
+        """
+        roots = [Path(path) for path in [build_dir] + [extra[1] for extra in extras if extra[0] == "--classfiles"]
+                 if path is not None]
+        # (root, directory, class files or archive, packages, size) - the root is None for loose files
+        pieces: list[tuple[Optional[Path], Path, list[Path], set[str], int]] = []
+        for root in roots:
+            if not root.is_dir():
+                pieces.append((None, root.parent, [root], _file_packages(root), _size(root)))
+                continue
+            for directory, directory_names, file_names in os.walk(root):
+                directory_names.sort()
+                files = [Path(directory) / name for name in sorted(file_names)]
+                class_files = [path for path in files if path.suffix == ".class"]
+                if class_files:
+                    package = jacoco_report.class_package(class_files[0].read_bytes(),
+                                                          Path(os.path.relpath(directory, root)).as_posix())
+                    pieces.append((root, Path(directory), class_files, {package}, sum(map(_size, class_files))))
+                pieces.extend((root, Path(directory), [path], _file_packages(path), _size(path))
+                              for path in files if path.suffix in _ARCHIVE_SUFFIXES)
+
+        # Units are the groups of packages sharing a piece, named and ordered by their first package
+        unit_of = _join_packages([packages for _, _, _, packages, _ in pieces])
+        piece_units = [unit_of[min(packages)] if packages else None for _, _, _, packages, _ in pieces]
+        units = sorted({unit for unit in piece_units if unit is not None})
+        unit_index = {unit: index for index, unit in enumerate(units)}
+        sizes = [0] * len(units)
+        for unit, (_, _, _, _, size) in zip(piece_units, pieces):
+            if unit is not None:
+                sizes[unit_index[unit]] += size
+        shard_of_unit = _contiguous_shards(sizes, self._shards)
+        if not shard_of_unit or max(shard_of_unit) == 0:
+            return []
+        # Pieces without classes are left to the first shard
+        shard_of = [shard_of_unit[unit_index[unit]] if unit is not None else 0 for unit in piece_units]
+
+        owners: dict[Path, set[int]] = {}
+        for (root, directory, _, _, _), shard in zip(pieces, shard_of):
+            if root is not None:
+                for ancestor in _ancestors(root, directory):
+                    owners.setdefault(ancestor, set()).add(shard)
+        partition: list[list[Path]] = [[] for _ in range(max(shard_of_unit) + 1)]
+        for (root, directory, paths, _, _), shard in zip(pieces, shard_of):
+            whole = next((ancestor for ancestor in (_ancestors(root, directory) if root is not None else [])
+                          if owners[ancestor] == {shard}), None)
+            for path in [whole] if whole is not None else paths:
+                if path not in partition[shard]:
+                    partition[shard].append(path)
+        return partition
+
+    def _partition_assemblies(self, coverage_files: list[Path],
+                              extras: tuple[tuple[str, Optional[str]], ...]) -> list[list[str]]:
+        """
+        Partitions the assemblies of Cobertura coverage files into contiguous shards of about equal line count.
+        :param coverage_files: The Cobertura coverage files
+        :param extras: Extra options - assemblies are not partitioned when they are filtered already
+        :returns: The assemblies of each shard, empty if the assemblies cannot be partitioned
+        """
+        if any(extra[0] == "-assemblyfilters" for extra in extras):
+            return []
+        sizes: dict[str, int] = {}
+        for coverage_file in coverage_files:
+            package = None
+            for event, element in ElementTree.iterparse(coverage_file, events=("start", "end")):
+                if event == "start" and element.tag == "package":
+                    package = element.get("name", "")
+                    sizes.setdefault(package, 0)
+                elif event == "end" and element.tag == "line" and package is not None:
+                    sizes[package] += 1
+                elif event == "end" and element.tag == "class":
+                    element.clear()
+        assemblies = sorted(sizes)
+        shard_of = _contiguous_shards([sizes[assembly] for assembly in assemblies], self._shards)
+        if not shard_of or max(shard_of) == 0:
+            return []
+        partition: list[list[str]] = [[] for _ in range(max(shard_of) + 1)]
+        for assembly, shard in zip(assemblies, shard_of):
+            partition[shard].append(assembly)
+        return partition
+
+    def _stitch_jacoco(self, commands: list[Command], shard_dirs: list[Path], unsharded: Command, target_dir: Path,
+                       formats: set[ReportFormat], extras: tuple[tuple[str, Optional[str]], ...]):
+        """
+        Stitches the JaCoCo reports of the shards into the outputs of the unsharded report command - XML packages
+        and CSV rows are concatenated, HTML package directories moved, and the totals and HTML index recomputed.
+        """
+        shard_outputs = [{path.suffix: path for path in command.outputs} for command in commands]
+        outputs = {path.suffix: path for path in unsharded.outputs}
+        name = next((extra[1] for extra in extras if extra[0] == "--name"), jacoco_report.DEFAULT_REPORT_NAME)
+
+        bundle = jacoco_report.CoverageNode(name)
+        packages: list[tuple[str, jacoco_report.CoverageNode]] = []
+        with (atomic_write(outputs[".xml"], "w", encoding="utf-8") if ReportFormat.Xml in formats
+              else nullcontext()) as xml_stream:
+            if xml_stream is not None:
+                xml_stream.write(jacoco_report.XML_HEADER)
+            for index, shard in enumerate(shard_outputs):
+                self._stitch_xml(shard[".xml"], index == 0, xml_stream, bundle, packages)
+            if xml_stream is not None:
+                for counter, counter_name in enumerate(jacoco_report.COUNTERS):
+                    if bundle.total(counter):
+                        xml_stream.write(f'<counter type="{counter_name}" missed="{bundle.missed(counter)}" '
+                                         f'covered="{bundle.covered(counter)}"/>')
+                xml_stream.write("</report>")
+
+        if ReportFormat.Csv in formats:
+            with atomic_write(outputs[".csv"], "w", encoding="utf-8", newline="") as csv_stream:
+                for index, shard in enumerate(shard_outputs):
+                    with open(shard[".csv"], encoding="utf-8", newline="") as shard_stream:
+                        header = shard_stream.readline()
+                        if index == 0:
+                            csv_stream.write(header)
+                        shutil.copyfileobj(shard_stream, csv_stream)
+
+        if ReportFormat.Html in formats:
+            html_dir = target_dir
+            html_dir.mkdir(parents=True, exist_ok=True)
+            for entry in ("jacoco-resources", "jacoco-sessions.html"):
+                source, destination = shard_dirs[0] / entry, html_dir / entry
+                if source.exists():
+                    _remove(destination)
+                    shutil.move(source, destination)
+            for shard_dir in shard_dirs:
+                for directory_name in [directory_name for directory_name, _ in packages
+                                       if (shard_dir / directory_name).is_dir()]:
+                    _remove(html_dir / directory_name)
+                    shutil.move(shard_dir / directory_name, html_dir / directory_name)
+            jacoco_report.write_html_index(html_dir, name, sorted(packages, key=lambda package: package[0]), bundle)
+
+    @staticmethod
+    def _stitch_xml(shard_file: Path, first: bool, stream: Optional[IO[str]], bundle: "jacoco_report.CoverageNode",
+                    packages: list[tuple[str, "jacoco_report.CoverageNode"]]):
+        """
+        Streams the packages of a shard's XML report into the stitched report, summing their counters.
+        :param shard_file: The shard's XML report
+        :param first: True for the first shard, whose report name and sessions are written
+        :param stream: The stitched XML report's stream, None if no XML report is requested
+        :param bundle: The counters of the stitched report
+        :param packages: The directory name and counters of the stitched packages
+        """
+        depth = 0
+        for event, element in ElementTree.iterparse(shard_file, events=("start", "end")):
+            if event == "start":
+                depth += 1
+                if depth == 1 and first and stream is not None:
+                    stream.write(f"<report name={quoteattr(element.get('name', ''))}>")
+                continue
+            depth -= 1
+            if depth != 1:
+                continue
+            if element.tag == "sessioninfo" and first and stream is not None:
+                stream.write(ElementTree.tostring(element, encoding="unicode"))
+            elif element.tag == "package":
+                if any(package[1].name == element.get("name") for package in packages):
+                    raise ValueError(f"Package {element.get('name')} was reported by several shards")
+                node = jacoco_report.CoverageNode(element.get("name"))
+                for counter in element.findall("counter"):
+                    node.increment_counter(jacoco_report.COUNTERS.index(counter.get("type")),
+                                           int(counter.get("missed")), int(counter.get("covered")))
+                bundle.add(node, with_lines=False)
+                packages.append((jacoco_report.package_name(node.name), node))
+                if stream is not None:
+                    stream.write(ElementTree.tostring(element, encoding="unicode"))
+                element.clear()
+
+
+def _contiguous_shards(sizes: list[int], shards: int) -> list[int]:
+    """
+    Assigns consecutive units to shards of about equal total size.
+    :param sizes: The size of each unit, in order
+    :param shards: Maximal number of shards
+    :returns: The shard of each unit, non-decreasing and starting at 0
+    """
+    total = sum(sizes)
+    assigned, cumulative, shard = [], 0, 0
+    for size in sizes:
+        # A unit starts the next shard once the current one holds its share of the total
+        if cumulative >= total * (shard + 1) / shards and shard < shards - 1:
+            shard += 1
+        assigned.append(shard)
+        cumulative += size
+    return assigned
+
+
+def _join_packages(groups: list[set[str]]) -> dict[str, str]:
+    """
+    Joins packages appearing together in a group, transitively.
+    :param groups: Groups of packages which must not be separated
+    :returns: The representative of each package's joined group - its smallest package
+    """
+    parent: dict[str, str] = {}
+
+    def find(package: str) -> str:
+        while parent[package] != package:
+            parent[package] = parent[parent[package]]
+            package = parent[package]
+        return package
+
+    for group in groups:
+        for package in group:
+            parent.setdefault(package, package)
+        first = min(group, default=None)
+        for package in group:
+            first_root, package_root = find(first), find(package)
+            if first_root != package_root:
+                parent[max(first_root, package_root)] = min(first_root, package_root)
+    return {package: find(package) for package in parent}
+
+
+def _file_packages(path: Path) -> set[str]:
+    """
+    :param path: A class file or an archive
+    :returns: The packages of the class file or of the classes in the archive, also in nested archives - read from
+              the first class file of each directory, like the native report groups them
+    """
+    packages: set[str] = set()
+
+    def add_archive(archive: zipfile.ZipFile):
+        directories: dict[str, str] = {}
+        for info in archive.infolist():
+            entry = info.filename
+            if info.is_dir() or entry.startswith("META-INF/versions/"):
+                continue
+            if entry.endswith(".class"):
+                directories.setdefault(entry.rpartition("/")[0], entry)
+            elif entry.endswith(_ARCHIVE_SUFFIXES):
+                with zipfile.ZipFile(io.BytesIO(archive.read(entry))) as nested:
+                    add_archive(nested)
+        packages.update(jacoco_report.class_package(archive.read(entry), directory)
+                        for directory, entry in directories.items())
+
+    try:
+        if path.suffix == ".class":
+            packages.add(jacoco_report.class_package(path.read_bytes(), path.parent.name))
+        elif path.suffix in _ARCHIVE_SUFFIXES:
+            with zipfile.ZipFile(path) as archive:
+                add_archive(archive)
+    except (OSError, zipfile.BadZipFile):
+        # Left to the report command of the shard it falls in to fail on
+        pass
+    return packages
+
+
+def _ancestors(root: Path, directory: Path) -> list[Path]:
+    """
+    :returns: The directories from the root down to the directory, both included
+    """
+    parts = directory.relative_to(root).parts
+    return [root.joinpath(*parts[:depth]) for depth in range(len(parts) + 1)]
+
+
+def _size(path: Path) -> int:
+    """
+    :returns: The size of a file in bytes, at least 1 so that empty files still count
+    """
+    return max(1, path.stat().st_size)
+
+
+def _remove(path: Path):
+    """
+    Removes a file or directory if it exists.
+    """
+    if path.is_dir():
+        shutil.rmtree(path)
+    elif path.exists():
+        path.unlink()
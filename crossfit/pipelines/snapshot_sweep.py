@@ -0,0 +1,99 @@
+import os
+from dataclasses import dataclass
+from logging import Logger
+from pathlib import Path
+from typing import Iterable, Optional
+
+from crossfit.executors.executor import CancellationToken, Executor
+from crossfit.models.executor_models import BatchPolicy
+from crossfit.models.pipeline_models import SweepSummary
+from crossfit.tools.tool import Tool
+
+
+@dataclass(slots=True)
+class SnapshotTarget:
+    """A coverage agent to snapshot - its tool, session and the file its coverage is written to."""
+    tool: Tool
+    session: str
+    target_dir: Path
+    target_file: Optional[Path] = None
+    extras: tuple[tuple[str, Optional[str]], ...] = ()
+    timeout: Optional[float] = None
+    name: Optional[str] = None
+
+    @property
+    def label(self) -> str:
+        """Returns the name identifying the target in logs and summaries."""
+        return self.name or self.session
+
+
+class SnapshotSweep:
+    """
+    Snapshots the coverage of many agents at once - JaCoCo agents and dotnet-coverage sessions alike - bounding
+    the number of concurrent connections and the time spent on each agent.
+    """
+
+    def __init__(self, executor: Executor, logger: Logger, max_concurrency: int = 16, timeout: Optional[float] = 60):
+        """
+        :param executor: The executor running the snapshot commands, concurrently if it supports batches
+        :param logger: Logger instance for logging the sweep progress (required)
+        :param max_concurrency: Maximal number of snapshots running at once
+        :param timeout: Default maximum time in seconds of each snapshot, None for no limit
+        :raises ValueError: If max_concurrency is lower than 1 or the timeout is not positive
+        """
+        if max_concurrency < 1:
+            raise ValueError(f"Sweep concurrency must be at least 1. Valued as: '{max_concurrency}'")
+        if timeout is not None and timeout <= 0:
+            raise ValueError(f"Sweep timeout must be positive. Valued as: '{timeout}'")
+        self._executor = executor
+        self._logger = logger
+        self._max_concurrency = max_concurrency
+        self._timeout = timeout
+
+    def sweep(self,
+              targets: Iterable[SnapshotTarget],
+              cancel_token: Optional[CancellationToken] = None) -> SweepSummary:
+        """
+        Snapshots every target through its tool's snapshot_coverage command.
+        :param targets: The agents to snapshot
+        :param cancel_token: Token cancelling the remaining snapshots from another thread
+        :returns: Summary of the sweep, with the CommandResult of every target in the order given
+        """
+        targets = list(targets)
+        commands = []
+        for target in targets:
+            command = target.tool.snapshot_coverage(target.session, target.target_dir, target.target_file,
+                                                    *target.extras)
+            command.timeout = target.timeout or self._timeout
+            commands.append(command)
+        sizes_before = [_size(command.outputs) for command in commands]
+
+        self._logger.info(f"Snapshotting {len(targets)} coverage agents, at most {self._max_concurrency} at once")
+        execution = self._executor.execute_batch(commands, self._max_concurrency, BatchPolicy.CollectAll,
+                                                 cancel_token=cancel_token)
+        results = execution.results()
+
+        summary = SweepSummary(total=len(targets), skipped=execution.summary.skipped,
+                               wall_time=execution.summary.wall_time, results=results)
+        for target, command, size_before, result in zip(targets, commands, sizes_before, results):
+            if result is None:
+                continue
+            if result.code == 0:
+                summary.succeeded += 1
+                summary.bytes_collected += max(_size(command.outputs) - size_before, 0)
+            else:
+                summary.failed += 1
+                summary.failures[target.label] = str(result.error) or f"Exited with code {result.code}"
+        self._logger.info(
+            f"Snapshot sweep finished in {summary.wall_time:.2f}s. Succeeded: {summary.succeeded}, "
+            f"failed: {summary.failed}, skipped: {summary.skipped}, collected {summary.bytes_collected} bytes."
+        )
+        return summary
+
+
+def _size(paths: list[Path]) -> int:
+    """
+    :param paths: Output files of a snapshot command
+    :returns: The total size in bytes of the existing files
+    """
+    return sum(os.path.getsize(path) for path in paths if os.path.isfile(path))
@@ -0,0 +1,30 @@
+"""
+Entry point of the native tools, running a tool module's command line by its name:
+
+    python -m crossfit.tools jacoco_exec merge --destfile merged.exec f1.exec f2.exec
+
+The crossfit package imports the tool modules itself, so running them directly with '-m' executes a module already
+in sys.modules, which runpy warns about on stderr - and any stderr output fails a command. This module is never
+imported by the package and imports the requested tool module only once called.
+"""
+import importlib
+import sys
+from typing import Optional
+
+NATIVE_TOOLS = ("cobertura", "coverage_delta", "jacoco_agent", "jacoco_exec", "jacoco_report")
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """
+    :param argv: The tool module's name followed by its command line arguments, defaults to sys.argv[1:]
+    :returns: The process exit code
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] not in NATIVE_TOOLS:
+        print(f"usage: python -m crossfit.tools {{{','.join(NATIVE_TOOLS)}}} ...", file=sys.stderr)
+        return 2
+    return importlib.import_module(f"{__package__}.{argv[0]}").main(argv[1:])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""
+Persistent cache of class file analyses, keyed by a digest of the class file bytes.
+
+Analyzing a class into its probes and instruction graph costs far more than hashing it, and between two reports
+of the same build most class files are unchanged - the cache returns their stored ClassModel, class id included,
+so only new or changed class files are analyzed. Being keyed by content, a cache can be shared by builds, branches
+and concurrent report processes, and deleted at any time. Models are stored as plain JSON, so a shared cache holds
+data only - a tampered entry can fail to decode, which is treated as a miss, but never runs code.
+"""
+import hashlib
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Optional
+
+from crossfit.tools.class_analysis import ClassModel, MethodModel, analyze_class
+
+# Bumped whenever the analysis or the ClassModel changes, discarding the analyses cached by earlier versions
+_VERSION = 2
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS analyses (
+    digest BLOB PRIMARY KEY,
+    model BLOB,
+    used REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+class AnalysisCache:
+    """SQLite cache of class analyses, keyed by the BLAKE2 digest of the class file bytes."""
+    hits: int
+    misses: int
+
+    def __init__(self, path: Path):
+        """
+        :param path: The cache database file, created with its directories if it does not exist - ':memory:' for an
+                     in-memory cache
+        """
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._used = time.time()
+        if str(path) != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(str(path), timeout=60)
+        if str(path) != ":memory:":
+            self._connection.execute("PRAGMA journal_mode = WAL")
+            self._connection.execute("PRAGMA synchronous = NORMAL")
+        with self._connection:
+            if self._connection.execute("PRAGMA user_version").fetchone()[0] != _VERSION:
+                self._connection.execute("DROP TABLE IF EXISTS analyses")
+                self._connection.execute(f"PRAGMA user_version = {_VERSION}")
+            self._connection.executescript(_SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """
+        Commits the analyses added since the last flush and closes the cache database.
+        """
+        self.flush()
+        self._connection.close()
+
+    def flush(self):
+        """
+        Commits the analyses added and the entries used since the last flush.
+        """
+        self._connection.commit()
+
+    def analyze(self, data: bytes) -> Optional[ClassModel]:
+        """
+        Returns the cached analysis of a class file, analyzing and caching it if it is not cached yet.
+        :param data: The class file bytes
+        :returns: The class model, None for classes JaCoCo does not report
+        :raises ValueError: If the class cannot be analyzed - failures are not cached
+        """
+        digest = hashlib.blake2b(data, digest_size=16).digest()
+        row = self._connection.execute("SELECT model, used FROM analyses WHERE digest = ?", (digest,)).fetchone()
+        if row is not None:
+            try:
+                model = _decode(row[0]) if row[0] is not None else None
+            except (ValueError, TypeError, KeyError):
+                pass
+            else:
+                self.hits += 1
+                if row[1] < self._used:
+                    self._connection.execute("UPDATE analyses SET used = ? WHERE digest = ?", (self._used, digest))
+                return model
+
+        self.misses += 1
+        model = analyze_class(data)
+        self._connection.execute("INSERT OR REPLACE INTO analyses VALUES (?, ?, ?)",
+                                 (digest, _encode(model) if model else None, self._used))
+        return model
+
+    def prune(self, max_age: float) -> int:
+        """
+        Removes the analyses not used for a while, e.g. of class files no longer built.
+        :param max_age: Seconds since an analysis was last used for it to be removed
+        :returns: The number of removed analyses
+        """
+        with self._connection:
+            return self._connection.execute("DELETE FROM analyses WHERE used < ?",
+                                            (time.time() - max_age,)).rowcount
+
+    def __len__(self) -> int:
+        """
+        :returns: The number of cached analyses
+        """
+        return self._connection.execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
+
+
+def _encode(model: ClassModel) -> bytes:
+    """
+    :param model: The class model to store
+    :returns: The class model as compact JSON
+    """
+    return json.dumps([model.id, model.name, model.super_name, model.interfaces, model.source_file,
+                       model.probe_count,
+                       [[method.name, method.desc, method.access, method.lines, method.branches, method.predecessors,
+                         method.predecessor_branches, method.probes, method.ignored] for method in model.methods]],
+                      separators=(",", ":")).encode()
+
+
+def _decode(data: bytes) -> ClassModel:
+    """
+    :param data: A class model stored by _encode
+    :returns: The class model
+    :raises ValueError: If the data is not a stored class model
+    """
+    class_id, name, super_name, interfaces, source_file, probe_count, methods = json.loads(data)
+    return ClassModel(class_id, name, super_name, interfaces, source_file, probe_count,
+                      [MethodModel(method_name, desc, access, lines, branches, predecessors, predecessor_branches,
+                                   [tuple(probe) for probe in probes], ignored)
+                       for method_name, desc, access, lines, branches, predecessors, predecessor_branches, probes,
+                       ignored in methods])
@@ -0,0 +1,29 @@
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Iterator
+
+
+@contextmanager
+def atomic_write(path: Path, mode: str = "wb", **open_kwargs) -> Iterator[IO]:
+    """
+    Writes a file through a temporary file in the same directory, replacing the target only once the write
+    completed - readers and crashes never observe a partially written file.
+    :param path: Path of the file to write, its parent directories are created
+    :param mode: The write mode of the file, 'wb' or 'w'
+    :param open_kwargs: Additional arguments passed to open, e.g. encoding
+    :returns: The stream of the temporary file
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    descriptor, temp_path = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(descriptor, mode, **open_kwargs) as stream:
+            yield stream
+            stream.flush()
+            os.fsync(stream.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
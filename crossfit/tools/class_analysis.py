@@ -0,0 +1,654 @@
+"""
+Native analysis of Java class files into the structure JaCoCo computes coverage on.
+
+Replicates how JaCoCo assigns probes to the methods of a class (its LabelFlowAnalyzer and MethodProbesAdapter) and
+the instruction graph its analyzer propagates executed probes through, so coverage counters can be computed from
+execution data without a JVM. JaCoCo's method level filters - synthetic, bridge, enum and @Generated methods and
+private empty constructors - are applied; its instruction level filters (e.g. duplicated finally blocks) are not.
+"""
+import struct
+from dataclasses import dataclass, field
+from typing import Optional
+
+UNKNOWN_LINE = -1
+
+ACC_PRIVATE = 0x0002
+ACC_BRIDGE = 0x0040
+ACC_SYNTHETIC = 0x1000
+ACC_MODULE = 0x8000
+
+_MAGIC = 0xCAFEBABE
+_V9 = 53
+_V1_8 = 52
+_U2 = struct.Struct(">H")
+_U4 = struct.Struct(">I")
+_S2 = struct.Struct(">h")
+_S4 = struct.Struct(">i")
+
+_GOTO, _JSR, _RET, _TABLESWITCH, _LOOKUPSWITCH, _WIDE = 0xA7, 0xA8, 0xA9, 0xAA, 0xAB, 0xC4
+_IFNULL, _IFNONNULL, _GOTO_W, _JSR_W = 0xC6, 0xC7, 0xC8, 0xC9
+_ALOAD_0, _ALOAD_1, _ILOAD_2, _INVOKESPECIAL, _RETURN = 0x2A, 0x2B, 0x1C, 0xB7, 0xB1
+_RETURNS = frozenset(range(0xAC, 0xB2)) | {0xBF}
+_JUMPS = frozenset(range(0x99, 0xA8)) | {_IFNULL, _IFNONNULL, _GOTO_W}
+_INVOKES = frozenset(range(0xB6, 0xBB))
+_SUBROUTINES = frozenset((_JSR, _RET, _JSR_W))
+
+
+def _instruction_lengths() -> bytes:
+    """Returns the length of the instructions by opcode, 0 for variable length and unknown opcodes."""
+    lengths = bytearray([1] * 0xCA + [0] * (256 - 0xCA))
+    for opcodes, length in ((range(0x15, 0x1A), 2), (range(0x36, 0x3B), 2), (range(0x99, 0xA9), 3),
+                            (range(0xB2, 0xB9), 3), ((0x10, 0x12, 0xA9, 0xBC), 2),
+                            ((0x11, 0x13, 0x14, 0x84, 0xBB, 0xBD, 0xC0, 0xC1, 0xC6, 0xC7), 3), ((0xC5,), 4),
+                            ((0xB9, 0xBA, 0xC8, 0xC9), 5), ((_TABLESWITCH, _LOOKUPSWITCH, _WIDE), 0)):
+        for opcode in opcodes:
+            lengths[opcode] = length
+    return bytes(lengths)
+
+
+_LENGTHS = _instruction_lengths()
+
+_CRC64_TABLE = []
+for _index in range(256):
+    _value = _index
+    for _ in range(8):
+        _value = (_value >> 1) ^ 0xD800000000000000 if _value & 1 else _value >> 1
+    _CRC64_TABLE.append(_value)
+
+
+@dataclass(slots=True)
+class MethodModel:
+    """
+    Instruction graph of a method, as JaCoCo's analyzer builds it. Each instruction has at most one predecessor
+    that is not separated from it by a probe, so executed probes mark instructions by walking predecessors.
+    """
+    name: str
+    desc: str
+    access: int
+    lines: list[int] = field(default_factory=list)
+    branches: list[int] = field(default_factory=list)
+    predecessors: list[int] = field(default_factory=list)
+    predecessor_branches: list[int] = field(default_factory=list)
+    probes: list[tuple[int, int, int]] = field(default_factory=list)
+    ignored: bool = False
+
+    def covered_branches(self, probes: Optional[int]) -> list[int]:
+        """
+        :param probes: The executed probes of the class packed into an int, None if the class was not executed
+        :returns: The covered branches of every instruction, as a bit set per instruction
+        """
+        covered = [0] * len(self.lines)
+        if not probes:
+            return covered
+        predecessors, predecessor_branches = self.predecessors, self.predecessor_branches
+        for instruction, probe_id, branch in self.probes:
+            if not probes >> probe_id & 1:
+                continue
+            # Walks the predecessors until an instruction already propagated its coverage, like JaCoCo
+            while instruction != -1:
+                already_covered = covered[instruction]
+                covered[instruction] = already_covered | 1 << branch
+                if already_covered:
+                    break
+                branch = predecessor_branches[instruction]
+                instruction = predecessors[instruction]
+        return covered
+
+
+@dataclass(slots=True)
+class ClassModel:
+    """Structure of a class - its id, names and the instruction graphs of its methods."""
+    id: int
+    name: str
+    super_name: Optional[str]
+    interfaces: list[str]
+    source_file: Optional[str]
+    probe_count: int
+    methods: list[MethodModel]
+
+    @property
+    def package(self) -> str:
+        """Returns the VM name of the class' package, empty for the default package."""
+        return self.name.rpartition("/")[0]
+
+
+def crc64(data: bytes, initial: int = 0) -> int:
+    """
+    :param data: The bytes to checksum
+    :param initial: The checksum to continue from
+    :returns: The CRC64 checksum of the bytes, as computed by JaCoCo (unsigned)
+    """
+    checksum, table = initial, _CRC64_TABLE
+    for byte in data:
+        checksum = (checksum >> 8) ^ table[(checksum ^ byte) & 0xFF]
+    return checksum
+
+
+def class_id(data: bytes) -> int:
+    """
+    :param data: The class file bytes
+    :returns: The class id JaCoCo identifies the class' execution data by, as a signed 64 bit value
+    """
+    if len(data) > 7 and data[6] == 0 and data[7] == _V9:
+        # JaCoCo identifies Java 9 class files as if they were Java 8 ones
+        checksum = crc64(data[8:], crc64(bytes([_V1_8]), crc64(data[:7])))
+    else:
+        checksum = crc64(data)
+    return checksum - (1 << 64) if checksum >= 1 << 63 else checksum
+
+
+def analyze_class(data: bytes) -> Optional[ClassModel]:
+    """
+    :param data: The class file bytes
+    :returns: The class model, None for synthetic classes and modules which JaCoCo does not report
+    :raises ValueError: If the class file is invalid, already instrumented or uses subroutines (JSR/RET)
+    """
+    reader = _ClassReader(data)
+    access, name = reader.access, reader.name
+    if access & (ACC_MODULE | ACC_SYNTHETIC):
+        return None
+
+    methods = []
+    probe_count = 0
+    generated = reader.class_generated
+    for method in reader.methods:
+        if method.name == "$jacocoInit":
+            raise ValueError(f"Cannot process instrumented class {name}.")
+        model = MethodModel(method.name, method.desc, method.access)
+        if method.code is not None:
+            probe_count = _MethodAnalyzer(method, reader, model, probe_count).analyze()
+        model.ignored = generated or method.generated or _is_filtered(reader, method)
+        methods.append(model)
+    return ClassModel(class_id(data), name, reader.super_name, reader.interfaces, reader.source_file,
+                      probe_count, methods)
+
+
+def read_class_name(data: bytes) -> str:
+    """
+    :param data: The class file bytes
+    :returns: The VM name of the class
+    :raises ValueError: If the class file is invalid
+    """
+    return _ClassReader(data, header_only=True).name
+
+
+def _is_filtered(reader: "_ClassReader", method: "_Method") -> bool:
+    """
+    :returns: True if JaCoCo's method filters exclude the method from the counters
+    """
+    if method.access & ACC_SYNTHETIC and not method.name.startswith("lambda$"):
+        return True
+    if method.access & ACC_BRIDGE:
+        return True
+    if reader.super_name == "java/lang/Enum" and (
+            (method.name == "values" and method.desc == f"()[L{reader.name};")
+            or (method.name == "valueOf" and method.desc == f"(Ljava/lang/String;)L{reader.name};")):
+        return True
+    if method.access & ACC_PRIVATE and method.name == "<init>" and method.code is not None:
+        # Private constructors only calling the super constructor, e.g. of utility classes and enums
+        code = method.code
+        if method.desc == "()V" and code[:2] == bytes([_ALOAD_0, _INVOKESPECIAL]) and code[4:] == bytes([_RETURN]):
+            return reader.member_ref(_U2.unpack_from(code, 2)[0]) == (reader.super_name, "<init>", "()V")
+        if (reader.super_name == "java/lang/Enum" and method.desc == "(Ljava/lang/String;I)V"
+                and code[:4] == bytes([_ALOAD_0, _ALOAD_1, _ILOAD_2, _INVOKESPECIAL])
+                and code[6:] == bytes([_RETURN])):
+            return reader.member_ref(_U2.unpack_from(code, 4)[0]) == (reader.super_name, "<init>", method.desc)
+    return False
+
+
+def _is_generated_annotation(descriptor: str) -> bool:
+    """
+    :param descriptor: Type descriptor of an annotation
+    :returns: True if the annotation marks generated code for JaCoCo (its simple name contains 'Generated')
+    """
+    return "Generated" in descriptor[max(descriptor.rfind("/"), descriptor.rfind("$")) + 1:]
+
+
+def _decode_utf(encoded: bytes) -> str:
+    """Decodes a class file string - modified UTF-8, like DataInput.readUTF."""
+    if encoded.isascii():
+        return encoded.decode("ascii")
+    return (encoded.replace(b"\xc0\x80", b"\0").decode("utf-8", "surrogatepass")
+            .encode("utf-16-le", "surrogatepass").decode("utf-16-le"))
+
+
+@dataclass(slots=True)
+class _Method:
+    """A method as read from the class file."""
+    access: int
+    name: str
+    desc: str
+    code: Optional[bytes] = None
+    exception_table: list[tuple[int, int, int]] = field(default_factory=list)
+    line_numbers: dict[int, int] = field(default_factory=dict)
+    generated: bool = False
+
+
+class _ClassReader:
+    """Reads the parts of a class file the analysis needs."""
+
+    def __init__(self, data: bytes, header_only: bool = False):
+        """
+        :param data: The class file bytes
+        :param header_only: If True, stops after reading the class' name
+        :raises ValueError: If the class file is invalid
+        """
+        self._data = data
+        try:
+            if _U4.unpack_from(data, 0)[0] != _MAGIC:
+                raise ValueError("Not a class file - invalid magic number.")
+            self._read_constant_pool()
+            self.access, this_class, super_class = struct.unpack_from(">HHH", data, self._offset)
+            self.name = self.class_name(this_class)
+            if header_only:
+                return
+            self.super_name = self.class_name(super_class) if super_class else None
+            self._offset += 6
+            (interface_count,) = _U2.unpack_from(data, self._offset)
+            self.interfaces = [self.class_name(index) for index in
+                               struct.unpack_from(f">{interface_count}H", data, self._offset + 2)]
+            self._offset += 2 + 2 * interface_count
+            self._read_members(None)
+            self.methods: list[_Method] = []
+            self._read_members(self.methods)
+            self.source_file: Optional[str] = None
+            self.class_generated = False
+            for attribute, start, length in self._read_attributes():
+                if attribute == "SourceFile":
+                    self.source_file = self.utf(_U2.unpack_from(data, start)[0])
+                elif attribute in ("RuntimeVisibleAnnotations", "RuntimeInvisibleAnnotations"):
+                    self.class_generated |= self._has_generated_annotation(start)
+        except (struct.error, IndexError, KeyError, UnicodeDecodeError) as e:
+            raise ValueError(f"Invalid class file: {e}") from e
+
+    def utf(self, index: int) -> str:
+        """Returns the string of a CONSTANT_Utf8 entry."""
+        return self._strings[index]
+
+    def class_name(self, index: int) -> str:
+        """Returns the VM name of a CONSTANT_Class entry."""
+        return self._strings[self._references[index][0]]
+
+    def member_ref(self, index: int) -> tuple[str, str, str]:
+        """Returns the owner, name and descriptor of a field or method reference entry."""
+        owner, name_and_type = self._references[index]
+        name, desc = self._references[name_and_type]
+        return self.class_name(owner), self.utf(name), self.utf(desc)
+
+    def _read_constant_pool(self):
+        """Reads the strings and references of the constant pool."""
+        data = self._data
+        (count,) = _U2.unpack_from(data, 8)
+        self._strings: dict[int, str] = {}
+        self._references: dict[int, tuple[int, ...]] = {}
+        offset, index = 10, 1
+        while index < count:
+            tag = data[offset]
+            if tag == 1:
+                (length,) = _U2.unpack_from(data, offset + 1)
+                self._strings[index] = _decode_utf(data[offset + 3:offset + 3 + length])
+                offset += 3 + length
+            elif tag in (7, 8, 16, 19, 20):
+                self._references[index] = _U2.unpack_from(data, offset + 1)
+                offset += 3
+            elif tag in (9, 10, 11, 12, 17, 18):
+                self._references[index] = struct.unpack_from(">HH", data, offset + 1)
+                offset += 5
+            elif tag in (3, 4):
+                offset += 5
+            elif tag in (5, 6):
+                offset += 9
+                index += 1
+            elif tag == 15:
+                offset += 4
+            else:
+                raise ValueError(f"Unknown constant pool tag {tag}.")
+            index += 1
+        self._offset = offset
+
+    def _read_attributes(self) -> list[tuple[str, int, int]]:
+        """
+        :returns: The name, start offset and length of each attribute at the current offset, skipping them
+        """
+        data = self._data
+        (count,) = _U2.unpack_from(data, self._offset)
+        self._offset += 2
+        attributes = []
+        for _ in range(count):
+            name_index, length = struct.unpack_from(">HI", data, self._offset)
+            attributes.append((self.utf(name_index), self._offset + 6, length))
+            self._offset += 6 + length
+        return attributes
+
+    def _read_members(self, methods: Optional[list[_Method]]):
+        """
+        Reads the fields or methods at the current offset.
+        :param methods: List to add the methods to, None to skip fields
+        """
+        (count,) = _U2.unpack_from(self._data, self._offset)
+        self._offset += 2
+        for _ in range(count):
+            access, name_index, desc_index = struct.unpack_from(">HHH", self._data, self._offset)
+            self._offset += 6
+            attributes = self._read_attributes()
+            if methods is None:
+                if self.utf(name_index) == "$jacocoData":
+                    raise ValueError(f"Cannot process instrumented class {self.name}.")
+                continue
+            method = _Method(access, self.utf(name_index), self.utf(desc_index))
+            for attribute, start, length in attributes:
+                if attribute == "Code":
+                    self._read_code(method, start)
+                elif attribute in ("RuntimeVisibleAnnotations", "RuntimeInvisibleAnnotations"):
+                    method.generated |= self._has_generated_annotation(start)
+            methods.append(method)
+
+    def _read_code(self, method: _Method, start: int):
+        """Reads the bytecode, exception table and line numbers of a Code attribute."""
+        data = self._data
+        (code_length,) = _U4.unpack_from(data, start + 4)
+        offset = start + 8
+        method.code = data[offset:offset + code_length]
+        offset += code_length
+        (exception_count,) = _U2.unpack_from(data, offset)
+        offset += 2
+        for _ in range(exception_count):
+            method.exception_table.append(struct.unpack_from(">HHH", data, offset))
+            offset += 8
+        saved, self._offset = self._offset, offset
+        for attribute, attribute_start, _ in self._read_attributes():
+            if attribute == "LineNumberTable":
+                (count,) = _U2.unpack_from(data, attribute_start)
+                for entry in range(count):
+                    start_pc, line = struct.unpack_from(">HH", data, attribute_start + 2 + 4 * entry)
+                    # The last entry of a start_pc wins, as ASM visits them in table order
+                    method.line_numbers[start_pc] = line
+        self._offset = saved
+
+    def _has_generated_annotation(self, start: int) -> bool:
+        """
+        :param start: Offset of a Runtime(In)VisibleAnnotations attribute
+        :returns: True if one of the annotations marks generated code
+        """
+        (count,) = _U2.unpack_from(self._data, start)
+        offset = start + 2
+        for _ in range(count):
+            if _is_generated_annotation(self.utf(_U2.unpack_from(self._data, offset)[0])):
+                return True
+            offset = self._skip_annotation(offset)
+        return False
+
+    def _skip_annotation(self, offset: int) -> int:
+        """Returns the offset following the annotation structure at the offset."""
+        (pair_count,) = _U2.unpack_from(self._data, offset + 2)
+        offset += 4
+        for _ in range(pair_count):
+            offset = self._skip_element_value(offset + 2)
+        return offset
+
+    def _skip_element_value(self, offset: int) -> int:
+        """Returns the offset following the element_value structure at the offset."""
+        tag = chr(self._data[offset])
+        if tag == "e":
+            return offset + 5
+        if tag == "@":
+            return self._skip_annotation(offset + 1)
+        if tag == "[":
+            (count,) = _U2.unpack_from(self._data, offset + 1)
+            offset += 3
+            for _ in range(count):
+                offset = self._skip_element_value(offset)
+            return offset
+        return offset + 3
+
+
+class _LabelInfo:
+    """Flow information of a bytecode offset that is a label for ASM, as tracked by JaCoCo's LabelInfo."""
+    __slots__ = ("target", "successor", "multi_target", "method_invocation_line", "done", "probe_id")
+
+    def __init__(self):
+        self.target = False
+        self.successor = False
+        self.multi_target = False
+        self.method_invocation_line = False
+        self.done = False
+        self.probe_id = -1
+
+    def set_target(self):
+        if self.target or self.successor:
+            self.multi_target = True
+        else:
+            self.target = True
+
+    def set_successor(self):
+        self.successor = True
+        if self.target:
+            self.multi_target = True
+
+    def needs_probe(self) -> bool:
+        return self.successor and (self.multi_target or self.method_invocation_line)
+
+
+class _MethodAnalyzer:
+    """Assigns a method's probes and builds its instruction graph in a single pass over its bytecode."""
+
+    def __init__(self, method: _Method, reader: _ClassReader, model: MethodModel, next_probe_id: int):
+        """
+        :param method: The method read from the class file
+        :param reader: The class' reader
+        :param model: The model to build the instruction graph into
+        :param next_probe_id: Id of the method's first probe
+        """
+        self._method = method
+        self._reader = reader
+        self._model = model
+        self._next_probe_id = next_probe_id
+        self._instructions = self._decode()
+        self._labels: dict[int, _LabelInfo] = {}
+        for _, _, targets in self._instructions:
+            for target in targets or ():
+                self._labels.setdefault(target, _LabelInfo())
+        for start, end, handler in method.exception_table:
+            for offset in (start, end, handler):
+                self._labels.setdefault(offset, _LabelInfo())
+        for offset in method.line_numbers:
+            self._labels.setdefault(offset, _LabelInfo())
+        for (_, opcode, targets), (offset, _, _) in zip(self._instructions, self._instructions[1:]):
+            if opcode in _RETURNS or opcode == _GOTO or opcode == _GOTO_W or opcode in (_TABLESWITCH, _LOOKUPSWITCH):
+                # Class files have a stack map frame - a label for ASM - after every unconditional branch
+                self._labels.setdefault(offset, _LabelInfo())
+
+    def analyze(self) -> int:
+        """
+        Builds the instruction graph into the model.
+        :returns: Id of the next method's first probe
+        """
+        self._mark_labels()
+        self._build()
+        return self._next_probe_id
+
+    def _decode(self) -> list[tuple[int, int, Optional[list[int]]]]:
+        """
+        :returns: The offset, opcode and jump targets (None for instructions not jumping) of every instruction
+        :raises ValueError: If the bytecode is invalid or uses subroutines
+        """
+        code = self._method.code
+        instructions = []
+        offset = 0
+        while offset < len(code):
+            opcode = code[offset]
+            targets = None
+            if opcode in _SUBROUTINES:
+                raise ValueError(f"Subroutines not supported in {self._reader.name}.{self._method.name}.")
+            if opcode in _JUMPS:
+                if opcode == _GOTO_W:
+                    targets = [offset + _S4.unpack_from(code, offset + 1)[0]]
+                else:
+                    targets = [offset + _S2.unpack_from(code, offset + 1)[0]]
+                length = _LENGTHS[opcode]
+            elif opcode == _TABLESWITCH or opcode == _LOOKUPSWITCH:
+                position = offset + 4 - offset % 4
+                default, first, second = struct.unpack_from(">iii", code, position)
+                if opcode == _TABLESWITCH:
+                    count = second - first + 1
+                    jumps = struct.unpack_from(f">{count}i", code, position + 12)
+                    length = position + 12 + 4 * count - offset
+                else:
+                    jumps = struct.unpack_from(f">{2 * first}i", code, position + 8)[1::2]
+                    length = position + 8 + 8 * first - offset
+                targets = [offset + default] + [offset + jump for jump in jumps]
+            elif opcode == _WIDE:
+                length = 6 if code[offset + 1] == 0x84 else 4
+            else:
+                length = _LENGTHS[opcode]
+                if not length:
+                    raise ValueError(f"Unknown opcode {opcode:#x} in {self._reader.name}.{self._method.name}.")
+            instructions.append((offset, opcode, targets))
+            offset += length
+        return instructions
+
+    def _mark_labels(self):
+        """Marks jump targets, successors and method invocation lines like JaCoCo's LabelFlowAnalyzer."""
+        labels = self._labels
+        for start, _, handler in reversed(self._method.exception_table):
+            labels[start].set_target()
+            labels[handler].set_target()
+
+        successor, first, line_start = False, True, None
+        line_numbers = self._method.line_numbers
+        for offset, opcode, targets in self._instructions:
+            label = labels.get(offset)
+            if label is not None:
+                if first:
+                    label.set_target()
+                if successor:
+                    label.set_successor()
+                if offset in line_numbers:
+                    line_start = label
+            if targets is None:
+                successor = opcode not in _RETURNS
+                if opcode in _INVOKES and line_start is not None:
+                    line_start.method_invocation_line = True
+            elif opcode in _JUMPS:
+                labels[targets[0]].set_target()
+                successor = opcode != _GOTO and opcode != _GOTO_W
+            else:
+                for target in targets:
+                    labels[target].done = False
+                for target in targets:
+                    if not labels[target].done:
+                        labels[target].set_target()
+                        labels[target].done = True
+                successor = False
+            first = False
+
+    def _build(self):
+        """Inserts the probes like JaCoCo's MethodProbesAdapter while building the graph like its MethodAnalyzer."""
+        model, labels = self._model, self._labels
+        line_numbers = self._method.line_numbers
+        self._current: Optional[int] = None
+        self._current_line = UNKNOWN_LINE
+        self._pending_labels: list[int] = []
+        self._label_instructions: dict[int, int] = {}
+        self._jumps: list[tuple[int, int, int]] = []
+
+        for offset, opcode, targets in self._instructions:
+            label = labels.get(offset)
+            if label is not None:
+                if label.needs_probe():
+                    self._add_probe(self._next_id(), 0)
+                    self._current = None
+                self._pending_labels.append(offset)
+                if not label.successor:
+                    self._current = None
+                if offset in line_numbers:
+                    self._current_line = line_numbers[offset]
+
+            self._add_instruction()
+            if targets is None:
+                if opcode in _RETURNS:
+                    self._add_probe(self._next_id(), 0)
+            elif opcode in _JUMPS:
+                if labels[targets[0]].multi_target:
+                    self._add_probe(self._next_id(), 1)
+                else:
+                    self._jumps.append((self._current, targets[0], 1))
+            else:
+                self._add_switch(targets)
+
+        for source, target, branch in self._jumps:
+            instruction = self._label_instructions[target]
+            model.branches[source] += 1
+            model.predecessors[instruction] = source
+            model.predecessor_branches[instruction] = branch
+
+    def _add_switch(self, targets: list[int]):
+        """
+        Adds the branches of a switch instruction - a probe for each target that is a multi target.
+        :param targets: The default target followed by the case targets
+        """
+        labels = self._labels
+        default, cases = labels[targets[0]], [labels[target] for target in targets[1:]]
+        with_probes = False
+        for case in cases:
+            case.done = False
+        if default.multi_target:
+            default.probe_id = self._next_id()
+            with_probes = True
+        default.done = True
+        for case in cases:
+            if case.multi_target and not case.done:
+                case.probe_id = self._next_id()
+                with_probes = True
+            case.done = True
+
+        if with_probes:
+            for label in [default] + cases:
+                label.done = False
+            for branch, (target, label) in enumerate(zip(targets, [default] + cases)):
+                if not label.done:
+                    if label.probe_id == -1:
+                        self._jumps.append((self._current, target, branch))
+                    else:
+                        self._add_probe(label.probe_id, branch)
+                    label.done = True
+        else:
+            for case in cases:
+                case.done = False
+            self._jumps.append((self._current, targets[0], 0))
+            default.done = True
+            branch = 0
+            for target, case in zip(targets[1:], cases):
+                if not case.done:
+                    branch += 1
+                    self._jumps.append((self._current, target, branch))
+                    case.done = True
+
+    def _next_id(self) -> int:
+        """Returns the id of the next probe of the class."""
+        probe_id = self._next_probe_id
+        self._next_probe_id += 1
+        return probe_id
+
+    def _add_instruction(self):
+        """Adds the next instruction, falling through from the current one if any."""
+        model = self._model
+        index = len(model.lines)
+        model.lines.append(self._current_line)
+        model.branches.append(0)
+        model.predecessors.append(-1)
+        model.predecessor_branches.append(0)
+        for offset in self._pending_labels:
+            self._label_instructions[offset] = index
+        self._pending_labels.clear()
+        if self._current is not None:
+            model.branches[self._current] += 1
+            model.predecessors[index] = self._current
+        self._current = index
+
+    def _add_probe(self, probe_id: int, branch: int):
+        """Adds a branch of the current instruction that executes a probe."""
+        if self._current is None:
+            raise ValueError(f"Unexpected probe in {self._reader.name}.{self._method.name}.")
+        self._model.branches[self._current] += 1
+        self._model.probes.append((self._current, probe_id, branch))
@@ -0,0 +1,387 @@
+"""
+Native, streaming merge of Cobertura XML coverage files.
+
+Inputs are read with ElementTree.iterparse and released element by element, so memory is bounded by the number
+of distinct lines rather than by file size. Can also be run as a dotnet-coverage compatible merge command:
+
+    python -m crossfit.tools cobertura merge --output merged.xml s1.cobertura.xml s2.cobertura.xml
+
+or fold new files into a running aggregate, atomically replacing it:
+
+    python -m crossfit.tools cobertura append --output aggregate.xml s3.cobertura.xml
+"""
+import argparse
+import os
+import re
+import sys
+import xml.etree.ElementTree as ElementTree
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import IO, Iterable, Optional
+from xml.sax.saxutils import escape, quoteattr
+
+from crossfit.tools.atomic_file import atomic_write
+
+_CONDITION_COVERAGE = re.compile(r"\((\d+)/(\d+)\)")
+
+
+@dataclass(slots=True)
+class LineCoverage:
+    """Coverage of a single source line - summed hits and the best branch coverage seen."""
+    hits: int = 0
+    branch: bool = False
+    covered_conditions: int = 0
+    total_conditions: int = 0
+    conditions: tuple[tuple[str, str, str], ...] = ()
+
+    def add(self, hits: int, covered_conditions: int, total_conditions: int,
+            conditions: tuple[tuple[str, str, str], ...]):
+        """
+        Folds the coverage of the same line from another file into this one.
+        Hits are summed - branch coverage cannot be unioned from counts, so the best coverage is kept.
+        :param hits: Hits of the line
+        :param covered_conditions: Number of covered branch conditions of the line
+        :param total_conditions: Number of branch conditions of the line
+        :param conditions: The line's (number, type, coverage) condition entries
+        """
+        self.hits += hits
+        if total_conditions:
+            self.branch = True
+            if (covered_conditions, total_conditions) > (self.covered_conditions, self.total_conditions):
+                self.covered_conditions, self.total_conditions = covered_conditions, total_conditions
+                self.conditions = conditions or self.conditions
+
+
+@dataclass(slots=True)
+class MethodCoverage:
+    """Coverage of a method - the numbers of its lines, whose coverage is kept on the class."""
+    complexity: float = 0
+    lines: set[int] = field(default_factory=set)
+
+
+@dataclass(slots=True)
+class ClassCoverage:
+    """Coverage of a class - its lines and methods."""
+    name: str
+    filename: str
+    complexity: float = 0
+    lines: dict[int, LineCoverage] = field(default_factory=dict)
+    methods: dict[tuple[str, str], MethodCoverage] = field(default_factory=dict)
+
+
+@dataclass(slots=True)
+class PackageCoverage:
+    """Coverage of a package - its classes keyed by (name, filename)."""
+    name: str
+    complexity: float = 0
+    classes: dict[tuple[str, str], ClassCoverage] = field(default_factory=dict)
+
+
+class CoberturaAggregate:
+    """Aggregates Cobertura documents, summing line hits per (package, class, line)."""
+    version: Optional[str]
+    timestamp: int
+    sources: dict[str, None]
+    packages: dict[str, PackageCoverage]
+
+    def __init__(self):
+        self.version = None
+        self.timestamp = 0
+        self.sources = {}
+        self.packages = {}
+
+    def add_file(self, path: Path):
+        """
+        Streams a Cobertura XML file into the aggregate.
+        :param path: Path to the Cobertura XML file
+        :raises ValueError: If the file is not a Cobertura document
+        """
+        package: Optional[PackageCoverage] = None
+        coverage_class: Optional[ClassCoverage] = None
+        method: Optional[MethodCoverage] = None
+
+        try:
+            events = ElementTree.iterparse(path, events=("start", "end"))
+            _, root = next(events)
+            if root.tag != "coverage":
+                raise ValueError(f"'{path}' is not a Cobertura document - root is <{root.tag}>")
+            self.version = self.version or root.get("version")
+            self.timestamp = max(self.timestamp, int(root.get("timestamp", 0) or 0))
+
+            for event, element in events:
+                tag = element.tag
+                if event == "start":
+                    if tag == "package":
+                        package = self._get_package(element)
+                    elif tag == "class" and package is not None:
+                        coverage_class = self._get_class(package, element)
+                    elif tag == "method" and coverage_class is not None:
+                        method = coverage_class.methods.setdefault(
+                            (element.get("name", ""), element.get("signature", "")), MethodCoverage())
+                        method.complexity = max(method.complexity, _float(element.get("complexity")))
+                elif tag == "line":
+                    if method is not None:
+                        # Method lines repeat the class' own lines - only their numbers are kept
+                        method.lines.add(_line_number(element, path))
+                    elif coverage_class is not None:
+                        self._add_line(coverage_class, element, path)
+                elif tag == "lines" or tag == "source":
+                    if tag == "source" and element.text:
+                        self.sources.setdefault(element.text.strip(), None)
+                    # Drop finished elements right away, so memory does not grow with the document
+                    element.clear()
+                elif tag == "method":
+                    method = None
+                    element.clear()
+                elif tag == "class":
+                    coverage_class = None
+                    element.clear()
+                elif tag == "package":
+                    package = None
+                    element.clear()
+        except ElementTree.ParseError as e:
+            raise ValueError(f"Could not parse Cobertura file '{path}': {e}") from e
+
+    def write(self, path: Path):
+        """
+        Writes the aggregate as a Cobertura XML document.
+        :param path: Path of the merged Cobertura XML file
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as stream:
+            self.write_stream(stream)
+
+    def write_stream(self, stream: IO[str]):
+        """
+        Writes the aggregate as a Cobertura XML document to a text stream, one element at a time.
+        :param stream: Text stream to write to
+        """
+        lines = [line for package in self.packages.values() for coverage_class in package.classes.values()
+                 for line in coverage_class.lines.values()]
+        stream.write('<?xml version="1.0" encoding="utf-8"?>\n')
+        stream.write(_start_tag("coverage", {
+            **_rates(lines),
+            "lines-covered": sum(1 for line in lines if line.hits),
+            "lines-valid": len(lines),
+            "branches-covered": sum(line.covered_conditions for line in lines),
+            "branches-valid": sum(line.total_conditions for line in lines),
+            "complexity": _number(sum(package.complexity for package in self.packages.values())),
+            "version": self.version or "1.9",
+            "timestamp": self.timestamp,
+        }))
+        stream.write("\n  <sources>\n")
+        for source in self.sources:
+            stream.write(f"    <source>{escape(source)}</source>\n")
+        stream.write("  </sources>\n  <packages>\n")
+        for package in self.packages.values():
+            package_lines = [line for coverage_class in package.classes.values()
+                             for line in coverage_class.lines.values()]
+            stream.write("    " + _start_tag("package", {
+                "name": package.name, **_rates(package_lines), "complexity": _number(package.complexity)}))
+            stream.write("\n      <classes>\n")
+            for coverage_class in package.classes.values():
+                self._write_class(stream, coverage_class)
+            stream.write("      </classes>\n    </package>\n")
+        stream.write("  </packages>\n</coverage>\n")
+
+    def _get_package(self, element: ElementTree.Element) -> PackageCoverage:
+        """Returns the aggregated package for a <package> element, creating it on first sight."""
+        name = element.get("name", "")
+        package = self.packages.get(name)
+        if package is None:
+            package = self.packages[name] = PackageCoverage(name)
+        package.complexity = max(package.complexity, _float(element.get("complexity")))
+        return package
+
+    @staticmethod
+    def _get_class(package: PackageCoverage, element: ElementTree.Element) -> ClassCoverage:
+        """Returns the aggregated class for a <class> element, creating it on first sight."""
+        key = (element.get("name", ""), element.get("filename", ""))
+        coverage_class = package.classes.get(key)
+        if coverage_class is None:
+            coverage_class = package.classes[key] = ClassCoverage(*key)
+        coverage_class.complexity = max(coverage_class.complexity, _float(element.get("complexity")))
+        return coverage_class
+
+    @staticmethod
+    def _add_line(coverage_class: ClassCoverage, element: ElementTree.Element, path: Path):
+        """Folds a <line> element of a class' own lines, read from the file at path, into the class."""
+        number = _line_number(element, path)
+        line = coverage_class.lines.get(number)
+        if line is None:
+            line = coverage_class.lines[number] = LineCoverage()
+
+        covered, total, conditions = 0, 0, ()
+        if element.get("branch", "false").lower() == "true":
+            match = _CONDITION_COVERAGE.search(element.get("condition-coverage", ""))
+            if match:
+                covered, total = int(match.group(1)), int(match.group(2))
+            conditions = tuple((condition.get("number", ""), condition.get("type", ""), condition.get("coverage", ""))
+                               for condition in element.iter("condition"))
+        line.add(int(element.get("hits", 0)), covered, total, conditions)
+
+    @staticmethod
+    def _write_class(stream: IO[str], coverage_class: ClassCoverage):
+        """Writes a <class> element with its methods and lines."""
+        lines = [coverage_class.lines[number] for number in sorted(coverage_class.lines)]
+        stream.write("        " + _start_tag("class", {
+            "name": coverage_class.name, "filename": coverage_class.filename, **_rates(lines),
+            "complexity": _number(coverage_class.complexity)}))
+        stream.write("\n          <methods>\n")
+        for (name, signature), method in coverage_class.methods.items():
+            method_lines = sorted(number for number in method.lines if number in coverage_class.lines)
+            stream.write("            " + _start_tag("method", {
+                "name": name, "signature": signature,
+                **_rates([coverage_class.lines[number] for number in method_lines]),
+                "complexity": _number(method.complexity)}))
+            stream.write("\n")
+            _write_lines(stream, coverage_class, method_lines, "              ")
+            stream.write("            </method>\n")
+        stream.write("          </methods>\n")
+        _write_lines(stream, coverage_class, sorted(coverage_class.lines), "          ")
+        stream.write("        </class>\n")
+
+
+def merge_cobertura_files(coverage_files: Iterable[Path],
+                          target_file: Path,
+                          out: Optional[IO[str]] = None) -> CoberturaAggregate:
+    """
+    Merges Cobertura XML files into a single file, summing line hits.
+    :param coverage_files: Paths to the Cobertura XML files to merge
+    :param target_file: Path of the merged Cobertura XML file
+    :param out: Optional text stream to report progress to
+    :returns: The aggregate holding the merged coverage
+    """
+    aggregate = CoberturaAggregate()
+    for coverage_file in coverage_files:
+        if out:
+            print(f"Merging {os.path.abspath(coverage_file)}", file=out)
+        aggregate.add_file(coverage_file)
+    aggregate.write(target_file)
+    if out:
+        print(f"Merged coverage written to {os.path.abspath(target_file)}", file=out)
+    return aggregate
+
+
+def append_cobertura_files(coverage_files: Iterable[Path],
+                           target_file: Path,
+                           out: Optional[IO[str]] = None) -> CoberturaAggregate:
+    """
+    Folds Cobertura XML files into a running aggregate, summing their line hits into the aggregate's.
+    Only the aggregate and the new files are read, and the aggregate is replaced atomically.
+    :param coverage_files: Paths to the new Cobertura XML files
+    :param target_file: Path of the aggregate Cobertura XML file, created if it does not exist
+    :param out: Optional text stream to report progress to
+    :returns: The updated aggregate
+    """
+    aggregate = CoberturaAggregate()
+    if os.path.exists(target_file):
+        aggregate.add_file(target_file)
+    for coverage_file in coverage_files:
+        if out:
+            print(f"Appending {os.path.abspath(coverage_file)}", file=out)
+        aggregate.add_file(coverage_file)
+    with atomic_write(target_file, "w", encoding="utf-8") as stream:
+        aggregate.write_stream(stream)
+    if out:
+        print(f"Aggregated coverage written to {os.path.abspath(target_file)}", file=out)
+    return aggregate
+
+
+def _write_lines(stream: IO[str], coverage_class: ClassCoverage, numbers: list[int], indent: str):
+    """Writes a <lines> element for the given line numbers of a class."""
+    stream.write(f"{indent}<lines>\n")
+    for number in numbers:
+        line = coverage_class.lines[number]
+        if not line.branch:
+            stream.write(f'{indent}  <line number="{number}" hits="{line.hits}" branch="False" />\n')
+            continue
+        percent = round(100 * line.covered_conditions / line.total_conditions) if line.total_conditions else 0
+        stream.write(f'{indent}  <line number="{number}" hits="{line.hits}" branch="True" condition-coverage='
+                     f'"{percent}% ({line.covered_conditions}/{line.total_conditions})"')
+        if not line.conditions:
+            stream.write(" />\n")
+            continue
+        stream.write(f">\n{indent}    <conditions>\n")
+        for condition_number, condition_type, coverage in line.conditions:
+            stream.write(f"{indent}      <condition number={quoteattr(condition_number)} "
+                         f"type={quoteattr(condition_type)} coverage={quoteattr(coverage)} />\n")
+        stream.write(f"{indent}    </conditions>\n{indent}  </line>\n")
+    stream.write(f"{indent}</lines>\n")
+
+
+def _start_tag(tag: str, attributes: dict) -> str:
+    """Formats an opening tag, escaping its attribute values."""
+    return f"<{tag}" + "".join(f" {name}={quoteattr(str(value))}" for name, value in attributes.items()) + ">"
+
+
+def _rates(lines: list[LineCoverage]) -> dict[str, str]:
+    """Returns the line-rate and branch-rate attributes of a set of lines."""
+    total_conditions = sum(line.total_conditions for line in lines)
+    line_rate = sum(1 for line in lines if line.hits) / len(lines) if lines else 1
+    branch_rate = sum(line.covered_conditions for line in lines) / total_conditions if total_conditions else 1
+    return {"line-rate": _number(line_rate), "branch-rate": _number(branch_rate)}
+
+
+def _number(value: float) -> str:
+    """Formats a rate or complexity the way Cobertura writers do - up to 4 decimals, no trailing zeros."""
+    return f"{round(value, 4):g}"
+
+
+def _line_number(element: ElementTree.Element, path: Path) -> int:
+    """
+    :param element: A <line> element
+    :param path: The Cobertura file the element was read from
+    :returns: The line's number
+    :raises ValueError: If the line has no valid number
+    """
+    number = element.get("number")
+    try:
+        return int(number)
+    except (TypeError, ValueError):
+        raise ValueError(f"Cobertura file '{path}' has a <line> with an invalid number: {number!r}") from None
+
+
+def _float(value: Optional[str]) -> float:
+    """Parses an optional numeric attribute, treating missing and malformed values as 0."""
+    try:
+        return float(value) if value else 0
+    except ValueError:
+        return 0
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """
+    Command line entry point, compatible with the arguments of 'dotnet-coverage merge' for Cobertura inputs.
+    :param argv: Command line arguments, defaults to sys.argv[1:]
+    :returns: The process exit code
+    """
+    parser = argparse.ArgumentParser(prog="python -m crossfit.tools cobertura", fromfile_prefix_chars="@")
+    commands = parser.add_subparsers(dest="command", required=True)
+    merge = commands.add_parser("merge", help="Merges Cobertura coverage files into a new one.")
+    merge.add_argument("files", nargs="*", type=Path, help="Cobertura XML files to merge")
+    merge.add_argument("-o", "--output", required=True, type=Path, help="file to write the merged coverage to")
+    merge.add_argument("-f", "--output-format", default="cobertura", help="output format, only cobertura")
+    append = commands.add_parser("append", help="Folds Cobertura coverage files into an existing aggregate.")
+    append.add_argument("files", nargs="+", type=Path, help="new Cobertura XML files to fold in")
+    append.add_argument("-o", "--output", required=True, type=Path, help="aggregate file to update atomically")
+    append.add_argument("-f", "--output-format", default="cobertura", help="output format, only cobertura")
+    args = parser.parse_args(argv)
+
+    if args.output_format.lower() != "cobertura":
+        print(f"Unsupported output format '{args.output_format}', only cobertura is supported.", file=sys.stderr)
+        return 1
+    try:
+        if args.command == "append":
+            append_cobertura_files(args.files, args.output, sys.stdout)
+        else:
+            merge_cobertura_files(args.files, args.output, sys.stdout)
+    except (OSError, ValueError) as e:
+        print(f"Execution of {args.command} failed: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
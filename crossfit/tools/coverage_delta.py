@@ -0,0 +1,155 @@
+"""
+Native delta of two coverage snapshots - what became covered between them.
+
+JaCoCo snapshots are compared probe by probe on the packed probe bits (after AND-NOT before), Cobertura snapshots
+line by line on their hits, without generating and diffing reports. The delta is written in the snapshots' own
+format, holding only the newly covered probes or lines, so it can be reported on or merged like any other snapshot:
+
+    python -m crossfit.tools coverage_delta diff --output delta.exec --summary delta.json before.exec after.exec
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+from typing import IO, Optional
+
+from crossfit.models.tool_models import DeltaSummary
+from crossfit.tools.atomic_file import atomic_write
+from crossfit.tools.cobertura import ClassCoverage, CoberturaAggregate, PackageCoverage
+from crossfit.tools.jacoco_exec import ExecFileLoader
+from crossfit.tools.probe_store import ExecutionData
+
+
+def diff_exec_files(before_file: Path, after_file: Path, destfile: Path) -> DeltaSummary:
+    """
+    Writes the probes executed in the after snapshot but not in the before snapshot.
+    :param before_file: The earlier .exec snapshot
+    :param after_file: The later .exec snapshot
+    :param destfile: Path of the delta .exec file, holding the after snapshot's sessions
+    :returns: Summary of the delta, counting probes
+    :raises ValueError: If a file is not a valid execution data file or a class differs between the snapshots
+    """
+    before, after = ExecFileLoader(), ExecFileLoader()
+    before.load(before_file)
+    after.load(after_file)
+
+    summary = DeltaSummary(covered_before=before.store.hit_count(), covered_after=after.store.hit_count())
+    delta = ExecFileLoader()
+    delta.sessions = after.sessions
+    for data in after.store:
+        newly_covered = ExecutionData(data.id, data.name, data.probe_count, data.probes)
+        previous = before.store.get(data.id)
+        if previous is not None:
+            newly_covered.subtract(previous)
+            summary.no_longer_covered += (previous.probes & ~data.probes).bit_count()
+        if newly_covered.has_hits():
+            delta.store.put(newly_covered)
+            summary.newly_covered += newly_covered.hit_count()
+            summary.classes.append(data.name)
+    summary.no_longer_covered += sum(data.hit_count() for data in before.store if data.id not in after.store)
+
+    with atomic_write(destfile) as stream:
+        delta.write(stream)
+    return summary
+
+
+def diff_cobertura_files(before_file: Path, after_file: Path, target_file: Path) -> DeltaSummary:
+    """
+    Writes the lines hit in the after snapshot but not in the before snapshot, with their hits in the after one.
+    :param before_file: The earlier Cobertura XML snapshot
+    :param after_file: The later Cobertura XML snapshot
+    :param target_file: Path of the delta Cobertura XML file
+    :returns: Summary of the delta, counting lines
+    :raises ValueError: If a file is not a Cobertura document
+    """
+    before, after = CoberturaAggregate(), CoberturaAggregate()
+    before.add_file(before_file)
+    after.add_file(after_file)
+
+    covered_before = {(package.name, key, number)
+                      for package in before.packages.values()
+                      for key, coverage_class in package.classes.items()
+                      for number, line in coverage_class.lines.items() if line.hits}
+    summary = DeltaSummary(covered_before=len(covered_before))
+    delta = CoberturaAggregate()
+    delta.version, delta.timestamp, delta.sources = after.version, after.timestamp, after.sources
+    for package in after.packages.values():
+        for key, coverage_class in package.classes.items():
+            lines = {}
+            for number, line in coverage_class.lines.items():
+                if not line.hits:
+                    continue
+                summary.covered_after += 1
+                if (package.name, key, number) in covered_before:
+                    covered_before.discard((package.name, key, number))
+                else:
+                    lines[number] = line
+            if lines:
+                delta_package = delta.packages.setdefault(package.name, PackageCoverage(package.name))
+                delta_package.classes[key] = ClassCoverage(coverage_class.name, coverage_class.filename,
+                                                           coverage_class.complexity, lines, coverage_class.methods)
+                summary.newly_covered += len(lines)
+                summary.classes.append(coverage_class.name)
+    summary.no_longer_covered = len(covered_before)
+
+    with atomic_write(target_file, "w", encoding="utf-8") as stream:
+        delta.write_stream(stream)
+    return summary
+
+
+def diff_coverage_files(before_file: Path,
+                        after_file: Path,
+                        target_file: Path,
+                        summary_file: Optional[Path] = None,
+                        out: Optional[IO[str]] = None) -> DeltaSummary:
+    """
+    Writes the delta of two snapshots of the same format - .exec files natively as JaCoCo, others as Cobertura.
+    :param before_file: The earlier snapshot
+    :param after_file: The later snapshot
+    :param target_file: Path of the delta file
+    :param summary_file: Optional path to write the summary to as JSON
+    :param out: Optional text stream to report progress to
+    :returns: Summary of the delta
+    :raises ValueError: If the snapshots could not be compared
+    """
+    if out:
+        print(f"Comparing {os.path.abspath(before_file)} to {os.path.abspath(after_file)}", file=out)
+    if Path(after_file).suffix == ".exec":
+        summary = diff_exec_files(before_file, after_file, target_file)
+    else:
+        summary = diff_cobertura_files(before_file, after_file, target_file)
+    if summary_file is not None:
+        with atomic_write(summary_file, "w", encoding="utf-8") as stream:
+            stream.write(summary.model_dump_json(indent=2))
+    if out:
+        print(f"Newly covered: {summary.newly_covered} in {len(summary.classes)} classes, no longer covered: "
+              f"{summary.no_longer_covered}. Delta written to {os.path.abspath(target_file)}", file=out)
+    return summary
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """
+    Command line entry point.
+    :param argv: Command line arguments, defaults to sys.argv[1:]
+    :returns: The process exit code
+    """
+    parser = argparse.ArgumentParser(prog="python -m crossfit.tools coverage_delta", fromfile_prefix_chars="@")
+    commands = parser.add_subparsers(dest="command", required=True)
+    diff = commands.add_parser("diff", help="Writes what became covered between two snapshots.")
+    diff.add_argument("before", type=Path, help="the earlier snapshot")
+    diff.add_argument("after", type=Path, help="the later snapshot")
+    diff.add_argument("--output", required=True, type=Path, help="file to write the delta to")
+    diff.add_argument("--summary", type=Path, help="file to write the delta summary to as JSON")
+    diff.add_argument("--quiet", action="store_true", help="suppress all output on stdout")
+    args = parser.parse_args(argv)
+
+    try:
+        diff_coverage_files(args.before, args.after, args.output, args.summary, None if args.quiet else sys.stdout)
+    except (OSError, ValueError) as e:
+        print(f"Execution of {args.command} failed: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,26 @@
+from logging import Logger
 from pathlib import Path
 from typing import Optional
 
 from crossfit import Command
-from crossfit.models import ReportFormat, ToolType
-from crossfit.tools.tool import Tool
+from crossfit.models import ArgFileStyle, ReportFormat, ToolType
+from crossfit.tools.tool import Tool, native_execution_args
 
 
 class DotnetCoverage(Tool):
     _tool_type = ToolType.DotnetCoverage
+    _native_merge: bool
+
+    def __init__(self, logger: Logger, path: Optional[Path] = None, catch: bool = True, native_merge: bool = False):
+        """
+        :param logger: Logger instance for logging (required).
+        :param path: The path to the tool executable.
+        :param catch: If True, catches exceptions and returns fallback. If False, re-raises.
+        :param native_merge: If True, merges Cobertura files with the native streaming python implementation
+                             instead of dotnet-coverage.
+        """
+        super().__init__(logger, path, catch)
+        self._native_merge = native_merge
 
     def save_report(self,
                     coverage_files,
@@ -33,10 +46,14 @@ class DotnetCoverage(Tool):
         command_builder = (
             self._create_command_builder("", ToolType.DotnetReportGenerator, None, *extras)
             .set_values_delimiter(":", True)
-            .add_option("-reports", f"\"{multiple_values_delimiter.join(map(str, coverage_files))}\""))
+            .add_option("-reports", multiple_values_delimiter.join(map(str, coverage_files)))
+            .add_inputs(*map(Path, coverage_files),
+                        *[Path(directory) for option, value in extras if option == "-sourcedirs" and value
+                          for directory in value.split(multiple_values_delimiter) if directory])
+            .add_outputs(Path(target_dir)))
         combined_formats = set((report_formats or []) + [report_format])
         command_builder = command_builder.add_option(
-            "-reporttypes",f"\"{multiple_values_delimiter.join([rf.value for rf in combined_formats if rf])}\"")
+            "-reporttypes", multiple_values_delimiter.join([rf.value for rf in combined_formats if rf]))
 
         command = command_builder.build_command()
         command.command = [kw.replace("--", "-") for kw in command.command[2:]]
@@ -62,7 +79,7 @@ class DotnetCoverage(Tool):
             target_path = target_path.with_suffix(".xml")
         extras += ("--output", str(target_path)),
         command_builder = self._create_command_builder(
-            "snapshot", None, None, *extras).add_arguments(session)
+            "snapshot", None, None, *extras).add_arguments(session).add_outputs(target_path)
 
         return command_builder.build_command()
 
@@ -79,11 +96,62 @@ class DotnetCoverage(Tool):
         :param extras: Extra options to pass to the dotnet-coverage CLI's merge command.
         :return: A Command object configured to merge coverage files.
         """
-        extras += ("--output", str(target_dir / (
+        target_path = target_dir / (
             target_file if target_file is not None else Path(self._get_default_target_filename()).with_suffix(
-                ".xml")))),
-        command_builder = self._create_command_builder("merge", None, coverage_files, *extras)
+                ".xml"))
+        extras += ("--output", str(target_path)),
+        command_builder = (self._create_command_builder("merge", None, coverage_files, *extras)
+                           .set_argfile_style(ArgFileStyle.DotnetResponseFile)
+                           .add_outputs(target_path))
         if {"--output-format", "-f"}.intersection(command_builder.build_command().command):
             command_builder = command_builder.add_option("--output-format", ReportFormat.Cobertura.value.lower())
+        if self._native_merge:
+            command_builder = (command_builder.set_execution_args(*native_execution_args("cobertura"))
+                               .set_argfile_style(ArgFileStyle.Argparse))
 
         return command_builder.build_command()
+
+    def append_coverage(self,
+                        coverage_files,
+                        aggregate_file,
+                        *extras: tuple[str, Optional[str]]) -> Command:
+        """
+        Folds Cobertura coverage files into a running aggregate file, summing their line hits.
+        Always runs the native implementation, as dotnet-coverage has no equivalent command.
+        :param coverage_files: File paths to the new Cobertura coverage files.
+        :param aggregate_file: The aggregate Cobertura file, created on the first append.
+        :param extras: Extra options to pass to the append command.
+        :return: A Command object configured to append the coverage files.
+        """
+        extras += ("--output", str(aggregate_file)),
+        return (self._create_command_builder("append", None, coverage_files, *extras)
+                .set_execution_args(*native_execution_args("cobertura"))
+                .set_argfile_style(ArgFileStyle.Argparse)
+                .build_command())
+
+    def diff_coverage(self,
+                      before_file,
+                      after_file,
+                      target_dir,
+                      target_file,
+                      *extras: tuple[str, Optional[str]]) -> Command:
+        """
+        Writes the lines covered between two Cobertura snapshots into a delta Cobertura file, with a JSON summary
+        next to it. Always runs the native implementation, as dotnet-coverage has no equivalent command.
+        :param before_file: The earlier Cobertura snapshot.
+        :param after_file: The later Cobertura snapshot.
+        :param target_dir: Targeted directory to save the delta file to.
+        :param target_file: Specified delta file name - when not given, uses default with .xml suffix.
+        :param extras: Extra options to pass to the diff command.
+        :return: A Command object configured to diff the snapshots.
+        """
+        target_path = target_dir / (target_file if target_file is not None else self._get_default_target_filename())
+        if not target_path.suffix:
+            target_path = target_path.with_suffix(".xml")
+        summary_path = target_path.with_suffix(".json")
+        extras += ("--output", str(target_path)), ("--summary", str(summary_path))
+        return (self._create_command_builder("diff", None, [before_file, after_file], *extras)
+                .set_execution_args(*native_execution_args("coverage_delta"))
+                .set_argfile_style(ArgFileStyle.Argparse)
+                .add_outputs(target_path, summary_path)
+                .build_command())
@@ -1,15 +1,46 @@
 import os.path
 
+from logging import Logger
+from pathlib import Path
 from typing import Optional
 from crossfit import Command
 from crossfit.commands.command_builder import CommandBuilder
+from crossfit.models.command_models import ArgFileStyle
 from crossfit.models.tool_models import ReportFormat, ToolType
-from crossfit.tools.tool import Tool
+from crossfit.tools.tool import Tool, native_execution_args
 
 
 class Jacoco(Tool):
     """JaCoCo coverage tool implementation for Java projects."""
     _tool_type = ToolType.Jacoco
+    _native_merge: bool
+    _native_dump: bool
+    _native_report: bool
+    _analysis_cache: Optional[Path]
+
+    def __init__(self, logger: Logger, path: Optional[Path] = None, catch: bool = True, native_merge: bool = False,
+                 native_dump: bool = False, native_report: bool = False, analysis_cache: Optional[Path] = None):
+        """
+        :param logger: Logger instance for logging (required).
+        :param path: The path to the tool executable/jar.
+        :param catch: If True, catches exceptions and returns fallback. If False, re-raises.
+        :param native_merge: If True, merges .exec files with the native python implementation instead of a JVM.
+        :param native_dump: If True, dumps the agent's coverage with the native python client instead of a JVM.
+        :param native_report: If True, generates reports with the native python report engine instead of a JVM.
+                              Experimental - JaCoCo's instruction level filters are not applied, so counters may
+                              differ from jacococli's.
+        :param analysis_cache: Database caching class analyses between native reports, so only changed class
+                               files are analyzed - used with native_report only.
+        """
+        super().__init__(logger, path, catch)
+        self._native_merge = native_merge
+        self._native_dump = native_dump
+        self._native_report = native_report
+        if native_report:
+            self._logger.warning("The native JaCoCo report is experimental - instruction level filters (finally "
+                                 "blocks, try-with-resources, switches on strings and enums, asserts, Kotlin) are not "
+                                 "applied, so its counters may differ from jacococli's.")
+        self._analysis_cache = analysis_cache
 
     def _create_command_builder(self,
                                 command,
@@ -29,7 +60,8 @@ class Jacoco(Tool):
         """
         tool_type = tool_type or self._tool_type
         command_builder = (super()._create_command_builder(command, tool_type, path_arguments, *extras)
-                           .set_execution_call(f"java -jar {os.path.relpath(self._path / str(tool_type.value))}"))
+                           .set_execution_args("java", "-jar", os.path.relpath(self._path / str(tool_type.value)))
+                           .set_argfile_style(ArgFileStyle.Java))
 
         required_flags = required_flags or []
         for required_flag in required_flags:
@@ -68,14 +100,21 @@ class Jacoco(Tool):
             extras += ("--classfiles", str(build_dir)),
         command = self._create_command_builder(
             "report", None, coverage_files, ["--classfiles"], *extras)
+        # Every class and source location is an input, also when passed as extras
+        command = command.add_inputs(*[Path(value) for option, value in extras
+                                       if option in ("--classfiles", "--sourcefiles") and value])
         combined_formats = set((report_formats or []) + [report_format])
         for rf in combined_formats:
             if rf == ReportFormat.Html:
-                command = command.add_option(f"--{rf.name.lower()}", str(target_dir))
+                command = command.add_option(f"--{rf.name.lower()}", str(target_dir)).add_outputs(Path(target_dir))
             elif rf is not None:
-                command = command.add_option(f"--{rf.name.lower()}",
-                                             str((target_dir / self._get_default_target_filename())
-                                                 .with_suffix(f".{rf.value.lower()}")))
+                report_path = (target_dir / self._get_default_target_filename()).with_suffix(f".{rf.value.lower()}")
+                command = command.add_option(f"--{rf.name.lower()}", str(report_path)).add_outputs(report_path)
+        if self._native_report:
+            if self._analysis_cache is not None:
+                command = command.add_option("--analysiscache", str(self._analysis_cache))
+            command = (command.set_execution_args(*native_execution_args("jacoco_report"))
+                       .set_argfile_style(ArgFileStyle.Argparse))
         return command.build_command()
 
     def snapshot_coverage(self,
@@ -97,7 +136,10 @@ class Jacoco(Tool):
             target_path = target_path.with_suffix(".exec")
         extras += ("--destfile", str(target_path)),
         command = self._create_command_builder(
-            "dump", None, None, None, *extras)
+            "dump", None, None, None, *extras).add_outputs(target_path)
+        if self._native_dump:
+            command = (command.set_execution_args(*native_execution_args("jacoco_agent"))
+                       .set_argfile_style(ArgFileStyle.Argparse))
         return command.build_command()
 
     def merge_coverage(self,
@@ -119,5 +161,71 @@ class Jacoco(Tool):
             target_path = target_path.with_suffix(".exec")
         extras += ("--destfile", str(target_path)),
         command = self._create_command_builder(
-            "merge", None, coverage_files, None,*extras)
+            "merge", None, coverage_files, None,*extras).add_outputs(target_path)
+        if self._native_merge:
+            command = (command.set_execution_args(*native_execution_args("jacoco_exec"))
+                       .set_argfile_style(ArgFileStyle.Argparse))
         return command.build_command()
+
+    def reset_coverage(self,
+                       session,
+                       *extras) -> Command:
+        """
+        Resets the JaCoCo agent's coverage data. With native_dump, the native client sends a reset command without
+        requesting a dump - no execution data is transferred or written to disk. Otherwise jacococli dumps with
+        --reset to a temporary file, which a chained command removes.
+        :param session: Session identifier (not used by JaCoCo but kept for interface consistency).
+        :param extras: Extra options to pass to the reset command (e.g. '--address', '--port').
+        :return: A Command object configured to reset the coverage data.
+        """
+        if not self._native_dump:
+            return super().reset_coverage(session, *extras)
+        return (self._create_command_builder("reset", None, None, None, *extras)
+                .set_execution_args(*native_execution_args("jacoco_agent"))
+                .set_argfile_style(ArgFileStyle.Argparse)
+                .build_command())
+
+    def append_coverage(self,
+                        coverage_files,
+                        aggregate_file,
+                        *extras) -> Command:
+        """
+        Folds JaCoCo coverage files into a running aggregate .exec file, OR-ing their probes.
+        Always runs the native implementation, as jacococli has no equivalent command.
+        :param coverage_files: File paths to the new JaCoCo .exec coverage files.
+        :param aggregate_file: The aggregate .exec file, created on the first append.
+        :param extras: Extra options to pass to the append command (e.g. '--quiet').
+        :return: A Command object configured to append the coverage files.
+        """
+        extras += ("--destfile", str(aggregate_file)),
+        return (self._create_command_builder("append", None, coverage_files, None, *extras)
+                .set_execution_args(*native_execution_args("jacoco_exec"))
+                .set_argfile_style(ArgFileStyle.Argparse)
+                .build_command())
+
+    def diff_coverage(self,
+                      before_file,
+                      after_file,
+                      target_dir,
+                      target_file,
+                      *extras) -> Command:
+        """
+        Writes the probes executed between two JaCoCo snapshots into a delta .exec file (after AND-NOT before),
+        with a JSON summary next to it. Always runs the native implementation, as jacococli has no equivalent.
+        :param before_file: The earlier JaCoCo .exec snapshot.
+        :param after_file: The later JaCoCo .exec snapshot.
+        :param target_dir: Targeted directory to save the delta file to.
+        :param target_file: Specified delta file name - when not given, uses default with .exec suffix.
+        :param extras: Extra options to pass to the diff command (e.g. '--quiet').
+        :return: A Command object configured to diff the snapshots.
+        """
+        target_path = target_dir / (target_file if target_file is not None else self._get_default_target_filename())
+        if not target_path.suffix:
+            target_path = target_path.with_suffix(".exec")
+        summary_path = target_path.with_suffix(".json")
+        extras += ("--output", str(target_path)), ("--summary", str(summary_path))
+        return (self._create_command_builder("diff", None, [before_file, after_file], None, *extras)
+                .set_execution_args(*native_execution_args("coverage_delta"))
+                .set_argfile_style(ArgFileStyle.Argparse)
+                .add_outputs(target_path, summary_path)
+                .build_command())
@@ -0,0 +1,151 @@
+"""
+Native client for the remote control protocol of the JaCoCo agent's tcpserver output.
+
+Requests dumps and resets over a plain socket instead of starting a JVM, writing the received execution data
+like jacococli does. Can also be run as a jacococli-compatible dump command:
+
+    python -m crossfit.tools jacoco_agent dump --address localhost --port 6300 --destfile dump.exec --reset
+
+or reset the agent's execution data without transferring it at all:
+
+    python -m crossfit.tools jacoco_agent reset --address localhost --port 6300
+"""
+import argparse
+import os
+import socket
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import IO, Optional
+
+from crossfit.tools.jacoco_exec import BLOCK_CMD_DUMP, BLOCK_HEADER, FORMAT_VERSION, MAGIC_NUMBER, ExecFileLoader
+
+DEFAULT_ADDRESS = "localhost"
+DEFAULT_PORT = 6300
+RETRY_DELAY = 1.0
+_HEADER = bytes([BLOCK_HEADER]) + struct.pack(">HH", MAGIC_NUMBER, FORMAT_VERSION)
+
+
+class AgentClient:
+    """Client of a JaCoCo agent running with output=tcpserver."""
+
+    def __init__(self,
+                 address: str = DEFAULT_ADDRESS,
+                 port: int = DEFAULT_PORT,
+                 retry_count: int = 10,
+                 retry_delay: float = RETRY_DELAY,
+                 timeout: Optional[float] = None):
+        """
+        :param address: Host name or IP address of the agent
+        :param port: The agent's tcpserver port
+        :param retry_count: Number of additional connection attempts when the agent does not accept connections
+        :param retry_delay: Time in seconds between connection attempts
+        :param timeout: Maximum time in seconds each socket operation may block, None to block indefinitely
+        :raises ValueError: If retry_count is negative
+        """
+        if retry_count < 0:
+            raise ValueError(f"Retry count must not be negative. Valued as: '{retry_count}'")
+        self.address = address
+        self.port = port
+        self._retry_count = retry_count
+        self._retry_delay = retry_delay
+        self._timeout = timeout
+
+    def dump(self, dump: bool = True, reset: bool = False, out: Optional[IO[str]] = None) -> ExecFileLoader:
+        """
+        Sends a dump command to the agent and reads its response.
+        :param dump: If True, the agent sends its current execution data
+        :param reset: If True, the agent resets its execution data after the optional dump
+        :param out: Optional text stream to report progress to
+        :returns: The loader holding the received sessions and execution data - empty if dump is False
+        :raises OSError: If the agent could not be reached
+        :raises EOFError: If the agent closed the connection before acknowledging the command
+        :raises ValueError: If the agent sent invalid execution data
+        """
+        loader = ExecFileLoader()
+        with self._connect(out) as connection, connection.makefile("rwb") as stream:
+            stream.write(_HEADER + bytes([BLOCK_CMD_DUMP, dump, reset]))
+            stream.flush()
+            loader.load_remote(stream)
+        return loader
+
+    def _connect(self, out: Optional[IO[str]]) -> socket.socket:
+        """
+        :param out: Optional text stream to report progress to
+        :returns: A socket connected to the agent, retrying while the agent refuses connections
+        :raises OSError: If the agent could not be reached after all retries
+        """
+        for attempt in range(self._retry_count + 1):
+            if out:
+                print(f"[INFO] Connecting to {self.address}:{self.port}.", file=out)
+            try:
+                return socket.create_connection((self.address, self.port), timeout=self._timeout)
+            except OSError as e:
+                if attempt == self._retry_count:
+                    raise
+                if out:
+                    print(f"[WARN] {e}.", file=out)
+                time.sleep(self._retry_delay)
+
+
+def dump_agent(client: AgentClient,
+               destfile: Path,
+               reset: bool = False,
+               append: bool = True,
+               out: Optional[IO[str]] = None) -> ExecFileLoader:
+    """
+    Dumps the agent's execution data into a file, like 'jacococli.jar dump'.
+    :param client: Client of the agent to dump
+    :param destfile: Path of the .exec file to write
+    :param reset: If True, the agent resets its execution data after the dump
+    :param append: If True, appends to an existing destfile like jacococli does, otherwise overwrites it
+    :param out: Optional text stream to report progress to
+    :returns: The loader holding the dumped execution data
+    """
+    loader = client.dump(dump=True, reset=reset, out=out)
+    if out:
+        print(f"[INFO] Writing execution data to {os.path.abspath(destfile)}.", file=out)
+    loader.save(destfile, append)
+    return loader
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """
+    Command line entry point, compatible with the arguments of 'jacococli.jar dump'.
+    :param argv: Command line arguments, defaults to sys.argv[1:]
+    :returns: The process exit code
+    """
+    parser = argparse.ArgumentParser(prog="python -m crossfit.tools jacoco_agent", fromfile_prefix_chars="@")
+    commands = parser.add_subparsers(dest="command", required=True)
+    dump = commands.add_parser("dump", help="Request execution data from a JaCoCo agent running in 'tcpserver' "
+                                            "output mode.")
+    dump.add_argument("--address", default=DEFAULT_ADDRESS, help="host name or ip address to connect to")
+    dump.add_argument("--port", type=int, default=DEFAULT_PORT, help="the port to connect to")
+    dump.add_argument("--destfile", required=True, type=Path, help="file to write execution data to")
+    dump.add_argument("--reset", action="store_true", help="reset execution data on test target after dump")
+    dump.add_argument("--retry", type=int, default=10, help="number of retries")
+    dump.add_argument("--quiet", action="store_true", help="suppress all output on stdout")
+    reset = commands.add_parser("reset", help="Reset execution data of a JaCoCo agent running in 'tcpserver' "
+                                              "output mode, without dumping it.")
+    reset.add_argument("--address", default=DEFAULT_ADDRESS, help="host name or ip address to connect to")
+    reset.add_argument("--port", type=int, default=DEFAULT_PORT, help="the port to connect to")
+    reset.add_argument("--retry", type=int, default=10, help="number of retries")
+    reset.add_argument("--quiet", action="store_true", help="suppress all output on stdout")
+    args = parser.parse_args(argv)
+
+    out = None if args.quiet else sys.stdout
+    try:
+        client = AgentClient(args.address, args.port, args.retry)
+        if args.command == "reset":
+            client.dump(dump=False, reset=True, out=out)
+        else:
+            dump_agent(client, args.destfile, args.reset, True, out)
+    except (OSError, ValueError, EOFError) as e:
+        print(f"Execution of {args.command} failed: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,369 @@
+"""
+Native reader/writer for JaCoCo execution data (.exec) files.
+
+Mirrors the block format written by JaCoCo's ExecutionDataWriter, so files can be loaded, merged and saved
+without starting a JVM. Can also be run as a jacococli-compatible merge command:
+
+    python -m crossfit.tools jacoco_exec merge --destfile merged.exec f1.exec f2.exec
+
+or fold new dumps into a running aggregate, atomically replacing it:
+
+    python -m crossfit.tools jacoco_exec append --destfile aggregate.exec new.exec
+"""
+import argparse
+import os
+import struct
+import sys
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Iterable, Optional
+
+from crossfit.tools.atomic_file import atomic_write
+from crossfit.tools.probe_store import ExecutionData, ProbeStore
+
+BLOCK_HEADER = 0x01
+BLOCK_SESSIONINFO = 0x10
+BLOCK_EXECUTIONDATA = 0x11
+BLOCK_CMD_OK = 0x20
+BLOCK_CMD_DUMP = 0x40
+MAGIC_NUMBER = 0xC0C0
+FORMAT_VERSION = 0x1007
+
+_CHAR = struct.Struct(">H")
+_LONG = struct.Struct(">q")
+_FILE_HEADER = bytes([BLOCK_HEADER]) + _CHAR.pack(MAGIC_NUMBER) + _CHAR.pack(FORMAT_VERSION)
+
+
+@dataclass(slots=True)
+class SessionInfo:
+    """Session information block, as written by the JaCoCo agent on every dump."""
+    id: str
+    start: int
+    dump: int
+
+
+class ExecFileLoader:
+    """Loads and saves execution data files, merging the execution data of classes seen more than once."""
+    sessions: list[SessionInfo]
+    store: ProbeStore
+
+    def __init__(self):
+        self.sessions = []
+        self.store = ProbeStore()
+
+    def load(self, path: Path):
+        """
+        Loads an execution data file, merging its execution data into the already loaded data.
+        :param path: Path to the .exec file
+        :raises ValueError: If the file is not a valid execution data file
+        """
+        with open(path, "rb") as stream:
+            self.load_bytes(stream.read())
+
+    def load_bytes(self, data: bytes):
+        """
+        Loads execution data from the raw contents of an execution data file or dump stream.
+        :param data: The execution data blocks
+        :raises ValueError: If the data is not valid execution data
+        """
+        self._read_blocks(_BlockReader(data), remote=False)
+
+    def load_remote(self, stream: IO[bytes]):
+        """
+        Loads the execution data a JaCoCo agent sends in response to a dump command, up to its acknowledgement.
+        :param stream: Binary stream of the agent connection, positioned at the agent's header
+        :raises ValueError: If the stream is not valid execution data
+        :raises EOFError: If the connection closed before the agent acknowledged the command
+        """
+        self._read_blocks(_StreamBlockReader(stream), remote=True)
+
+    def _read_blocks(self, reader: "_BlockReader", remote: bool):
+        """
+        Reads execution data blocks, merging them into the already loaded data.
+        :param reader: The reader over the blocks
+        :param remote: If True, reads up to the agent's command acknowledgement instead of the end of the data
+        :raises ValueError: If the data is not valid execution data
+        :raises EOFError: If a remote stream ended before the acknowledgement
+        """
+        first_block = True
+        while not reader.at_end():
+            block = reader.read_byte()
+            if first_block and block != BLOCK_HEADER:
+                raise ValueError("Invalid execution data file.")
+            first_block = False
+            if block == BLOCK_HEADER:
+                reader.read_header()
+            elif block == BLOCK_SESSIONINFO:
+                self.sessions.append(SessionInfo(reader.read_utf(), reader.read_long(), reader.read_long()))
+            elif block == BLOCK_EXECUTIONDATA:
+                class_id, name = reader.read_long(), reader.read_utf()
+                probe_count = reader.read_var_int()
+                self.store.put(ExecutionData.from_packed(
+                    class_id, name, probe_count, reader.read_packed_booleans(probe_count)))
+            elif remote and block == BLOCK_CMD_OK:
+                return
+            else:
+                raise ValueError(f"Unknown block type {block:x}.")
+        if remote:
+            raise EOFError("Socket closed unexpectedly.")
+
+    def save(self, path: Path, append: bool = True):
+        """
+        Saves the loaded sessions and execution data to a file, creating its parent directories.
+        :param path: Path of the .exec file to write
+        :param append: If True, appends to an existing file like jacococli does, otherwise overwrites it
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "ab" if append else "wb") as stream:
+            self.write(stream)
+
+    def write(self, stream: IO[bytes]):
+        """
+        Writes the header, the sessions (ordered by dump time) and the classes with hits to a stream.
+        Classes are written in the iteration order of JaCoCo's own store, so the output is byte-identical.
+        :param stream: Binary stream to write to
+        """
+        stream.write(_FILE_HEADER)
+        for session in sorted(self.sessions, key=lambda info: info.dump):
+            stream.write(bytes([BLOCK_SESSIONINFO]))
+            stream.write(_encode_utf(session.id))
+            stream.write(_LONG.pack(session.start))
+            stream.write(_LONG.pack(session.dump))
+        for class_id in _java_hash_map_order(self.store.ids()):
+            data = self.store.get(class_id)
+            if data.has_hits():
+                stream.write(bytes([BLOCK_EXECUTIONDATA]))
+                stream.write(_LONG.pack(data.id))
+                stream.write(_encode_utf(data.name))
+                stream.write(_encode_var_int(data.probe_count))
+                stream.write(data.packed())
+
+
+def merge_exec_files(coverage_files: Iterable[Path],
+                     destfile: Path,
+                     append: bool = True,
+                     out: Optional[IO[str]] = None) -> ExecFileLoader:
+    """
+    Merges execution data files into a single file, like 'jacococli.jar merge'.
+    :param coverage_files: Paths to the .exec files to merge
+    :param destfile: Path of the merged .exec file
+    :param append: If True, appends to an existing destfile like jacococli does, otherwise overwrites it
+    :param out: Optional text stream to report progress to
+    :returns: The loader holding the merged execution data
+    """
+    loader = ExecFileLoader()
+    coverage_files = list(coverage_files)
+    if not coverage_files and out:
+        print("[WARN] No execution data files provided.", file=out)
+    for coverage_file in coverage_files:
+        if out:
+            print(f"[INFO] Loading execution data file {os.path.abspath(coverage_file)}.", file=out)
+        loader.load(coverage_file)
+    if out:
+        print(f"[INFO] Writing execution data to {os.path.abspath(destfile)}.", file=out)
+    loader.save(destfile, append)
+    return loader
+
+
+def append_exec_files(coverage_files: Iterable[Path],
+                      destfile: Path,
+                      out: Optional[IO[str]] = None) -> ExecFileLoader:
+    """
+    Folds execution data files into a running aggregate, OR-ing their probes into the aggregate's.
+    Only the aggregate and the new files are read, and the aggregate is replaced atomically.
+    :param coverage_files: Paths to the new .exec files
+    :param destfile: Path of the aggregate .exec file, created if it does not exist
+    :param out: Optional text stream to report progress to
+    :returns: The loader holding the updated aggregate
+    """
+    loader = ExecFileLoader()
+    if os.path.exists(destfile):
+        loader.load(destfile)
+    for coverage_file in coverage_files:
+        if out:
+            print(f"[INFO] Appending execution data file {os.path.abspath(coverage_file)}.", file=out)
+        loader.load(coverage_file)
+    with atomic_write(destfile) as stream:
+        loader.write(stream)
+    if out:
+        print(f"[INFO] Wrote execution data to {os.path.abspath(destfile)}.", file=out)
+    return loader
+
+
+class _BlockReader:
+    """Sequential reader over the primitives of JaCoCo's CompactDataInput."""
+
+    def __init__(self, data: bytes):
+        """
+        :param data: The raw execution data to read
+        """
+        self._data = data
+        self._offset = 0
+
+    def at_end(self) -> bool:
+        """Returns True if all data was read."""
+        return self._offset >= len(self._data)
+
+    def read_byte(self) -> int:
+        """Reads a single unsigned byte."""
+        return self._take(1)[0]
+
+    def read_header(self):
+        """Reads and validates the body of a header block."""
+        if _CHAR.unpack(self._take(2))[0] != MAGIC_NUMBER:
+            raise ValueError("Invalid execution data file.")
+        version = _CHAR.unpack(self._take(2))[0]
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Cannot read execution data version 0x{version:x}. "
+                             f"This version of JaCoCo uses execution data version 0x{FORMAT_VERSION:x}.")
+
+    def read_long(self) -> int:
+        """Reads a signed big-endian 64 bit value."""
+        return _LONG.unpack(self._take(8))[0]
+
+    def read_utf(self) -> str:
+        """Reads a length-prefixed modified UTF-8 string."""
+        return _decode_utf(self._take(_CHAR.unpack(self._take(2))[0]))
+
+    def read_var_int(self) -> int:
+        """Reads a variable length int (7 bits per byte, LSB first)."""
+        value, shift = 0, 0
+        while True:
+            byte = self.read_byte()
+            value |= (byte & 0x7F) << shift
+            if not byte & 0x80:
+                return value
+            shift += 7
+
+    def read_packed_booleans(self, length: int) -> bytes:
+        """Reads the bytes of a boolean array of the given length, packed 8 per byte, LSB first."""
+        return self._take((length + 7) // 8)
+
+    def _take(self, size: int) -> bytes:
+        """Consumes the next bytes, raising EOFError if the data ends first."""
+        end = self._offset + size
+        if end > len(self._data):
+            raise EOFError("Unexpected end of execution data.")
+        value = self._data[self._offset:end]
+        self._offset = end
+        return value
+
+
+class _StreamBlockReader(_BlockReader):
+    """Sequential reader over the primitives of JaCoCo's CompactDataInput, consuming a binary stream."""
+
+    def __init__(self, stream: IO[bytes]):
+        """
+        :param stream: The binary stream to read, e.g. a socket file
+        """
+        super().__init__(b"")
+        self._stream = stream
+
+    def at_end(self) -> bool:
+        """Returns True if the stream ended."""
+        return not self._stream.peek(1)
+
+    def _take(self, size: int) -> bytes:
+        """Consumes the next bytes, raising EOFError if the stream ends first."""
+        value = self._stream.read(size)
+        if len(value) < size:
+            raise EOFError("Unexpected end of execution data.")
+        return value
+
+
+def _encode_var_int(value: int) -> bytes:
+    """Encodes a non-negative int the way CompactDataOutput.writeVarInt does (7 bits per byte, LSB first)."""
+    encoded = bytearray()
+    while value & ~0x7F:
+        encoded.append(0x80 | (value & 0x7F))
+        value >>= 7
+    encoded.append(value)
+    return bytes(encoded)
+
+
+def _encode_utf(value: str) -> bytes:
+    """Encodes a string as Java's DataOutput.writeUTF does (length-prefixed modified UTF-8)."""
+    if value.isascii() and "\0" not in value:
+        encoded = value.encode("ascii")
+    else:
+        surrogated = "".join(
+            chr(0xD800 + ((ord(char) - 0x10000) >> 10)) + chr(0xDC00 + ((ord(char) - 0x10000) & 0x3FF))
+            if ord(char) > 0xFFFF else char for char in value)
+        encoded = surrogated.encode("utf-8", "surrogatepass").replace(b"\0", b"\xc0\x80")
+    if len(encoded) > 0xFFFF:
+        raise ValueError(f"Encoded string too long: {len(encoded)} bytes")
+    return _CHAR.pack(len(encoded)) + encoded
+
+
+def _decode_utf(encoded: bytes) -> str:
+    """Decodes Java's modified UTF-8, as read by DataInput.readUTF."""
+    if encoded.isascii():
+        return encoded.decode("ascii")
+    return (encoded.replace(b"\xc0\x80", b"\0").decode("utf-8", "surrogatepass")
+            .encode("utf-16-le", "surrogatepass").decode("utf-16-le"))
+
+
+def _java_hash_map_order(keys: list[int]) -> list[int]:
+    """
+    Orders class ids the way java.util.HashMap<Long, ?> iterates them after inserting them in the given order.
+    Bins grown into trees (more than 8 colliding ids on a table of 64+ buckets) keep insertion order here.
+    :param keys: Distinct class ids in insertion order
+    :returns: The class ids in HashMap iteration order
+    """
+    hashes = []
+    for key in keys:
+        unsigned = key & 0xFFFFFFFFFFFFFFFF
+        hashed = (unsigned ^ (unsigned >> 32)) & 0xFFFFFFFF
+        hashes.append(hashed ^ (hashed >> 16))
+
+    capacity = 16
+    bin_sizes = Counter()
+    for size, hashed in enumerate(hashes, 1):
+        index = hashed & (capacity - 1)
+        bin_sizes[index] += 1
+        resized = False
+        if bin_sizes[index] > 8 and capacity < 64:
+            capacity, resized = capacity * 2, True
+        if size > capacity * 3 // 4:
+            capacity, resized = capacity * 2, True
+        if resized:
+            bin_sizes = Counter(value & (capacity - 1) for value in hashes[:size])
+
+    order = sorted(range(len(keys)), key=lambda position: hashes[position] & (capacity - 1))
+    return [keys[position] for position in order]
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """
+    Command line entry point, compatible with the arguments of 'jacococli.jar merge'.
+    :param argv: Command line arguments, defaults to sys.argv[1:]
+    :returns: The process exit code
+    """
+    parser = argparse.ArgumentParser(prog="python -m crossfit.tools jacoco_exec", fromfile_prefix_chars="@")
+    commands = parser.add_subparsers(dest="command", required=True)
+    merge = commands.add_parser("merge", help="Merges multiple exec files into a new one.")
+    merge.add_argument("execfiles", nargs="*", type=Path, help="list of JaCoCo *.exec files to read")
+    merge.add_argument("--destfile", required=True, type=Path, help="file to write merged execution data to")
+    merge.add_argument("--quiet", action="store_true", help="suppress all output on stdout")
+    append = commands.add_parser("append", help="Folds exec files into an existing aggregate exec file.")
+    append.add_argument("execfiles", nargs="+", type=Path, help="list of new JaCoCo *.exec files to fold in")
+    append.add_argument("--destfile", required=True, type=Path, help="aggregate file to update atomically")
+    append.add_argument("--quiet", action="store_true", help="suppress all output on stdout")
+    args = parser.parse_args(argv)
+
+    out = None if args.quiet else sys.stdout
+    try:
+        if args.command == "append":
+            append_exec_files(args.execfiles, args.destfile, out)
+        else:
+            merge_exec_files(args.execfiles, args.destfile, True, out)
+    except (OSError, ValueError, EOFError) as e:
+        print(f"Execution of {args.command} failed: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,700 @@
+"""
+Native JaCoCo report engine - renders HTML, XML and CSV reports from execution data and class files without a JVM.
+
+Class files are analyzed by crossfit.tools.class_analysis and processed one package at a time: each package's
+pages, XML element and CSV rows are written as soon as it is analyzed, so memory is bounded by the largest package
+rather than by the whole report. Can be run as a jacococli-compatible report command:
+
+    python -m crossfit.tools jacoco_report report jacoco.exec --classfiles build/classes --sourcefiles src \\
+        --html report --xml report.xml --csv report.csv
+"""
+import argparse
+import csv
+import html
+import io
+import os
+import sqlite3
+import sys
+import zipfile
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+from typing import IO, Callable, Iterable, Iterator, Optional
+from xml.sax.saxutils import quoteattr
+
+from crossfit.tools.analysis_cache import AnalysisCache
+from crossfit.tools.atomic_file import atomic_write
+from crossfit.tools.class_analysis import UNKNOWN_LINE, ClassModel, MethodModel, analyze_class, read_class_name
+from crossfit.tools.jacoco_exec import ExecFileLoader, SessionInfo
+
+DEFAULT_REPORT_NAME = "JaCoCo Coverage Report"
+XML_HEADER = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+              '<!DOCTYPE report PUBLIC "-//JACOCO//DTD Report 1.1//EN" "report.dtd">')
+COUNTERS = ("INSTRUCTION", "BRANCH", "LINE", "COMPLEXITY", "METHOD", "CLASS")
+INSTRUCTION, BRANCH, LINE, COMPLEXITY, METHOD, CLASS = range(len(COUNTERS))
+
+_ARCHIVE_SUFFIXES = (".jar", ".war", ".ear", ".zip")
+_CSS = """body{font-family:sans-serif;font-size:10pt}
+table.coverage{border-collapse:collapse}
+table.coverage td,table.coverage th{padding:2px 8px;border-bottom:1px solid #d6d3ce;text-align:right}
+table.coverage td:first-child,table.coverage th:first-child{text-align:left}
+table.coverage thead th{background:#e0e0e0}table.coverage tfoot td{font-weight:bold;background:#e0e0e0}
+span.bar{display:inline-block;height:10px;vertical-align:middle}span.red{background:#b22}span.green{background:#2a2}
+pre.source{border:1px solid #d6d3ce;font-size:10pt}pre.source span{display:inline-block;width:100%}
+span.nr{color:#777;width:4em!important}.fc{background:#ccffcc}.pc{background:#ffffcc}.nc{background:#ffaaaa}
+.bfc:before,.bpc:before,.bnc:before{content:"\\25C6 "}.bfc:before{color:#2a2}.bpc:before{color:#cc2}
+.bnc:before{color:#b22}
+"""
+
+
+class CoverageNode:
+    """Counters of a report element and, for elements with source lines, the counters of each line."""
+    __slots__ = ("name", "counters", "lines")
+
+    def __init__(self, name: str):
+        """
+        :param name: Name of the element
+        """
+        self.name = name
+        self.counters = [0] * (2 * len(COUNTERS))
+        self.lines: dict[int, list[int]] = {}
+
+    def missed(self, counter: int) -> int:
+        """Returns the missed count of a counter."""
+        return self.counters[2 * counter]
+
+    def covered(self, counter: int) -> int:
+        """Returns the covered count of a counter."""
+        return self.counters[2 * counter + 1]
+
+    def total(self, counter: int) -> int:
+        """Returns the total count of a counter."""
+        return self.counters[2 * counter] + self.counters[2 * counter + 1]
+
+    def first_line(self) -> int:
+        """Returns the first line with instructions, UNKNOWN_LINE if there is none."""
+        return min(self.lines) if self.lines else UNKNOWN_LINE
+
+    def increment_counter(self, counter: int, missed: int, covered: int):
+        """Adds to the missed and covered counts of a counter."""
+        self.counters[2 * counter] += missed
+        self.counters[2 * counter + 1] += covered
+
+    def increment(self, instructions_missed: int, instructions_covered: int, branches_missed: int,
+                  branches_covered: int, line: int):
+        """
+        Adds instructions and branches on a line, updating the line counter like JaCoCo's SourceNodeImpl:
+        a line is covered once any of its instructions is.
+        """
+        self.increment_counter(INSTRUCTION, instructions_missed, instructions_covered)
+        self.increment_counter(BRANCH, branches_missed, branches_covered)
+        if line == UNKNOWN_LINE:
+            return
+        counts = self.lines.get(line)
+        if counts is None:
+            counts = self.lines[line] = [0, 0, 0, 0]
+        old_total, old_covered = counts[0] + counts[1], counts[1]
+        counts[0] += instructions_missed
+        counts[1] += instructions_covered
+        counts[2] += branches_missed
+        counts[3] += branches_covered
+        if instructions_missed + instructions_covered > 0:
+            if instructions_covered == 0:
+                if old_total == 0:
+                    self.increment_counter(LINE, 1, 0)
+            elif old_total == 0:
+                self.increment_counter(LINE, 0, 1)
+            elif old_covered == 0:
+                self.increment_counter(LINE, -1, 1)
+
+    def add(self, child: "CoverageNode", with_lines: bool = True):
+        """
+        Adds the counters of a child element.
+        :param child: The child element
+        :param with_lines: If True, merges the child's lines into this element's lines and derives the line counter
+                           from them, otherwise adds the child's line counter
+        """
+        for counter in (COMPLEXITY, METHOD, CLASS):
+            self.increment_counter(counter, child.missed(counter), child.covered(counter))
+        if not with_lines:
+            for counter in (INSTRUCTION, BRANCH, LINE):
+                self.increment_counter(counter, child.missed(counter), child.covered(counter))
+            return
+        self.increment_counter(INSTRUCTION, child.missed(INSTRUCTION) - sum(c[0] for c in child.lines.values()),
+                               child.covered(INSTRUCTION) - sum(c[1] for c in child.lines.values()))
+        self.increment_counter(BRANCH, child.missed(BRANCH) - sum(c[2] for c in child.lines.values()),
+                               child.covered(BRANCH) - sum(c[3] for c in child.lines.values()))
+        for line, counts in child.lines.items():
+            self.increment(*counts, line)
+
+
+class ClassCoverage:
+    """Coverage of an analyzed class - its counters and those of its methods containing code."""
+    __slots__ = ("model", "node", "methods", "no_match")
+
+    def __init__(self, model: ClassModel, node: CoverageNode, methods: list[tuple[MethodModel, CoverageNode]],
+                 no_match: bool):
+        self.model = model
+        self.node = node
+        self.methods = methods
+        self.no_match = no_match
+
+
+def analyze_coverage(model: ClassModel, probes: Optional[int], no_match: bool = False) -> ClassCoverage:
+    """
+    Computes the counters of a class from its executed probes, like JaCoCo's ClassAnalyzer.
+    :param model: The class model
+    :param probes: The executed probes of the class, None if the class was not executed
+    :param no_match: True if execution data of the class exists but does not match the class file
+    :returns: The coverage of the class and of its methods containing code
+    """
+    class_node = CoverageNode(model.name)
+    methods = []
+    for method in model.methods:
+        if method.ignored or not method.lines:
+            continue
+        node = CoverageNode(method.name)
+        for line, branches, covered in zip(method.lines, method.branches, method.covered_branches(probes)):
+            instruction_covered = 1 if covered else 0
+            if branches > 1:
+                branches_covered = covered.bit_count()
+                node.increment(1 - instruction_covered, instruction_covered, branches - branches_covered,
+                               branches_covered, line)
+                complexity_covered = max(0, branches_covered - 1)
+                node.increment_counter(COMPLEXITY, max(0, branches - complexity_covered - 1), complexity_covered)
+            else:
+                node.increment(1 - instruction_covered, instruction_covered, 0, 0, line)
+        executed = 1 if node.covered(INSTRUCTION) else 0
+        node.increment_counter(METHOD, 1 - executed, executed)
+        node.increment_counter(COMPLEXITY, 1 - executed, executed)
+        class_node.add(node)
+        methods.append((method, node))
+    executed = 1 if class_node.covered(METHOD) else 0
+    class_node.increment_counter(CLASS, 1 - executed, executed)
+    return ClassCoverage(model, class_node, methods, no_match)
+
+
+def package_name(vm_name: str) -> str:
+    """
+    :param vm_name: The VM name of a package
+    :returns: The package's Java name, 'default' for the default package
+    """
+    return vm_name.replace("/", ".") if vm_name else "default"
+
+
+def class_name(model: ClassModel) -> str:
+    """
+    :param model: The class model
+    :returns: The class' Java name without its package - anonymous classes named like 'A.new Runnable() {...}'
+    """
+    if _is_anonymous(model.name):
+        supertype = model.interfaces[0] if model.interfaces else model.super_name
+        if supertype is not None:
+            return f"{_simple_name(model.name[:model.name.rfind('$')])}.new {_simple_name(supertype)}() {{...}}"
+    return _simple_name(model.name)
+
+
+def method_name(model: ClassModel, method: MethodModel) -> str:
+    """
+    :param model: The class model
+    :param method: The method model
+    :returns: The method's Java name with its parameter types, e.g. 'run(String, int[])'
+    """
+    if method.name == "<clinit>":
+        return "static {...}"
+    if method.name == "<init>":
+        if _is_anonymous(model.name):
+            return "{...}"
+        name = _simple_name(model.name)
+    else:
+        name = method.name
+    return f"{name}({', '.join(_parameter_types(method.desc))})"
+
+
+class _XmlWriter:
+    """Writes the report as JaCoCo XML, one package element at a time."""
+
+    def __init__(self, stream: IO[str], name: str, sessions: list[SessionInfo]):
+        self._stream = stream
+        stream.write(XML_HEADER)
+        stream.write(f"<report name={quoteattr(name)}>")
+        for session in sessions:
+            stream.write(f'<sessioninfo id={quoteattr(session.id)} start="{session.start}" dump="{session.dump}"/>')
+
+    def package(self, vm_name: str, node: CoverageNode, classes: list[ClassCoverage],
+                source_files: list[CoverageNode]):
+        write = self._stream.write
+        write(f"<package name={quoteattr(vm_name)}>")
+        for coverage in classes:
+            source = (f" sourcefilename={quoteattr(coverage.model.source_file)}"
+                      if coverage.model.source_file is not None else "")
+            write(f"<class name={quoteattr(coverage.model.name)}{source}>")
+            for method, method_node in coverage.methods:
+                first_line = method_node.first_line()
+                line = f' line="{first_line}"' if first_line != UNKNOWN_LINE else ""
+                write(f"<method name={quoteattr(method.name)} desc={quoteattr(method.desc)}{line}>")
+                self._counters(method_node)
+                write("</method>")
+            self._counters(coverage.node)
+            write("</class>")
+        for source_file in source_files:
+            write(f"<sourcefile name={quoteattr(source_file.name)}>")
+            for number in sorted(source_file.lines):
+                missed, covered, branches_missed, branches_covered = source_file.lines[number]
+                if missed + covered:
+                    write(f'<line nr="{number}" mi="{missed}" ci="{covered}" mb="{branches_missed}" '
+                          f'cb="{branches_covered}"/>')
+            self._counters(source_file)
+            write("</sourcefile>")
+        self._counters(node)
+        write("</package>")
+
+    def finish(self, bundle: CoverageNode):
+        self._counters(bundle)
+        self._stream.write("</report>")
+
+    def _counters(self, node: CoverageNode):
+        for counter, counter_name in enumerate(COUNTERS):
+            if node.total(counter):
+                self._stream.write(f'<counter type="{counter_name}" missed="{node.missed(counter)}" '
+                                   f'covered="{node.covered(counter)}"/>')
+
+
+class _CsvWriter:
+    """Writes the report as JaCoCo CSV, a row per class."""
+
+    def __init__(self, stream: IO[str], name: str):
+        self._name = name
+        self._writer = csv.writer(stream, lineterminator="\n")
+        self._writer.writerow(["GROUP", "PACKAGE", "CLASS"] + [f"{counter}_{kind}" for counter in COUNTERS[:-1]
+                                                              for kind in ("MISSED", "COVERED")])
+
+    def package(self, vm_name: str, node: CoverageNode, classes: list[ClassCoverage],
+                source_files: list[CoverageNode]):
+        for coverage in classes:
+            self._writer.writerow([self._name, package_name(vm_name), class_name(coverage.model)]
+                                  + coverage.node.counters[:2 * CLASS])
+
+    def finish(self, bundle: CoverageNode):
+        pass
+
+
+class _HtmlWriter:
+    """Writes the report as HTML pages - an index, a directory per package, and a page per class and source file."""
+
+    def __init__(self, directory: Path, name: str, sessions: list[SessionInfo], loader: ExecFileLoader,
+                 source_dirs: list[Path], encoding: str, tab_width: int):
+        self._directory = Path(directory)
+        self._name = name
+        self._source_dirs = source_dirs
+        self._encoding = encoding
+        self._tab_width = tab_width
+        self._packages: list[tuple[str, CoverageNode]] = []
+        (self._directory / "jacoco-resources").mkdir(parents=True, exist_ok=True)
+        with atomic_write(self._directory / "jacoco-resources" / "report.css", "w", encoding="utf-8") as stream:
+            stream.write(_CSS)
+        with _page(self._directory / "jacoco-sessions.html", "Sessions", [(name, "index.html")], "") as stream:
+            stream.write("<table class=\"coverage\"><thead><tr><th>Session</th><th>Start Time</th>"
+                         "<th>Dump Time</th></tr></thead><tbody>")
+            for session in sessions:
+                stream.write(f"<tr><td>{html.escape(session.id)}</td><td>{session.start}</td>"
+                             f"<td>{session.dump}</td></tr>")
+            stream.write("</tbody></table><p>Execution data for the following classes is considered in this "
+                         "report:</p><table class=\"coverage\"><thead><tr><th>Class</th><th>Id</th></tr></thead>"
+                         "<tbody>")
+            for data in sorted(loader.store, key=lambda execution_data: execution_data.name):
+                stream.write(f"<tr><td>{html.escape(data.name.replace('/', '.'))}</td>"
+                             f"<td><code>{data.id & 0xFFFFFFFFFFFFFFFF:016x}</code></td></tr>")
+            stream.write("</tbody></table>")
+
+    def package(self, vm_name: str, node: CoverageNode, classes: list[ClassCoverage],
+                source_files: list[CoverageNode]):
+        directory_name = package_name(vm_name)
+        directory = self._directory / directory_name
+        directory.mkdir(parents=True, exist_ok=True)
+        self._packages.append((directory_name, node))
+        crumbs = [(self._name, "../index.html")]
+
+        sources = {}
+        for source_file in source_files:
+            lines = self._read_source(vm_name, source_file.name)
+            if lines is not None:
+                sources[source_file.name] = f"{source_file.name}.html"
+                self._source_page(directory / sources[source_file.name], crumbs + [(directory_name, "index.html")],
+                                  source_file, lines)
+
+        with _page(directory / "index.html", directory_name, crumbs, "../") as stream:
+            stream.write('<p><a href="index.source.html">Source Files</a></p>')
+            _table(stream, [(class_name(coverage.model), f"{coverage.model.name.rpartition('/')[2]}.html",
+                             coverage.node) for coverage in classes], node)
+        with _page(directory / "index.source.html", directory_name, crumbs, "../") as stream:
+            stream.write('<p><a href="index.html">Classes</a></p>')
+            _table(stream, [(source_file.name, sources.get(source_file.name), source_file)
+                            for source_file in source_files], node)
+        for coverage in classes:
+            title = class_name(coverage.model)
+            source_page = sources.get(coverage.model.source_file)
+            with _page(directory / f"{coverage.model.name.rpartition('/')[2]}.html", title,
+                       crumbs + [(directory_name, "index.html")], "../") as stream:
+                if coverage.no_match:
+                    stream.write("<p>Execution data does not match the class file of this class.</p>")
+                rows = []
+                for method, method_node in coverage.methods:
+                    first_line = method_node.first_line()
+                    link = f"{source_page}#L{first_line}" if source_page and first_line != UNKNOWN_LINE else None
+                    rows.append((method_name(coverage.model, method), link, method_node))
+                _table(stream, rows, coverage.node)
+
+    def finish(self, bundle: CoverageNode):
+        write_html_index(self._directory, self._name, self._packages, bundle)
+
+    def _read_source(self, vm_package: str, source_name: str) -> Optional[list[str]]:
+        """
+        :returns: The lines of the source file found in the source directories, None if it is not found
+        """
+        for source_dir in self._source_dirs:
+            path = Path(source_dir) / vm_package / source_name
+            if path.is_file():
+                with open(path, encoding=self._encoding, errors="replace") as stream:
+                    return [line.rstrip("\r\n").expandtabs(self._tab_width) for line in stream]
+        return None
+
+    def _source_page(self, path: Path, crumbs: list[tuple[str, str]], source_file: CoverageNode, lines: list[str]):
+        """Writes a source file page, highlighting each line by the coverage of its instructions and branches."""
+        with _page(path, source_file.name, crumbs, "../") as stream:
+            stream.write('<pre class="source">')
+            for number, text in enumerate(lines, 1):
+                counts = source_file.lines.get(number)
+                attributes = ""
+                if counts is not None and counts[0] + counts[1]:
+                    missed, covered, branches_missed, branches_covered = counts
+                    style = "nc" if not covered else "pc" if missed or branches_missed else "fc"
+                    title = ""
+                    if branches_missed + branches_covered:
+                        branches = branches_missed + branches_covered
+                        style += " " + ("bnc" if not branches_covered else "bpc" if branches_missed else "bfc")
+                        title = (f' title="All {branches} branches covered."' if not branches_missed else
+                                 f' title="{branches_missed} of {branches} branches missed."')
+                    attributes = f' class="{style}"{title}'
+                stream.write(f'<span id="L{number}"{attributes}><span class="nr">{number}</span>'
+                             f"{html.escape(text)}</span>\n")
+            stream.write("</pre>")
+
+
+def create_report(exec_files: Iterable[Path],
+                  class_files: Iterable[Path],
+                  source_files: Iterable[Path] = (),
+                  html_dir: Optional[Path] = None,
+                  xml_file: Optional[Path] = None,
+                  csv_file: Optional[Path] = None,
+                  name: str = DEFAULT_REPORT_NAME,
+                  encoding: str = "utf-8",
+                  tab_width: int = 4,
+                  analysis_cache: Optional[Path] = None,
+                  out: Optional[IO[str]] = None) -> CoverageNode:
+    """
+    Analyzes class files against execution data and writes the requested reports, one package at a time.
+    :param exec_files: The .exec files to report on, merged
+    :param class_files: Class files, directories and archives (.jar/.war/.ear/.zip, also nested) of the classes
+    :param source_files: Source directories, laid out by package, to render source pages from
+    :param html_dir: Optional directory to write the HTML report to
+    :param xml_file: Optional path to write the XML report to
+    :param csv_file: Optional path to write the CSV report to
+    :param name: Name of the report
+    :param encoding: Encoding of the source files
+    :param tab_width: Number of spaces a tab is rendered as in source pages
+    :param analysis_cache: Optional analysis cache database, so only class files not analyzed before are analyzed
+    :param out: Optional text stream to report progress and warnings to
+    :returns: The counters of the whole report
+    :raises ValueError: If a file is not valid execution data, a class cannot be analyzed or two different classes
+                        have the same name
+    """
+    loader = ExecFileLoader()
+    for exec_file in exec_files:
+        if out:
+            print(f"[INFO] Loading execution data file {os.path.abspath(exec_file)}.", file=out)
+        loader.load(exec_file)
+    executed_names = {data.name for data in loader.store}
+    sessions = sorted(loader.sessions, key=lambda session: session.dump)
+
+    bundle = CoverageNode(name)
+    mismatched = []
+    with ExitStack() as stack:
+        cache = stack.enter_context(AnalysisCache(analysis_cache)) if analysis_cache is not None else None
+        analyze = cache.analyze if cache is not None else analyze_class
+        groups = _collect_class_files(class_files, stack)
+        if out:
+            print(f"[INFO] Analyzing {sum(len(group) for group in groups.values())} classes.", file=out)
+        writers = []
+        if xml_file is not None:
+            writers.append(_XmlWriter(stack.enter_context(atomic_write(xml_file, "w", encoding="utf-8")), name,
+                                      sessions))
+        if csv_file is not None:
+            writers.append(_CsvWriter(stack.enter_context(atomic_write(csv_file, "w", encoding="utf-8", newline="")),
+                                      name))
+        if html_dir is not None:
+            writers.append(_HtmlWriter(html_dir, name, sessions, loader, [Path(path) for path in source_files],
+                                       encoding, tab_width))
+
+        for key in sorted(groups):
+            packages: dict[str, list[ClassCoverage]] = {}
+            for coverage in _analyze_group(groups[key], analyze, loader, executed_names):
+                if coverage.no_match:
+                    mismatched.append(coverage.model.name)
+                packages.setdefault(coverage.model.package, []).append(coverage)
+            for vm_package in sorted(packages):
+                classes = sorted(packages[vm_package], key=lambda coverage: coverage.model.name)
+                package_node = CoverageNode(vm_package)
+                sources: dict[str, CoverageNode] = {}
+                for coverage in classes:
+                    source_file = coverage.model.source_file
+                    if source_file is None:
+                        package_node.add(coverage.node, with_lines=False)
+                    else:
+                        sources.setdefault(source_file, CoverageNode(source_file)).add(coverage.node)
+                source_nodes = [sources[source_name] for source_name in sorted(sources)]
+                for source_node in source_nodes:
+                    package_node.add(source_node, with_lines=False)
+                bundle.add(package_node, with_lines=False)
+                for writer in writers:
+                    writer.package(vm_package, package_node, classes, source_nodes)
+            if cache is not None:
+                cache.flush()
+        for writer in writers:
+            writer.finish(bundle)
+        if out and cache is not None:
+            print(f"[INFO] Reused {cache.hits} cached class analyses, analyzed {cache.misses} classes.", file=out)
+
+    if out and mismatched:
+        print("[WARN] Some classes do not match with execution data.", file=out)
+        print("[WARN] For report generation the same class files must be used as at runtime.", file=out)
+        for mismatched_name in sorted(mismatched):
+            print(f"[WARN] Execution data for class {mismatched_name} does not match.", file=out)
+    return bundle
+
+
+def write_html_index(directory: Path, name: str, packages: list[tuple[str, CoverageNode]], bundle: CoverageNode):
+    """
+    Writes the index page of an HTML report, linking the pages of its packages.
+    :param directory: The report's root directory
+    :param name: Name of the report
+    :param packages: The directory name and counters of each package
+    :param bundle: The counters of the whole report
+    """
+    with _page(Path(directory) / "index.html", name, [], "") as stream:
+        stream.write('<p><a href="jacoco-sessions.html">Sessions</a></p>')
+        _table(stream, [(directory_name, f"{directory_name}/index.html", node) for directory_name, node in packages],
+               bundle)
+
+
+def _analyze_group(class_files: list[tuple[str, Callable[[], bytes]]],
+                   analyze: Callable[[bytes], Optional[ClassModel]],
+                   loader: ExecFileLoader,
+                   executed_names: set[str]) -> Iterator[ClassCoverage]:
+    """
+    Analyzes the class files of a package, skipping classes without code.
+    :param class_files: Location and reader of each class file
+    :param analyze: Analyzes class file bytes into a class model
+    :param loader: The loaded execution data
+    :param executed_names: Names of the classes with execution data
+    :returns: The coverage of each class with code
+    :raises ValueError: If a class cannot be analyzed or two different classes have the same name
+    """
+    ids: dict[str, int] = {}
+    for location, read in class_files:
+        try:
+            model = analyze(read())
+        except ValueError as e:
+            raise ValueError(f"Error while analyzing {location}: {e}") from e
+        if model is None:
+            continue
+        if model.name in ids:
+            if ids[model.name] != model.id:
+                raise ValueError(f"Can't add different class with same name: {model.name}.")
+            continue
+        ids[model.name] = model.id
+        data = loader.store.get(model.id)
+        coverage = analyze_coverage(model, data.probes if data is not None else None,
+                                    data is None and model.name in executed_names)
+        if coverage.node.total(INSTRUCTION):
+            yield coverage
+
+
+def class_package(data: bytes, default: str) -> str:
+    """
+    :param data: The class file bytes
+    :param default: Package returned for an invalid class file, left to its analysis to report
+    :returns: The VM name of the class's package
+    """
+    try:
+        return read_class_name(data).rpartition("/")[0]
+    except ValueError:
+        return default
+
+
+def _collect_class_files(paths: Iterable[Path], stack: ExitStack) -> dict[str, list[tuple[str, Callable[[], bytes]]]]:
+    """
+    Finds the class files in files, directories and archives, grouped by package - the class files of a package
+    are grouped together even when spread over several roots and archives. The package of a directory is read
+    from its first class file.
+    :param paths: Class files, directories and archives
+    :param stack: Exit stack keeping the opened archives open
+    :returns: Location and reader of each class file, by package
+    """
+    groups: dict[str, list[tuple[str, Callable[[], bytes]]]] = {}
+
+    def add_archive(archive: zipfile.ZipFile, location: str):
+        directories: dict[str, list[str]] = {}
+        for info in archive.infolist():
+            entry = info.filename
+            if info.is_dir() or entry.startswith("META-INF/versions/"):
+                continue
+            if entry.endswith(".class"):
+                directories.setdefault(entry.rpartition("/")[0], []).append(entry)
+            elif entry.endswith(_ARCHIVE_SUFFIXES):
+                add_archive(zipfile.ZipFile(io.BytesIO(archive.read(entry))), f"{location}@{entry}")
+        for directory, entries in directories.items():
+            groups.setdefault(class_package(archive.read(entries[0]), directory), []).extend(
+                (f"{location}@{entry}", lambda archive=archive, entry=entry: archive.read(entry)) for entry in entries)
+
+    def add_class_files(class_files: list[Path], directory: str):
+        groups.setdefault(class_package(class_files[0].read_bytes(), directory), []).extend(
+            (str(path), path.read_bytes) for path in class_files)
+
+    for root in paths:
+        root = Path(root)
+        if not root.is_dir():
+            if root.suffix == ".class":
+                add_class_files([root], str(root.parent))
+            elif root.suffix in _ARCHIVE_SUFFIXES:
+                add_archive(stack.enter_context(zipfile.ZipFile(root)), str(root))
+            continue
+        for directory, directory_names, file_names in os.walk(root):
+            directory_names.sort()
+            files = [Path(directory) / file_name for file_name in sorted(file_names)]
+            class_files = [path for path in files if path.suffix == ".class"]
+            if class_files:
+                add_class_files(class_files, Path(os.path.relpath(directory, root)).as_posix().lstrip("."))
+            for path in files:
+                if path.suffix in _ARCHIVE_SUFFIXES:
+                    add_archive(stack.enter_context(zipfile.ZipFile(path)), str(path))
+    return groups
+
+
+@contextmanager
+def _page(path: Path, title: str, crumbs: list[tuple[str, str]], root: str) -> Iterator[IO[str]]:
+    """
+    Writes a page with a breadcrumb trail and heading.
+    :param path: Path of the page
+    :param title: Title of the page
+    :param crumbs: Text and link of the pages leading to this page
+    :param root: Relative path from the page to the report's root directory
+    :returns: The stream to write the page's body to
+    """
+    with atomic_write(path, "w", encoding="utf-8") as stream:
+        trail = " &gt; ".join(f'<a href="{href}">{html.escape(text)}</a>' for text, href in crumbs)
+        stream.write(f'<!DOCTYPE html><html><head><meta charset="UTF-8"/><title>{html.escape(title)}</title>'
+                     f'<link rel="stylesheet" href="{root}jacoco-resources/report.css" type="text/css"/></head>'
+                     f'<body><div class="breadcrumb">{trail}</div><h1>{html.escape(title)}</h1>')
+        yield stream
+        stream.write("</body></html>")
+
+def _table(stream: IO[str], rows: list[tuple[str, Optional[str], CoverageNode]], total: CoverageNode):
+    """Writes a coverage table with a row per element and a total row."""
+    stream.write('<table class="coverage"><thead><tr><th>Element</th><th>Missed Instructions</th><th>Cov.</th>'
+                 "<th>Missed Branches</th><th>Cov.</th><th>Missed</th><th>Cxty</th><th>Missed</th>"
+                 "<th>Lines</th><th>Missed</th><th>Methods</th><th>Missed</th><th>Classes</th></tr></thead>"
+                 f"<tfoot><tr><td>Total</td>{_cells(total, True)}</tr></tfoot><tbody>")
+    for text, link, node in rows:
+        label = f'<a href="{html.escape(link)}">{html.escape(text)}</a>' if link else html.escape(text)
+        stream.write(f"<tr><td>{label}</td>{_cells(node, False)}</tr>")
+    stream.write("</tbody></table>")
+
+
+def _cells(node: CoverageNode, total: bool) -> str:
+    """
+    :returns: The table cells of an element's counters - bars for rows and 'missed of total' for the total row
+    """
+    cells = []
+    for counter in (INSTRUCTION, BRANCH):
+        missed, covered = node.missed(counter), node.covered(counter)
+        if total:
+            cells.append(f"<td>{missed:,} of {missed + covered:,}</td>")
+        elif missed + covered:
+            width = 120 * missed // (missed + covered)
+            cells.append(f'<td><span class="bar red" style="width:{width}px" title="{missed:,}"></span>'
+                         f'<span class="bar green" style="width:{120 - width}px" title="{covered:,}"></span></td>')
+        else:
+            cells.append("<td></td>")
+        cells.append(f"<td>{covered * 100 // (missed + covered)}%</td>" if missed + covered else "<td>n/a</td>")
+    for counter in (COMPLEXITY, LINE, METHOD, CLASS):
+        cells.append(f"<td>{node.missed(counter):,}</td><td>{node.total(counter):,}</td>")
+    return "".join(cells)
+
+
+def _is_anonymous(vm_name: str) -> bool:
+    """Returns True if the class is an anonymous class, named by a number after its outer class' name."""
+    simple = vm_name.rpartition("/")[2]
+    return "$" in simple and simple.rpartition("$")[2].isdigit()
+
+
+def _simple_name(vm_name: str) -> str:
+    """Returns the Java name of a class without its package, nested classes separated by dots."""
+    return vm_name.rpartition("/")[2].replace("$", ".")
+
+
+def _parameter_types(desc: str) -> list[str]:
+    """Returns the simple Java names of the parameter types of a method descriptor."""
+    primitives = {"Z": "boolean", "B": "byte", "C": "char", "S": "short", "I": "int", "J": "long", "F": "float",
+                  "D": "double"}
+    types = []
+    index = 1
+    while desc[index] != ")":
+        dimensions = 0
+        while desc[index] == "[":
+            dimensions += 1
+            index += 1
+        if desc[index] == "L":
+            end = desc.index(";", index)
+            type_name = _simple_name(desc[index + 1:end])
+            index = end + 1
+        else:
+            type_name = primitives[desc[index]]
+            index += 1
+        types.append(type_name + "[]" * dimensions)
+    return types
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """
+    Command line entry point, taking the arguments of jacococli's report command.
+    :param argv: Command line arguments, defaults to sys.argv[1:]
+    :returns: The process exit code
+    """
+    parser = argparse.ArgumentParser(prog="python -m crossfit.tools jacoco_report", fromfile_prefix_chars="@")
+    commands = parser.add_subparsers(dest="command", required=True)
+    report = commands.add_parser("report", help="Generates HTML, XML and CSV reports from execution data.")
+    report.add_argument("execfiles", nargs="*", type=Path, help="list of JaCoCo *.exec files to read")
+    report.add_argument("--classfiles", action="append", required=True, type=Path,
+                        help="location of Java class files")
+    report.add_argument("--sourcefiles", action="append", default=[], type=Path, help="location of the source files")
+    report.add_argument("--html", type=Path, help="output directory for the HTML report")
+    report.add_argument("--xml", type=Path, help="output file for the XML report")
+    report.add_argument("--csv", type=Path, help="output file for the CSV report")
+    report.add_argument("--name", default=DEFAULT_REPORT_NAME, help="name used for this report")
+    report.add_argument("--encoding", default="utf-8", help="source file encoding")
+    report.add_argument("--tabwith", type=int, default=4, help="tab stop for source pages")
+    report.add_argument("--analysiscache", type=Path, help="database caching class analyses between reports")
+    report.add_argument("--quiet", action="store_true", help="suppress all output on stdout")
+    args = parser.parse_args(argv)
+
+    try:
+        create_report(args.execfiles, args.classfiles, args.sourcefiles, args.html, args.xml, args.csv, args.name,
+                      args.encoding, args.tabwith, args.analysiscache, None if args.quiet else sys.stdout)
+    except (OSError, ValueError, zipfile.BadZipFile, sqlite3.Error) as e:
+        print(f"Execution of {args.command} failed: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+
+@dataclass(slots=True)
+class ExecutionData:
+    """
+    Execution data of a single class, identified by the class id (CRC64 of the class bytes).
+    Probes are packed into a single int - bit i is probe i - matching the LSB-first layout of .exec files,
+    so merging is a bitwise OR and counting hits is a popcount.
+    """
+    id: int
+    name: str
+    probe_count: int
+    probes: int = 0
+
+    @classmethod
+    def from_bools(cls, class_id: int, name: str, probes: list[bool]) -> "ExecutionData":
+        """
+        :param class_id: The class id
+        :param name: The VM name of the class
+        :param probes: The probes as booleans
+        :returns: Execution data holding the given probes packed
+        """
+        return cls(class_id, name, len(probes), sum(1 << index for index, probe in enumerate(probes) if probe))
+
+    @classmethod
+    def from_packed(cls, class_id: int, name: str, probe_count: int, packed: bytes) -> "ExecutionData":
+        """
+        :param class_id: The class id
+        :param name: The VM name of the class
+        :param probe_count: The number of probes of the class
+        :param packed: The probes packed 8 per byte, LSB first
+        :returns: Execution data holding the given probes
+        """
+        return cls(class_id, name, probe_count, int.from_bytes(packed, "little") & ((1 << probe_count) - 1))
+
+    def packed(self) -> bytes:
+        """
+        :returns: The probes packed 8 per byte, LSB first
+        """
+        return self.probes.to_bytes((self.probe_count + 7) // 8, "little")
+
+    def to_list(self) -> list[bool]:
+        """
+        :returns: The probes as booleans
+        """
+        return [bool(self.probes >> index & 1) for index in range(self.probe_count)]
+
+    def has_hits(self) -> bool:
+        """
+        :returns: True if at least one probe of the class was executed
+        """
+        return self.probes != 0
+
+    def hit_count(self) -> int:
+        """
+        :returns: The number of executed probes
+        """
+        return self.probes.bit_count()
+
+    def assert_compatible(self, other: "ExecutionData"):
+        """
+        Validates that another execution data describes the same class.
+        :param other: Execution data to compare with
+        :raises ValueError: If the other execution data does not belong to the same class
+        """
+        if self.id != other.id:
+            raise ValueError(f"Different ids ({_hex_id(self.id)} and {_hex_id(other.id)}).")
+        if self.name != other.name:
+            raise ValueError(f"Different class names {self.name} and {other.name} for id {_hex_id(self.id)}.")
+        if self.probe_count != other.probe_count:
+            raise ValueError(f"Incompatible execution data for class {self.name} with id {_hex_id(self.id)}.")
+
+    def merge(self, other: "ExecutionData"):
+        """
+        Merges the probes of another execution data of the same class into this one (bitwise OR).
+        :param other: Execution data of the same class
+        :raises ValueError: If the other execution data does not belong to the same class
+        """
+        self.assert_compatible(other)
+        self.probes |= other.probes
+
+    def subtract(self, other: "ExecutionData"):
+        """
+        Clears every probe that is also executed in another execution data of the same class (bitwise AND-NOT).
+        :param other: Execution data of the same class
+        :raises ValueError: If the other execution data does not belong to the same class
+        """
+        self.assert_compatible(other)
+        self.probes &= ~other.probes
+
+
+class ProbeStore:
+    """In-memory store of execution data keyed by class id, merging data of classes added more than once."""
+    _entries: dict[int, ExecutionData]
+
+    def __init__(self):
+        self._entries = {}
+
+    def __len__(self) -> int:
+        """
+        :returns: The number of stored classes
+        """
+        return len(self._entries)
+
+    def __contains__(self, class_id: int) -> bool:
+        """
+        :returns: True if execution data of the class id is stored
+        """
+        return class_id in self._entries
+
+    def __iter__(self) -> Iterator[ExecutionData]:
+        """
+        :returns: Iterator over the stored execution data, in insertion order
+        """
+        return iter(self._entries.values())
+
+    def ids(self) -> list[int]:
+        """
+        :returns: The class ids in insertion order
+        """
+        return list(self._entries)
+
+    def get(self, class_id: int) -> Optional[ExecutionData]:
+        """
+        :param class_id: The class id
+        :returns: The execution data of the class, or None if it is unknown
+        """
+        return self._entries.get(class_id)
+
+    def put(self, data: ExecutionData):
+        """
+        Adds execution data of a class, OR-ing it into already stored execution data of the same class.
+        The store takes ownership of newly added execution data.
+        :param data: The class execution data
+        :raises ValueError: If stored execution data with the same id belongs to another class
+        """
+        existing = self._entries.get(data.id)
+        if existing is None:
+            self._entries[data.id] = data
+        else:
+            existing.merge(data)
+
+    def merge(self, other: "ProbeStore"):
+        """
+        Merges all execution data of another store into this one.
+        :param other: The store to merge
+        """
+        for data in other:
+            self.put(ExecutionData(data.id, data.name, data.probe_count, data.probes))
+
+    def subtract(self, other: "ProbeStore"):
+        """
+        Clears every probe that is also executed in another store.
+        :param other: The store holding the probes to clear
+        """
+        for data in other:
+            existing = self._entries.get(data.id)
+            if existing is not None:
+                existing.subtract(data)
+
+    def probe_count(self) -> int:
+        """
+        :returns: The total number of probes of all stored classes
+        """
+        return sum(data.probe_count for data in self._entries.values())
+
+    def hit_count(self) -> int:
+        """
+        :returns: The total number of executed probes of all stored classes
+        """
+        return sum(data.probes.bit_count() for data in self._entries.values())
+
+
+def _hex_id(class_id: int) -> str:
+    """Formats a class id the way JaCoCo prints it - as unsigned 16 digit hex."""
+    return f"{class_id & 0xFFFFFFFFFFFFFFFF:016x}"
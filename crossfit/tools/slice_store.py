@@ -0,0 +1,307 @@
+"""
+Compact store of per-test coverage slices, answering which tests hit a class or source file.
+
+A slice maps the units a test covered - JaCoCo classes or Cobertura source files - to a bit set of what it hit:
+probe indices for JaCoCo, line numbers for Cobertura. Bit sets are deduplicated across tests, so a class every test
+runs through the same way is stored once, and every recorded slice is appended to the store file as a single
+zlib-compressed frame - recording never rewrites earlier slices.
+"""
+import struct
+import threading
+import zlib
+from pathlib import Path
+from typing import Iterable, Optional
+
+from crossfit.tools.cobertura import CoberturaAggregate
+from crossfit.tools.jacoco_exec import ExecFileLoader
+
+MAGIC = b"CFSL\x01"
+_FRAME = struct.Struct(">I")
+_COUNT = struct.Struct(">I")
+
+
+class SliceStore:
+    """Per-test coverage slices with deduplicated bit sets, persisted to an append-only file."""
+    _names: list[str]
+    _name_ids: dict[str, int]
+    _vectors: list[tuple[int, int]]
+    _vector_ids: dict[tuple[int, int], int]
+    _slices: dict[str, list[int]]
+    _hitting: list[set[str]]
+    _unit_vectors: dict[int, list[int]]
+
+    def __init__(self, path: Optional[Path] = None):
+        """
+        :param path: The store file, loaded if it exists - None keeps the slices in memory only
+        :raises ValueError: If the file is not a slice store
+        """
+        self.path = Path(path) if path is not None else None
+        self._lock = threading.Lock()
+        self._names = []
+        self._name_ids = {}
+        self._vectors = []
+        self._vector_ids = {}
+        self._slices = {}
+        self._hitting = []
+        self._unit_vectors = {}
+        self._valid_size = 0
+        if self.path is not None and self.path.exists():
+            self._load(self.path.read_bytes())
+
+    def __len__(self) -> int:
+        """
+        :returns: The number of recorded tests
+        """
+        return len(self._slices)
+
+    def __contains__(self, label: str) -> bool:
+        """
+        :returns: True if a slice of the test is recorded
+        """
+        return label in self._slices
+
+    @property
+    def labels(self) -> list[str]:
+        """Returns the recorded tests in recording order."""
+        return list(self._slices)
+
+    @property
+    def vector_count(self) -> int:
+        """Returns the number of distinct bit sets stored for all tests."""
+        return len(self._vectors)
+
+    def units(self) -> list[str]:
+        """
+        :returns: The classes and source files hit by at least one test
+        """
+        return [self._names[name_id] for name_id in self._unit_vectors]
+
+    def add(self, label: str, units: dict[str, int]):
+        """
+        Records the slice of a test, replacing an earlier slice of the same test.
+        :param label: The test's label
+        :param units: The bit set of every hit unit - units without hits are ignored
+        """
+        with self._lock:
+            new_names: list[str] = []
+            new_vectors: list[tuple[int, int]] = []
+            references = []
+            for name, bits in units.items():
+                if not bits:
+                    continue
+                name_id = self._name_ids.get(name)
+                if name_id is None:
+                    name_id = self._add_name(name)
+                    new_names.append(name)
+                vector_id = self._vector_ids.get((name_id, bits))
+                if vector_id is None:
+                    vector_id = self._add_vector(name_id, bits)
+                    new_vectors.append((name_id, bits))
+                references.append(vector_id)
+            self._set_slice(label, references)
+            if self.path is not None:
+                self._append(_encode_frame(label, new_names, new_vectors, references))
+
+    def add_file(self, label: str, path: Path):
+        """
+        Records the slice of a test from its coverage file.
+        :param label: The test's label
+        :param path: A JaCoCo .exec dump, or a Cobertura XML snapshot
+        :raises ValueError: If the file could not be parsed
+        """
+        self.add(label, read_units(path))
+
+    def get(self, label: str) -> dict[str, int]:
+        """
+        :param label: The test's label
+        :returns: The bit set of every unit the test hit - empty for unknown tests
+        """
+        references = self._slices.get(label, ())
+        return {self._names[self._vectors[vector_id][0]]: self._vectors[vector_id][1] for vector_id in references}
+
+    def tests_hitting(self, unit: str, index: Optional[int] = None) -> list[str]:
+        """
+        :param unit: The VM name of a JaCoCo class (e.g. 'com/example/A') or a Cobertura source file name
+        :param index: The probe index (JaCoCo) or line number (Cobertura) to match, None to match any hit
+        :returns: The tests hitting the unit, in recording order
+        """
+        name_id = self._name_ids.get(unit)
+        if name_id is None:
+            return []
+        hitting = set()
+        for vector_id in self._unit_vectors.get(name_id, ()):
+            if index is None or self._vectors[vector_id][1] >> index & 1:
+                hitting |= self._hitting[vector_id]
+        return [label for label in self._slices if label in hitting]
+
+    def _add_name(self, name: str) -> int:
+        """
+        :param name: A unit name not stored yet
+        :returns: The id of the interned name
+        """
+        name_id = len(self._names)
+        self._names.append(name)
+        self._name_ids[name] = name_id
+        return name_id
+
+    def _add_vector(self, name_id: int, bits: int) -> int:
+        """
+        :param name_id: The id of the unit's name
+        :param bits: A bit set of the unit not stored yet
+        :returns: The id of the stored bit set
+        """
+        vector_id = len(self._vectors)
+        self._vectors.append((name_id, bits))
+        self._vector_ids[(name_id, bits)] = vector_id
+        self._hitting.append(set())
+        self._unit_vectors.setdefault(name_id, []).append(vector_id)
+        return vector_id
+
+    def _set_slice(self, label: str, references: list[int]):
+        """
+        Sets the bit sets of a test, updating the inverted index.
+        :param label: The test's label
+        :param references: The ids of the test's bit sets
+        """
+        for vector_id in self._slices.pop(label, ()):
+            self._hitting[vector_id].discard(label)
+        self._slices[label] = references
+        for vector_id in references:
+            self._hitting[vector_id].add(label)
+
+    def _append(self, frame: bytes):
+        """
+        Appends a frame to the store file, dropping a torn frame a previous writer left behind.
+        :param frame: The encoded frame
+        """
+        with open(self.path, "ab") as file:
+            if self._valid_size == 0:
+                file.truncate(0)
+                file.write(MAGIC)
+                self._valid_size = len(MAGIC)
+            elif file.tell() != self._valid_size:
+                file.truncate(self._valid_size)
+            file.write(frame)
+        self._valid_size += len(frame)
+
+    def _load(self, data: bytes):
+        """
+        Replays the frames of a store file. A torn trailing frame is ignored, and dropped on the next append.
+        :param data: The store file's content
+        :raises ValueError: If the data is not a slice store
+        """
+        if not data:
+            return
+        if not data.startswith(MAGIC):
+            raise ValueError(f"'{self.path}' is not a coverage slice store.")
+        offset = len(MAGIC)
+        while offset + _FRAME.size <= len(data):
+            (length,) = _FRAME.unpack_from(data, offset)
+            end = offset + _FRAME.size + length
+            if end > len(data):
+                break
+            try:
+                payload = zlib.decompress(data[offset + _FRAME.size:end])
+            except zlib.error as e:
+                raise ValueError(f"Corrupt frame in '{self.path}' at offset {offset}: {e}") from e
+            self._replay(payload)
+            offset = end
+        self._valid_size = offset
+
+    def _replay(self, payload: bytes):
+        """
+        Applies a decompressed frame - its new names and bit sets, then the slice itself.
+        :param payload: The frame's payload
+        """
+        offset = 0
+        label, offset = _read_string(payload, offset)
+        (name_count,), offset = _COUNT.unpack_from(payload, offset), offset + _COUNT.size
+        for _ in range(name_count):
+            name, offset = _read_string(payload, offset)
+            self._add_name(name)
+        (vector_count,), offset = _COUNT.unpack_from(payload, offset), offset + _COUNT.size
+        for _ in range(vector_count):
+            (name_id,), offset = _COUNT.unpack_from(payload, offset), offset + _COUNT.size
+            packed, offset = _read_bytes(payload, offset)
+            self._add_vector(name_id, int.from_bytes(packed, "little"))
+        (reference_count,), offset = _COUNT.unpack_from(payload, offset), offset + _COUNT.size
+        references = list(struct.unpack_from(f">{reference_count}I", payload, offset))
+        self._set_slice(label, references)
+
+
+def read_units(path: Path) -> dict[str, int]:
+    """
+    :param path: A JaCoCo .exec dump, or a Cobertura XML snapshot
+    :returns: The hit bit set of every class (probe indices) or source file (line numbers) in the file
+    :raises ValueError: If the file could not be parsed
+    """
+    if Path(path).suffix == ".exec":
+        loader = ExecFileLoader()
+        loader.load(path)
+        return exec_units(loader)
+    aggregate = CoberturaAggregate()
+    aggregate.add_file(path)
+    units: dict[str, int] = {}
+    for package in aggregate.packages.values():
+        for coverage_class in package.classes.values():
+            bits = sum(1 << number for number, line in coverage_class.lines.items() if line.hits)
+            units[coverage_class.filename] = units.get(coverage_class.filename, 0) | bits
+    return units
+
+
+def exec_units(loader: ExecFileLoader) -> dict[str, int]:
+    """
+    :param loader: Loaded JaCoCo execution data
+    :returns: The executed probes of every class, keyed by the class' VM name - the probes of classes sharing a name
+              under different class ids are OR-ed, so none of them is lost
+    """
+    units: dict[str, int] = {}
+    for data in loader.store:
+        if data.probes:
+            units[data.name] = units.get(data.name, 0) | data.probes
+    return units
+
+
+def _encode_frame(label: str, names: Iterable[str], vectors: list[tuple[int, int]], references: list[int]) -> bytes:
+    """
+    :param label: The test's label
+    :param names: Unit names first referenced by this slice
+    :param vectors: Bit sets first referenced by this slice, as (name id, bits)
+    :param references: The ids of all bit sets of the slice
+    :returns: The length prefixed, compressed frame
+    """
+    names = list(names)
+    payload = bytearray(_encode_string(label))
+    payload += _COUNT.pack(len(names))
+    for name in names:
+        payload += _encode_string(name)
+    payload += _COUNT.pack(len(vectors))
+    for name_id, bits in vectors:
+        packed = bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+        payload += _COUNT.pack(name_id) + _COUNT.pack(len(packed)) + packed
+    payload += _COUNT.pack(len(references)) + struct.pack(f">{len(references)}I", *references)
+    compressed = zlib.compress(payload, 1)
+    return _FRAME.pack(len(compressed)) + compressed
+
+
+def _encode_string(value: str) -> bytes:
+    """Encodes a string as length prefixed UTF-8."""
+    encoded = value.encode("utf-8")
+    return _COUNT.pack(len(encoded)) + encoded
+
+
+def _read_bytes(payload: bytes, offset: int) -> tuple[bytes, int]:
+    """
+    :returns: The length prefixed bytes at the offset, and the offset following them
+    """
+    (length,) = _COUNT.unpack_from(payload, offset)
+    start = offset + _COUNT.size
+    return payload[start:start + length], start + length
+
+
+def _read_string(payload: bytes, offset: int) -> tuple[str, int]:
+    """
+    :returns: The length prefixed UTF-8 string at the offset, and the offset following it
+    """
+    value, offset = _read_bytes(payload, offset)
+    return value.decode("utf-8"), offset
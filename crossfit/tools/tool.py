@@ -1,3 +1,4 @@
+import sys
 import tempfile
 
 from abc import ABC, abstractmethod
@@ -8,6 +9,17 @@ from crossfit import Command
 from crossfit.commands import CommandBuilder
 from crossfit.models import ToolType, ReportFormat
 
+# Package whose __main__ runs the native tool modules - never imported by the package, unlike the tool modules
+NATIVE_ENTRY = "crossfit.tools"
+
+
+def native_execution_args(tool_module: str) -> list[str]:
+    """
+    :param tool_module: Name of the native tool module in crossfit.tools (e.g. 'jacoco_exec')
+    :returns: The execution call running the tool module's command line with the current interpreter
+    """
+    return [sys.executable, "-m", NATIVE_ENTRY, tool_module]
+
 
 class Tool(ABC):
     """Abstract base class for coverage tools. Tools build and return Commands."""
@@ -15,6 +27,8 @@ class Tool(ABC):
     _path: Optional[Path]
     _logger: Logger
     _catch: bool
+    # Whether append_coverage folds files into an aggregate in place - pipelines merge into a new aggregate otherwise
+    supports_append: bool = True
 
     def __init__(self, logger: Logger, path: Optional[Path] = None, catch: bool = True):
         """
@@ -87,12 +101,47 @@ class Tool(ABC):
         """Builds a command to merge coverage files."""
         raise NotImplementedError
 
+    @abstractmethod
+    def append_coverage(self,
+                        coverage_files: list[Path],
+                        aggregate_file: Path,
+                        *extras: tuple[str, Optional[str]]) -> Command:
+        """
+        Builds a command folding new coverage files into a running aggregate file, which is replaced atomically.
+        The cost of each append depends on the aggregate and the new files only, not on the merged history.
+        :param coverage_files: File paths to the new coverage files.
+        :param aggregate_file: The aggregate coverage file, created on the first append.
+        :param extras: Extra options to pass to the CLI's command.
+        :returns: A Command object configured to append the coverage files.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def diff_coverage(self,
+                      before_file: Path,
+                      after_file: Path,
+                      target_dir: Path,
+                      target_file: Optional[Path],
+                      *extras: tuple[str, Optional[str]]) -> Command:
+        """
+        Builds a command writing what became covered between two snapshots into a delta file, alongside a JSON
+        summary of the delta.
+        :param before_file: The earlier snapshot.
+        :param after_file: The later snapshot.
+        :param target_dir: Targeted directory to save the delta file to.
+        :param target_file: Specified delta file name - when not given, uses the default file name.
+        :param extras: Extra options to pass to the CLI's command.
+        :returns: A Command object configured to diff the snapshots.
+        """
+        raise NotImplementedError
+
     def reset_coverage(self,
                        session: str,
                        *extras: tuple[str, Optional[str]]) -> Command:
         """
         Builds a command to reset coverage data.
         Uses next_command chaining to snapshot with --reset flag and then clean up temp file.
+        Tools able to reset without persisting a snapshot override it.
         :param session: Session id of the coverage agent.
         :param extras: Extra options to pass to the CLI's command.
         :returns: A Command with chained cleanup command via next_command.
@@ -101,7 +150,8 @@ class Tool(ABC):
         extras += ("--reset", None),
 
         snapshot_command = self.snapshot_coverage(session, target_dir, None, *extras)
-        cleanup_command = CommandBuilder().with_command(["rm", "-f", str(target_dir)]).build_command()
+        snapshot_files = [str(path) for path in snapshot_command.outputs] or [str(target_dir)]
+        cleanup_command = CommandBuilder().with_command(["rm", "-f", *snapshot_files]).build_command()
         snapshot_command.next_command = cleanup_command
 
         return snapshot_command
@@ -6,18 +6,19 @@ from crossfit.tools import Jacoco, DotnetCoverage
 from crossfit.models import ToolType
 
 
-def create_tool(tool_type: ToolType, tool_path: Path = None, logger: Logger = None, catch: bool = True):
+def create_tool(tool_type: ToolType, tool_path: Path = None, logger: Logger = None, catch: bool = True, **kwargs):
     """
     Factory method to create a tool based on the specified type.
     :param tool_type: The type of tool to create.
     :param tool_path: Optional path to the tool executable.
     :param logger: Optional logger instance for logging tool operations.
     :param catch: Whether to catch exceptions during tool operations.
+    :param kwargs: Additional keyword arguments for tool initialization.
     :return: An instance of the specified tool type.
     """
     if tool_type == ToolType.Jacoco:
-        return Jacoco(logger, tool_path or crossfit.refs.tools_dir, catch)
+        return Jacoco(logger, tool_path or crossfit.refs.tools_dir, catch, **kwargs)
     elif tool_type == ToolType.DotnetCoverage:
-        return DotnetCoverage(logger, tool_path or crossfit.refs.tools_dir, catch)
+        return DotnetCoverage(logger, tool_path or crossfit.refs.tools_dir, catch, **kwargs)
     else:
         raise ValueError(f"Unknown tool type: {tool_type}")
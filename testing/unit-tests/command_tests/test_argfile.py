@@ -0,0 +1,79 @@
+# test_argfile.py
+import os
+import pytest
+
+from crossfit.commands.argfile import argv_size, spilled_argv
+from crossfit.commands.command import Command
+from crossfit.models.command_models import ArgFileStyle
+
+
+def _command(style: ArgFileStyle, *body: str) -> Command:
+    cmd = Command()
+    cmd.execution_args = ["java", "-jar", "jacococli.jar"]
+    cmd.command_to_execute = "merge"
+    cmd.command_body = list(body)
+    cmd.argfile_style = style
+    return cmd
+
+
+def _read_argfile(argv: list[str]) -> str:
+    with open(argv[-1][1:], encoding="utf-8") as argfile:
+        return argfile.read()
+
+
+class TestSpilledArgv:
+    """Tests for moving long argument lists into response files."""
+
+    def test_argv_size(self):
+        """Test that the size counts every argument's bytes and terminator."""
+        assert argv_size(["ab", "é"]) == 3 + 3
+
+    def test_below_threshold_is_unchanged(self):
+        """Test that short argument vectors are passed as is."""
+        cmd = _command(ArgFileStyle.Java, "a.exec")
+        with spilled_argv(cmd, 1024) as argv:
+            assert argv == cmd.argv
+
+    def test_no_style_is_unchanged(self):
+        """Test that commands without a response file style are never spilled."""
+        cmd = _command(None, "a.exec")
+        with spilled_argv(cmd, 1) as argv:
+            assert argv == cmd.argv
+
+    def test_java_argfile(self):
+        """Test that Java argument files keep only the launcher and quote every argument."""
+        cmd = _command(ArgFileStyle.Java, "my dir\\a.exec", 'b"c')
+        with spilled_argv(cmd, 1) as argv:
+            assert argv[0] == "java" and len(argv) == 2
+            assert _read_argfile(argv).splitlines() == [
+                '"-jar"', '"jacococli.jar"', '"merge"', '"my dir\\\\a.exec"', '"b\\"c"']
+
+    def test_dotnet_response_file(self):
+        """Test that .NET response files keep the executable and quote arguments with whitespace."""
+        cmd = _command(ArgFileStyle.DotnetResponseFile, "my dir/a.xml", "b.xml")
+        with spilled_argv(cmd, 1) as argv:
+            assert argv[:3] == ["java", "-jar", "jacococli.jar"]
+            assert _read_argfile(argv).splitlines() == ["merge", '"my dir/a.xml"', "b.xml"]
+
+    def test_argparse_file(self):
+        """Test that argparse files hold one raw argument per line."""
+        cmd = _command(ArgFileStyle.Argparse, "my dir/a.exec")
+        with spilled_argv(cmd, 1) as argv:
+            assert _read_argfile(argv).splitlines() == ["merge", "my dir/a.exec"]
+
+    def test_argfile_is_removed(self):
+        """Test that the response file is removed on exit, also when execution fails."""
+        with pytest.raises(RuntimeError):
+            with spilled_argv(_command(ArgFileStyle.Java, "a.exec"), 1) as argv:
+                path = argv[-1][1:]
+                assert os.path.exists(path)
+                raise RuntimeError()
+        assert not os.path.exists(path)
+
+    @pytest.mark.parametrize("style, argument", [(ArgFileStyle.DotnetResponseFile, 'a"b'),
+                                                 (ArgFileStyle.Argparse, "a\nb")], ids=["Dotnet", "Argparse"])
+    def test_unrepresentable_argument_raises(self, style, argument):
+        """Test that arguments the response file syntax cannot hold are rejected."""
+        with pytest.raises(ValueError):
+            with spilled_argv(_command(style, argument), 1):
+                pass
@@ -55,6 +55,54 @@ class TestCommand:
         command.command_to_execute = "run.py"
         command.command_body = ["--debug"]
         assert str(command) == "python run.py --debug"
+
+    def test_command_str_quotes_arguments(self):
+        """Test that the string representation quotes arguments shell-like."""
+        command = Command()
+        command.execution_call = "python"
+        command.command_to_execute = "run.py"
+        command.command_body = ["my file.exec"]
+        assert str(command) == "python run.py 'my file.exec'"
+    # endregion
+
+    # region Argument Vector Tests
+    def test_argv_keeps_arguments_with_spaces(self):
+        """Test that body arguments are passed as they are."""
+        command = Command()
+        command.execution_call = "python"
+        command.command_to_execute = "run.py"
+        command.command_body = ["--destfile", "/tmp/my dir/merged.exec", 'say "hi"']
+        assert command.argv == ["python", "run.py", "--destfile", "/tmp/my dir/merged.exec", 'say "hi"']
+
+    def test_argv_splits_execution_call(self):
+        """Test that an execution call string with arguments is split into separate arguments."""
+        command = Command()
+        command.execution_call = "java -jar 'tools dir/jacococli.jar'"
+        command.command_to_execute = "merge"
+        assert command.argv == ["java", "-jar", "tools dir/jacococli.jar", "merge"]
+
+    def test_argv_uses_execution_args_unsplit(self):
+        """Test that explicit execution arguments are not split and are shown quoted."""
+        command = Command()
+        command.execution_args = ["java", "-jar", "tools dir/jacococli.jar"]
+        command.command_to_execute = "merge"
+        assert command.argv == ["java", "-jar", "tools dir/jacococli.jar", "merge"]
+        assert command.execution_call == "java -jar 'tools dir/jacococli.jar'"
+
+    def test_argv_skips_empty_command_to_execute(self):
+        """Test that an empty command to execute is not passed as an empty argument."""
+        command = Command()
+        command.execution_call = "reportgenerator"
+        command.command_to_execute = ""
+        command.command_body = ["-reports:a.xml"]
+        assert command.argv == ["reportgenerator", "-reports:a.xml"]
+
+    def test_setting_execution_call_resets_execution_args(self):
+        """Test that the execution call string overrides previously set execution arguments."""
+        command = Command()
+        command.execution_args = ["java", "-jar", "a.jar"]
+        command.execution_call = "python"
+        assert command.execution_args == ["python"]
     # endregion
 
     # region Validation Tests
@@ -113,6 +161,7 @@ class TestCommand:
         assert copied.options == original.options
         assert copied.arguments == original.arguments
         assert copied.values_delimiter == original.values_delimiter
+        assert copied.argv == original.argv
         assert copied is not original
 
     def test_command_copy_with_next_command(self):
@@ -1,3 +1,4 @@
+import copy
 import os.path
 import pytest
 
@@ -312,3 +313,36 @@ class TestCommandBuilder:
         assert "--output=file.txt" in command.command
         assert "input.txt" in command.command
     # endregion
+
+    # region set_timeout Tests
+    def test_set_timeout(self):
+        """Test that the timeout is set on the built command and kept by copies."""
+        command = CommandBuilder().with_command(["python", "run.py"]).set_timeout(2.5).build_command()
+        assert command.timeout == 2.5
+        assert copy.copy(command).timeout == 2.5
+
+    @pytest.mark.parametrize("timeout", [0, -1.0], ids=["Zero", "Negative"])
+    def test_set_invalid_timeout(self, timeout):
+        """Test that non positive timeouts are rejected."""
+        with pytest.raises(ValueError):
+            CommandBuilder().with_command(["python", "run.py"]).set_timeout(timeout)
+    # endregion
+
+    # region inputs and outputs Tests
+    def test_path_arguments_are_inputs(self, tmp_path):
+        """Test that resolved path arguments are declared as the command's inputs."""
+        (tmp_path / "a.exec").write_text("a")
+        (tmp_path / "b.exec").write_text("b")
+        command = (CommandBuilder().with_command(["tool", "merge"]).add_path_arguments(tmp_path / "*.exec")
+                   .add_inputs(tmp_path / "classes").add_outputs(tmp_path / "merged.exec").build_command())
+        assert sorted(path.resolve() for path in command.inputs[:2]) == [tmp_path / "a.exec", tmp_path / "b.exec"]
+        assert command.inputs[2] == tmp_path / "classes"
+        assert command.outputs == [tmp_path / "merged.exec"]
+
+    def test_inputs_are_not_shared_between_builds(self, tmp_path):
+        """Test that declaring inputs after building does not change built commands."""
+        builder = CommandBuilder().with_command(["tool", "merge"]).add_inputs(tmp_path / "a")
+        command = builder.build_command()
+        builder.add_inputs(tmp_path / "b")
+        assert command.inputs == [tmp_path / "a"]
+    # endregion
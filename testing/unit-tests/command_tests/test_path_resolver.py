@@ -0,0 +1,115 @@
+# test_path_resolver.py
+import glob
+import os
+import time
+import pytest
+
+from pathlib import Path
+from crossfit.commands.command_builder import CommandBuilder
+from crossfit.commands.path_resolver import PathResolver, default_path_resolver
+
+PATTERNS = ["*", "**", "tree/*", "tree/**", "tree/**/*.exec", "tree/**/", "tree/*/", "tree/**/b/*", "tree/.*",
+            "tree/**/.hidden.exec", "tree/[ab]*", "tree/?", "**/*.exec", "tree", "tree/a", "tree/missing",
+            "tree/**/**/*.exec", "tree//*", "./tree/*/*"]
+
+
+@pytest.fixture
+def tree(tmp_path, monkeypatch) -> Path:
+    for file in ("a/x.exec", "a/b/y.exec", "a/b/c.xml", "b/z.exec", "b/.hidden.exec", ".git/h.exec", "top.exec",
+                 "c.xml"):
+        (tmp_path / "tree" / file).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / "tree" / file).touch()
+    for directory, _, _ in os.walk(tmp_path / "tree"):
+        _age(Path(directory))
+    monkeypatch.chdir(tmp_path)
+    return tmp_path / "tree"
+
+
+def _age(directory: Path):
+    """Moves the directory's modification time a minute back, so its listing is no longer racy."""
+    modified = time.time_ns() - 60 * 10 ** 9
+    os.utime(directory, ns=(modified, modified))
+
+
+class TestPathResolver:
+    """Tests for resolving paths and glob patterns with cached directory listings."""
+
+    @pytest.mark.parametrize("pattern", PATTERNS)
+    def test_resolve_matches_glob(self, tree, pattern):
+        """Test that patterns resolve to the paths recursive glob finds, relative to the current directory."""
+        expected = sorted(os.path.relpath(path) for path in glob.glob(pattern, recursive=True))
+        assert sorted(PathResolver().resolve(pattern)) == expected
+
+    def test_resolve_absolute_pattern(self, tree):
+        """Test that absolute patterns resolve to relative paths."""
+        assert PathResolver().resolve(tree / "**" / "*.exec") == [os.path.join("tree", "top.exec"),
+                                                                  os.path.join("tree", "a", "x.exec"),
+                                                                  os.path.join("tree", "a", "b", "y.exec"),
+                                                                  os.path.join("tree", "b", "z.exec")]
+
+    def test_listings_are_cached_until_directory_changes(self, tree, monkeypatch):
+        """Test that directories are scanned once and rescanned after an entry is added."""
+        resolver = PathResolver()
+        scans = []
+        scandir = os.scandir
+        monkeypatch.setattr(os, "scandir", lambda path: scans.append(path) or scandir(path))
+
+        first = resolver.resolve("tree/**/*.exec")
+        assert resolver.resolve("tree/**/*.exec") == first
+        assert len(scans) == 4
+
+        (tree / "b" / "new.exec").touch()
+        _age(tree / "b")
+        assert resolver.resolve("tree/**/*.exec") == first[:3] + [os.path.join("tree", "b", "new.exec"), first[3]]
+        assert len(scans) == 5
+
+    def test_racy_listings_are_not_cached(self, tree, monkeypatch):
+        """Test that directories changed within the modification time granularity are rescanned every time."""
+        resolver = PathResolver()
+        (tree / "b" / "new.exec").touch()
+        scans = []
+        scandir = os.scandir
+        monkeypatch.setattr(os, "scandir", lambda path: scans.append(path) or scandir(path))
+
+        resolver.resolve("tree/b/*")
+        (tree / "b" / "newer.exec").touch()
+        assert os.path.join("tree", "b", "newer.exec") in resolver.resolve("tree/b/*")
+        assert len(scans) == 2 and not resolver._listings
+
+        _age(tree / "b")
+        resolver.resolve("tree/b/*")
+        resolver.resolve("tree/b/*")
+        assert len(scans) == 3
+
+    def test_uncached_resolver(self, tree):
+        """Test that a resolver without cache, also the one builders use given None, caches no listing."""
+        resolver = PathResolver(cache=False)
+        assert resolver.resolve("tree/*/*.exec") == [os.path.join("tree", "a", "x.exec"),
+                                                     os.path.join("tree", "b", "z.exec")]
+        assert not resolver._listings
+
+        builder = CommandBuilder().with_command(["tool", "merge"]).with_path_resolver(None)
+        assert builder.add_path_arguments(Path("tree/*/*.exec")).build_command().arguments == \
+               resolver.resolve("tree/*/*.exec")
+        assert builder._path_resolver is not default_path_resolver and not builder._path_resolver._listings
+
+    def test_listing_cache_is_bounded(self, tree):
+        """Test that the least recently used listings are evicted beyond the maximal number of directories."""
+        resolver = PathResolver(max_directories=2)
+        resolver.resolve("tree/**")
+        assert len(resolver._listings) == 2
+        resolver.clear()
+        assert len(resolver._listings) == 0
+
+    def test_builder_uses_given_resolver(self, tree):
+        """Test that path arguments are resolved once by the builder's resolver, failing on unmatched patterns."""
+        resolver = PathResolver()
+        command = CommandBuilder().with_command(["tool", "merge"]).with_path_resolver(resolver).add_path_arguments(
+            Path("tree/*/*.exec"), Path("tree/top.exec")).build_command()
+        assert command.arguments == [os.path.join("tree", "a", "x.exec"), os.path.join("tree", "b", "z.exec"),
+                                     os.path.join("tree", "top.exec")]
+        assert command.inputs == [Path(argument) for argument in command.arguments]
+        assert resolver._listings
+
+        with pytest.raises(FileNotFoundError, match="does not exist"):
+            CommandBuilder().with_command(["tool", "merge"]).add_path_arguments(Path("tree/*/*.missing"))
@@ -0,0 +1,133 @@
+# test_async_executor.py
+import asyncio
+import subprocess
+import sys
+import threading
+import time
+import pytest
+
+from crossfit.commands.command import Command
+from crossfit.executors.async_executor import AsyncExecutor
+from crossfit.executors.executor import CancellationToken, CANCELLED_CODE, TIMED_OUT_CODE
+from crossfit.executors.executor_factory import create_executor
+from crossfit.models.executor_models import ExecutorType
+
+
+def _python_command(code: str, next_command: Command = None) -> Command:
+    cmd = Command()
+    cmd.execution_call = sys.executable
+    cmd.command_to_execute = "-c"
+    cmd.command_body = [code]
+    cmd.next_command = next_command
+    return cmd
+
+
+@pytest.fixture
+def executor(logger):
+    return AsyncExecutor(logger)
+
+
+class TestAsyncExecutor:
+    """Tests for the asyncio based executor."""
+
+    def test_execute_async_returns_output(self, executor):
+        """Test that a single command runs and its output is captured."""
+        result = asyncio.run(executor.execute_async(_python_command("print('hello')")))
+        assert result.code == 0
+        assert result.output.strip() == "hello"
+
+    def test_execute_many_keeps_order(self, executor):
+        """Test that results are returned in the order of the given commands."""
+        commands = [_python_command(f"import time; time.sleep({0.2 - index * 0.05}); print({index})")
+                    for index in range(4)]
+        results = executor.execute_many(commands)
+        assert [result.output.strip() for result in results] == ["0", "1", "2", "3"]
+
+    def test_execute_many_runs_concurrently(self, executor):
+        """Test that commands overlap instead of running one after another."""
+        commands = [_python_command("import time; time.sleep(0.5)") for _ in range(4)]
+        start = time.monotonic()
+        results = executor.execute_many(commands)
+        assert all(result.code == 0 for result in results)
+        assert time.monotonic() - start < 1.5
+
+    def test_execute_many_respects_limit(self, executor, tmp_path):
+        """Test that no more than max_concurrency chains run at once."""
+        code = (f"import os, time; path = os.path.join({str(tmp_path)!r}, str(os.getpid())); "
+                f"open(path, 'w').close(); print(len(os.listdir({str(tmp_path)!r}))); "
+                f"time.sleep(0.3); os.remove(path)")
+        results = executor.execute_many([_python_command(code) for _ in range(6)], max_concurrency=2)
+        assert max(int(result.output) for result in results) <= 2
+
+    def test_chain_is_honoured(self, executor):
+        """Test that chained commands run after the first one and their results are aggregated."""
+        command = _python_command("print('first')", _python_command("print('second')"))
+        result = executor.execute_many([command])[0]
+        assert result.code == 0
+        assert "first" in result.output and "second" in result.output
+
+    def test_chain_stops_on_failure(self, executor, tmp_path):
+        """Test that a failing command stops its own chain but not the other commands."""
+        marker = tmp_path / "ran"
+        failing = _python_command("import sys; sys.exit(3)", _python_command(f"open({str(marker)!r}, 'w')"))
+        results = executor.execute_many([failing, _python_command("print('ok')")])
+        assert results[0].code == 3
+        assert not marker.exists()
+        assert results[1].code == 0
+
+    def test_missing_executable(self, executor):
+        """Test that a missing executable is reported like in LocalExecutor."""
+        cmd = Command()
+        cmd.execution_call = "nonexistent_tool_xyz"
+        cmd.command_to_execute = "arg"
+        assert executor.execute_many([cmd])[0].code == 124
+
+    def test_timeout_kills_process(self, logger):
+        """Test that the timeout execution argument is honoured."""
+        executor = AsyncExecutor(logger, timeout=0.2)
+        result = executor.execute_many([_python_command("import time; time.sleep(5)")])[0]
+        assert result.code == TIMED_OUT_CODE
+        assert "timed out" in result.error
+
+    def test_no_catch_raises(self, logger):
+        """Test that failures are raised when catch is disabled."""
+        executor = AsyncExecutor(logger, catch=False)
+        with pytest.raises(subprocess.CalledProcessError):
+            executor.execute_many([_python_command("import sys; sys.exit(2)")])
+
+    def test_invalid_limit_raises(self, logger):
+        """Test that a concurrency limit below 1 is rejected."""
+        with pytest.raises(ValueError):
+            AsyncExecutor(logger, max_concurrency=0)
+
+    def test_factory_creates_async_executor(self, logger):
+        """Test that the factory creates an AsyncExecutor for the Async type."""
+        assert isinstance(create_executor(ExecutorType.Async, logger, max_concurrency=4), AsyncExecutor)
+
+    def test_streaming_output(self, logger):
+        """Test that streamed output is returned as a spooled handle."""
+        executor = AsyncExecutor(logger, stream_output=True, spool_size=100)
+        result = executor.execute_many([_python_command("for i in range(50): print(i)")])[0]
+        assert result.code == 0
+        assert result.output.spooled
+        assert result.output.read().split() == [str(i) for i in range(50)]
+
+    def test_cancellation(self, executor):
+        """Test that cancelling the token kills every running command."""
+        token = CancellationToken()
+        threading.Timer(0.3, token.cancel).start()
+        commands = [_python_command("import time; time.sleep(10)") for _ in range(3)]
+        start = time.monotonic()
+        results = executor.execute_many(commands, cancel_token=token)
+
+        assert [result.code for result in results] == [CANCELLED_CODE] * 3
+        assert time.monotonic() - start < 5
+
+    def test_chain_timeout(self, executor):
+        """Test that the chain timeout applies to the commands of each chain."""
+        command = _python_command("import time; time.sleep(0.3)", _python_command("import time; time.sleep(10)"))
+        start = time.monotonic()
+        result = executor.execute_many([command], timeout=0.8)[0]
+        assert result.code == TIMED_OUT_CODE
+        assert "timed out" in result.error
+        assert time.monotonic() - start < 5
@@ -0,0 +1,260 @@
+# test_caching_executor.py
+import sys
+import pytest
+
+from pathlib import Path
+import crossfit
+from crossfit import CachingExecutor, Jacoco, LocalExecutor
+from crossfit.commands.command import Command
+from crossfit.executors import caching_executor
+from crossfit.executors.executor import Executor
+from crossfit.models.command_models import CommandResult
+from crossfit.models.tool_models import ReportFormat
+
+
+class CountingExecutor(Executor):
+    """Executor faking a tool - writes the upper-cased input to the output and counts its executions."""
+
+    def __init__(self, logger, code: int = 0):
+        super().__init__(logger)
+        self.executions = 0
+        self._code = code
+
+    def _execute_single(self, command: Command) -> CommandResult:
+        self.executions += 1
+        if self._code == 0:
+            for output in command.outputs:
+                output.parent.mkdir(parents=True, exist_ok=True)
+                output.write_text(" ".join(Path(path).read_text().upper() for path in command.inputs
+                                           if Path(path).is_file()))
+        return CommandResult(code=self._code, command=str(command), output=f"run {self.executions}", error="")
+
+
+def _command(inputs: list[Path], output: Path, *body: str) -> Command:
+    cmd = Command()
+    cmd.execution_call = "tool"
+    cmd.command_to_execute = "merge"
+    cmd.command_body = [*map(str, inputs), *body]
+    cmd.inputs = list(inputs)
+    cmd.outputs = [output]
+    return cmd
+
+
+@pytest.fixture
+def input_file(tmp_path) -> Path:
+    path = tmp_path / "input.exec"
+    path.write_text("coverage")
+    return path
+
+
+@pytest.fixture
+def inner(logger) -> CountingExecutor:
+    return CountingExecutor(logger)
+
+
+@pytest.fixture
+def executor(logger, inner, tmp_path) -> CachingExecutor:
+    return CachingExecutor(logger, inner, tmp_path / "cache")
+
+
+class TestCachingExecutor:
+    """Tests for the content-addressed result cache."""
+
+    def test_hit_restores_outputs(self, executor, inner, input_file, tmp_path):
+        """Test that a repeated command is not executed again and its output is restored."""
+        output = tmp_path / "out" / "merged.exec"
+        first = executor.execute(_command([input_file], output))
+        output.unlink()
+        second = executor.execute(_command([input_file], output))
+
+        assert inner.executions == 1
+        assert second.code == 0
+        assert second.output == first.output
+        assert output.read_text() == "COVERAGE"
+        assert executor.statistics.hits == 1 and executor.statistics.misses == 1
+
+    def test_changed_input_misses(self, executor, inner, input_file, tmp_path):
+        """Test that changing the content of an input invalidates the cached result."""
+        output = tmp_path / "merged.exec"
+        executor.execute(_command([input_file], output))
+        input_file.write_text("changed coverage")
+        executor.execute(_command([input_file], output))
+
+        assert inner.executions == 2
+        assert output.read_text() == "CHANGED COVERAGE"
+
+    def test_changed_arguments_miss(self, executor, inner, input_file, tmp_path):
+        """Test that different arguments are cached separately."""
+        output = tmp_path / "merged.exec"
+        executor.execute(_command([input_file], output))
+        executor.execute(_command([input_file], output, "--quiet"))
+
+        assert inner.executions == 2
+
+    def test_directory_inputs(self, executor, inner, tmp_path):
+        """Test that a file changing within an input directory invalidates the cached result."""
+        classes = tmp_path / "classes"
+        (classes / "com").mkdir(parents=True)
+        (classes / "com" / "A.class").write_text("a")
+        cmd = Command()
+        cmd.execution_call = "tool"
+        cmd.command_to_execute = "report"
+        cmd.inputs = [classes]
+        cmd.outputs = [tmp_path / "report"]
+        executor.execute(cmd)
+        executor.execute(cmd)
+        (classes / "com" / "A.class").write_text("b")
+        executor.execute(cmd)
+
+        assert inner.executions == 2
+
+    def test_restored_directory_replaces_stale_files(self, logger, tmp_path):
+        """Test that restoring a directory output removes files a previous run left in it."""
+        class ReportExecutor(CountingExecutor):
+            def _execute_single(self, command: Command) -> CommandResult:
+                self.executions += 1
+                command.outputs[0].mkdir(parents=True, exist_ok=True)
+                (command.outputs[0] / "index.html").write_text("report")
+                return CommandResult(code=0, command=str(command), output="", error="")
+
+        inner = ReportExecutor(logger)
+        executor = CachingExecutor(logger, inner, tmp_path / "cache")
+        (tmp_path / "input.exec").write_text("coverage")
+        report = tmp_path / "report"
+        executor.execute(_command([tmp_path / "input.exec"], report))
+        (report / "stale.html").write_text("previous report")
+        executor.execute(_command([tmp_path / "input.exec"], report))
+
+        assert inner.executions == 1
+        assert sorted(path.name for path in report.iterdir()) == ["index.html"]
+
+    def test_relative_paths_resolve_in_executor_workdir(self, logger, tmp_path, monkeypatch):
+        """Test that relative inputs and outputs are those of the wrapped executor's working directory."""
+        workdir = tmp_path / "work"
+        workdir.mkdir()
+        (workdir / "input.exec").write_text("coverage")
+        monkeypatch.chdir(tmp_path)
+        executor = CachingExecutor(logger, LocalExecutor(logger, workdir=workdir), tmp_path / "cache")
+        cmd = Command()
+        cmd.execution_call = sys.executable
+        cmd.command_to_execute = "-c"
+        cmd.command_body = ["open('out.exec', 'w').write(open('input.exec').read().upper())"]
+        cmd.inputs = [Path("input.exec")]
+        cmd.outputs = [Path("out.exec")]
+
+        assert executor.execute(cmd).code == 0
+        (workdir / "out.exec").unlink()
+        assert executor.execute(cmd).code == 0
+        assert (workdir / "out.exec").read_text() == "COVERAGE"
+        (workdir / "input.exec").write_text("changed")
+        executor.execute(cmd)
+
+        assert (executor.statistics.hits, executor.statistics.misses) == (1, 2)
+        assert not (tmp_path / "out.exec").exists()
+
+    def test_report_class_files_passed_as_extras_are_inputs(self, logger, executor, inner, input_file, tmp_path):
+        """Test that recompiling classes passed as --classfiles extras invalidates a cached report."""
+        classes = tmp_path / "classes"
+        (classes / "com").mkdir(parents=True)
+        (classes / "com" / "A.class").write_text("a")
+        command = Jacoco(logger, crossfit.refs.tools_dir).save_report(
+            [input_file], tmp_path / "report", None, ReportFormat.Xml, None, None, ("--classfiles", str(classes)))
+        executor.execute(command)
+        executor.execute(command)
+        (classes / "com" / "A.class").write_text("b")
+        executor.execute(command)
+
+        assert classes in command.inputs
+        assert inner.executions == 2
+
+    def test_file_hashes_are_bounded(self, executor, tmp_path, monkeypatch):
+        """Test that a rewritten file replaces its memoized hash and the least recently hashed are forgotten."""
+        monkeypatch.setattr(caching_executor, "_MAX_FILE_HASHES", 2)
+        path = tmp_path / "input.exec"
+        for content in ("a", "bb", "ccc"):
+            path.write_text(content)
+            executor._file_hash(str(path))
+        assert len(executor._file_hashes) == 1
+        for index in range(3):
+            (tmp_path / f"{index}.exec").write_text(str(index))
+            executor._file_hash(str(tmp_path / f"{index}.exec"))
+        assert list(executor._file_hashes) == [str(tmp_path / "1.exec"), str(tmp_path / "2.exec")]
+
+    def test_failed_results_are_not_cached(self, logger, input_file, tmp_path):
+        """Test that failures are executed again."""
+        inner = CountingExecutor(logger, code=2)
+        executor = CachingExecutor(logger, inner, tmp_path / "cache")
+        for _ in range(2):
+            assert executor.execute(_command([input_file], tmp_path / "merged.exec")).code == 2
+
+        assert inner.executions == 2
+        assert executor.statistics.stores == 0
+
+    def test_commands_without_outputs_are_not_cached(self, executor, inner, input_file):
+        """Test that commands not declaring their outputs always run."""
+        cmd = _command([input_file], Path("unused"))
+        cmd.outputs = []
+        executor.execute(cmd)
+        executor.execute(cmd)
+
+        assert inner.executions == 2
+        assert executor.statistics.misses == 0
+
+    def test_lru_eviction(self, logger, inner, tmp_path):
+        """Test that the least recently used entries are evicted beyond the cache size."""
+        executor = CachingExecutor(logger, inner, tmp_path / "cache", max_size=2000)
+        inputs = []
+        for index in range(3):
+            path = tmp_path / f"input-{index}.exec"
+            path.write_text(str(index) * 800)
+            inputs.append(path)
+        executor.execute(_command([inputs[0]], tmp_path / "0.out"))
+        executor.execute(_command([inputs[1]], tmp_path / "1.out"))
+        executor.execute(_command([inputs[0]], tmp_path / "0.out"))
+        executor.execute(_command([inputs[2]], tmp_path / "2.out"))
+
+        statistics = executor.statistics
+        assert statistics.evictions == 1
+        assert statistics.size <= 2000
+        executor.execute(_command([inputs[0]], tmp_path / "0.out"))
+        assert inner.executions == 3
+
+    def test_cache_persists_between_executors(self, logger, inner, input_file, tmp_path):
+        """Test that entries are found again by a new executor on the same cache directory."""
+        output = tmp_path / "merged.exec"
+        CachingExecutor(logger, inner, tmp_path / "cache").execute(_command([input_file], output))
+        output.unlink()
+        executor = CachingExecutor(logger, inner, tmp_path / "cache")
+        executor.execute(_command([input_file], output))
+
+        assert inner.executions == 1
+        assert executor.statistics.entries == 1
+        assert output.exists()
+
+    def test_clear(self, executor, inner, input_file, tmp_path):
+        """Test that cleared entries are executed again."""
+        executor.execute(_command([input_file], tmp_path / "merged.exec"))
+        executor.clear()
+        executor.execute(_command([input_file], tmp_path / "merged.exec"))
+
+        assert inner.executions == 2
+
+    def test_invalid_size_raises(self, logger, inner, tmp_path):
+        """Test that a non-positive cache size is rejected."""
+        with pytest.raises(ValueError):
+            CachingExecutor(logger, inner, tmp_path, max_size=0)
+
+    def test_native_merge_is_cached(self, logger, tmp_path):
+        """Test that merge commands built by a tool declare their inputs and outputs."""
+        dump = tmp_path / "dump.exec"
+        dump.write_bytes(b"\x01\xc0\xc0\x10\x07")
+        tool = Jacoco(logger, crossfit.refs.tools_dir, native_merge=True)
+        command = tool.merge_coverage([dump], tmp_path / "out", Path("merged.exec"))
+        executor = CachingExecutor(logger, LocalExecutor(logger), tmp_path / "cache")
+        executor.execute(command)
+        (tmp_path / "out" / "merged.exec").unlink()
+        result = executor.execute(command)
+
+        assert result.code == 0
+        assert executor.statistics.hits == 1
+        assert (tmp_path / "out" / "merged.exec").read_bytes() == dump.read_bytes()
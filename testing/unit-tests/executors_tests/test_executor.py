@@ -3,7 +3,8 @@ import pytest
 
 from crossfit.commands.command import Command
 from crossfit.executors.executor import Executor
-from crossfit.models.command_models import CommandResult
+from crossfit.models.command_models import CommandResult, ResultChain
+from crossfit.models.executor_models import BatchPolicy
 
 
 class ConcreteExecutor(Executor):
@@ -178,6 +179,51 @@ class TestExecuteChain:
         assert "out2" in result.output
         assert "out3" in result.output
 
+    def test_execute_chain_keeps_failure_code(self, chained_commands, logger):
+        """Test that a command failing after successful ones decides the code of the chain."""
+        results = [
+            CommandResult(code=0, command="cmd1 arg1", output="out1", error=""),
+            CommandResult(code=3, command="cmd2 arg2", output="", error="cmd2 failed"),
+        ]
+        executor = ConcreteExecutor(logger=logger, results=results)
+        result = executor.execute(chained_commands[0])
+
+        assert len(executor._executed_commands) == 2
+        assert result.code == 3
+        assert result.command == "cmd1 arg1 && cmd2 arg2"
+        assert result.error == "\ncmd2 failed"
+
+
+class TestResultChain:
+    """Tests for aggregating the results of chained commands."""
+
+    def test_chain_joins_results_when_read(self):
+        """Test that the chain joins the commands, outputs and errors of its results and keeps the last target."""
+        chain = ResultChain(CommandResult(code=0, command="a", output="out a", target="t1"))
+        chain.add_result(CommandResult(code=0, command="b", output="out b", error="warn"))
+
+        assert len(chain) == 2
+        assert (chain.code, chain.command, chain.output, chain.error, chain.target) == (0, "a && b", "out a\nout b",
+                                                                                        "\nwarn", "t1")
+        assert [result.command for result in chain] == ["a", "b"]
+
+    def test_chain_code_is_first_failure(self):
+        """Test that the first failed result decides the code, unlike a bitwise and of the codes."""
+        chain = ResultChain(CommandResult(code=0, command="a"), CommandResult(code=125, command="b"),
+                            CommandResult(code=1, command="c"))
+        assert chain.code == 125
+        assert (CommandResult(code=0, command="a") + CommandResult(code=2, command="b")).code == 2
+
+    def test_to_result_exports_command_result(self):
+        """Test that the chain exports to the CommandResult shape, returning a single result as it is."""
+        single = CommandResult(code=0, command="a")
+        assert ResultChain(single).to_result() is single
+
+        result = ResultChain(single, CommandResult(code=1, command="b", error="e")).to_result()
+        assert isinstance(result, CommandResult)
+        assert result.model_dump() == {"code": 1, "command": "a && b", "output": "\n", "target": "", "error": "\ne"}
+        assert CommandResult.model_validate_json(result.model_dump_json()) == result
+
 
 class TestExecuteEdgeCases:
     """Tests for edge cases in command execution."""
@@ -230,3 +276,64 @@ class TestExecuteEdgeCases:
 
         assert len(executor._executed_commands) == 1
         assert result.code == 255
+
+
+class TestExecutorBatch:
+    """Tests for the sequential execute_batch of the base Executor."""
+
+    @staticmethod
+    def _commands(count: int) -> list[Command]:
+        commands = []
+        for index in range(count):
+            cmd = Command()
+            cmd.execution_call = f"cmd{index}"
+            commands.append(cmd)
+        return commands
+
+    def test_batch_runs_commands_in_order(self, logger):
+        """Test that every command is executed and results keep the command order."""
+        executor = ConcreteExecutor(logger=logger)
+        batch = executor.execute_batch(self._commands(3))
+
+        assert [index for index, _ in batch] == [0, 1, 2]
+        assert batch.summary.total == 3
+        assert batch.summary.succeeded == 3
+
+    def test_batch_is_lazy(self, logger):
+        """Test that commands only run while the batch is consumed."""
+        executor = ConcreteExecutor(logger=logger)
+        batch = executor.execute_batch(self._commands(2))
+
+        assert executor._executed_commands == []
+        assert batch.summary is None
+        batch.results()
+        assert len(executor._executed_commands) == 2
+
+    def test_batch_collect_all_continues_after_failure(self, logger, failure_result):
+        """Test that the CollectAll policy executes every command."""
+        executor = ConcreteExecutor(logger=logger, results=[failure_result])
+        batch = executor.execute_batch(self._commands(3))
+        results = batch.results()
+
+        assert [result.code for result in results] == [1, 0, 0]
+        assert batch.summary.failed == 1
+        assert batch.summary.skipped == 0
+
+    def test_batch_fail_fast_skips_remaining(self, logger, failure_result):
+        """Test that the FailFast policy stops after the first failed command."""
+        executor = ConcreteExecutor(logger=logger, results=[failure_result])
+        batch = executor.execute_batch(self._commands(3), policy=BatchPolicy.FailFast)
+        results = batch.results()
+
+        assert results[0].code == 1
+        assert results[1:] == [None, None]
+        assert batch.summary.skipped == 2
+
+    def test_batch_keeps_chain_semantics(self, logger, chained_commands, failure_result):
+        """Test that every batch entry executes its own command chain."""
+        executor = ConcreteExecutor(logger=logger, results=[failure_result])
+        batch = executor.execute_batch([chained_commands[0], *self._commands(1)])
+        batch.results()
+
+        assert executor._executed_commands == [chained_commands[0], executor._executed_commands[1]]
+        assert executor._executed_commands[1].execution_call == "cmd0"
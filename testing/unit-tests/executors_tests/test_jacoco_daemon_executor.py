@@ -0,0 +1,151 @@
+# test_jacoco_daemon_executor.py
+import subprocess
+import sys
+import pytest
+
+from crossfit.commands.command import Command
+from crossfit.executors.executor import TIMED_OUT_CODE
+from crossfit.executors.jacoco_daemon_executor import JacocoDaemon, JacocoDaemonExecutor
+from crossfit.models.command_models import ArgFileStyle
+
+FAKE_DAEMON = r'''
+import os
+import struct
+import sys
+import time
+
+stdin, stdout = sys.stdin.buffer, sys.stdout.buffer
+
+
+def read_int():
+    data = stdin.read(4)
+    if len(data) < 4:
+        sys.exit(0)
+    return struct.unpack(">i", data)[0]
+
+
+def write_bytes(value):
+    stdout.write(struct.pack(">i", len(value)) + value)
+
+
+while True:
+    argc = read_int()
+    if argc < 0:
+        sys.exit(0)
+    args = [stdin.read(read_int()).decode("utf-8") for _ in range(argc)]
+    if args and args[0] == "crash":
+        sys.exit(3)
+    if args and args[0] == "hang":
+        time.sleep(30)
+    code = 2 if args and args[0] == "fail" else 0
+    stdout.write(struct.pack(">i", code))
+    write_bytes(f"{os.getpid()}|{'|'.join(args)}".encode("utf-8"))
+    write_bytes(b"failed" if code else b"")
+    stdout.flush()
+'''
+
+
+@pytest.fixture
+def fake_daemon(tmp_path, monkeypatch):
+    """Replaces the JVM launch with a python process speaking the daemon protocol."""
+    script = tmp_path / "fake_daemon.py"
+    script.write_text(FAKE_DAEMON)
+    monkeypatch.setattr(JacocoDaemon, "launch_args", property(lambda self: [sys.executable, str(script)]))
+    return script
+
+
+@pytest.fixture
+def executor(logger, fake_daemon):
+    with JacocoDaemonExecutor(logger=logger, catch=True) as daemon_executor:
+        yield daemon_executor
+
+
+def _jacoco_command(*body: str) -> Command:
+    cmd = Command()
+    cmd.execution_call = "java -jar tools/jacococli.jar"
+    cmd.command_to_execute = body[0]
+    cmd.command_body = list(body[1:])
+    return cmd
+
+
+class TestJacocoDaemonExecutor:
+    """Tests for running jacococli commands through the daemon."""
+
+    def test_jacoco_command_runs_in_daemon(self, executor):
+        """Test that jacococli arguments are forwarded to the daemon."""
+        result = executor.execute(_jacoco_command("merge", "--destfile", "out/merged.exec", "a.exec"))
+
+        assert result.code == 0
+        assert result.output.split("|", 1)[1] == "merge|--destfile|out/merged.exec|a.exec"
+
+    def test_daemon_is_reused_between_commands(self, executor):
+        """Test that consecutive commands are served by the same process."""
+        first = executor.execute(_jacoco_command("dump"))
+        second = executor.execute(_jacoco_command("dump"))
+
+        assert first.output.split("|")[0] == second.output.split("|")[0]
+
+    def test_daemon_failure_code_is_returned(self, executor):
+        """Test that a failing jacococli command yields its exit code and error."""
+        result = executor.execute(_jacoco_command("fail"))
+
+        assert result.code == 2
+        assert "failed" in result.error
+
+    def test_daemon_crash_is_reported_and_restarted(self, executor):
+        """Test that a crashed daemon is reported and replaced on the next command."""
+        crashed = executor.execute(_jacoco_command("crash"))
+        recovered = executor.execute(_jacoco_command("dump"))
+
+        assert crashed.code == 1
+        assert "exited unexpectedly" in crashed.error
+        assert recovered.code == 0
+
+    def test_hung_daemon_command_times_out(self, executor):
+        """Test that a command stuck in the daemon times out and the daemon is replaced."""
+        hung = _jacoco_command("hang")
+        hung.timeout = 0.3
+        timed_out = executor.execute(hung)
+        recovered = executor.execute(_jacoco_command("dump"))
+
+        assert timed_out.code == TIMED_OUT_CODE
+        assert recovered.code == 0
+
+    def test_long_arguments_are_not_spilled(self, logger, fake_daemon):
+        """Test that jacococli arguments reach the daemon inline even beyond the response file threshold."""
+        files = [f"dump-{index}.exec" for index in range(100)]
+        cmd = _jacoco_command("merge", *files)
+        cmd.argfile_style = ArgFileStyle.Java
+        with JacocoDaemonExecutor(logger=logger, argfile_threshold=64) as daemon_executor:
+            result = daemon_executor.execute(cmd)
+
+        assert result.code == 0
+        assert result.output.split("|")[2:] == files
+
+    def test_non_jacoco_command_runs_locally(self, executor, monkeypatch):
+        """Test that other commands are executed through subprocess.run."""
+        received = {}
+
+        def mock_run(cmd, **kwargs):
+            received["cmd"] = cmd
+            return subprocess.CompletedProcess(cmd, returncode=0, stdout="local", stderr="")
+
+        monkeypatch.setattr(subprocess, "run", mock_run)
+        cmd = Command()
+        cmd.execution_call = "echo"
+        cmd.command_to_execute = "hello"
+        result = executor.execute(cmd)
+
+        assert received["cmd"] == ["echo", "hello"]
+        assert result.output == "local"
+
+    def test_close_stops_daemons(self, logger, fake_daemon):
+        """Test that closing the executor shuts its daemons down."""
+        daemon_executor = JacocoDaemonExecutor(logger=logger)
+        daemon_executor.execute(_jacoco_command("dump"))
+        daemons = list(daemon_executor._daemons.values())
+
+        daemon_executor.close()
+
+        assert daemons and not any(daemon.alive for daemon in daemons)
+        assert daemon_executor._daemons == {}
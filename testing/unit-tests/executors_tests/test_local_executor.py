@@ -1,9 +1,16 @@
 # test_local_executor.py
+import os
 import subprocess
+import sys
+import tempfile
+import threading
+import time
 import pytest
 from crossfit.commands.command import Command
+from crossfit.executors.executor import CancellationToken, CANCELLED_CODE, TIMED_OUT_CODE
 from crossfit.executors.local_executor import LocalExecutor
-from crossfit.models.command_models import CommandResult
+from crossfit.models.command_models import ArgFileStyle, CommandResult, SpooledOutput
+from crossfit.models.executor_models import BatchPolicy
 
 
 @pytest.fixture
@@ -324,13 +331,7 @@ class TestLocalExecutorChaining:
         assert result.code == 1
 
     def test_execute_chained_commands_second_fails(self, executor, monkeypatch):
-        """Test chain behavior when second command fails.
-
-        Note: Due to the CommandResult.__add__ using bitwise AND for codes,
-        when the first succeeds (code=0) and second fails (code=1), the combined
-        code becomes 0 & 1 = 0. This causes the chain to continue executing.
-        This test documents the current behavior.
-        """
+        """Test that the chain stops after the second command fails, keeping its code."""
         cmd1 = Command()
         cmd1.execution_call = "cmd1"
         cmd1.command_to_execute = "arg1"
@@ -355,11 +356,12 @@ class TestLocalExecutorChaining:
             return subprocess.CompletedProcess(cmd, returncode=0, stdout=f"output{call_count['count']}", stderr="")
 
         monkeypatch.setattr(subprocess, "run", mock_run)
-        executor.execute(cmd1)
+        result = executor.execute(cmd1)
 
-        # Due to bitwise AND in CommandResult.__add__, all commands are executed
-        # because 0 & 1 = 0, so result.code stays 0 after second command
-        assert call_count["count"] == 3  # All commands executed due to current implementation
+        # Third command should not be executed
+        assert call_count["count"] == 2
+        assert result.code == 1
+        assert result.command.count(" && ") == 1
 
 
 class TestLocalExecutorKwargs:
@@ -387,3 +389,278 @@ class TestLocalExecutorKwargs:
         assert received_kwargs["capture_output"] is True
         assert received_kwargs["check"] is True
         assert received_kwargs["text"] is True
+
+
+class TestLocalExecutorBatch:
+    """Tests for the thread-pool execute_batch of LocalExecutor."""
+
+    @staticmethod
+    def _sleep_command(seconds: float, code: int = 0) -> Command:
+        cmd = Command()
+        cmd.execution_call = sys.executable
+        cmd.command_to_execute = "-c"
+        cmd.command_body = [f"import sys, time; time.sleep({seconds}); sys.exit({code})"]
+        return cmd
+
+    def test_batch_runs_concurrently(self, executor):
+        """Test that commands overlap and the summary reports wall-clock time below the summed durations."""
+        batch = executor.execute_batch([self._sleep_command(0.4) for _ in range(4)], max_workers=4)
+        results = batch.results()
+
+        assert all(result.code == 0 for result in results)
+        assert batch.summary.succeeded == 4
+        assert batch.summary.wall_time < 1.2
+        assert batch.summary.cpu_time >= 0
+
+    def test_batch_yields_in_completion_order(self, executor):
+        """Test that faster commands are yielded first."""
+        batch = executor.execute_batch([self._sleep_command(0.6), self._sleep_command(0.0)], max_workers=2)
+        assert [index for index, _ in batch] == [1, 0]
+
+    def test_batch_summary_survives_results_after_iteration(self, executor, caplog):
+        """Test that iterating the batch and then calling results() keeps the summary of the iteration."""
+        batch = executor.execute_batch([self._sleep_command(0.3) for _ in range(2)], max_workers=2)
+        with caplog.at_level("INFO"):
+            for index, result in batch:
+                assert result.code == 0
+            summary = batch.summary
+            assert [result.code for result in batch.results()] == [0, 0]
+
+        assert batch.summary is summary and summary.wall_time >= 0.3
+        assert sum("Batch of 2 commands finished" in record.getMessage() for record in caplog.records) == 1
+
+    def test_batch_timed_from_first_pull(self, executor):
+        """Test that a batch resumed after a partial iteration is timed from its first result pull."""
+        batch = executor.execute_batch([self._sleep_command(0.3), self._sleep_command(0.3)], max_workers=1)
+        for _ in batch:
+            break
+        batch.results()
+        assert batch.summary.succeeded == 2 and batch.summary.wall_time >= 0.6
+
+    def test_batch_fail_fast_cancels_pending(self, executor):
+        """Test that FailFast cancels commands which did not start yet - the one already picked up still runs."""
+        commands = [self._sleep_command(0.0, code=3), *[self._sleep_command(0.2) for _ in range(4)]]
+        batch = executor.execute_batch(commands, max_workers=1, policy=BatchPolicy.FailFast)
+        results = batch.results()
+
+        assert results[0].code == 3
+        assert batch.summary.failed == 1
+        assert batch.summary.skipped >= 3
+
+    def test_batch_collect_all(self, executor):
+        """Test that CollectAll executes every command despite failures."""
+        batch = executor.execute_batch([self._sleep_command(0.0, code=2), self._sleep_command(0.0)], max_workers=1)
+        assert [result.code for result in batch.results()] == [2, 0]
+
+
+class TestLocalExecutorStreaming:
+    """Tests for streaming output capture with disk spooling."""
+
+    @staticmethod
+    def _python_command(code: str) -> Command:
+        cmd = Command()
+        cmd.execution_call = sys.executable
+        cmd.command_to_execute = "-c"
+        cmd.command_body = [code]
+        return cmd
+
+    def test_lines_are_forwarded_to_logger(self, logger, caplog):
+        """Test that every output line is logged as it is read."""
+        executor = LocalExecutor(logger=logger, stream_output=True)
+        with caplog.at_level("INFO"):
+            result = executor.execute(self._python_command("print('first'); print('second')"))
+
+        assert result.code == 0
+        messages = [record.getMessage() for record in caplog.records]
+        assert "first" in messages and "second" in messages
+
+    def test_small_output_stays_in_memory(self, logger):
+        """Test that output below the spool size is not written to disk."""
+        executor = LocalExecutor(logger=logger, stream_output=True)
+        result = executor.execute(self._python_command("print('hello')"))
+
+        assert isinstance(result.output, SpooledOutput)
+        assert not result.output.spooled
+        assert result.output == "hello\n"
+
+    def test_large_output_is_spooled(self, logger):
+        """Test that output beyond the spool size is moved to a temporary file and still fully readable."""
+        executor = LocalExecutor(logger=logger, stream_output=True, spool_size=1000)
+        result = executor.execute(self._python_command("for i in range(500): print(f'line {i}')"))
+
+        assert result.output.spooled
+        lines = result.output.read().splitlines()
+        assert len(lines) == 500
+        assert lines[-1] == "line 499"
+
+    def test_streamed_stderr_fails_command(self, logger):
+        """Test that streamed stderr output is reported as the error, like captured output is."""
+        executor = LocalExecutor(logger=logger, stream_output=True)
+        result = executor.execute(self._python_command("import sys; sys.stderr.write('boom\\n')"))
+
+        assert result.code == 0
+        assert "boom" in result.error
+
+    def test_streamed_chain_joins_outputs(self, logger):
+        """Test that chained streamed outputs are joined into a single handle."""
+        executor = LocalExecutor(logger=logger, stream_output=True, spool_size=10)
+        first = self._python_command("print('first output')")
+        first.next_command = self._python_command("print('second output')")
+        result = executor.execute(first)
+
+        assert isinstance(result.output, SpooledOutput)
+        assert result.output.read() == "first output\n\nsecond output\n"
+        assert result.model_dump()["output"] == "first output\n\nsecond output\n"
+
+
+class TestLocalExecutorTimeouts:
+    """Tests for command and chain timeouts, cancellation and process group kill."""
+
+    @staticmethod
+    def _python_command(code: str, timeout: float = None) -> Command:
+        cmd = Command()
+        cmd.execution_call = sys.executable
+        cmd.command_to_execute = "-c"
+        cmd.command_body = [code]
+        cmd.timeout = timeout
+        return cmd
+
+    def test_command_timeout(self, executor):
+        """Test that a command running past its timeout is killed and reported with a distinct code."""
+        start = time.monotonic()
+        result = executor.execute(self._python_command("import time; time.sleep(10)", timeout=0.3))
+
+        assert result.code == TIMED_OUT_CODE
+        assert "timed out" in result.error
+        assert time.monotonic() - start < 5
+
+    def test_timeout_keeps_partial_output(self, executor):
+        """Test that output written before the timeout is kept."""
+        result = executor.execute(self._python_command(
+            "import sys, time; print('started', flush=True); time.sleep(10)", timeout=0.5))
+
+        assert result.code == TIMED_OUT_CODE
+        assert "started" in result.output
+
+    @pytest.mark.skipif(os.name != "posix", reason="Process groups are a POSIX feature")
+    def test_timeout_kills_process_group(self, executor, tmp_path):
+        """Test that processes started by the command are killed along with it."""
+        pid_file = tmp_path / "child.pid"
+        code = (f"import subprocess, sys, time; "
+                f"child = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)']); "
+                f"open({str(pid_file)!r}, 'w').write(str(child.pid)); time.sleep(30)")
+        result = executor.execute(self._python_command(code, timeout=1))
+
+        assert result.code == TIMED_OUT_CODE
+        child_pid = int(pid_file.read_text())
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            try:
+                os.kill(child_pid, 0)
+            except ProcessLookupError:
+                break
+            time.sleep(0.05)
+        else:
+            pytest.fail("Child process survived the timeout")
+
+    def test_chain_timeout(self, executor, tmp_path):
+        """Test that the chain timeout limits the commands together."""
+        marker = tmp_path / "third"
+        first = self._python_command("import time; time.sleep(0.4)")
+        first.next_command = self._python_command("import time; time.sleep(10)")
+        first.next_command.next_command = self._python_command(f"open({str(marker)!r}, 'w')")
+        result = executor.execute(first, timeout=1)
+
+        assert result.code == TIMED_OUT_CODE
+        assert "timed out" in result.error
+        assert not marker.exists()
+
+    def test_cancel_from_other_thread(self, executor):
+        """Test that cancelling the token kills the running command."""
+        token = CancellationToken()
+        threading.Timer(0.3, token.cancel).start()
+        start = time.monotonic()
+        result = executor.execute(self._python_command("import time; time.sleep(10)"), cancel_token=token)
+
+        assert result.code == CANCELLED_CODE
+        assert time.monotonic() - start < 5
+
+    def test_cancelled_token_skips_commands(self, executor, tmp_path):
+        """Test that no command starts once the token is cancelled."""
+        marker = tmp_path / "ran"
+        token = CancellationToken()
+        token.cancel()
+        result = executor.execute(self._python_command(f"open({str(marker)!r}, 'w')"), cancel_token=token)
+
+        assert result.code == CANCELLED_CODE
+        assert not marker.exists()
+
+    def test_timeout_no_catch_raises(self, executor_no_catch):
+        """Test that timeouts are raised when catch is disabled."""
+        with pytest.raises(subprocess.TimeoutExpired):
+            executor_no_catch.execute(self._python_command("import time; time.sleep(10)", timeout=0.2))
+
+    def test_batch_cancellation(self, executor):
+        """Test that a batch shares the cancellation token between its command chains."""
+        token = CancellationToken()
+        threading.Timer(0.3, token.cancel).start()
+        commands = [self._python_command("import time; time.sleep(10)") for _ in range(3)]
+        results = executor.execute_batch(commands, max_workers=3, cancel_token=token).results()
+
+        assert [result.code for result in results] == [CANCELLED_CODE] * 3
+
+
+class TestLocalExecutorArgv:
+    """Tests for passing the command's argument vector directly to the process."""
+
+    def test_arguments_with_spaces_and_quotes(self, executor):
+        """Test that arguments reach the process exactly as given."""
+        cmd = Command()
+        cmd.execution_call = sys.executable
+        cmd.command_to_execute = "-c"
+        cmd.command_body = ["import sys; print(sys.argv[1:])", "my dir/file.exec", 'say "hi"', "it's"]
+        result = executor.execute(cmd)
+
+        assert result.code == 0
+        assert result.output.strip() == repr(["my dir/file.exec", 'say "hi"', "it's"])
+
+
+class TestLocalExecutorArgFile:
+    """Tests for passing long argument lists through response files."""
+
+    @staticmethod
+    def _argparse_command(arguments: list[str]) -> Command:
+        cmd = Command()
+        cmd.execution_args = [sys.executable, "-c",
+                              "import argparse; parser = argparse.ArgumentParser(fromfile_prefix_chars='@'); "
+                              "parser.add_argument('files', nargs='*'); import sys; "
+                              "print(len(parser.parse_args().files), sys.argv[-1].startswith('@'))"]
+        cmd.command_body = arguments
+        cmd.argfile_style = ArgFileStyle.Argparse
+        return cmd
+
+    def test_long_arguments_are_spilled(self, logger, tmp_path):
+        """Test that arguments beyond the threshold are passed through a removed response file."""
+        tempfile.tempdir, previous = str(tmp_path), tempfile.tempdir
+        try:
+            result = LocalExecutor(logger, argfile_threshold=1024).execute(
+                self._argparse_command([f"dump {index}.exec" for index in range(500)]))
+        finally:
+            tempfile.tempdir = previous
+
+        assert result.code == 0
+        assert result.output.split() == ["500", "True"]
+        assert not list(tmp_path.iterdir())
+
+    def test_short_arguments_stay_inline(self, logger):
+        """Test that arguments within the threshold are passed on the command line."""
+        result = LocalExecutor(logger, argfile_threshold=1024).execute(self._argparse_command(["a.exec", "b.exec"]))
+
+        assert result.output.split() == ["2", "False"]
+
+    def test_spilling_disabled(self, logger):
+        """Test that no response file is used when the threshold is None."""
+        result = LocalExecutor(logger, argfile_threshold=None).execute(
+            self._argparse_command([f"dump-{index}.exec" for index in range(500)]))
+
+        assert result.output.split() == ["500", "False"]
@@ -0,0 +1,137 @@
+# test_coverage_index.py
+import pytest
+
+from crossfit import CoverageIndex
+from crossfit.tools.jacoco_exec import ExecFileLoader
+from crossfit.tools.probe_store import ExecutionData
+
+JACOCO_REPORT = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<!DOCTYPE report PUBLIC "-//JACOCO//DTD Report 1.1//EN" "report.dtd">
+<report name="app">
+  <sessioninfo id="s" start="1" dump="2"/>
+  <package name="com/example">
+    <class name="com/example/A" sourcefilename="A.java">
+      <method name="run" desc="()V" line="3"><counter type="LINE" missed="1" covered="1"/></method>
+    </class>
+    <sourcefile name="A.java">
+      <line nr="3" mi="0" ci="4" mb="1" cb="1"/>
+      <line nr="4" mi="2" ci="0" mb="0" cb="0"/>
+    </sourcefile>
+  </package>
+</report>
+"""
+
+
+def _cobertura(covered: int, total: int = 4) -> str:
+    lines = "".join(f'<line number="{number}" hits="{int(number <= covered)}"/>' for number in range(1, total + 1))
+    return ('<?xml version="1.0"?><coverage version="1" timestamp="0"><packages>'
+            '<package name="App"><classes><class name="App.Service" filename="src/Service.cs">'
+            f'<lines>{lines}</lines></class></classes></package>'
+            '<package name="App.Data"><classes><class name="App.Data.Repo" filename="src/Repo.cs">'
+            '<lines><line number="1" hits="3" branch="true" condition-coverage="50% (1/2)"/></lines>'
+            '</class></classes></package></packages></coverage>')
+
+
+@pytest.fixture
+def index(tmp_path):
+    with CoverageIndex(tmp_path / "coverage.db") as coverage_index:
+        yield coverage_index
+
+
+class TestCoverageIndex:
+    """Tests for indexing coverage reports and querying them."""
+
+    def test_cobertura_coverage_by_package_and_file(self, index, tmp_path):
+        """Test that Cobertura totals are answered per build, package and file."""
+        report = tmp_path / "build-1.xml"
+        report.write_text(_cobertura(covered=3))
+        assert index.ingest(report, "build-1") == 2
+
+        totals = index.coverage("build-1")
+        assert (totals.lines_valid, totals.lines_covered, totals.branches_valid, totals.branches_covered) == (5, 4, 2, 1)
+        assert index.coverage("build-1", package="App").line_rate == 0.75
+        assert index.coverage("build-1", filename="src/Repo.cs").branch_rate == 0.5
+        assert list(index.packages("build-1")) == ["App", "App.Data"]
+        assert index.lines("build-1", "src/Service.cs") == {1: 1, 2: 1, 3: 1, 4: 0}
+        assert index.coverage("unknown").lines_valid == 0
+
+    def test_trend_over_builds(self, index, tmp_path):
+        """Test that trends list the most recent builds oldest first, with empty builds counted as zero."""
+        for build in range(1, 5):
+            report = tmp_path / f"build-{build}.xml"
+            report.write_text(_cobertura(covered=build))
+            index.ingest(report, f"build-{build}", timestamp=build)
+
+        trend = index.trend(package="App", last=3)
+        assert [totals.build for totals in trend] == ["build-2", "build-3", "build-4"]
+        assert [totals.lines_covered for totals in trend] == [2, 3, 4]
+        assert [totals.lines_valid for totals in index.trend(package="Other")] == [0, 0, 0, 0]
+
+    def test_partial_files_of_a_build_are_merged(self, index, tmp_path):
+        """Test that classes ingested twice into a build count their lines once, with hits and probes merged."""
+        for covered in (1, 3):
+            report = tmp_path / f"part-{covered}.xml"
+            report.write_text(_cobertura(covered=covered))
+            index.ingest(report, "b")
+        for probes in (0b0011, 0b0110):
+            dump = tmp_path / f"part-{probes}.exec"
+            loader = ExecFileLoader()
+            loader.store.put(ExecutionData(42, "com/example/A", 4, probes))
+            loader.save(dump, append=False)
+            index.ingest(dump, "b")
+
+        totals = index.coverage("b")
+        assert (totals.lines_valid, totals.lines_covered, totals.branches_valid, totals.branches_covered) == (5, 4, 2, 1)
+        assert totals.line_rate == 0.8
+        assert (totals.probes_valid, totals.probes_covered) == (4, 3)
+        assert index.lines("b", "src/Service.cs") == {1: 2, 2: 1, 3: 1, 4: 0}
+        assert index.trend(package="App")[0].lines_covered == 3
+
+    def test_jacoco_report_and_exec(self, index, tmp_path):
+        """Test that JaCoCo XML reports index source file lines and .exec files index class probes."""
+        report = tmp_path / "jacoco.xml"
+        report.write_text(JACOCO_REPORT)
+        dump = tmp_path / "jacoco.exec"
+        loader = ExecFileLoader()
+        loader.store.put(ExecutionData(42, "com/example/A", 4, 0b0111))
+        loader.save(dump, append=False)
+
+        index.ingest(report, "build-1")
+        index.ingest(dump, "build-1")
+
+        totals = index.coverage("build-1", package="com/example")
+        assert (totals.lines_valid, totals.lines_covered, totals.branches_valid, totals.branches_covered) == (2, 1, 2, 1)
+        assert (totals.probes_valid, totals.probes_covered) == (4, 3)
+        assert index.lines("build-1", "com/example/A.java") == {3: 4, 4: 0}
+
+    def test_remove_build(self, index, tmp_path):
+        """Test that removing a build removes its coverage."""
+        report = tmp_path / "build.xml"
+        report.write_text(_cobertura(covered=1))
+        index.ingest(report, "build-1")
+
+        assert index.remove_build("build-1")
+        assert index.builds() == []
+        assert index.coverage("build-1").lines_valid == 0
+        assert not index.remove_build("build-1")
+
+    def test_invalid_report_is_rolled_back(self, index, tmp_path):
+        """Test that a file which cannot be parsed leaves no build behind."""
+        report = tmp_path / "broken.xml"
+        report.write_text("<html></html>")
+        with pytest.raises(ValueError):
+            index.ingest(report, "build-1")
+        assert index.builds() == []
+
+    def test_large_report_ingestion(self, index, tmp_path):
+        """Test that a report with many lines is ingested and queried as a whole."""
+        report = tmp_path / "large.xml"
+        with open(report, "w") as stream:
+            stream.write('<?xml version="1.0"?><coverage><packages><package name="P"><classes>')
+            for number in range(200):
+                lines = "".join(f'<line number="{line}" hits="{line % 2}"/>' for line in range(250))
+                stream.write(f'<class name="C{number}" filename="C{number}.cs"><lines>{lines}</lines></class>')
+            stream.write("</classes></package></packages></coverage>")
+
+        assert index.ingest(report, "build-1") == 200
+        assert index.coverage("build-1", package="P").lines_covered == 200 * 125
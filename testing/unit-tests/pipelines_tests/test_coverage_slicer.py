@@ -0,0 +1,196 @@
+# test_coverage_slicer.py
+import socket
+import struct
+import threading
+import pytest
+
+import crossfit
+from crossfit import CoverageSlicer, DotnetCoverage, Jacoco, LocalExecutor
+from crossfit.models.command_models import CommandResult
+from crossfit.tools.jacoco_agent import AgentClient
+from crossfit.tools.jacoco_exec import ExecFileLoader
+from crossfit.tools.probe_store import ExecutionData
+from crossfit.tools.slice_store import SliceStore, exec_units, read_units
+
+HEADER = b"\x01\xc0\xc0\x10\x07"
+
+COBERTURA = """<?xml version="1.0" encoding="UTF-8"?>
+<coverage version="1" timestamp="0">
+  <packages>
+    <package name="App">
+      <classes>
+        <class name="App.Service" filename="src/Service.cs">
+          <lines>
+            <line number="3" hits="{hits}"/>
+            <line number="7" hits="2"/>
+          </lines>
+        </class>
+      </classes>
+    </package>
+  </packages>
+</coverage>
+"""
+
+
+class SlicingAgent:
+    """JaCoCo agent in tcpserver mode - answers every dump with the next probes of a fixed sequence."""
+
+    def __init__(self, probes: list[int]):
+        self.commands: list[tuple[bool, bool]] = []
+        self._probes = list(probes)
+        self._server = socket.create_server(("127.0.0.1", 0))
+        self.port = self._server.getsockname()[1]
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self):
+        while True:
+            try:
+                connection, _ = self._server.accept()
+            except OSError:
+                return
+            with connection, connection.makefile("rwb") as stream:
+                stream.write(HEADER)
+                stream.flush()
+                stream.read(5)
+                _, dump, reset = stream.read(3)
+                self.commands.append((bool(dump), bool(reset)))
+                if dump:
+                    name = b"com/example/A"
+                    stream.write(b"\x11" + struct.pack(">q", 42) + struct.pack(">H", len(name)) + name
+                                 + bytes([8, self._probes.pop(0)]))
+                stream.write(b"\x20")
+                stream.flush()
+
+    def close(self):
+        self._server.close()
+
+
+class TestSliceStore:
+    """Tests for storing and querying per-test coverage slices."""
+
+    def test_queries_by_unit_and_index(self):
+        """Test that tests are found by the units and the bits they hit."""
+        store = SliceStore()
+        store.add("test_a", {"com/example/A": 0b011, "com/example/B": 0b1})
+        store.add("test_b", {"com/example/A": 0b100})
+
+        assert store.tests_hitting("com/example/A") == ["test_a", "test_b"]
+        assert store.tests_hitting("com/example/A", 2) == ["test_b"]
+        assert store.tests_hitting("com/example/B") == ["test_a"]
+        assert store.tests_hitting("com/example/C") == []
+        assert store.get("test_a") == {"com/example/A": 0b011, "com/example/B": 0b1}
+
+    def test_identical_bit_sets_are_stored_once(self):
+        """Test that bit sets hit the same way by many tests are deduplicated."""
+        store = SliceStore()
+        for index in range(100):
+            store.add(f"test_{index}", {"com/example/A": 0b101, "com/example/B": 1 << (index % 2)})
+
+        assert len(store) == 100
+        assert store.vector_count == 3
+
+    def test_persisted_slices_are_reloaded(self, tmp_path):
+        """Test that slices appended to the store file are restored, including replaced slices."""
+        path = tmp_path / "slices.bin"
+        store = SliceStore(path)
+        store.add("test_a", {"com/example/A": 0b1})
+        store.add("test_b", {"com/example/A": 0b1, "com/example/B": 1 << 200})
+        store.add("test_a", {"com/example/B": 0b10})
+
+        reloaded = SliceStore(path)
+        assert reloaded.labels == ["test_b", "test_a"]
+        assert reloaded.get("test_b") == {"com/example/A": 0b1, "com/example/B": 1 << 200}
+        assert reloaded.tests_hitting("com/example/A") == ["test_b"]
+
+    def test_torn_frame_is_dropped(self, tmp_path):
+        """Test that a frame left half written is ignored on load and overwritten by the next slice."""
+        path = tmp_path / "slices.bin"
+        SliceStore(path).add("test_a", {"com/example/A": 0b1})
+        with open(path, "ab") as file:
+            file.write(b"\x00\x00\x01\x00partial")
+
+        store = SliceStore(path)
+        assert store.labels == ["test_a"]
+        store.add("test_b", {"com/example/A": 0b1})
+        assert SliceStore(path).labels == ["test_a", "test_b"]
+
+    def test_invalid_file_raises(self, tmp_path):
+        """Test that files which are not slice stores are rejected."""
+        path = tmp_path / "slices.bin"
+        path.write_bytes(b"not a store")
+        with pytest.raises(ValueError):
+            SliceStore(path)
+
+    def test_cobertura_units_are_lines(self, tmp_path):
+        """Test that Cobertura snapshots are sliced into the hit line numbers of each source file."""
+        path = tmp_path / "snapshot.xml"
+        path.write_text(COBERTURA.format(hits=0))
+        assert read_units(path) == {"src/Service.cs": 1 << 7}
+
+
+    def test_exec_units_of_classes_sharing_a_name(self):
+        """Test that the probes of classes with the same name and different ids are combined."""
+        loader = ExecFileLoader()
+        loader.store.put(ExecutionData(1, "com/example/A", 4, 0b0001))
+        loader.store.put(ExecutionData(2, "com/example/A", 4, 0b0100))
+        loader.store.put(ExecutionData(3, "com/example/B", 4, 0))
+        assert exec_units(loader) == {"com/example/A": 0b0101}
+
+class TestCoverageSlicer:
+    """Tests for recording per-test coverage slices around tests."""
+
+    def test_agent_client_slices(self, logger, tmp_path):
+        """Test that each test's slice is dumped and reset in a single agent command."""
+        agent = SlicingAgent([0b001, 0b110])
+        try:
+            slicer = CoverageSlicer(Jacoco(logger, crossfit.refs.tools_dir), LocalExecutor(logger), logger,
+                                    SliceStore(tmp_path / "slices.bin"), "session", tmp_path,
+                                    client=AgentClient("127.0.0.1", agent.port))
+            reset = slicer.reset()
+            assert (reset.code, reset.command) == (0, "agent reset")
+            with slicer.slice("test_a"):
+                pass
+            with slicer.slice("test_b"):
+                pass
+        finally:
+            agent.close()
+
+        assert agent.commands == [(False, True), (True, True), (True, True)]
+        assert slicer.recorded == 2
+        assert SliceStore(tmp_path / "slices.bin").tests_hitting("com/example/A", 1) == ["test_b"]
+
+    def test_snapshot_command_slices(self, logger, tmp_path):
+        """Test that tools without a client record slices through their snapshot command with --reset."""
+
+        class SnapshotExecutor(LocalExecutor):
+            def __init__(self):
+                super().__init__(logger)
+                self.commands = []
+
+            def execute(self, command, *args, **kwargs):
+                self.commands.append(command)
+                command.outputs[0].write_text(COBERTURA.format(hits=len(self.commands)))
+                return CommandResult(code=0, command=str(command))
+
+        executor = SnapshotExecutor()
+        slicer = CoverageSlicer(DotnetCoverage(logger, crossfit.refs.tools_dir), executor, logger, SliceStore(),
+                                "session", tmp_path / "work")
+        with slicer.slice("test_a"):
+            pass
+
+        assert "--reset" in executor.commands[0].command
+        assert slicer.store.get("test_a") == {"src/Service.cs": 1 << 3 | 1 << 7}
+        assert list((tmp_path / "work").iterdir()) == []
+
+    def test_failed_snapshot_records_nothing(self, logger, tmp_path):
+        """Test that a test whose snapshot failed gets no slice."""
+        with socket.create_server(("127.0.0.1", 0)) as placeholder:
+            port = placeholder.getsockname()[1]
+        slicer = CoverageSlicer(Jacoco(logger, crossfit.refs.tools_dir), LocalExecutor(logger), logger, SliceStore(),
+                                "session", tmp_path, client=AgentClient("127.0.0.1", port, retry_count=0))
+        with pytest.raises(RuntimeError):
+            with slicer.slice("test_a"):
+                raise RuntimeError("test failed")
+
+        assert slicer.failed == 1
+        assert "test_a" not in slicer.store
@@ -0,0 +1,207 @@
+# test_coverage_watcher.py
+import sys
+import time
+import pytest
+
+from pathlib import Path
+import crossfit
+from crossfit import CoverageWatcher, DotnetCoverage, Jacoco, LocalExecutor
+from crossfit.commands.command import Command
+from crossfit.pipelines import coverage_watcher
+from crossfit.tools.jacoco_exec import ExecFileLoader
+from crossfit.tools.probe_store import ExecutionData
+
+
+def _write_dump(path: Path, probes: int):
+    loader = ExecFileLoader()
+    loader.store.put(ExecutionData(42, "com/example/A", 4, probes))
+    partial = path.with_name(f".{path.name}.partial")
+    loader.save(partial, append=False)
+    partial.rename(path)
+
+
+def _wait_for(condition, timeout: float = 10) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def _probes(aggregate: Path) -> int:
+    loader = ExecFileLoader()
+    loader.load(aggregate)
+    return loader.store.get(42).probes
+
+
+@pytest.fixture
+def drop_dir(tmp_path) -> Path:
+    path = tmp_path / "drop"
+    path.mkdir()
+    return path
+
+
+@pytest.fixture
+def jacoco_tool(logger):
+    return Jacoco(logger, crossfit.refs.tools_dir)
+
+
+@pytest.mark.parametrize("use_inotify", [True, False], ids=["Inotify", "Polling"])
+class TestCoverageWatcher:
+    """Tests for continuously folding dropped coverage files into an aggregate."""
+
+    def test_arrivals_are_folded(self, logger, jacoco_tool, drop_dir, tmp_path, use_inotify):
+        """Test that files landing in the drop directory end up in the aggregate and are consumed."""
+        aggregate = tmp_path / "aggregate.exec"
+        watcher = CoverageWatcher(jacoco_tool, LocalExecutor(logger), logger, drop_dir, aggregate,
+                                  debounce=0.1, poll_interval=0.1, use_inotify=use_inotify)
+        with watcher:
+            _write_dump(drop_dir / "a.exec", 0b0001)
+            assert _wait_for(lambda: watcher.merged_files == 1)
+            _write_dump(drop_dir / "b.exec", 0b0100)
+            assert _wait_for(lambda: watcher.merged_files == 2)
+
+        assert _probes(aggregate) == 0b0101
+        assert not list(drop_dir.iterdir())
+
+    def test_existing_files_and_stop_flush(self, logger, jacoco_tool, drop_dir, tmp_path, use_inotify):
+        """Test that files present on start are merged and pending files are flushed on stop."""
+        _write_dump(drop_dir / "a.exec", 0b0001)
+        aggregate = tmp_path / "aggregate.exec"
+        watcher = CoverageWatcher(jacoco_tool, LocalExecutor(logger), logger, drop_dir, aggregate,
+                                  debounce=60, poll_interval=0.1, use_inotify=use_inotify)
+        with watcher:
+            time.sleep(0.3)
+            _write_dump(drop_dir / "b.exec", 0b1000)
+            time.sleep(0.3)
+            assert watcher.merged_files == 0
+
+        assert watcher.merged_files == 2
+        assert _probes(aggregate) == 0b1001
+
+    def test_batches_are_bounded(self, logger, jacoco_tool, drop_dir, tmp_path, use_inotify):
+        """Test that arrivals are folded in batches of at most max_batch files."""
+        for index in range(5):
+            _write_dump(drop_dir / f"{index}.exec", 1 << (index % 4))
+        executor = LocalExecutor(logger)
+        commands = []
+        original_execute = executor.execute
+        executor.execute = lambda command, *args: commands.append(command) or original_execute(command, *args)
+        with CoverageWatcher(jacoco_tool, executor, logger, drop_dir, tmp_path / "aggregate.exec", debounce=0,
+                             max_batch=2, poll_interval=0.1, use_inotify=use_inotify):
+            assert _wait_for(lambda: not list(drop_dir.iterdir()))
+
+        assert all(len(command.arguments) <= 2 for command in commands)
+        assert _probes(tmp_path / "aggregate.exec") == 0b1111
+
+    def test_report_is_regenerated(self, logger, jacoco_tool, drop_dir, tmp_path, use_inotify):
+        """Test that the report is regenerated from the aggregate after new files were folded."""
+        marker = tmp_path / "reports.txt"
+
+        def report_command(aggregate: Path) -> Command:
+            command = Command()
+            command.execution_args = [sys.executable, "-c",
+                                      f"open({str(marker)!r}, 'a').write(open({str(aggregate)!r}, 'rb').read().hex() + '\\n')"]
+            return command
+
+        watcher = CoverageWatcher(jacoco_tool, LocalExecutor(logger), logger, drop_dir, tmp_path / "aggregate.exec",
+                                  debounce=0.1, poll_interval=0.1, use_inotify=use_inotify,
+                                  report_command=report_command, report_interval=0.1)
+        with watcher:
+            _write_dump(drop_dir / "a.exec", 0b0001)
+            assert _wait_for(lambda: watcher.reports == 1)
+            time.sleep(0.3)
+            assert watcher.reports == 1
+
+        assert len(marker.read_text().splitlines()) == 1
+
+    def test_failed_fold_is_retried_and_quarantined(self, logger, jacoco_tool, drop_dir, tmp_path, use_inotify):
+        """Test that a file which cannot be folded is retried alone, then moved out of the drop directory."""
+        executor = LocalExecutor(logger)
+        commands = []
+        original_execute = executor.execute
+        executor.execute = lambda command, *args: commands.append(command) or original_execute(command, *args)
+        watcher = CoverageWatcher(jacoco_tool, executor, logger, drop_dir, tmp_path / "aggregate.exec",
+                                  debounce=0.1, poll_interval=0.1, use_inotify=use_inotify, max_retries=2,
+                                  quarantine_dir=tmp_path / "failed")
+        with watcher:
+            (drop_dir / "broken.exec").write_bytes(b"\x02")
+            _write_dump(drop_dir / "a.exec", 0b0001)
+            assert _wait_for(lambda: watcher.failed_files == 1)
+
+        assert not list(drop_dir.iterdir())
+        assert (tmp_path / "failed" / "broken.exec").read_bytes() == b"\x02"
+        assert watcher.merged_files == 1
+        attempts = [len(command.arguments) for command in commands if "broken.exec" in str(command)]
+        assert len(attempts) == 3 and attempts[1:] == [1, 1]
+
+    def test_steady_arrivals_are_folded(self, logger, jacoco_tool, drop_dir, tmp_path, use_inotify):
+        """Test that files are folded while others keep arriving faster than the queue goes quiet."""
+        watcher = CoverageWatcher(jacoco_tool, LocalExecutor(logger), logger, drop_dir, tmp_path / "aggregate.exec",
+                                  debounce=0.1, max_batch=16, poll_interval=0.05, use_inotify=use_inotify)
+        with watcher:
+            merged_while_arriving = 0
+            for index in range(100):
+                _write_dump(drop_dir / f"{index}.exec", 1 << (index % 4))
+                merged_while_arriving = watcher.merged_files
+                time.sleep(0.02)
+            assert merged_while_arriving
+            assert _wait_for(lambda: watcher.merged_files == 100, timeout=30)
+
+        assert not list(drop_dir.iterdir())
+
+
+class TestCoverageWatcherConfiguration:
+    """Tests for the watcher's configuration and fallbacks."""
+
+    def test_merge_fallback_for_tools_without_append(self, logger, drop_dir, tmp_path, tests_dir_path, monkeypatch):
+        """Test that tools without append support fold files through a merge replacing the aggregate."""
+        monkeypatch.setattr(DotnetCoverage, "supports_append", False)
+        tool = DotnetCoverage(logger, crossfit.refs.tools_dir, native_merge=True)
+        aggregate = tmp_path / "aggregate.xml"
+        source = tests_dir_path / "helpers/tools/dotnetcoverage/s1.cobertura.xml"
+        with CoverageWatcher(tool, LocalExecutor(logger), logger, drop_dir, aggregate, debounce=0,
+                             poll_interval=0.1, use_inotify=False) as watcher:
+            (drop_dir / "s1.cobertura.xml").write_bytes(source.read_bytes())
+            assert _wait_for(lambda: watcher.merged_files == 1)
+
+        assert aggregate.read_text().startswith("<?xml")
+        assert [path.name for path in tmp_path.iterdir() if path.name.startswith(".")] == []
+
+    def test_pending_files_are_bounded(self, logger, jacoco_tool, drop_dir, tmp_path):
+        """Test that arrivals are taken at most max_batch at a time and never beyond queue_size pending files."""
+        watcher = CoverageWatcher(jacoco_tool, LocalExecutor(logger), logger, drop_dir, tmp_path / "a.exec",
+                                  max_batch=3, queue_size=4)
+        for index in range(4):
+            watcher._arrivals.put(drop_dir / f"{index}.exec")
+        pending = {}
+        watcher._take_arrivals(pending, stopping=False)
+        assert len(pending) == 3
+        watcher._take_arrivals(pending, stopping=False)
+        assert len(pending) == 4
+        watcher._arrivals.put(drop_dir / "4.exec")
+        watcher._take_arrivals(pending, stopping=True)
+        assert len(pending) == 4 and watcher._arrivals.qsize() == 1
+
+    def test_inotify_events_are_parsed(self):
+        """Test that raw inotify events are split into masks and names."""
+        data = (coverage_watcher._INOTIFY_EVENT.pack(1, coverage_watcher.IN_CLOSE_WRITE, 0, 8) + b"a.exec\0\0"
+                + coverage_watcher._INOTIFY_EVENT.pack(1, coverage_watcher.IN_Q_OVERFLOW, 0, 0))
+        assert list(coverage_watcher._read_inotify_events(data)) == [
+            (coverage_watcher.IN_CLOSE_WRITE, "a.exec"), (coverage_watcher.IN_Q_OVERFLOW, "")]
+
+    @pytest.mark.parametrize("kwargs", [{"debounce": -1}, {"poll_interval": 0}, {"max_batch": 0},
+                                        {"queue_size": 0}, {"report_interval": 0}, {"max_retries": -1}],
+                             ids=["Debounce", "Poll_Interval", "Max_Batch", "Queue_Size", "Report_Interval",
+                                  "Max_Retries"])
+    def test_invalid_parameters_raise(self, logger, jacoco_tool, drop_dir, tmp_path, kwargs):
+        """Test that out of range parameters are rejected."""
+        with pytest.raises(ValueError):
+            CoverageWatcher(jacoco_tool, LocalExecutor(logger), logger, drop_dir, tmp_path / "a.exec", **kwargs)
+
+    def test_start_twice_raises(self, logger, jacoco_tool, drop_dir, tmp_path):
+        """Test that a running watcher cannot be started again."""
+        with CoverageWatcher(jacoco_tool, LocalExecutor(logger), logger, drop_dir, tmp_path / "a.exec") as watcher:
+            with pytest.raises(RuntimeError):
+                watcher.start()
@@ -0,0 +1,159 @@
+# test_merge_planner.py
+import threading
+import pytest
+
+from pathlib import Path
+import crossfit
+from crossfit import DotnetCoverage, Jacoco, LocalExecutor, MergePlanner
+from crossfit.commands.command import Command
+from crossfit.executors.executor import Executor
+from crossfit.models.command_models import CommandResult
+from crossfit.tools.jacoco_exec import ExecFileLoader
+from crossfit.tools.probe_store import ExecutionData
+
+
+class MergeRecordingExecutor(Executor):
+    """Executor faking merges - records the inputs of every merge and creates its output file."""
+
+    def __init__(self, logger, fail_on_call: int = None):
+        super().__init__(logger)
+        self.merges: list[tuple[list[str], Path]] = []
+        self._fail_on_call = fail_on_call
+        self._lock = threading.Lock()
+
+    def _execute_single(self, command: Command) -> CommandResult:
+        body = command.command
+        option = "--destfile" if "--destfile" in body else "--output"
+        destination = Path(body[body.index(option) + 1])
+        with self._lock:
+            self.merges.append((list(command.arguments), destination))
+            call = len(self.merges)
+        if call == self._fail_on_call:
+            return CommandResult(code=2, command=str(command), output="", error="merge failed")
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        destination.write_text("merged")
+        return CommandResult(code=0, command=str(command), output=f"merged {destination.name}", error="")
+
+
+@pytest.fixture
+def coverage_files(tmp_path) -> list[Path]:
+    files = []
+    for index in range(7):
+        path = tmp_path / "dumps" / f"dump-{index}.exec"
+        path.parent.mkdir(exist_ok=True)
+        path.write_text("dump")
+        files.append(path)
+    return files
+
+
+@pytest.fixture
+def jacoco_tool(logger):
+    return Jacoco(logger, crossfit.refs.tools_dir, True)
+
+
+class TestMergePlanner:
+    """Tests for the tree-reduction merge planner."""
+
+    def test_few_files_merge_in_single_command(self, logger, jacoco_tool, coverage_files, tmp_path):
+        """Test that inputs within the fan-in are merged directly."""
+        executor = MergeRecordingExecutor(logger)
+        result = MergePlanner(jacoco_tool, executor, logger, fan_in=8).merge(
+            coverage_files, tmp_path / "out", Path("merged.exec"))
+
+        assert result.code == 0
+        assert len(executor.merges) == 1
+        assert executor.merges[0][1] == tmp_path / "out" / "merged.exec"
+
+    def test_tree_reduction_levels(self, logger, jacoco_tool, coverage_files, tmp_path):
+        """Test that 7 files with fan-in 2 are reduced over 4+2 intermediate merges and a final merge."""
+        executor = MergeRecordingExecutor(logger)
+        result = MergePlanner(jacoco_tool, executor, logger, fan_in=2, parallelism=3, intermediates_dir=tmp_path) \
+            .merge(coverage_files, tmp_path / "out", Path("merged.exec"))
+
+        assert result.code == 0
+        assert len(executor.merges) == 4 + 2 + 1
+        final_inputs, final_target = executor.merges[-1]
+        assert final_target == tmp_path / "out" / "merged.exec"
+        assert len(final_inputs) == 2
+        assert all("level-1" in path for path in final_inputs)
+        assert sorted(len(inputs) for inputs, _ in executor.merges[:4]) == [1, 2, 2, 2]
+
+    def test_step_results_are_chained(self, logger, jacoco_tool, coverage_files, tmp_path, monkeypatch):
+        """Test that the results of every merge are aggregated in a ResultChain, not folded pairwise."""
+        monkeypatch.setattr(CommandResult, "add_result", lambda self, other: pytest.fail("pairwise aggregation"))
+        monkeypatch.setattr(CommandResult, "__add__", lambda self, other: pytest.fail("pairwise aggregation"))
+        executor = MergeRecordingExecutor(logger)
+        result = MergePlanner(jacoco_tool, executor, logger, fan_in=2, intermediates_dir=tmp_path).merge(
+            coverage_files, tmp_path / "out", Path("merged.exec"))
+
+        assert result.code == 0
+        assert result.command.count(" && ") == len(executor.merges) - 1
+        assert result.output.splitlines()[-1] == "merged merged.exec"
+
+    def test_intermediates_are_removed(self, logger, jacoco_tool, coverage_files, tmp_path):
+        """Test that no intermediate directory is left behind."""
+        executor = MergeRecordingExecutor(logger)
+        MergePlanner(jacoco_tool, executor, logger, fan_in=3, intermediates_dir=tmp_path).merge(
+            coverage_files, tmp_path / "out", Path("merged.exec"))
+
+        assert not list(tmp_path.glob("crossfit-merge-*"))
+
+    def test_failed_batch_stops_reduction(self, logger, jacoco_tool, coverage_files, tmp_path):
+        """Test that a failed batch stops the merge, reports its code and still cleans up."""
+        executor = MergeRecordingExecutor(logger, fail_on_call=2)
+        result = MergePlanner(jacoco_tool, executor, logger, fan_in=2, parallelism=1, intermediates_dir=tmp_path) \
+            .merge(coverage_files, tmp_path / "out", Path("merged.exec"))
+
+        assert result.code == 2
+        assert "merge failed" in result.error
+        assert len(executor.merges) == 4
+        assert not (tmp_path / "out").exists()
+        assert not list(tmp_path.glob("crossfit-merge-*"))
+
+    def test_wildcards_are_resolved_for_batching(self, logger, jacoco_tool, coverage_files, tmp_path):
+        """Test that glob patterns are expanded before batching."""
+        executor = MergeRecordingExecutor(logger)
+        MergePlanner(jacoco_tool, executor, logger, fan_in=4).merge(
+            [tmp_path / "dumps" / "*.exec"], tmp_path / "out", Path("merged.exec"))
+
+        assert len(executor.merges) == 2 + 1
+
+    def test_dotnet_coverage_intermediates(self, logger, tmp_path):
+        """Test that DotnetCoverage merges are planned the same way, keeping the input suffix."""
+        files = []
+        for index in range(3):
+            path = tmp_path / f"s{index}.xml"
+            path.write_text("<coverage />")
+            files.append(path)
+        executor = MergeRecordingExecutor(logger)
+        tool = DotnetCoverage(logger, crossfit.refs.tools_dir, True)
+        result = MergePlanner(tool, executor, logger, fan_in=2).merge(files, tmp_path / "out", Path("merged.xml"))
+
+        assert result.code == 0
+        assert len(executor.merges) == 2 + 1
+        assert all(target.suffix == ".xml" for _, target in executor.merges)
+
+    @pytest.mark.parametrize("fan_in, parallelism", [(1, 1), (2, 0)], ids=["Fan_In", "Parallelism"])
+    def test_invalid_parameters_raise(self, logger, jacoco_tool, fan_in, parallelism):
+        """Test that a fan-in below 2 or no parallelism are rejected."""
+        with pytest.raises(ValueError):
+            MergePlanner(jacoco_tool, MergeRecordingExecutor(logger), logger, fan_in, parallelism)
+
+    def test_native_jacoco_tree_merge(self, logger, tmp_path):
+        """Test an actual tree merge of .exec files through the native merge command."""
+        files = []
+        for index in range(3):
+            loader = ExecFileLoader()
+            loader.store.put(ExecutionData(42, "com/example/A", 3, 1 << index))
+            path = tmp_path / f"dump-{index}.exec"
+            loader.save(path, append=False)
+            files.append(path)
+
+        tool = Jacoco(logger, crossfit.refs.tools_dir, True, native_merge=True)
+        result = MergePlanner(tool, LocalExecutor(logger), logger, fan_in=2, intermediates_dir=tmp_path).merge(
+            files, tmp_path / "out", Path("merged.exec"))
+
+        assert result.code == 0
+        merged = ExecFileLoader()
+        merged.load(tmp_path / "out" / "merged.exec")
+        assert merged.store.get(42).probes == 0b111
@@ -0,0 +1,198 @@
+# test_sharded_reporter.py
+import shutil
+import threading
+import xml.etree.ElementTree as ElementTree
+import zipfile
+import pytest
+
+from pathlib import Path
+import crossfit
+from crossfit import DotnetCoverage, Jacoco, LocalExecutor, ShardedReporter
+from crossfit.commands.command import Command
+from crossfit.executors.executor import Executor
+from crossfit.models.command_models import CommandResult
+from crossfit.models.tool_models import ReportFormat
+from crossfit.pipelines import sharded_reporter
+from crossfit.tools.class_analysis import analyze_class
+from crossfit.tools.jacoco_exec import ExecFileLoader, SessionInfo
+from crossfit.tools.probe_store import ExecutionData
+
+PACKAGES = ("org/jacoco/cli/internal/commands/", "org/jacoco/cli/internal/core/data/",
+            "org/jacoco/cli/internal/core/tools/", "org/jacoco/cli/internal/report/")
+
+
+class CoberturaShardExecutor(Executor):
+    """Executor faking ReportGenerator - writes a Cobertura report with a class per filtered assembly."""
+
+    def __init__(self, logger, fail: bool = False):
+        super().__init__(logger)
+        self.filters: list[str] = []
+        self._fail = fail
+        self._lock = threading.Lock()
+
+    def _execute_single(self, command: Command) -> CommandResult:
+        options = dict(argument.split(":", 1) for argument in command.command if ":" in argument)
+        with self._lock:
+            self.filters.append(options.get("-assemblyfilters", ""))
+        if self._fail:
+            return CommandResult(code=3, command=str(command), output="", error="report failed")
+        assemblies = [assembly[1:] for assembly in options.get("-assemblyfilters", "+A;+B;+C").split(";")]
+        target_dir = Path(options["-targetdir"])
+        target_dir.mkdir(parents=True, exist_ok=True)
+        packages = "".join(f'<package name="{assembly}"><classes><class name="{assembly}.C" filename="{assembly}.cs">'
+                           '<lines><line number="1" hits="1"/></lines></class></classes></package>'
+                           for assembly in assemblies)
+        (target_dir / "Cobertura.xml").write_text(f'<?xml version="1.0"?><coverage><packages>{packages}</packages>'
+                                                  "</coverage>")
+        return CommandResult(code=0, command=str(command), output="reported", error="")
+
+
+@pytest.fixture(scope="module")
+def classes_and_exec(tmp_path_factory) -> tuple[Path, Path]:
+    root = tmp_path_factory.mktemp("sharded")
+    loader = ExecFileLoader()
+    loader.sessions.append(SessionInfo("session", 1, 2))
+    with zipfile.ZipFile(crossfit.refs.tools_dir / "jacococli.jar") as archive:
+        for entry in archive.namelist():
+            if entry.endswith(".class") and entry.startswith(PACKAGES):
+                data = archive.read(entry)
+                (root / "classes" / entry).parent.mkdir(parents=True, exist_ok=True)
+                (root / "classes" / entry).write_bytes(data)
+                model = analyze_class(data)
+                if model is not None and model.probe_count:
+                    loader.store.put(ExecutionData(model.id, model.name, model.probe_count, 0b1011))
+    loader.save(root / "jacoco.exec", append=False)
+    return root / "classes", root / "jacoco.exec"
+
+
+def _elements(path: Path) -> list[bytes]:
+    return sorted(ElementTree.tostring(element) for element in ElementTree.parse(path).getroot())
+
+
+class TestShardedReporter:
+    """Tests for reporting shards of the classes in parallel and stitching their reports."""
+
+    def test_sharded_jacoco_report_equals_unsharded(self, logger, classes_and_exec, tmp_path):
+        """Test that the stitched XML, CSV and HTML reports hold the content of the unsharded reports."""
+        classes, exec_file = classes_and_exec
+        tool = Jacoco(logger, crossfit.refs.tools_dir, native_report=True)
+        executor = LocalExecutor(logger)
+        formats = (ReportFormat.Xml, [ReportFormat.Csv, ReportFormat.Html])
+
+        assert executor.execute(tool.save_report([exec_file], tmp_path / "single", None, *formats, classes)).code == 0
+        result = ShardedReporter(tool, executor, logger, shards=3).save_report(
+            [exec_file], tmp_path / "sharded", None, *formats, classes)
+
+        assert result.code == 0
+        assert result.command.count(" && ") == 2
+        single, sharded = tmp_path / "single", tmp_path / "sharded"
+        assert _elements(sharded / "cross-jacoco.xml") == _elements(single / "cross-jacoco.xml")
+        assert (sorted((sharded / "cross-jacoco.csv").read_text().splitlines())
+                == sorted((single / "cross-jacoco.csv").read_text().splitlines()))
+        assert (sorted(path.relative_to(sharded) for path in sharded.rglob("*"))
+                == sorted(path.relative_to(single) for path in single.rglob("*")))
+        assert 'href="org.jacoco.cli.internal.report/index.html"' in (sharded / "index.html").read_text()
+
+    def test_packages_are_passed_as_whole_directories(self, logger, classes_and_exec, tmp_path):
+        """Test that every class file is in exactly one shard, package directories of a single shard passed whole."""
+        classes, exec_file = classes_and_exec
+        tool = Jacoco(logger, crossfit.refs.tools_dir, native_report=True)
+        partition = ShardedReporter(tool, LocalExecutor(logger), logger, shards=2)._partition_class_files(classes, ())
+
+        assert len(partition) == 2
+        sharded_files = [file for paths in partition for path in paths
+                         for file in (path.rglob("*.class") if path.is_dir() else [path])]
+        assert sorted(sharded_files) == sorted(classes.rglob("*.class"))
+        assert classes / "org/jacoco/cli/internal/core" in partition[0]
+        assert classes / "org/jacoco/cli/internal/report/xml" in partition[1]
+
+    def test_package_in_several_roots_is_reported_by_one_shard(self, logger, classes_and_exec, tmp_path):
+        """Test that a package spread over class roots falls in a single shard, stitched like the unsharded report."""
+        classes, exec_file = classes_and_exec
+        first, second = tmp_path / "r1", tmp_path / "r2"
+        shutil.copytree(classes, first)
+        (second / PACKAGES[0]).mkdir(parents=True)
+        for class_file in sorted((first / PACKAGES[0]).glob("*.class"))[::2]:
+            class_file.rename(second / PACKAGES[0] / class_file.name)
+        tool = Jacoco(logger, crossfit.refs.tools_dir, native_report=True)
+        executor = LocalExecutor(logger)
+        formats = (ReportFormat.Xml, [ReportFormat.Html])
+        extras = ("--classfiles", str(second)),
+
+        assert executor.execute(tool.save_report([exec_file], tmp_path / "single", None, *formats, first,
+                                                 *extras)).code == 0
+        result = ShardedReporter(tool, executor, logger, shards=4).save_report(
+            [exec_file], tmp_path / "sharded", None, *formats, first, *extras)
+
+        assert result.code == 0
+        assert result.command.count(" && ") > 0
+        single, sharded = tmp_path / "single", tmp_path / "sharded"
+        assert _elements(sharded / "cross-jacoco.xml") == _elements(single / "cross-jacoco.xml")
+        assert (sorted(path.relative_to(sharded) for path in sharded.rglob("*"))
+                == sorted(path.relative_to(single) for path in single.rglob("*")))
+
+    def test_archive_packages_share_a_shard(self, logger, classes_and_exec, tmp_path):
+        """Test that the packages of an archive and their directories in other roots fall in the same shard."""
+        classes, exec_file = classes_and_exec
+        with zipfile.ZipFile(tmp_path / "lib.jar", "w") as archive:
+            for package in (PACKAGES[0], PACKAGES[3]):
+                class_file = next((classes / package).glob("*.class"))
+                archive.write(class_file, f"{package}{class_file.name}")
+        tool = Jacoco(logger, crossfit.refs.tools_dir, native_report=True)
+        partition = ShardedReporter(tool, LocalExecutor(logger), logger, shards=4)._partition_class_files(
+            classes, (("--classfiles", str(tmp_path / "lib.jar")),))
+
+        shard = next(paths for paths in partition if tmp_path / "lib.jar" in paths)
+        shard_files = {file for path in shard for file in (path.rglob("*.class") if path.is_dir() else [path])}
+        for package in (PACKAGES[0], PACKAGES[3]):
+            assert set((classes / package).glob("*.class")) <= shard_files
+
+    def test_contiguous_shards_are_balanced(self):
+        """Test that units are assigned in order to shards of about equal size."""
+        assert sharded_reporter._contiguous_shards([1] * 8, 4) == [0, 0, 1, 1, 2, 2, 3, 3]
+        assert sharded_reporter._contiguous_shards([10, 1, 1, 1, 1], 2) == [0, 1, 1, 1, 1]
+        assert sharded_reporter._contiguous_shards([5], 4) == [0]
+
+    def test_dotnet_shards_by_assembly(self, logger, tmp_path):
+        """Test that dotnet-coverage shards are filtered by assembly and their Cobertura reports merged."""
+        coverage = tmp_path / "coverage.cobertura.xml"
+        coverage.write_text('<?xml version="1.0"?><coverage><packages>'
+                            + "".join(f'<package name="{name}"><classes><class name="{name}.C" filename="c.cs"><lines>'
+                                      '<line number="1" hits="1"/></lines></class></classes></package>'
+                                      for name in ("A", "B", "C")) + "</packages></coverage>")
+        executor = CoberturaShardExecutor(logger)
+        tool = DotnetCoverage(logger, crossfit.refs.tools_dir)
+
+        result = ShardedReporter(tool, executor, logger, shards=3).save_report(
+            [coverage], tmp_path / "report", None, ReportFormat.Cobertura)
+
+        assert result.code == 0
+        assert sorted(executor.filters) == ["+A", "+B", "+C"]
+        report = ElementTree.parse(tmp_path / "report" / "Cobertura.xml").getroot()
+        assert sorted(package.get("name") for package in report.iter("package")) == ["A", "B", "C"]
+
+    def test_failed_shard_stops_report(self, logger, tmp_path):
+        """Test that a failed shard fails the report with its code and leaves no stitched report behind."""
+        coverage = tmp_path / "coverage.cobertura.xml"
+        coverage.write_text('<?xml version="1.0"?><coverage><packages><package name="A"><classes/></package>'
+                            '<package name="B"><classes/></package></packages></coverage>')
+        result = ShardedReporter(DotnetCoverage(logger, crossfit.refs.tools_dir), CoberturaShardExecutor(logger, True),
+                                 logger, shards=2).save_report([coverage], tmp_path / "report", None,
+                                                               ReportFormat.Cobertura)
+
+        assert result.code == 3
+        assert not (tmp_path / "report").exists()
+
+    def test_unshardable_report_runs_single_command(self, logger, tmp_path):
+        """Test that reports of formats which cannot be stitched run as a single report command."""
+        executor = CoberturaShardExecutor(logger)
+        result = ShardedReporter(DotnetCoverage(logger, crossfit.refs.tools_dir), executor, logger, shards=4).save_report(
+            [tmp_path / "coverage.xml"], tmp_path / "report", None, ReportFormat.Html)
+
+        assert result.code == 0
+        assert executor.filters == [""]
+
+    def test_invalid_shards_raise(self, logger):
+        """Test that less than one shard is rejected."""
+        with pytest.raises(ValueError):
+            ShardedReporter(Jacoco(logger, crossfit.refs.tools_dir), LocalExecutor(logger), logger, shards=0)
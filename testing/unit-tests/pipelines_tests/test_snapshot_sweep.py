@@ -0,0 +1,149 @@
+# test_snapshot_sweep.py
+import socket
+import struct
+import threading
+import time
+import pytest
+
+from pathlib import Path
+import crossfit
+from crossfit import DotnetCoverage, Jacoco, LocalExecutor, SnapshotSweep, SnapshotTarget
+from crossfit.commands.command import Command
+from crossfit.executors.executor import CancellationToken
+from crossfit.models.command_models import CommandResult
+
+HEADER = b"\x01\xc0\xc0\x10\x07"
+CLASS_BLOCK = b"\x11" + struct.pack(">q", 42) + struct.pack(">H", 1) + b"A" + bytes([8, 0b11])
+
+
+class FakeAgent:
+    """JaCoCo agent in tcpserver mode answering dumps with a single class, optionally after a delay."""
+
+    def __init__(self, delay: float = 0):
+        self._delay = delay
+        self._server = socket.create_server(("127.0.0.1", 0))
+        self.port = self._server.getsockname()[1]
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self):
+        while True:
+            try:
+                connection, _ = self._server.accept()
+            except OSError:
+                return
+            with connection, connection.makefile("rwb") as stream:
+                stream.write(HEADER)
+                stream.flush()
+                stream.read(8)
+                time.sleep(self._delay)
+                stream.write(CLASS_BLOCK + b"\x20")
+                stream.flush()
+
+    def close(self):
+        self._server.close()
+
+
+class ConcurrencyRecordingExecutor(LocalExecutor):
+    """Executor faking snapshots - records the highest number of snapshots running at once."""
+
+    def __init__(self, logger):
+        super().__init__(logger)
+        self.running = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def _execute_single(self, command: Command) -> CommandResult:
+        with self._lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        time.sleep(0.05)
+        with self._lock:
+            self.running -= 1
+        return CommandResult(code=0, command=str(command), output="", error="")
+
+
+@pytest.fixture
+def agents():
+    fake_agents = [FakeAgent() for _ in range(4)]
+    yield fake_agents
+    for fake_agent in fake_agents:
+        fake_agent.close()
+
+
+@pytest.fixture
+def jacoco_tool(logger):
+    return Jacoco(logger, crossfit.refs.tools_dir, native_dump=True)
+
+
+def _jacoco_target(tool, port: int, tmp_path: Path, name: str, **kwargs) -> SnapshotTarget:
+    return SnapshotTarget(tool, name, tmp_path, Path(f"{name}.exec"),
+                          (("--address", "127.0.0.1"), ("--port", str(port)), ("--retry", "0")), name=name, **kwargs)
+
+
+class TestSnapshotSweep:
+    """Tests for snapshotting many coverage agents concurrently."""
+
+    def test_sweep_collects_all_agents(self, logger, jacoco_tool, agents, tmp_path):
+        """Test that every agent is dumped and the collected bytes are summed."""
+        targets = [_jacoco_target(jacoco_tool, agent.port, tmp_path, f"svc-{index}")
+                   for index, agent in enumerate(agents)]
+        summary = SnapshotSweep(LocalExecutor(logger), logger, max_concurrency=2).sweep(targets)
+
+        assert summary.total == summary.succeeded == 4
+        assert summary.bytes_collected == sum((tmp_path / f"svc-{index}.exec").stat().st_size for index in range(4))
+        assert all(result.code == 0 for result in summary.results)
+
+    def test_failures_are_summarized(self, logger, jacoco_tool, agents, tmp_path):
+        """Test that unreachable agents and missing tools are reported per target without stopping the sweep."""
+        with socket.create_server(("127.0.0.1", 0)) as placeholder:
+            closed_port = placeholder.getsockname()[1]
+        dotnet_tool = DotnetCoverage(logger, crossfit.refs.tools_dir)
+        targets = [_jacoco_target(jacoco_tool, agents[0].port, tmp_path, "up"),
+                   _jacoco_target(jacoco_tool, closed_port, tmp_path, "down"),
+                   SnapshotTarget(dotnet_tool, "dotnet-session", tmp_path, Path("dotnet.xml"))]
+        summary = SnapshotSweep(LocalExecutor(logger), logger).sweep(targets)
+
+        assert summary.succeeded == 1
+        assert summary.failed == 2
+        assert set(summary.failures) == {"down", "dotnet-session"}
+        assert summary.results[0].code == 0
+
+    def test_slow_agent_times_out(self, logger, jacoco_tool, tmp_path):
+        """Test that the per target timeout stops a hanging agent."""
+        slow_agent = FakeAgent(delay=10)
+        try:
+            target = _jacoco_target(jacoco_tool, slow_agent.port, tmp_path, "slow", timeout=0.5)
+            start = time.monotonic()
+            summary = SnapshotSweep(LocalExecutor(logger), logger).sweep([target])
+        finally:
+            slow_agent.close()
+
+        assert summary.failed == 1
+        assert "timed out" in summary.failures["slow"]
+        assert time.monotonic() - start < 5
+
+    def test_concurrency_is_bounded(self, logger, jacoco_tool, tmp_path):
+        """Test that no more than max_concurrency snapshots run at once."""
+        executor = ConcurrencyRecordingExecutor(logger)
+        targets = [_jacoco_target(jacoco_tool, 1, tmp_path, f"svc-{index}") for index in range(8)]
+        summary = SnapshotSweep(executor, logger, max_concurrency=3).sweep(targets)
+
+        assert summary.succeeded == 8
+        assert 1 < executor.peak <= 3
+
+    def test_cancelled_sweep(self, logger, jacoco_tool, agents, tmp_path):
+        """Test that a cancelled sweep does not snapshot the remaining agents."""
+        token = CancellationToken()
+        token.cancel()
+        targets = [_jacoco_target(jacoco_tool, agent.port, tmp_path, f"svc-{index}")
+                   for index, agent in enumerate(agents)]
+        summary = SnapshotSweep(LocalExecutor(logger), logger).sweep(targets, token)
+
+        assert summary.succeeded == 0
+        assert not list(tmp_path.glob("*.exec"))
+
+    @pytest.mark.parametrize("kwargs", [{"max_concurrency": 0}, {"timeout": 0}], ids=["Concurrency", "Timeout"])
+    def test_invalid_parameters_raise(self, logger, kwargs):
+        """Test that out of range parameters are rejected."""
+        with pytest.raises(ValueError):
+            SnapshotSweep(LocalExecutor(logger), logger, **kwargs)
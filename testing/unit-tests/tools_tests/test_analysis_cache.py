@@ -0,0 +1,80 @@
+# test_analysis_cache.py
+import json
+import pickle
+import sqlite3
+import zipfile
+import pytest
+
+import crossfit
+from crossfit.tools import analysis_cache
+from crossfit.tools.analysis_cache import AnalysisCache
+from crossfit.tools.class_analysis import analyze_class
+
+
+@pytest.fixture(scope="module")
+def class_files() -> list[bytes]:
+    with zipfile.ZipFile(crossfit.refs.tools_dir / "jacococli.jar") as archive:
+        return [archive.read(entry) for entry in archive.namelist()
+                if entry.endswith(".class") and not entry.startswith("META-INF/versions/")][:50]
+
+
+class TestAnalysisCache:
+    """Tests for caching class analyses by the class file bytes."""
+
+    def test_analyses_are_reused_across_instances(self, class_files, tmp_path):
+        """Test that a second cache on the same database analyzes nothing and returns equal models."""
+        with AnalysisCache(tmp_path / "cache.db") as cache:
+            models = [cache.analyze(data) for data in class_files]
+            assert (cache.hits, cache.misses) == (0, len(class_files))
+
+        with AnalysisCache(tmp_path / "cache.db") as cache:
+            assert [cache.analyze(data) for data in class_files] == models
+            assert (cache.hits, cache.misses) == (len(class_files), 0)
+        assert models == [analyze_class(data) for data in class_files]
+
+    def test_changed_class_is_analyzed(self, class_files, tmp_path):
+        """Test that class files differing in a byte are analyzed separately."""
+        data = class_files[1]
+        changed = data[:-1] + bytes([data[-1] ^ 1])
+        with AnalysisCache(tmp_path / "cache.db") as cache:
+            cache.analyze(data)
+            try:
+                cache.analyze(changed)
+            except ValueError:
+                pass
+            assert cache.misses == 2
+
+    def test_failures_are_not_cached(self, tmp_path):
+        """Test that class files which cannot be analyzed raise every time."""
+        with AnalysisCache(tmp_path / "cache.db") as cache:
+            for _ in range(2):
+                with pytest.raises(ValueError):
+                    cache.analyze(b"broken")
+            assert len(cache) == 0
+
+    def test_prune_and_version(self, class_files, tmp_path, monkeypatch):
+        """Test that unused analyses are pruned and analyses of another version are discarded."""
+        with AnalysisCache(tmp_path / "cache.db") as cache:
+            cache.analyze(class_files[0])
+            assert cache.prune(3600) == 0
+            assert cache.prune(-1) == 1
+
+        with AnalysisCache(tmp_path / "cache.db") as cache:
+            cache.analyze(class_files[0])
+        monkeypatch.setattr(analysis_cache, "_VERSION", analysis_cache._VERSION + 1)
+        with AnalysisCache(tmp_path / "cache.db") as cache:
+            assert len(cache) == 0
+        version = sqlite3.connect(tmp_path / "cache.db").execute("PRAGMA user_version").fetchone()[0]
+        assert version == analysis_cache._VERSION
+
+    def test_models_are_stored_as_data(self, class_files, tmp_path):
+        """Test that models are stored as JSON and entries that do not decode, like pickles, are analyzed again."""
+        with AnalysisCache(tmp_path / "cache.db") as cache:
+            model = cache.analyze(class_files[0])
+            stored, = cache._connection.execute("SELECT model FROM analyses").fetchone()
+            assert json.loads(stored)[1] == model.name
+
+            cache._connection.execute("UPDATE analyses SET model = ?", (pickle.dumps(model),))
+            assert cache.analyze(class_files[0]) == model
+            assert (cache.hits, cache.misses) == (0, 2)
+            assert json.loads(cache._connection.execute("SELECT model FROM analyses").fetchone()[0])[1] == model.name
@@ -0,0 +1,235 @@
+# test_cobertura.py
+import xml.etree.ElementTree as ElementTree
+import pytest
+
+from pathlib import Path
+import crossfit
+from crossfit import DotnetCoverage, LocalExecutor
+from crossfit.tools import cobertura
+from crossfit.tools.cobertura import CoberturaAggregate, append_cobertura_files, merge_cobertura_files
+
+FIRST = """<?xml version="1.0" encoding="UTF-8"?>
+<coverage line-rate="0.5" branch-rate="0.5" version="1.9" timestamp="100">
+  <sources><source>/src</source></sources>
+  <packages>
+    <package name="App" line-rate="0.5" branch-rate="0.5" complexity="3">
+      <classes>
+        <class name="App.Calc" filename="Calc.cs" line-rate="0.5" branch-rate="0.5" complexity="3">
+          <methods>
+            <method name="Add" signature="(II)I" line-rate="1" branch-rate="1" complexity="1">
+              <lines><line number="10" hits="2" branch="False" /></lines>
+            </method>
+          </methods>
+          <lines>
+            <line number="10" hits="2" branch="False" />
+            <line number="11" hits="0" branch="True" condition-coverage="50% (1/2)">
+              <conditions><condition number="0" type="jump" coverage="50%" /></conditions>
+            </line>
+          </lines>
+        </class>
+      </classes>
+    </package>
+  </packages>
+</coverage>
+"""
+
+SECOND = """<?xml version="1.0" encoding="UTF-8"?>
+<coverage line-rate="1" branch-rate="1" version="1.9" timestamp="200">
+  <sources><source>/src</source><source>/other</source></sources>
+  <packages>
+    <package name="App" complexity="3">
+      <classes>
+        <class name="App.Calc" filename="Calc.cs" complexity="3">
+          <methods />
+          <lines>
+            <line number="11" hits="3" branch="True" condition-coverage="100% (2/2)" />
+            <line number="12" hits="1" branch="False" />
+          </lines>
+        </class>
+      </classes>
+    </package>
+    <package name="Lib">
+      <classes>
+        <class name="Lib.Util" filename="Util.cs">
+          <lines><line number="1" hits="0" branch="False" /></lines>
+        </class>
+      </classes>
+    </package>
+  </packages>
+</coverage>
+"""
+
+
+@pytest.fixture
+def cobertura_files(tmp_path) -> list[Path]:
+    first, second = tmp_path / "s1.cobertura.xml", tmp_path / "s2.cobertura.xml"
+    first.write_text(FIRST)
+    second.write_text(SECOND)
+    return [first, second]
+
+
+def _lines(element: ElementTree.Element) -> dict[str, ElementTree.Element]:
+    return {line.get("number"): line for line in element.find("lines")}
+
+
+class TestCoberturaMerge:
+    """Tests for the streaming Cobertura merge."""
+
+    def test_merge_sums_hits_per_line(self, cobertura_files, tmp_path):
+        """Test that hits of the same class line are summed across files."""
+        target = tmp_path / "out" / "merged.xml"
+        merge_cobertura_files(cobertura_files, target)
+
+        root = ElementTree.parse(target).getroot()
+        calc = root.find("packages/package[@name='App']/classes/class[@name='App.Calc']")
+        lines = _lines(calc)
+        assert lines["10"].get("hits") == "2"
+        assert lines["11"].get("hits") == "3"
+        assert lines["12"].get("hits") == "1"
+
+    def test_merge_keeps_best_branch_coverage(self, cobertura_files, tmp_path):
+        """Test that branch coverage of a line is the best seen."""
+        target = tmp_path / "merged.xml"
+        merge_cobertura_files(cobertura_files, target)
+
+        calc = ElementTree.parse(target).getroot().find(".//class[@name='App.Calc']")
+        assert _lines(calc)["11"].get("condition-coverage") == "100% (2/2)"
+
+    def test_merge_keeps_methods_and_sources(self, cobertura_files, tmp_path):
+        """Test that methods, packages and sources of all files are kept."""
+        target = tmp_path / "merged.xml"
+        merge_cobertura_files(cobertura_files, target)
+
+        root = ElementTree.parse(target).getroot()
+        assert [source.text for source in root.find("sources")] == ["/src", "/other"]
+        assert [package.get("name") for package in root.find("packages")] == ["App", "Lib"]
+        method = root.find(".//method[@name='Add']")
+        assert method.get("signature") == "(II)I"
+        assert _lines(method)["10"].get("hits") == "2"
+
+    def test_merge_computes_totals(self, cobertura_files, tmp_path):
+        """Test the document level counters and rates."""
+        target = tmp_path / "merged.xml"
+        merge_cobertura_files(cobertura_files, target)
+
+        root = ElementTree.parse(target).getroot()
+        assert root.get("lines-valid") == "4"
+        assert root.get("lines-covered") == "3"
+        assert root.get("line-rate") == "0.75"
+        assert root.get("branches-covered") == "2"
+        assert root.get("branches-valid") == "2"
+        assert root.get("timestamp") == "200"
+
+    def test_add_file_releases_parsed_elements(self, cobertura_files, monkeypatch):
+        """Test that finished elements are detached while streaming."""
+        removed = []
+        original_iterparse = ElementTree.iterparse
+
+        def tracking_iterparse(source, events=None):
+            for event, element in original_iterparse(source, events):
+                yield event, element
+                if event == "end" and element.tag == "coverage":
+                    removed.append(len(list(element.iter("line"))))
+
+        monkeypatch.setattr(ElementTree, "iterparse", tracking_iterparse)
+        CoberturaAggregate().add_file(cobertura_files[0])
+        assert removed == [0]
+
+    def test_invalid_document_raises(self, tmp_path):
+        """Test that non Cobertura documents are rejected."""
+        path = tmp_path / "bad.xml"
+        path.write_text("<report />")
+        with pytest.raises(ValueError, match="not a Cobertura document"):
+            CoberturaAggregate().add_file(path)
+
+    def test_malformed_xml_raises(self, tmp_path):
+        """Test that malformed XML is reported as a ValueError."""
+        path = tmp_path / "bad.xml"
+        path.write_text("<coverage>")
+        with pytest.raises(ValueError, match="Could not parse"):
+            CoberturaAggregate().add_file(path)
+
+    @pytest.mark.parametrize("line", ['<line hits="1"/>', '<line number="x" hits="1"/>'])
+    @pytest.mark.parametrize("in_method", [False, True])
+    def test_line_without_number_raises(self, tmp_path, capsys, line, in_method):
+        """Test that lines without a valid number are reported with the file, also by the command line."""
+        path = tmp_path / "bad.xml"
+        lines = f"<lines>{line}</lines>"
+        if in_method:
+            lines = f'<methods><method name="m" signature="()V">{lines}</method></methods>'
+        path.write_text(f'<coverage><packages><package name="P"><classes><class name="C" filename="C.cs">{lines}'
+                        '</class></classes></package></packages></coverage>')
+        with pytest.raises(ValueError, match="bad.xml"):
+            CoberturaAggregate().add_file(path)
+
+        assert cobertura.main(["merge", str(path), "--output", str(tmp_path / "m.xml")]) == 1
+        assert "invalid number" in capsys.readouterr().err
+
+    def test_main_rejects_other_formats(self, cobertura_files, tmp_path, capsys):
+        """Test that only the cobertura output format is accepted."""
+        code = cobertura.main(["merge", *map(str, cobertura_files), "--output", str(tmp_path / "m.xml"), "-f", "xml"])
+        assert code == 1
+        assert "Unsupported output format" in capsys.readouterr().err
+
+
+class TestCoberturaAppend:
+    """Tests for folding Cobertura files into a running aggregate."""
+
+    def test_append_sums_hits_into_aggregate(self, cobertura_files, tmp_path):
+        """Test that appending files one by one sums hits like merging them at once."""
+        aggregate = tmp_path / "aggregate.xml"
+        for coverage_file in cobertura_files:
+            append_cobertura_files([coverage_file], aggregate)
+
+        calc = ElementTree.parse(aggregate).getroot().find(".//class[@name='App.Calc']")
+        assert {number: line.get("hits") for number, line in _lines(calc).items()} == {"10": "2", "11": "3", "12": "1"}
+
+    def test_append_twice_doubles_hits(self, cobertura_files, tmp_path):
+        """Test that the same file appended twice is counted twice."""
+        aggregate = tmp_path / "aggregate.xml"
+        append_cobertura_files([cobertura_files[0]], aggregate)
+        append_cobertura_files([cobertura_files[0]], aggregate)
+        once = tmp_path / "once.xml"
+        merge_cobertura_files([cobertura_files[0]], once)
+
+        twice_lines = _lines(ElementTree.parse(aggregate).getroot().find(".//class[@name='App.Calc']"))
+        once_lines = _lines(ElementTree.parse(once).getroot().find(".//class[@name='App.Calc']"))
+        assert all(int(twice_lines[number].get("hits")) == 2 * int(line.get("hits"))
+                   for number, line in once_lines.items())
+
+    def test_failed_append_keeps_aggregate(self, cobertura_files, tmp_path):
+        """Test that an invalid new file leaves the aggregate untouched."""
+        aggregate = tmp_path / "aggregate.xml"
+        append_cobertura_files([cobertura_files[0]], aggregate)
+        before = aggregate.read_text()
+        invalid = tmp_path / "invalid.xml"
+        invalid.write_text("<report />")
+
+        with pytest.raises(ValueError):
+            append_cobertura_files([invalid], aggregate)
+        assert aggregate.read_text() == before
+
+    def test_append_command_runs_python(self, logger, cobertura_files, tmp_path):
+        """Test that the DotnetCoverage append command folds a file into the aggregate."""
+        command = DotnetCoverage(logger, crossfit.refs.tools_dir).append_coverage(
+            [cobertura_files[0]], tmp_path / "aggregate.xml")
+
+        assert "-m crossfit.tools cobertura append" in str(command)
+        assert LocalExecutor(logger).execute(command).code == 0
+        assert ElementTree.parse(tmp_path / "aggregate.xml").getroot().tag == "coverage"
+
+
+class TestDotnetCoverageNativeMerge:
+    """Tests for selecting the native merge through the DotnetCoverage tool."""
+
+    def test_native_merge_command_runs_python(self, logger, tests_dir_path, tmp_path):
+        """Test that the native merge command merges the helper Cobertura files."""
+        coverage_files = [tests_dir_path / "helpers/tools/dotnetcoverage/s1.cobertura.xml",
+                          tests_dir_path / "helpers/tools/dotnetcoverage/s2.cobertura.xml"]
+        tool = DotnetCoverage(logger, crossfit.refs.tools_dir, native_merge=True)
+        command = tool.merge_coverage(coverage_files, tmp_path, Path("merged.xml"))
+
+        assert "-m crossfit.tools cobertura merge" in str(command)
+        result = LocalExecutor(logger).execute(command)
+        assert result.code == 0
+        assert ElementTree.parse(tmp_path / "merged.xml").getroot().tag == "coverage"
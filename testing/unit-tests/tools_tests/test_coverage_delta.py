@@ -0,0 +1,106 @@
+# test_coverage_delta.py
+import json
+import pytest
+
+from pathlib import Path
+import crossfit
+from crossfit import DotnetCoverage, Jacoco, LocalExecutor
+from crossfit.tools import coverage_delta
+from crossfit.tools.cobertura import CoberturaAggregate
+from crossfit.tools.jacoco_exec import ExecFileLoader, SessionInfo
+from crossfit.tools.probe_store import ExecutionData
+
+
+def _write_exec(path: Path, session: str, *classes: tuple[int, str, int]) -> Path:
+    loader = ExecFileLoader()
+    loader.sessions.append(SessionInfo(session, 1, 2))
+    for class_id, name, probes in classes:
+        loader.store.put(ExecutionData(class_id, name, 8, probes))
+    loader.save(path, append=False)
+    return path
+
+
+def _write_cobertura(path: Path, hits: dict[int, int]) -> Path:
+    lines = "".join(f'<line number="{number}" hits="{count}"/>' for number, count in hits.items())
+    path.write_text('<?xml version="1.0"?><coverage version="1" timestamp="5"><packages><package name="App">'
+                    '<classes><class name="App.Service" filename="src/Service.cs">'
+                    f'<lines>{lines}</lines></class></classes></package></packages></coverage>')
+    return path
+
+
+class TestExecDelta:
+    """Tests for diffing JaCoCo snapshots on their probes."""
+
+    def test_newly_covered_probes(self, tmp_path):
+        """Test that the delta holds only the probes executed after the first snapshot."""
+        before = _write_exec(tmp_path / "before.exec", "before", (1, "com/A", 0b0011), (2, "com/B", 0b1))
+        after = _write_exec(tmp_path / "after.exec", "after", (1, "com/A", 0b0110), (2, "com/B", 0b1),
+                            (3, "com/C", 0b1000))
+
+        summary = coverage_delta.diff_exec_files(before, after, tmp_path / "delta.exec")
+
+        loader = ExecFileLoader()
+        loader.load(tmp_path / "delta.exec")
+        assert {data.name: data.probes for data in loader.store} == {"com/A": 0b0100, "com/C": 0b1000}
+        assert [session.id for session in loader.sessions] == ["after"]
+        assert (summary.covered_before, summary.covered_after) == (3, 4)
+        assert (summary.newly_covered, summary.no_longer_covered) == (2, 1)
+        assert summary.classes == ["com/A", "com/C"]
+
+    def test_incompatible_classes_raise(self, tmp_path):
+        """Test that snapshots of differently instrumented classes with the same id are rejected."""
+        before = _write_exec(tmp_path / "before.exec", "before", (1, "com/A", 0b1))
+        after = _write_exec(tmp_path / "after.exec", "after", (1, "com/Other", 0b1))
+        with pytest.raises(ValueError):
+            coverage_delta.diff_exec_files(before, after, tmp_path / "delta.exec")
+
+
+class TestCoberturaDelta:
+    """Tests for diffing Cobertura snapshots on their line hits."""
+
+    def test_newly_covered_lines(self, tmp_path):
+        """Test that the delta holds only the lines hit after the first snapshot, with their later hits."""
+        before = _write_cobertura(tmp_path / "before.xml", {1: 2, 2: 0, 3: 0, 4: 1})
+        after = _write_cobertura(tmp_path / "after.xml", {1: 5, 2: 3, 3: 0, 4: 0})
+
+        summary = coverage_delta.diff_cobertura_files(before, after, tmp_path / "delta.xml")
+
+        aggregate = CoberturaAggregate()
+        aggregate.add_file(tmp_path / "delta.xml")
+        coverage_class = aggregate.packages["App"].classes[("App.Service", "src/Service.cs")]
+        assert {number: line.hits for number, line in coverage_class.lines.items()} == {2: 3}
+        assert (summary.covered_before, summary.covered_after) == (2, 2)
+        assert (summary.newly_covered, summary.no_longer_covered) == (1, 1)
+
+
+class TestDiffCommands:
+    """Tests for the diff commands of the tools."""
+
+    def test_jacoco_diff_command(self, logger, tmp_path):
+        """Test that the JaCoCo diff command writes the delta and its summary."""
+        before = _write_exec(tmp_path / "before.exec", "before", (1, "com/A", 0b01))
+        after = _write_exec(tmp_path / "after.exec", "after", (1, "com/A", 0b11))
+        command = Jacoco(logger, crossfit.refs.tools_dir).diff_coverage(before, after, tmp_path, Path("delta"))
+
+        assert command.outputs == [tmp_path / "delta.exec", tmp_path / "delta.json"]
+        assert LocalExecutor(logger).execute(command).code == 0
+        assert json.loads((tmp_path / "delta.json").read_text())["newly_covered"] == 1
+
+    def test_dotnet_diff_command(self, logger, tmp_path):
+        """Test that the dotnet-coverage diff command diffs Cobertura snapshots natively."""
+        before = _write_cobertura(tmp_path / "before.xml", {1: 0})
+        after = _write_cobertura(tmp_path / "after.xml", {1: 1})
+        command = DotnetCoverage(logger, crossfit.refs.tools_dir).diff_coverage(before, after, tmp_path, None)
+
+        assert "-m crossfit.tools coverage_delta diff" in str(command)
+        assert LocalExecutor(logger).execute(command).code == 0
+        assert json.loads(command.outputs[1].read_text())["classes"] == ["App.Service"]
+
+    def test_main_reports_failure(self, tmp_path, capsys):
+        """Test that the command line reports snapshots which cannot be read with a failure code."""
+        after = _write_exec(tmp_path / "after.exec", "after", (1, "com/A", 0b1))
+        code = coverage_delta.main(["diff", str(tmp_path / "missing.exec"), str(after),
+                                    "--output", str(tmp_path / "delta.exec")])
+
+        assert code == 1
+        assert "Execution of diff failed" in capsys.readouterr().err
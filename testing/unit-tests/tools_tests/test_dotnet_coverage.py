@@ -91,6 +91,11 @@ def test_dotnetcoverage_reset_coverage_with_mocked_execute(monkeypatch, dotnetco
 
     command = dotnetcoverage_tool.reset_coverage(session)
     assert isinstance(command, Command)
+    assert "--reset" in command.argv
+    snapshot = command.argv[command.argv.index("--output") + 1]
+    assert Path(snapshot) in command.outputs
+    # The snapshot is written to a temporary file removed by the chained cleanup command
+    assert command.next_command is not None and snapshot in command.next_command.argv
 
     _mock_execute_success(monkeypatch, local_executor, command)
 
@@ -99,3 +104,10 @@ def test_dotnetcoverage_reset_coverage_with_mocked_execute(monkeypatch, dotnetco
     assert result.code == 0
 
 
+
+
+def test_dotnetcoverage_report_arguments_are_unquoted(dotnetcoverage_tool, coverage_files, target_dir):
+    command = dotnetcoverage_tool.save_report(coverage_files, target_dir, None, ReportFormat.Cobertura)
+    reports = next(arg for arg in command.argv if arg.startswith("-reports:"))
+    assert reports == f"-reports:{';'.join(map(str, coverage_files))}"
+    assert "-reporttypes:Cobertura" in command.argv
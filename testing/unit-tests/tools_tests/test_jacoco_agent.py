@@ -0,0 +1,163 @@
+# test_jacoco_agent.py
+import socket
+import struct
+import threading
+import pytest
+
+from pathlib import Path
+import crossfit
+from crossfit import Jacoco, LocalExecutor
+from crossfit.tools import jacoco_agent
+from crossfit.tools.jacoco_agent import AgentClient, dump_agent
+from crossfit.tools.jacoco_exec import ExecFileLoader
+
+HEADER = b"\x01\xc0\xc0\x10\x07"
+
+
+def _session_block(session_id: str) -> bytes:
+    encoded = session_id.encode("utf-8")
+    return b"\x10" + struct.pack(">H", len(encoded)) + encoded + struct.pack(">qq", 10, 20)
+
+
+def _class_block(class_id: int, name: str, probes: int) -> bytes:
+    encoded = name.encode("utf-8")
+    return b"\x11" + struct.pack(">q", class_id) + struct.pack(">H", len(encoded)) + encoded + bytes([8, probes])
+
+
+class FakeAgent:
+    """JaCoCo agent in tcpserver mode - answers dump commands with fixed execution data and records them."""
+
+    def __init__(self, acknowledge: bool = True):
+        self.commands: list[tuple[bool, bool]] = []
+        self._acknowledge = acknowledge
+        self._server = socket.create_server(("127.0.0.1", 0))
+        self.port = self._server.getsockname()[1]
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def _serve(self):
+        while True:
+            try:
+                connection, _ = self._server.accept()
+            except OSError:
+                return
+            with connection, connection.makefile("rwb") as stream:
+                stream.write(HEADER)
+                stream.flush()
+                assert stream.read(5) == HEADER
+                block, dump, reset = stream.read(3)
+                assert block == 0x40
+                self.commands.append((bool(dump), bool(reset)))
+                if dump:
+                    stream.write(_session_block("agent") + _class_block(42, "com/example/A", 0b101))
+                if self._acknowledge:
+                    stream.write(b"\x20")
+                stream.flush()
+
+    def close(self):
+        self._server.close()
+
+
+@pytest.fixture
+def agent():
+    fake_agent = FakeAgent()
+    yield fake_agent
+    fake_agent.close()
+
+
+class TestAgentClient:
+    """Tests for the native JaCoCo agent client."""
+
+    def test_dump_reads_execution_data(self, agent):
+        """Test that a dump returns the agent's sessions and execution data."""
+        loader = AgentClient("127.0.0.1", agent.port).dump()
+
+        assert agent.commands == [(True, False)]
+        assert [session.id for session in loader.sessions] == ["agent"]
+        assert loader.store.get(42).probes == 0b101
+
+    def test_reset_without_dump(self, agent):
+        """Test that a reset only command receives no execution data."""
+        loader = AgentClient("127.0.0.1", agent.port).dump(dump=False, reset=True)
+
+        assert agent.commands == [(False, True)]
+        assert len(loader.store) == 0
+
+    def test_missing_acknowledgement_raises(self):
+        """Test that a connection closed before the acknowledgement is reported."""
+        fake_agent = FakeAgent(acknowledge=False)
+        try:
+            with pytest.raises(EOFError):
+                AgentClient("127.0.0.1", fake_agent.port).dump()
+        finally:
+            fake_agent.close()
+
+    def test_unreachable_agent_is_retried(self):
+        """Test that connection attempts are retried before failing."""
+        with socket.create_server(("127.0.0.1", 0)) as placeholder:
+            port = placeholder.getsockname()[1]
+        with pytest.raises(OSError):
+            AgentClient("127.0.0.1", port, retry_count=2, retry_delay=0.01).dump()
+
+    def test_dump_agent_appends_like_jacococli(self, agent, tmp_path):
+        """Test that dumps are appended to an existing file."""
+        destfile = tmp_path / "out" / "dump.exec"
+        client = AgentClient("127.0.0.1", agent.port)
+        dump_agent(client, destfile)
+        dump_agent(client, destfile, reset=True)
+
+        loader = ExecFileLoader()
+        loader.load(destfile)
+        assert len(loader.sessions) == 2
+        assert agent.commands == [(True, False), (True, True)]
+
+    def test_main_reports_failure(self, tmp_path, capsys):
+        """Test that the command line reports unreachable agents with a failure code."""
+        with socket.create_server(("127.0.0.1", 0)) as placeholder:
+            port = placeholder.getsockname()[1]
+        code = jacoco_agent.main(["dump", "--address", "127.0.0.1", "--port", str(port), "--retry", "0",
+                                  "--destfile", str(tmp_path / "dump.exec")])
+
+        assert code == 1
+        assert "Execution of dump failed" in capsys.readouterr().err
+
+
+class TestJacocoNativeDump:
+    """Tests for selecting the native dump through the Jacoco tool."""
+
+    def test_native_snapshot_command(self, logger, agent, tmp_path):
+        """Test that the native snapshot command dumps the agent through the python client."""
+        tool = Jacoco(logger, crossfit.refs.tools_dir, native_dump=True)
+        command = tool.snapshot_coverage("session", tmp_path, Path("snapshot.exec"),
+                                         ("--address", "127.0.0.1"), ("--port", str(agent.port)))
+
+        assert "-m crossfit.tools jacoco_agent dump" in str(command)
+        result = LocalExecutor(logger).execute(command)
+        assert result.code == 0
+        loader = ExecFileLoader()
+        loader.load(tmp_path / "snapshot.exec")
+        assert loader.store.get(42).probes == 0b101
+
+    def test_reset_command_does_not_dump(self, logger, agent, tmp_path):
+        """Test that resetting sends a reset only command, without any snapshot file or cleanup command."""
+        command = Jacoco(logger, crossfit.refs.tools_dir, native_dump=True).reset_coverage(
+            "session", ("--address", "127.0.0.1"), ("--port", str(agent.port)))
+
+        assert "-m crossfit.tools jacoco_agent reset" in str(command)
+        assert command.next_command is None
+        assert LocalExecutor(logger).execute(command).code == 0
+        assert agent.commands == [(False, True)]
+
+    def test_default_reset_uses_jacococli(self, logger):
+        """Test that the JVM based reset stays the default, removing the snapshot it dumps."""
+        command = Jacoco(logger, crossfit.refs.tools_dir).reset_coverage("session")
+
+        assert "java -jar" in str(command)
+        assert "dump" in command.command and "--reset" in command.command
+        assert command.next_command.command[:2] == ["rm", "-f"]
+        assert command.next_command.command[2:] == [str(path) for path in command.outputs]
+
+    def test_default_snapshot_uses_jacococli(self, logger, tmp_path):
+        """Test that the JVM based dump stays the default."""
+        command = Jacoco(logger, crossfit.refs.tools_dir).snapshot_coverage("session", tmp_path, None)
+        assert "java -jar" in str(command)
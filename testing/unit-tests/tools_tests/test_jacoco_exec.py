@@ -0,0 +1,249 @@
+# test_jacoco_exec.py
+import io
+import struct
+import pytest
+
+from pathlib import Path
+import crossfit
+from crossfit import Jacoco, LocalExecutor
+from crossfit.models.command_models import ArgFileStyle
+from crossfit.tools import jacoco_exec
+from crossfit.tools.jacoco_exec import ExecFileLoader, SessionInfo, append_exec_files, merge_exec_files
+
+HEADER = b"\x01\xc0\xc0\x10\x07"
+
+
+def _session_block(session_id: str, start: int, dump: int) -> bytes:
+    encoded = session_id.encode("utf-8")
+    return b"\x10" + struct.pack(">H", len(encoded)) + encoded + struct.pack(">qq", start, dump)
+
+
+def _class_block(class_id: int, name: str, probes: list[bool]) -> bytes:
+    encoded = name.encode("utf-8")
+    packed = bytes(sum(1 << bit for bit, probe in enumerate(probes[i:i + 8]) if probe)
+                   for i in range(0, len(probes), 8))
+    return (b"\x11" + struct.pack(">q", class_id) + struct.pack(">H", len(encoded)) + encoded
+            + bytes([len(probes)]) + packed)
+
+
+@pytest.fixture
+def exec_file(tmp_path) -> Path:
+    path = tmp_path / "f1.exec"
+    path.write_bytes(HEADER + _session_block("s1", 10, 20)
+                     + _class_block(5, "com/example/A", [True, False, False, False, False, False, False, False, True])
+                     + _class_block(-1, "com/example/B", [False, True]))
+    return path
+
+
+@pytest.fixture
+def other_exec_file(tmp_path) -> Path:
+    path = tmp_path / "f2.exec"
+    path.write_bytes(HEADER + _session_block("s0", 1, 2)
+                     + _class_block(5, "com/example/A", [False, True, False, False, False, False, False, False, False])
+                     + _class_block(7, "com/example/C", [False]))
+    return path
+
+
+class TestExecFileLoader:
+    """Tests for reading and writing execution data."""
+
+    def test_load_reads_sessions_and_classes(self, exec_file):
+        """Test that all blocks of a file are read."""
+        loader = ExecFileLoader()
+        loader.load(exec_file)
+
+        assert loader.sessions == [SessionInfo("s1", 10, 20)]
+        assert loader.store.get(5).name == "com/example/A"
+        assert loader.store.get(5).to_list() == [True] + [False] * 7 + [True]
+        assert loader.store.get(-1).to_list() == [False, True]
+
+    def test_save_round_trips_bytes(self, exec_file, tmp_path):
+        """Test that a loaded file is written back byte for byte."""
+        loader = ExecFileLoader()
+        loader.load(exec_file)
+        target = tmp_path / "out" / "copy.exec"
+        loader.save(target, append=False)
+
+        expected = HEADER + _session_block("s1", 10, 20) + _class_block(-1, "com/example/B", [False, True]) \
+            + _class_block(5, "com/example/A", [True] + [False] * 7 + [True])
+        assert target.read_bytes() == expected
+
+    def test_empty_file_is_accepted(self, tmp_path):
+        """Test that empty files contribute no data."""
+        path = tmp_path / "empty.exec"
+        path.write_bytes(b"")
+        loader = ExecFileLoader()
+        loader.load(path)
+
+        assert loader.sessions == [] and len(loader.store) == 0
+
+    def test_invalid_first_block_raises(self, tmp_path):
+        """Test that files not starting with a header are rejected."""
+        path = tmp_path / "bad.exec"
+        path.write_bytes(b"\x10\x00")
+        with pytest.raises(ValueError, match="Invalid execution data file"):
+            ExecFileLoader().load(path)
+
+    def test_unknown_block_raises(self, tmp_path):
+        """Test that unknown block types are rejected."""
+        path = tmp_path / "bad.exec"
+        path.write_bytes(HEADER + b"\x7f")
+        with pytest.raises(ValueError, match="Unknown block type 7f"):
+            ExecFileLoader().load(path)
+
+    def test_truncated_file_raises(self, tmp_path):
+        """Test that truncated blocks are reported."""
+        path = tmp_path / "bad.exec"
+        path.write_bytes(HEADER + b"\x11\x00\x00")
+        with pytest.raises(EOFError):
+            ExecFileLoader().load(path)
+
+    def test_modified_utf_round_trip(self):
+        """Test that names are encoded as Java's modified UTF-8."""
+        name = "pkg/é\0\U0001F600"
+        encoded = jacoco_exec._encode_utf(name)
+
+        assert b"\xc0\x80" in encoded and b"\xed\xa0\xbd" in encoded
+        assert jacoco_exec._decode_utf(encoded[2:]) == name
+
+
+class TestMerge:
+    """Tests for merging execution data."""
+
+    def test_merge_ors_probes_and_orders_sessions(self, exec_file, other_exec_file, tmp_path):
+        """Test that probes of the same class are OR-ed and sessions are sorted by dump time."""
+        target = tmp_path / "merged.exec"
+        loader = merge_exec_files([exec_file, other_exec_file], target)
+
+        assert [session.id for session in loader.sessions] == ["s1", "s0"]
+        assert loader.store.get(5).to_list() == [True, True] + [False] * 6 + [True]
+        merged = target.read_bytes()
+        assert merged.index(b"s0") < merged.index(b"s1")
+        assert b"com/example/C" not in merged
+
+    def test_merge_appends_like_jacococli(self, exec_file, tmp_path):
+        """Test that merging into an existing file appends to it."""
+        target = tmp_path / "merged.exec"
+        merge_exec_files([exec_file], target)
+        first = target.read_bytes()
+        merge_exec_files([exec_file], target)
+
+        assert target.read_bytes() == first + first
+
+    def test_merge_reports_progress(self, exec_file, tmp_path):
+        """Test that progress is printed like jacococli."""
+        out = io.StringIO()
+        merge_exec_files([exec_file], tmp_path / "merged.exec", out=out)
+
+        assert "[INFO] Loading execution data file" in out.getvalue()
+        assert "[INFO] Writing execution data to" in out.getvalue()
+
+    def test_java_hash_map_order(self):
+        """Test that class ids are ordered by HashMap bucket, including table growth."""
+        assert jacoco_exec._java_hash_map_order([5, -1]) == [-1, 5]
+        assert jacoco_exec._java_hash_map_order([20, 3, 17]) == [17, 3, 20]
+        assert jacoco_exec._java_hash_map_order(list(range(40, 0, -1))) == list(range(1, 41))
+
+    def test_main_merges_files(self, exec_file, other_exec_file, tmp_path, capsys):
+        """Test the jacococli-compatible command line."""
+        target = tmp_path / "merged.exec"
+        code = jacoco_exec.main(["merge", str(exec_file), str(other_exec_file), "--destfile", str(target)])
+
+        assert code == 0
+        assert target.exists()
+        assert "Writing execution data" in capsys.readouterr().out
+
+    def test_main_reports_invalid_file(self, tmp_path, capsys):
+        """Test that invalid input fails with an error on stderr."""
+        bad = tmp_path / "bad.exec"
+        bad.write_bytes(b"\x02")
+        code = jacoco_exec.main(["merge", str(bad), "--destfile", str(tmp_path / "merged.exec")])
+
+        assert code == 1
+        assert "Invalid execution data file" in capsys.readouterr().err
+
+
+class TestAppend:
+    """Tests for folding execution data into a running aggregate."""
+
+    def test_append_creates_and_updates_aggregate(self, exec_file, other_exec_file, tmp_path):
+        """Test that appending files one by one equals merging them at once."""
+        aggregate = tmp_path / "aggregate.exec"
+        append_exec_files([exec_file], aggregate)
+        append_exec_files([other_exec_file], aggregate)
+        merge_exec_files([exec_file, other_exec_file], tmp_path / "merged.exec", append=False)
+
+        assert aggregate.read_bytes() == (tmp_path / "merged.exec").read_bytes()
+
+    def test_failed_append_keeps_aggregate(self, exec_file, tmp_path):
+        """Test that an invalid new file leaves the aggregate untouched and no temporary file behind."""
+        aggregate = tmp_path / "out" / "aggregate.exec"
+        append_exec_files([exec_file], aggregate)
+        before = aggregate.read_bytes()
+        invalid = tmp_path / "invalid.exec"
+        invalid.write_bytes(b"\x02")
+
+        with pytest.raises(ValueError):
+            append_exec_files([invalid], aggregate)
+        assert aggregate.read_bytes() == before
+        assert list(aggregate.parent.iterdir()) == [aggregate]
+
+    def test_append_command_runs_python(self, logger, exec_file, other_exec_file, tmp_path):
+        """Test that the Jacoco append command folds a dump into the aggregate."""
+        tool = Jacoco(logger, crossfit.refs.tools_dir)
+        executor = LocalExecutor(logger)
+        aggregate = tmp_path / "aggregate.exec"
+        for dump in (exec_file, other_exec_file):
+            command = tool.append_coverage([dump], aggregate)
+            assert "-m crossfit.tools jacoco_exec append" in str(command)
+            assert executor.execute(command).code == 0
+
+        loader = ExecFileLoader()
+        loader.load(aggregate)
+        assert loader.store.get(5).to_list()[:2] == [True, True]
+        assert len(loader.sessions) == 2
+
+
+class TestJacocoNativeMerge:
+    """Tests for selecting the native merge through the Jacoco tool."""
+
+    def test_native_merge_command_runs_python(self, logger, exec_file, other_exec_file, tmp_path):
+        """Test that the native merge command is executable and produces the merged file."""
+        tool = Jacoco(logger, crossfit.refs.tools_dir, native_merge=True)
+        command = tool.merge_coverage([exec_file, other_exec_file], tmp_path, Path("merged.exec"))
+
+        assert "-m crossfit.tools jacoco_exec merge" in str(command)
+        result = LocalExecutor(logger).execute(command)
+        assert result.code == 0
+        loader = ExecFileLoader()
+        loader.load(tmp_path / "merged.exec")
+        assert loader.store.get(5).to_list()[:2] == [True, True]
+
+    def test_native_merge_without_catch(self, logger, exec_file, other_exec_file, tmp_path):
+        """Test that the native merge writes nothing to stderr, which fails commands executed without catching."""
+        tool = Jacoco(logger, crossfit.refs.tools_dir, catch=False, native_merge=True)
+        command = tool.merge_coverage([exec_file, other_exec_file], tmp_path, Path("merged.exec"))
+
+        result = LocalExecutor(logger, catch=False).execute(command)
+        assert (result.code, result.error) == (0, "")
+        assert (tmp_path / "merged.exec").exists()
+
+    def test_default_merge_uses_jacococli(self, logger, exec_file, tmp_path):
+        """Test that the JVM based merge stays the default."""
+        command = Jacoco(logger, crossfit.refs.tools_dir).merge_coverage([exec_file], tmp_path, Path("merged.exec"))
+        assert "java -jar" in str(command)
+
+    def test_native_merge_through_argfile(self, logger, exec_file, other_exec_file, tmp_path):
+        """Test that the native merge reads its arguments from a response file beyond the threshold."""
+        tool = Jacoco(logger, crossfit.refs.tools_dir, native_merge=True)
+        command = tool.merge_coverage([exec_file, other_exec_file], tmp_path, Path("merged.exec"))
+
+        assert command.argfile_style == ArgFileStyle.Argparse
+        result = LocalExecutor(logger, argfile_threshold=16).execute(command)
+        assert result.code == 0
+        assert (tmp_path / "merged.exec").exists()
+
+    def test_default_merge_supports_java_argfiles(self, logger, exec_file, tmp_path):
+        """Test that the JVM based merge declares Java argument file support."""
+        command = Jacoco(logger, crossfit.refs.tools_dir).merge_coverage([exec_file], tmp_path, Path("merged.exec"))
+        assert command.argfile_style == ArgFileStyle.Java
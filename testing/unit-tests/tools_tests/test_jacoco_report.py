@@ -0,0 +1,237 @@
+# test_jacoco_report.py
+import struct
+import sys
+import xml.etree.ElementTree as ElementTree
+import zipfile
+import pytest
+
+from pathlib import Path
+import crossfit
+from crossfit import Jacoco, LocalExecutor
+from crossfit.models.tool_models import ReportFormat
+from crossfit.tools import jacoco_report
+from crossfit.tools.analysis_cache import AnalysisCache
+from crossfit.tools.class_analysis import analyze_class, class_id, read_class_name
+from crossfit.tools.jacoco_exec import ExecFileLoader, SessionInfo
+from crossfit.tools.probe_store import ExecutionData
+
+SAMPLE_SOURCE = """package com.example;
+
+public class Sample {
+
+    int f(int x) {
+        if (x > 0) return 1;
+        return 2;
+    }
+}
+"""
+
+
+def _class_file(name: str = "com/example/Sample", extra_method: str = None) -> bytes:
+    """
+    Assembles the class file javac compiles SAMPLE_SOURCE to - a default constructor on line 3 and f on lines 6-7.
+    """
+    constants = [b"\x01" + struct.pack(">H", len(name)) + name.encode(), b"\x07\x00\x01",
+                 b"\x01\x00\x10java/lang/Object", b"\x07\x00\x03", b"\x01\x00\x06<init>", b"\x01\x00\x03()V",
+                 b"\x0c\x00\x05\x00\x06", b"\x0a\x00\x04\x00\x07", b"\x01\x00\x04Code",
+                 b"\x01\x00\x0fLineNumberTable", b"\x01\x00\x01f", b"\x01\x00\x04(I)I", b"\x01\x00\x0aSourceFile",
+                 b"\x01\x00\x0bSample.java"]
+    methods = [(0x0001, 5, 6, bytes([0x2A, 0xB7, 0x00, 0x08, 0xB1]), [(0, 3)]),
+               (0x0000, 11, 12, bytes([0x1B, 0x9E, 0x00, 0x05, 0x04, 0xAC, 0x05, 0xAC]), [(0, 6), (4, 6), (6, 7)])]
+    if extra_method is not None:
+        constants.append(b"\x01" + struct.pack(">H", len(extra_method)) + extra_method.encode())
+        methods.append((0x000A, len(constants), 6, bytes([0xB1]), [(0, 9)]))
+
+    data = bytearray(b"\xca\xfe\xba\xbe\x00\x00\x00\x34")
+    data += struct.pack(">H", len(constants) + 1) + b"".join(constants)
+    data += struct.pack(">HHHHHH", 0x0021, 2, 4, 0, 0, len(methods))
+    for access, method_name, desc, code, lines in methods:
+        line_table = struct.pack(">HIH", 10, 2 + 4 * len(lines), len(lines))
+        line_table += b"".join(struct.pack(">HH", pc, line) for pc, line in lines)
+        body = struct.pack(">HHI", 2, 2, len(code)) + code + struct.pack(">HH", 0, 1) + line_table
+        data += struct.pack(">HHHHHI", access, method_name, desc, 1, 9, len(body)) + body
+    data += struct.pack(">HHIH", 1, 13, 2, 14)
+    return bytes(data)
+
+
+def _write_exec(path: Path, data: bytes, probes: int, name: str = "com/example/Sample") -> Path:
+    loader = ExecFileLoader()
+    loader.sessions.append(SessionInfo("session", 1, 2))
+    loader.store.put(ExecutionData(class_id(data), name, 3, probes))
+    loader.save(path, append=False)
+    return path
+
+
+@pytest.fixture
+def sample(tmp_path) -> tuple[Path, Path]:
+    classes = tmp_path / "classes" / "com" / "example"
+    classes.mkdir(parents=True)
+    (classes / "Sample.class").write_bytes(_class_file())
+    sources = tmp_path / "src" / "com" / "example"
+    sources.mkdir(parents=True)
+    (sources / "Sample.java").write_text(SAMPLE_SOURCE)
+    return tmp_path / "classes", tmp_path / "src"
+
+
+class TestClassAnalysis:
+    """Tests for analyzing class files into probes and instructions like JaCoCo."""
+
+    def test_probes_are_assigned_like_jacoco(self):
+        """Test that probes are inserted at method exits only, as jump targets with one predecessor need none."""
+        model = analyze_class(_class_file())
+
+        assert (model.name, model.package, model.source_file, model.probe_count) == (
+            "com/example/Sample", "com/example", "Sample.java", 3)
+        constructor, method = model.methods
+        assert [probe_id for _, probe_id, _ in constructor.probes] == [0]
+        assert [probe_id for _, probe_id, _ in method.probes] == [1, 2]
+        assert method.lines == [6, 6, 6, 6, 7, 7]
+        assert method.branches == [1, 2, 1, 1, 1, 1]
+
+    def test_coverage_propagates_to_predecessors(self):
+        """Test that an executed probe covers the instructions and the branch leading to it."""
+        method = analyze_class(_class_file()).methods[1]
+
+        assert method.covered_branches(0b010) == [1, 1, 1, 1, 0, 0]
+        assert method.covered_branches(0b110) == [1, 0b11, 1, 1, 1, 1]
+        assert method.covered_branches(None) == [0] * 6
+
+    def test_class_identity(self):
+        """Test that the class id is the checksum of the bytes and the name is read without analysis."""
+        data = _class_file()
+        assert class_id(data) == class_id(bytes(data))
+        assert class_id(data) != class_id(_class_file("com/example/Other"))
+        assert read_class_name(data) == "com/example/Sample"
+
+    def test_invalid_and_instrumented_classes_raise(self):
+        """Test that invalid class files and classes instrumented by JaCoCo are rejected."""
+        with pytest.raises(ValueError):
+            analyze_class(b"not a class file")
+        with pytest.raises(ValueError):
+            analyze_class(_class_file(extra_method="$jacocoInit"))
+
+    def test_real_classes_are_analyzed(self):
+        """Test that every class of the bundled jacococli jar is analyzed."""
+        with zipfile.ZipFile(crossfit.refs.tools_dir / "jacococli.jar") as archive:
+            models = [analyze_class(archive.read(entry)) for entry in archive.namelist()
+                      if entry.endswith(".class") and not entry.startswith("META-INF/versions/")]
+        assert sum(model.probe_count for model in models if model) > 0
+
+
+class TestReport:
+    """Tests for rendering reports natively from execution data and class files."""
+
+    def test_xml_report_counters(self, sample, tmp_path):
+        """Test that the XML report holds JaCoCo's counters for classes, methods and source lines."""
+        classes, sources = sample
+        exec_file = _write_exec(tmp_path / "jacoco.exec", _class_file(), 0b011)
+
+        bundle = jacoco_report.create_report([exec_file], [classes], xml_file=tmp_path / "report.xml")
+
+        report = ElementTree.parse(tmp_path / "report.xml").getroot()
+        counters = {counter.get("type"): (int(counter.get("missed")), int(counter.get("covered")))
+                    for counter in report.findall("counter")}
+        assert counters == {"INSTRUCTION": (2, 7), "BRANCH": (1, 1), "LINE": (1, 2), "COMPLEXITY": (1, 2),
+                            "METHOD": (0, 2), "CLASS": (0, 1)}
+        assert (bundle.missed(jacoco_report.LINE), bundle.covered(jacoco_report.LINE)) == (1, 2)
+        lines = {line.get("nr"): (line.get("mi"), line.get("ci"), line.get("mb"), line.get("cb"))
+                 for line in report.iter("line")}
+        assert lines == {"3": ("0", "3", "0", "0"), "6": ("0", "4", "1", "1"), "7": ("2", "0", "0", "0")}
+        assert [method.get("line") for method in report.iter("method")] == ["3", "6"]
+        assert report.find("sessioninfo").get("id") == "session"
+
+    def test_csv_and_html_reports(self, sample, tmp_path):
+        """Test that the CSV report has a row per class and the HTML report highlights the source lines."""
+        classes, sources = sample
+        exec_file = _write_exec(tmp_path / "jacoco.exec", _class_file(), 0b011)
+
+        jacoco_report.create_report([exec_file], [classes], [sources], html_dir=tmp_path / "html",
+                                    csv_file=tmp_path / "report.csv", name="app")
+
+        rows = (tmp_path / "report.csv").read_text().splitlines()
+        assert rows[1] == "app,com.example,Sample,2,7,1,1,1,2,1,2,0,2"
+        source_page = (tmp_path / "html" / "com.example" / "Sample.java.html").read_text()
+        assert '<span id="L6" class="pc bpc" title="1 of 2 branches missed.">' in source_page
+        assert '<span id="L7" class="nc">' in source_page
+        assert "f(int)" in (tmp_path / "html" / "com.example" / "Sample.html").read_text()
+        assert 'href="com.example/index.html"' in (tmp_path / "html" / "index.html").read_text()
+
+    def test_mismatched_execution_data_is_reported(self, sample, tmp_path, capsys):
+        """Test that classes whose execution data is of a different class file are reported as not covered."""
+        classes, sources = sample
+        exec_file = _write_exec(tmp_path / "jacoco.exec", _class_file("com/example/Other"), 0b111)
+
+        bundle = jacoco_report.create_report([exec_file], [classes], out=sys.stdout)
+
+        assert bundle.covered(jacoco_report.INSTRUCTION) == 0
+        assert "[WARN] Execution data for class com/example/Sample does not match." in capsys.readouterr().out
+
+    def test_classes_in_archives(self, tmp_path):
+        """Test that classes are found in nested archives and different classes with the same name are rejected."""
+        inner = tmp_path / "inner.jar"
+        with zipfile.ZipFile(inner, "w") as archive:
+            archive.writestr("com/example/Sample.class", _class_file())
+        with zipfile.ZipFile(tmp_path / "app.war", "w") as archive:
+            archive.write(inner, "WEB-INF/lib/inner.jar")
+        bundle = jacoco_report.create_report([], [tmp_path / "app.war"])
+        assert bundle.total(jacoco_report.CLASS) == 1
+
+        (tmp_path / "com" / "example").mkdir(parents=True)
+        (tmp_path / "com" / "example" / "Sample.class").write_bytes(_class_file(extra_method="g"))
+        with pytest.raises(ValueError):
+            jacoco_report.create_report([], [tmp_path / "app.war", tmp_path])
+
+    def test_java_names(self):
+        """Test that classes and methods are named like in JaCoCo's reports."""
+        model = analyze_class(_class_file("com/example/Sample$1"))
+        model.interfaces = ["java/lang/Runnable"]
+        assert jacoco_report.class_name(model) == "Sample.new Runnable() {...}"
+        assert jacoco_report.method_name(model, model.methods[0]) == "{...}"
+        assert jacoco_report.method_name(model, model.methods[1]) == "f(int)"
+        assert jacoco_report.package_name("") == "default"
+
+    def test_main_reports_failure(self, tmp_path, capsys):
+        """Test that the command line reports class files which cannot be analyzed with a failure code."""
+        (tmp_path / "Broken.class").write_bytes(b"broken")
+        code = jacoco_report.main(["report", "--classfiles", str(tmp_path), "--xml", str(tmp_path / "report.xml")])
+
+        assert code == 1
+        assert "Execution of report failed" in capsys.readouterr().err
+
+
+class TestJacocoNativeReport:
+    """Tests for selecting the native report engine through the Jacoco tool."""
+
+    def test_native_report_command_runs_python(self, logger, sample, tmp_path):
+        """Test that the native report command is executable and writes the requested reports."""
+        classes, sources = sample
+        exec_file = _write_exec(tmp_path / "jacoco.exec", _class_file(), 0b001)
+        tool = Jacoco(logger, crossfit.refs.tools_dir, native_report=True)
+        command = tool.save_report([exec_file], tmp_path / "report", sources, ReportFormat.Xml, [ReportFormat.Html],
+                                   classes)
+
+        assert "-m crossfit.tools jacoco_report report" in str(command)
+        assert LocalExecutor(logger).execute(command).code == 0
+        assert all(output.exists() for output in command.outputs)
+        assert (tmp_path / "report" / "com.example" / "Sample.java.html").exists()
+
+    def test_native_report_is_experimental(self, logger, caplog):
+        """Test that enabling the native report warns that it is experimental."""
+        with caplog.at_level("WARNING"):
+            Jacoco(logger, crossfit.refs.tools_dir)
+            assert not caplog.records
+            Jacoco(logger, crossfit.refs.tools_dir, native_report=True)
+
+        assert "experimental" in caplog.records[0].getMessage()
+
+    def test_native_report_with_analysis_cache(self, logger, sample, tmp_path):
+        """Test that the native report command passes the analysis cache, which is filled by the report."""
+        classes, sources = sample
+        exec_file = _write_exec(tmp_path / "jacoco.exec", _class_file(), 0b001)
+        tool = Jacoco(logger, crossfit.refs.tools_dir, native_report=True, analysis_cache=tmp_path / "cache.db")
+        command = tool.save_report([exec_file], tmp_path / "report", None, ReportFormat.Csv, None, classes)
+
+        assert "--analysiscache" in str(command)
+        assert LocalExecutor(logger).execute(command).code == 0
+        with AnalysisCache(tmp_path / "cache.db") as cache:
+            assert len(cache) == 1
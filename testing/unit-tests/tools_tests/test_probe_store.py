@@ -0,0 +1,104 @@
+# test_probe_store.py
+import pytest
+
+from crossfit.tools.probe_store import ExecutionData, ProbeStore
+
+
+def _store(*entries: ExecutionData) -> ProbeStore:
+    store = ProbeStore()
+    for entry in entries:
+        store.put(entry)
+    return store
+
+
+class TestExecutionData:
+    """Tests for packed class execution data."""
+
+    def test_from_bools_packs_lsb_first(self):
+        """Test that probe i is stored as bit i."""
+        data = ExecutionData.from_bools(1, "A", [True, False, True])
+        assert data.probes == 0b101
+        assert data.probe_count == 3
+        assert data.to_list() == [True, False, True]
+
+    def test_packed_round_trip(self):
+        """Test conversion from and to the .exec byte layout."""
+        data = ExecutionData.from_packed(1, "A", 10, b"\x81\x02")
+        assert data.to_list() == [True] + [False] * 6 + [True, False, True]
+        assert data.packed() == b"\x81\x02"
+
+    def test_from_packed_ignores_padding_bits(self):
+        """Test that bits beyond the probe count are dropped."""
+        data = ExecutionData.from_packed(1, "A", 2, b"\xff")
+        assert data.probes == 0b11
+
+    def test_hits(self):
+        """Test hit detection and popcount."""
+        assert not ExecutionData(1, "A", 4).has_hits()
+        data = ExecutionData(1, "A", 4, 0b1011)
+        assert data.has_hits()
+        assert data.hit_count() == 3
+
+    def test_merge_is_bitwise_or(self):
+        """Test that merging ORs the probes."""
+        data = ExecutionData(1, "A", 4, 0b0011)
+        data.merge(ExecutionData(1, "A", 4, 0b0110))
+        assert data.probes == 0b0111
+
+    def test_subtract_is_and_not(self):
+        """Test that subtracting clears the other's executed probes."""
+        data = ExecutionData(1, "A", 4, 0b0111)
+        data.subtract(ExecutionData(1, "A", 4, 0b0110))
+        assert data.probes == 0b0001
+
+    @pytest.mark.parametrize("other, message", [
+        (ExecutionData(2, "A", 4), "Different ids"),
+        (ExecutionData(1, "B", 4), "Different class names"),
+        (ExecutionData(1, "A", 5), "Incompatible execution data"),
+    ], ids=["Different_Id", "Different_Name", "Different_Probe_Count"])
+    def test_merge_incompatible_raises(self, other, message):
+        """Test that execution data of different classes cannot be merged."""
+        with pytest.raises(ValueError, match=message):
+            ExecutionData(1, "A", 4).merge(other)
+
+
+class TestProbeStore:
+    """Tests for the class id keyed probe store."""
+
+    def test_put_merges_same_class(self):
+        """Test that adding a class twice ORs its probes."""
+        store = _store(ExecutionData(1, "A", 3, 0b001), ExecutionData(1, "A", 3, 0b100))
+        assert len(store) == 1
+        assert store.get(1).probes == 0b101
+
+    def test_ids_keep_insertion_order(self):
+        """Test that class ids are listed in insertion order."""
+        store = _store(ExecutionData(3, "C", 1), ExecutionData(1, "A", 1))
+        assert store.ids() == [3, 1]
+        assert 3 in store and 2 not in store
+        assert store.get(2) is None
+
+    def test_merge_does_not_alias_other_store(self):
+        """Test that merging copies entries instead of sharing them."""
+        source = _store(ExecutionData(1, "A", 2, 0b01))
+        target = ProbeStore()
+        target.merge(source)
+        target.put(ExecutionData(1, "A", 2, 0b10))
+
+        assert target.get(1).probes == 0b11
+        assert source.get(1).probes == 0b01
+
+    def test_subtract_store(self):
+        """Test that subtracting a store clears probes of shared classes only."""
+        store = _store(ExecutionData(1, "A", 2, 0b11), ExecutionData(2, "B", 1, 0b1))
+        store.subtract(_store(ExecutionData(1, "A", 2, 0b01), ExecutionData(3, "C", 1, 0b1)))
+
+        assert store.get(1).probes == 0b10
+        assert store.get(2).probes == 0b1
+        assert 3 not in store
+
+    def test_statistics(self):
+        """Test total probe and hit counts."""
+        store = _store(ExecutionData(1, "A", 8, 0b1011), ExecutionData(2, "B", 2, 0b10))
+        assert store.probe_count() == 10
+        assert store.hit_count() == 4
@@ -1,4 +1,5 @@
 # test_tool.py
+import subprocess
 import tempfile
 import pytest
 
@@ -8,7 +9,8 @@ from typing import List, Optional, Tuple
 from crossfit.commands.command import Command
 from crossfit.commands.command_builder import CommandBuilder
 from crossfit.models.tool_models import ToolType, ReportFormat
-from crossfit.tools.tool import Tool
+from crossfit.tools.__main__ import NATIVE_TOOLS
+from crossfit.tools.tool import Tool, native_execution_args
 
 
 class ConcreteTool(Tool):
@@ -31,6 +33,14 @@ class ConcreteTool(Tool):
                        *extras: Tuple[str, Optional[str]]) -> Command:
         return self._create_command_builder("merge", None, coverage_files, *extras).build_command()
 
+    def append_coverage(self, coverage_files: List[Path], aggregate_file: Path,
+                        *extras: Tuple[str, Optional[str]]) -> Command:
+        return self._create_command_builder("append", None, coverage_files, *extras).build_command()
+
+    def diff_coverage(self, before_file: Path, after_file: Path, target_dir: Path, target_file: Optional[str],
+                      *extras: Tuple[str, Optional[str]]) -> Command:
+        return self._create_command_builder("diff", None, [before_file, after_file], *extras).build_command()
+
 
 @pytest.fixture
 def tool(logger):
@@ -201,3 +211,44 @@ class TestToolAbstractMethods:
         """Test that merge_coverage returns a Command."""
         command = tool.merge_coverage([], Path("/output"), "merged.exec")
         assert isinstance(command, Command)
+
+    def test_append_coverage_is_abstract(self, logger):
+        """Test that tools must implement append_coverage, which they support by default."""
+        class NoAppendTool(Tool):
+            save_report = ConcreteTool.save_report
+            snapshot_coverage = ConcreteTool.snapshot_coverage
+            merge_coverage = ConcreteTool.merge_coverage
+            diff_coverage = ConcreteTool.diff_coverage
+
+        with pytest.raises(TypeError, match="append_coverage"):
+            NoAppendTool(logger)
+        assert ConcreteTool(logger).supports_append
+
+    def test_diff_coverage_is_abstract(self, logger):
+        """Test that tools must implement diff_coverage."""
+        class NoDiffTool(Tool):
+            save_report = ConcreteTool.save_report
+            snapshot_coverage = ConcreteTool.snapshot_coverage
+            merge_coverage = ConcreteTool.merge_coverage
+            append_coverage = ConcreteTool.append_coverage
+
+        with pytest.raises(TypeError, match="diff_coverage"):
+            NoDiffTool(logger)
+
+
+class TestNativeEntry:
+    """Tests for running the native tool modules through the crossfit.tools entry point."""
+
+    @pytest.mark.parametrize("tool_module", NATIVE_TOOLS)
+    def test_native_tool_writes_no_stderr(self, tool_module):
+        """Test that native tools run without runpy warning about modules the package already imported."""
+        process = subprocess.run([*native_execution_args(tool_module), "--help"], capture_output=True, text=True)
+        assert process.returncode == 0
+        assert process.stderr == ""
+        assert f"crossfit.tools {tool_module}" in process.stdout
+
+    def test_unknown_tool_is_rejected(self):
+        """Test that only the native tool modules can be run."""
+        process = subprocess.run([*native_execution_args("tool"), "--help"], capture_output=True, text=True)
+        assert process.returncode == 2
+        assert "usage" in process.stderr